@@ -0,0 +1,65 @@
+import threading
+import time
+
+class GenerationCancelled(Exception):
+    """Raised by a generation loop that stopped because its CancellationToken fired."""
+
+    def __init__(self, reason: str, completion_tokens: int = 0):
+        super().__init__(reason)
+        self.reason = reason
+        self.completion_tokens = completion_tokens  # Tokens generated before stopping
+
+class CancellationToken:
+    """
+    A thread-safe flag that a request handler sets and a generation loop polls
+    between tokens.
+
+    The token fires when `cancel()` is called (e.g. because the client disconnected)
+    or once its optional deadline on the monotonic clock has passed.
+    """
+
+    DEADLINE_REASON = 'Deadline exceeded.'
+
+    def __init__(self, deadline: float | None = None, clock=time.monotonic):
+        """
+        Initializes the token.
+
+        Args:
+            deadline (float, optional): The time on `clock` after which the token counts as cancelled.
+            clock (callable): The monotonic time source, replaceable for tests.
+        """
+        self.deadline = deadline
+        self._clock = clock
+        self._event = threading.Event()
+        self._reason = None
+
+    def cancel(self, reason: str = 'Cancelled.'):
+        """Cancels the token; the first reason given is kept."""
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled or its deadline has passed."""
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and self._clock() >= self.deadline:
+            self.cancel(self.DEADLINE_REASON)
+            return True
+        return False
+
+    @property
+    def reason(self) -> str | None:
+        """Why the token fired, or None while it has not."""
+        return self._reason if self.cancelled else None
+
+    def raise_if_cancelled(self, completion_tokens: int = 0):
+        """
+        Raises GenerationCancelled if the token has fired.
+
+        Args:
+            completion_tokens (int): The tokens generated so far, reported on the exception.
+        """
+        if self.cancelled:
+            raise GenerationCancelled(self._reason, completion_tokens)
@@ -0,0 +1,193 @@
+import asyncio
+import collections
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def _collapse(counts: dict) -> str:
+    """Formats {stack: weight} as collapsed stacks ('root;...;leaf weight'), heaviest first."""
+    return ''.join(f"{stack} {weight}\n" for stack, weight in sorted(counts.items(), key=lambda item: -item[1]))
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Samples the stacks of all other threads every `interval` seconds for `seconds`.
+
+    Sampling only reads the interpreter's frames, so the profiled code runs at full
+    speed apart from the GIL the sampler briefly holds. Each stack starts with the
+    thread name; a thread idle in a wait shows up with the wait as its leaf.
+
+    Returns:
+        str: Collapsed stacks weighted by sample count, as consumed by flamegraph.pl or speedscope.
+    """
+    counts = collections.Counter()
+    own = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[';'.join(reversed(stack))] += 1
+        time.sleep(interval)
+    return _collapse(counts)
+
+async def profile_event_loop(seconds: float, limit: int = 50) -> str:
+    """
+    Profiles the calling thread's event loop with cProfile for `seconds`.
+
+    Unlike `sample_stacks` this counts every call, at a noticeable cost per call,
+    and reports per-function totals instead of stacks.
+
+    Returns:
+        str: The `limit` functions with the highest cumulative time.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+# Frames to skip in memory snapshots: the snapshot machinery and the import system
+_MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+def collapse_memory(snapshot: tracemalloc.Snapshot, base: tracemalloc.Snapshot = None) -> str:
+    """
+    Formats the allocations of a tracemalloc snapshot as collapsed stacks.
+
+    Args:
+        snapshot (tracemalloc.Snapshot): The allocations to report.
+        base (tracemalloc.Snapshot, optional): If given, only the growth since this snapshot is reported.
+
+    Returns:
+        str: Collapsed stacks weighted by bytes.
+    """
+    snapshot = snapshot.filter_traces(_MEMORY_FILTERS)
+    if base is not None:
+        stats = [(stat.traceback, stat.size_diff)
+                 for stat in snapshot.compare_to(base.filter_traces(_MEMORY_FILTERS), 'traceback')]
+    else:
+        stats = [(stat.traceback, stat.size) for stat in snapshot.statistics('traceback')]
+    counts = collections.Counter()
+    for trace, size in stats:
+        if size > 0:
+            # Traceback frames run from the oldest call to the allocation
+            counts[';'.join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in trace)] += size
+    return _collapse(counts)
+
+async def memory_profile(seconds: float, frames: int = 25) -> str:
+    """
+    Reports where memory is allocated in this process, as collapsed stacks weighted by bytes.
+
+    If tracemalloc is not already tracing (see PYTHONTRACEMALLOC), it is started for
+    the measurement and the growth over `seconds` of live traffic is reported;
+    otherwise all memory traced so far is reported after `seconds`.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    try:
+        base = tracemalloc.take_snapshot() if started else None
+        await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return await asyncio.to_thread(collapse_memory, snapshot, base)
+
+class LoopLagMonitor:
+    """
+    Reports callbacks that block the event loop.
+
+    A heartbeat task wakes up every `interval` seconds; a watchdog thread notices
+    when it is late by more than `threshold` seconds and captures the loop thread's
+    stack while it is still blocked. Once the loop recovers, the stall is logged to
+    stderr together with that stack.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, log=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall = None
+        self._log = log or (lambda message: print(message, file=sys.stderr))
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._blocked_stack = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Starts monitoring the running event loop."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = now - expected
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                stack, self._blocked_stack = self._blocked_stack, None
+                self.last_stall = {'lag_ms': round(lag * 1000, 1), 'stack': stack}
+                self._log(f"[WARNING] Event loop blocked for {lag * 1000:.0f} ms"
+                          + (f" in:\n{stack}" if stack else ""))
+
+    def _watch(self):
+        captured_for = None
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            if beat != captured_for and time.monotonic() - beat > self.interval + self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._blocked_stack = ''.join(traceback.format_stack(frame))
+                captured_for = beat
+
+    def get_metrics(self) -> dict:
+        return {
+            'threshold_ms': self.threshold * 1000,
+            'stalls': self.stalls,
+            'max_lag_ms': round(self.max_lag * 1000, 1),
+            'last_stall': self.last_stall,
+        }
@@ -0,0 +1,388 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: add the project root to the Python path to allow importing from asi_core
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from asi_core.role_prompts import render_mode_prompt, render_system_prompt
+
+class Criterion:
+    """
+    A quality aspect users give feedback about, with the directive that addresses it.
+
+    `feedback_pattern` finds the aspect in feedback texts; `marker_pattern` tells
+    whether a system prompt already asks for it.
+    """
+
+    __slots__ = ('name', 'feedback_pattern', 'marker_pattern', 'directive')
+
+    def __init__(self, name: str, feedback_pattern: str, marker_pattern: str, directive: str):
+        self.name = name
+        self.feedback_pattern = re.compile(feedback_pattern, re.IGNORECASE)
+        self.marker_pattern = re.compile(marker_pattern, re.IGNORECASE)
+        self.directive = directive
+
+CRITERIA = (
+    Criterion('concise', r'zu lang|langatmig|kürzer|knapper|schneller|langsam|too long|verbose|shorter|faster|slow',
+              r'knapp|auf den Punkt|concise', "Antworte knapp und auf den Punkt."),
+    Criterion('clarity', r'unklar|verwirrend|unverständlich|klar|verständlich|unclear|confusing|clear',
+              r'\bklar|verständlich|Schritt für Schritt', "Erkläre klar und Schritt für Schritt."),
+    Criterion('examples', r'beispiel|konkret|example|concrete',
+              r'Beispiel|konkret', "Nenne konkrete Beispiele."),
+    Criterion('structure', r'struktur|gliederung|übersicht|structure|organi[sz]ed',
+              r'strukturier|gliedere|Aufzählung', "Gliedere die Antwort mit Überschriften und Aufzählungen."),
+    Criterion('depth', r'oberflächlich|zu kurz|mehr details?|tiefer|ausführlicher|shallow|more detail|in-depth',
+              r'tiefgründig|ausführlich|in die Tiefe', "Gehe in die Tiefe und begründe deine Aussagen."),
+    Criterion('evidence', r'quelle|beleg|nachweis|source|citation|evidence',
+              r'Quelle|belege', "Belege Aussagen mit Quellen oder nachvollziehbaren Begründungen."),
+)
+
+DIRECTIVES = tuple(criterion.directive for criterion in CRITERIA)
+
+# Score cost per word of system prompt, which every request pays for again
+LENGTH_PENALTY = 0.001
+
+# Rounds kept in the state file's history
+HISTORY_LIMIT = 100
+
+# Cached scores kept in the state file; the least recently used are dropped first
+SCORES_LIMIT = 10000
+
+def build_replay_set(feedback: list) -> dict:
+    """
+    Groups feedback into replay cases per evolvable prompt.
+
+    Entries whose context names an 'active_role' count for 'role:<name>', entries
+    with a 'mode' for 'mode:<mode>'. Only entries that mention at least one
+    criterion become cases.
+
+    Args:
+        feedback (list): Entries as stored by FeedbackStore.
+
+    Returns:
+        dict: A mapping of prompt key to a list of cases ({'text', 'criteria'}).
+    """
+    replay = {}
+    for entry in feedback:
+        context = entry.get('context') or {}
+        keys = []
+        if context.get('active_role') not in (None, 'None'):
+            keys.append(f"role:{context['active_role']}")
+        if context.get('mode'):
+            keys.append(f"mode:{context['mode']}")
+        text = entry.get('feedback_text', '')
+        criteria = [criterion.name for criterion in CRITERIA if criterion.feedback_pattern.search(text)]
+        if not keys or not criteria:
+            continue
+        for key in keys:
+            replay.setdefault(key, []).append({'text': text, 'criteria': criteria})
+    return replay
+
+def score_prompt(text: str, cases: list) -> float:
+    """
+    The default scorer: how well a system prompt addresses the replayed feedback.
+
+    Every criterion a case mentions counts +1 if the prompt asks for it and -1
+    otherwise, averaged per case and over all cases, minus a small cost per word.
+
+    Args:
+        text (str): The rendered system prompt.
+        cases (list): The replay cases of the prompt's key.
+
+    Returns:
+        float: The score; higher is better.
+    """
+    addressed = {criterion.name: bool(criterion.marker_pattern.search(text)) for criterion in CRITERIA}
+    total = 0.0
+    for case in cases:
+        total += sum(1.0 if addressed[name] else -1.0 for name in case['criteria']) / len(case['criteria'])
+    return total / max(len(cases), 1) - LENGTH_PENALTY * len(text.split())
+
+def mutate(style: list, rng: random.Random, preferred: tuple = (), directives: tuple = DIRECTIVES) -> list:
+    """
+    Derives a style variant by adding, removing or replacing one directive.
+
+    Args:
+        style (list): The current directives.
+        rng (random.Random): The random generator.
+        preferred (tuple): Directives to draw additions from half of the time, e.g.
+            those addressing criteria the feedback mentions.
+        directives (tuple): All available directives.
+
+    Returns:
+        list: The new directives.
+    """
+    style = list(style)
+    unused = [directive for directive in directives if directive not in style]
+    operation = rng.choice(['add', 'remove', 'replace'] if style else ['add'])
+    if operation in ('add', 'replace') and not unused:
+        operation = 'remove'
+    if operation in ('remove', 'replace'):
+        style.pop(rng.randrange(len(style)))
+    if operation in ('add', 'replace'):
+        candidates = [directive for directive in preferred if directive in unused] or unused
+        style.append(rng.choice(candidates if rng.random() < 0.5 else unused))
+    return style
+
+def content_hash(*parts: str) -> str:
+    """Hashes the parts that determine an evaluation result."""
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+# Per-process state of the evaluation workers, installed once per pool
+_worker_replay = {}
+_worker_scorer = None
+
+def _init_worker(scorer, replay: dict):
+    global _worker_scorer, _worker_replay
+    _worker_scorer, _worker_replay = scorer, replay
+
+def _evaluate(key: str, text: str) -> float:
+    return _worker_scorer(text, _worker_replay[key])
+
+class EvolutionEngine:
+    """
+    Evolves the answer-style directives of roles and chat modes against feedback.
+
+    A round derives variants of every prompt that has replayable feedback, scores
+    them in parallel on a process pool and promotes a variant that beats the current
+    prompt by `min_improvement`. Promotions are written back to roles.json (which the
+    RoleManager hot-reloads) and to the mode prompts file.
+
+    Scores are memoized by a hash of the rendered prompt, the scorer and the key's
+    replay cases, so an unchanged variant is never scored twice, across rounds and
+    restarts, up to SCORES_LIMIT entries. A round stops dispatching at its wall-clock budget; variants that were
+    not scored in time are simply not considered.
+    """
+
+    def __init__(self, roles_path: Path, mode_prompts_path: Path, feedback_path: Path, state_path: Path,
+                 scorer=score_prompt, max_workers: int = None, population: int = 8, min_improvement: float = 0.05,
+                 seed: int = None):
+        """
+        Initializes the engine.
+
+        Args:
+            roles_path (Path): The roles file.
+            mode_prompts_path (Path): The mode prompts file ({'modes': {mode: {'prompt', 'style'}}}).
+            feedback_path (Path): The FeedbackStore archive to build the replay set from.
+            state_path (Path): Where the evaluation cache and round history are kept.
+            scorer (callable): A module-level (picklable) function `(prompt_text, cases) -> float`.
+            max_workers (int, optional): Evaluation processes; defaults to the CPU count.
+            population (int): Variants derived per prompt and round.
+            min_improvement (float): How much a variant must beat the current prompt to be promoted.
+            seed (int, optional): Seed of the variant generator.
+        """
+        self.roles_path = Path(roles_path)
+        self.mode_prompts_path = Path(mode_prompts_path)
+        self.feedback_path = Path(feedback_path)
+        self.state_path = Path(state_path)
+        self.scorer = scorer
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.population = population
+        self.min_improvement = min_improvement
+        self.rng = random.Random(seed)
+        self.state = {'scores': {}, 'history': []}
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    @staticmethod
+    def _read_json(path: Path, default):
+        if not path.exists():
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path: Path, data):
+        # Atomic, so a watcher never reads a half-written file
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        os.replace(temp_path, path)
+
+    def _candidates(self, roles_data: dict, modes_data: dict) -> dict:
+        """Returns key -> (render function, current definition) for every evolvable prompt."""
+        candidates = {}
+        for role in roles_data.get('roles', []):
+            candidates[f"role:{role['name']}"] = (render_system_prompt, role)
+        for mode, entry in modes_data.get('modes', {}).items():
+            candidates[f"mode:{mode}"] = (render_mode_prompt, entry)
+        return candidates
+
+    def _variants(self, key: str, definition: dict, cases: list) -> list:
+        """Derives up to `population` distinct style variants of a prompt definition."""
+        mentioned = {name for case in cases for name in case['criteria']}
+        preferred = tuple(criterion.directive for criterion in CRITERIA if criterion.name in mentioned)
+        current = list(definition.get('style', []))
+        seen = {tuple(current)}
+        variants = []
+        for _ in range(self.population * 4):
+            if len(variants) >= self.population:
+                break
+            style = mutate(current, self.rng, preferred)
+            if self.rng.random() < 0.5:
+                style = mutate(style, self.rng, preferred)
+            if tuple(style) not in seen:
+                seen.add(tuple(style))
+                variants.append(style)
+        return variants
+
+    def run_round(self, budget_s: float = 60.0, dry_run: bool = False) -> dict:
+        """
+        Runs one evolution round within `budget_s` seconds of wall-clock time.
+
+        Args:
+            budget_s (float): The time budget of the round.
+            dry_run (bool): Score and report, but do not write promotions.
+
+        Returns:
+            dict: Round statistics and the promotions.
+        """
+        deadline = time.monotonic() + budget_s
+        roles_data = self._read_json(self.roles_path, {'roles': []})
+        modes_data = self._read_json(self.mode_prompts_path, {'modes': {}})
+        replay = build_replay_set(self._read_json(self.feedback_path, []))
+        scorer_name = f"{self.scorer.__module__}.{self.scorer.__qualname__}"
+
+        # (key, style, cache key, text) of the current prompts and their variants
+        jobs = []
+        for key, (render, definition) in self._candidates(roles_data, modes_data).items():
+            cases = replay.get(key)
+            if not cases:
+                continue
+            replay_hash = content_hash(json.dumps(cases, sort_keys=True, ensure_ascii=False))
+            for style in [list(definition.get('style', []))] + self._variants(key, definition, cases):
+                text = render({**definition, 'style': style})
+                jobs.append((key, style, content_hash(scorer_name, replay_hash, text), text))
+
+        scores = self.state['scores']
+        pending = [job for job in jobs if job[2] not in scores]
+        cached = len(jobs) - len(pending)
+        evaluated = 0
+        if pending:
+            # Only the replay cases of keys with pending variants are shipped to the workers
+            needed = {key: replay[key] for key, _, _, _ in pending}
+            executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending)),
+                                           initializer=_init_worker, initargs=(self.scorer, needed))
+            try:
+                futures = {executor.submit(_evaluate, key, text): cache_key for key, _, cache_key, text in pending}
+                not_done = set(futures)
+                while not_done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    done, not_done = wait(not_done, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            scores[futures[future]] = future.result()
+                            evaluated += 1
+                        except Exception as e:
+                            print(f"[ERROR] Evaluation failed: {e}", file=sys.stderr)
+            finally:
+                # Queued evaluations are dropped; running ones finish in the background
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        promotions = self._select(jobs, scores)
+        self._prune_scores(jobs)
+        if promotions and not dry_run:
+            self._promote(promotions, roles_data, modes_data)
+
+        stats = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'prompts': len({job[0] for job in jobs}),
+            'variants': len(jobs),
+            'cached': cached,
+            'evaluated': evaluated,
+            'timed_out': len(pending) - evaluated,
+            'promotions': promotions,
+            'dry_run': dry_run,
+        }
+        self.state['history'].append({k: v for k, v in stats.items() if k != 'promotions'} |
+                                     {'promoted': [p['key'] for p in promotions]})
+        del self.state['history'][:-HISTORY_LIMIT]
+        self._write_json(self.state_path, self.state)
+        return stats
+
+    def _select(self, jobs: list, scores: dict) -> list:
+        """Picks, per key, the best scored variant if it beats the scored current prompt."""
+        by_key = {}
+        for key, style, cache_key, _ in jobs:
+            by_key.setdefault(key, []).append((style, scores.get(cache_key)))
+        promotions = []
+        for key, entries in by_key.items():
+            (current_style, current_score), variants = entries[0], entries[1:]
+            scored = [(score, style) for style, score in variants if score is not None]
+            if current_score is None or not scored:
+                continue
+            best_score, best_style = max(scored, key=lambda item: item[0])
+            if best_score >= current_score + self.min_improvement:
+                promotions.append({'key': key, 'style': best_style, 'score': best_score,
+                                   'previous_style': current_style, 'previous_score': current_score})
+        return promotions
+
+    def _prune_scores(self, jobs: list):
+        """Moves the scores of this round's jobs to the end and drops the oldest beyond SCORES_LIMIT."""
+        scores = self.state['scores']
+        for _, _, cache_key, _ in jobs:
+            if cache_key in scores:
+                scores[cache_key] = scores.pop(cache_key)
+        for cache_key in list(scores)[:-max(SCORES_LIMIT, len(jobs))]:
+            del scores[cache_key]
+
+    def _promote(self, promotions: list, roles_data: dict, modes_data: dict):
+        """Writes the promoted styles back to the roles and mode prompt files."""
+        styles = {promotion['key']: promotion['style'] for promotion in promotions}
+        roles_changed = modes_changed = False
+        for role in roles_data.get('roles', []):
+            if f"role:{role['name']}" in styles:
+                role['style'] = styles[f"role:{role['name']}"]
+                roles_changed = True
+        for mode, entry in modes_data.get('modes', {}).items():
+            if f"mode:{mode}" in styles:
+                entry['style'] = styles[f"mode:{mode}"]
+                modes_changed = True
+        if roles_changed:
+            self._write_json(self.roles_path, roles_data)
+        if modes_changed:
+            self._write_json(self.mode_prompts_path, modes_data)
+
+if __name__ == '__main__':
+    import argparse
+
+    base_path = Path(__file__).parent / 'data'
+    parser = argparse.ArgumentParser(description="Evolves role and mode prompt styles against the feedback archive.")
+    parser.add_argument('--rounds', type=int, default=1, help="Number of evolution rounds")
+    parser.add_argument('--budget', type=float, default=60.0, help="Wall-clock seconds per round")
+    parser.add_argument('--workers', type=int, help="Evaluation processes (default: CPU count)")
+    parser.add_argument('--population', type=int, default=8, help="Variants per prompt and round")
+    parser.add_argument('--seed', type=int, help="Seed of the variant generator")
+    parser.add_argument('--dry-run', action='store_true', help="Report promotions without writing them")
+    args = parser.parse_args()
+
+    engine = EvolutionEngine(
+        roles_path=base_path / 'roles.json',
+        mode_prompts_path=base_path / 'mode_prompts.json',
+        feedback_path=base_path / 'feedback_archive.json',
+        state_path=base_path / 'evolution_state.json',
+        max_workers=args.workers,
+        population=args.population,
+        seed=args.seed,
+    )
+    for round_number in range(1, args.rounds + 1):
+        stats = engine.run_round(args.budget, dry_run=args.dry_run)
+        print(f"Round {round_number}: {stats['prompts']} prompts, {stats['variants']} variants, "
+              f"{stats['cached']} cached, {stats['evaluated']} evaluated, {stats['timed_out']} timed out")
+        for promotion in stats['promotions']:
+            print(f"  Promoted {promotion['key']}: {promotion['previous_score']:.3f} -> {promotion['score']:.3f} "
+                  f"{promotion['style']}")
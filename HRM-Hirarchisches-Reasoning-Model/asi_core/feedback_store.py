@@ -1,8 +1,11 @@
 import json
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from asi_core import tracing
+
 class FeedbackStore:
     """Handles the storage and retrieval of user feedback in a GDPR-compliant manner."""
 
@@ -14,6 +17,8 @@ class FeedbackStore:
             storage_path (str): The path to the JSON file used for storage.
         """
         self.storage_path = Path(storage_path)
+        # Serializes read-modify-write cycles when the store is shared between threads
+        self._lock = threading.Lock()
         self._ensure_storage_file_exists()
 
     def _ensure_storage_file_exists(self):
@@ -53,19 +58,21 @@ class FeedbackStore:
         Returns:
             dict: The feedback entry that was added.
         """
-        all_feedback = self._load_feedback()
-
-        new_entry = {
-            'feedback_id': len(all_feedback) + 1,
-            'user_pseudonym': self._pseudonymize_user_id(user_id),
-            'timestamp_utc': datetime.utcnow().isoformat(),
-            'feedback_text': feedback_text,
-            'context': context or {},
-            'metadata': metadata or {}
-        }
-
-        all_feedback.append(new_entry)
-        self._save_feedback(all_feedback)
+        with tracing.span('feedback.add_feedback'), self._lock:
+            all_feedback = self._load_feedback()
+
+            new_entry = {
+                'feedback_id': len(all_feedback) + 1,
+                'user_pseudonym': self._pseudonymize_user_id(user_id),
+                'timestamp_utc': datetime.utcnow().isoformat(),
+                'feedback_text': feedback_text,
+                'context': context or {},
+                'metadata': metadata or {}
+            }
+
+            all_feedback.append(new_entry)
+            tracing.current_span().set_attribute('entries', len(all_feedback))
+            self._save_feedback(all_feedback)
         
         return new_entry
 
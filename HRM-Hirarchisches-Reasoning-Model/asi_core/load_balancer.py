@@ -0,0 +1,171 @@
+import hashlib
+import itertools
+import json
+from collections import OrderedDict
+
+SESSION_HEADER = 'x-hrm-session'
+
+class NoBackendAvailable(Exception):
+    """Raised when no healthy backend is left to serve a request."""
+
+class Backend:
+    """One proxy host behind the router and the load the router has sent to it."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.healthy = True
+        self.outstanding_tokens = 0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.stats = {'requests': 0, 'errors': 0}
+
+    def to_dict(self) -> dict:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'outstanding_tokens': self.outstanding_tokens,
+            'in_flight': self.in_flight,
+            'last_error': self.last_error,
+            **self.stats,
+        }
+
+def session_key(headers: dict, messages: list) -> str | None:
+    """
+    Identifies the conversation a chat request belongs to.
+
+    Clients that know their conversation send it in 'X-HRM-Session'. Otherwise the
+    conversation is recognized by its opening messages (system prompt and first
+    user message), which stay the same while the history grows turn by turn.
+
+    Args:
+        headers (dict): Lowercased request header names mapped to values.
+        messages (list): The request's OpenAI-style messages.
+    """
+    explicit = headers.get(SESSION_HEADER)
+    if explicit:
+        return 'session:' + explicit
+    opening = []
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        opening.append([message.get('role'), message.get('content')])
+        if message.get('role') == 'user':
+            break
+    if not opening:
+        return None
+    digest = hashlib.sha256(json.dumps(opening, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+    return 'opening:' + digest
+
+class LoadBalancer:
+    """
+    Spreads generations across backends by least outstanding tokens.
+
+    A request's cost is its prompt plus its maximum completion in tokens; a backend's
+    load is the summed cost of the requests the router has in flight there. New
+    conversations go to the least loaded healthy backend. Later turns stay with the
+    backend that served the conversation before, since its prompt cache holds the
+    conversation, unless that backend is unhealthy or carries more than
+    `sticky_slack_tokens` above the least loaded one; then the conversation moves.
+
+    A backend becomes unhealthy after `fall` failed health checks in a row, or at once
+    when a request to it cannot connect, and healthy again after one successful check.
+    """
+
+    def __init__(self, urls: list, sticky_slack_tokens: int = 4096, max_sessions: int = 10_000, fall: int = 2):
+        """
+        Initializes the balancer.
+
+        Args:
+            urls (list): Base URLs of the backend proxies.
+            sticky_slack_tokens (int): How much more load a conversation's backend may carry than the
+                least loaded one before the conversation is moved.
+            max_sessions (int): How many conversations to remember (least recently used are forgotten).
+            fall (int): Failed health checks in a row after which a backend is taken out.
+        """
+        if not urls:
+            raise ValueError("At least one backend URL is required.")
+        self.backends = [Backend(url) for url in urls]
+        self.sticky_slack_tokens = sticky_slack_tokens
+        self.max_sessions = max_sessions
+        self.fall = fall
+        self._sessions = OrderedDict()  # session key -> Backend
+        # Rotates the scan order so equally loaded backends take turns
+        self._rotation = itertools.cycle(range(len(self.backends)))
+        self.stats = {'routed': 0, 'sticky': 0, 'moved': 0, 'unavailable': 0}
+
+    def choose(self, key: str = None, exclude: tuple = ()) -> Backend:
+        """
+        Picks the backend for a request and remembers it for the request's conversation.
+
+        Args:
+            key (str, optional): The conversation (see `session_key`); None for one-off requests.
+            exclude (tuple): Backends that already failed this request.
+
+        Raises:
+            NoBackendAvailable: If no healthy backend is left.
+        """
+        start = next(self._rotation)
+        candidates = [backend for backend in self.backends[start:] + self.backends[:start]
+                      if backend.healthy and backend not in exclude]
+        if not candidates:
+            self.stats['unavailable'] += 1
+            raise NoBackendAvailable("No healthy backend is available.")
+        least = min(candidates, key=lambda backend: (backend.outstanding_tokens, backend.in_flight))
+        chosen = least
+        if key is not None:
+            previous = self._sessions.get(key)
+            if previous in candidates and previous.outstanding_tokens <= least.outstanding_tokens + self.sticky_slack_tokens:
+                chosen = previous
+                self.stats['sticky'] += 1
+            elif previous is not None:
+                self.stats['moved'] += 1
+            self._sessions[key] = chosen
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self.stats['routed'] += 1
+        return chosen
+
+    def acquire(self, backend: Backend, cost: int):
+        """Counts a request of `cost` tokens as outstanding on `backend`."""
+        backend.outstanding_tokens += cost
+        backend.in_flight += 1
+        backend.stats['requests'] += 1
+
+    def release(self, backend: Backend, cost: int, error: str = None):
+        """Ends a request started with `acquire`; `error` describes a failed one."""
+        backend.outstanding_tokens -= cost
+        backend.in_flight -= 1
+        if error is not None:
+            backend.stats['errors'] += 1
+            backend.last_error = error
+
+    def mark_down(self, backend: Backend, error: str):
+        """Takes a backend out at once, e.g. after a refused connection; the next good health check restores it."""
+        backend.healthy = False
+        backend.consecutive_failures = max(backend.consecutive_failures, self.fall)
+        backend.last_error = error
+
+    def record_health(self, backend: Backend, ok: bool, error: str = None):
+        """Records the result of one active health check."""
+        if ok:
+            backend.healthy = True
+            backend.consecutive_failures = 0
+            return
+        backend.consecutive_failures += 1
+        backend.last_error = error
+        if backend.consecutive_failures >= self.fall:
+            backend.healthy = False
+
+    def healthy_count(self) -> int:
+        return sum(1 for backend in self.backends if backend.healthy)
+
+    def get_metrics(self) -> dict:
+        return {
+            'backends': [backend.to_dict() for backend in self.backends],
+            'healthy': self.healthy_count(),
+            'sessions': len(self._sessions),
+            'sticky_slack_tokens': self.sticky_slack_tokens,
+            **self.stats,
+        }
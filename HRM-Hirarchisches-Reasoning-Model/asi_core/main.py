@@ -1,27 +1,60 @@
+import argparse
 import sys
 from pathlib import Path
 
-# Add the project root to the Python path to allow importing from asi_core
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script: make the asi_core package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from asi_core.role_manager import RoleManager
-from asi_core.feedback_store import FeedbackStore
-from asi_core.user_interface import UserInterface
+from asi_core.startup_profile import phase, profiling, run_profiled
 
 class AsiApplication:
-    """The main application class for the ASI core system."""
+    """
+    The main application class for the ASI core system.
 
-    def __init__(self):
-        """Initializes all core components of the ASI system."""
-        base_path = Path(__file__).parent
-        roles_path = base_path / 'data' / 'roles.json'
-        feedback_path = base_path / 'data' / 'feedback_archive.json'
+    Components are created (and their modules imported) on first access, so a
+    command only pays for what it uses: adding feedback never loads the roles,
+    routers or the model.
+    """
 
+    def __init__(self, base_path: Path = None):
+        """
+        Initializes the application.
+
+        Args:
+            base_path (Path, optional): The asi_core directory holding 'data/'.
+        """
+        self.base_path = base_path or Path(__file__).parent
+        self._role_manager = None
+        self._feedback_store = None
+
+    @property
+    def role_manager(self):
+        """The RoleManager, loaded and watching roles.json from first use."""
+        if self._role_manager is None:
+            with phase('RoleManager'):
+                from asi_core.role_manager import RoleManager
+
+                self._role_manager = self._init_component(lambda: RoleManager(self.base_path / 'data' / 'roles.json'))
+                # Pick up edits to roles.json without restarting the process
+                self._role_manager.start_watching()
+        return self._role_manager
+
+    @property
+    def feedback_store(self):
+        """The FeedbackStore, created on first use."""
+        if self._feedback_store is None:
+            with phase('FeedbackStore'):
+                from asi_core.feedback_store import FeedbackStore
+
+                self._feedback_store = self._init_component(
+                    lambda: FeedbackStore(self.base_path / 'data' / 'feedback_archive.json'))
+        return self._feedback_store
+
+    @staticmethod
+    def _init_component(factory):
         try:
-            print("Initializing ASI Core System...")
-            self.role_manager = RoleManager(roles_path)
-            self.feedback_store = FeedbackStore(feedback_path)
-            print("RoleManager and FeedbackStore initialized successfully.")
+            return factory()
         except (FileNotFoundError, ValueError) as e:
             print(f"[ERROR] Failed to initialize a core component: {e}")
             sys.exit(1)
@@ -58,18 +91,64 @@ class AsiApplication:
                 print(f"  - [{fb['timestamp_utc']}] {fb['feedback_text']}")
         else:
             print("  No feedback found for this user.")
-        
+
         print("\n--- Demonstration Complete ---")
 
 
+    def create_responder(self):
+        """
+        Loads the local model and returns a role-conditioned responder for it.
+        Returns None (placeholder responses) if the model is not available.
+        """
+        with phase('HRM model'):
+            from mcp_hrm_server import HRMMCPServer
+            from asi_core.role_prompts import RoleConditionedResponder
+
+            model = HRMMCPServer()
+            if not model.llm:
+                print("[WARNING] Local model unavailable, falling back to placeholder responses.")
+                return None
+            return RoleConditionedResponder(model, self.role_manager)
+
+
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="ASI Core interactive session")
+    parser.add_argument('command', nargs='?', default='session', choices=['session', 'demo', 'feedback'],
+                        help="'session' (default): interactive session; 'demo': component demonstration; "
+                             "'feedback': store the feedback given as text")
+    parser.add_argument('text', nargs='*', help="The feedback text for the 'feedback' command.")
+    parser.add_argument('--no-model', action='store_true', help="Answer with placeholder responses instead of the local model.")
+    parser.add_argument('--profile-startup', action='store_true', help="Report import and initialization time per module, then exit.")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        sys.exit(run_profiled([sys.argv[0], *(arg for arg in sys.argv[1:] if arg != '--profile-startup')]))
+
     app = AsiApplication()
-    # app.run_demonstration() # We keep the demo logic but run the interactive UI by default
+
+    if args.command == 'feedback':
+        if not args.text:
+            parser.error("the 'feedback' command needs the feedback text")
+        entry = app.feedback_store.add_feedback(user_id="cli_user", feedback_text=' '.join(args.text),
+                                                context={'module': 'cli'})
+        print(f"Feedback added with ID: {entry['feedback_id']}")
+        return
+
+    if args.command == 'demo':
+        app.run_demonstration()
+        return
+
+    responder = None if args.no_model else app.create_responder()
 
     # Initialize and start the interactive user interface
-    ui = UserInterface(role_manager=app.role_manager, feedback_store=app.feedback_store)
+    with phase('UserInterface'):
+        from asi_core.user_interface import UserInterface
+
+        ui = UserInterface(role_manager=app.role_manager, feedback_store=app.feedback_store, responder=responder)
+    if profiling():
+        return  # Initialized; nothing to wait for when measuring startup
     ui.start_interaction()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
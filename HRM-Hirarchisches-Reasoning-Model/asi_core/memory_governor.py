@@ -0,0 +1,178 @@
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+# Mistral-7B (the default model): 32 layers x 8 KV heads x 128 dims, keys and values in f16
+DEFAULT_KV_BYTES_PER_TOKEN = 2 * 32 * 8 * 128 * 2
+# Logits, sampling buffers and the Python-side text of one generation
+DEFAULT_REQUEST_OVERHEAD_BYTES = 8 * 2**20
+
+_MB = 2**20
+
+def read_rss():
+    """Returns the resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Only the peak is available here; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemoryBudgetExceeded(Exception):
+    """
+    Raised when a request does not fit into the memory budget.
+
+    `retry_after` is the suggested wait in seconds, or None if the request is too
+    large to ever fit.
+    """
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class MemoryGovernor:
+    """
+    Keeps concurrent generations within a memory budget.
+
+    Each generation reserves its estimated cost (KV cache for prompt plus maximum
+    completion, plus a fixed overhead) while it runs. A generation starts when the
+    process RSS plus all reservations plus its own estimate stay within the budget;
+    otherwise it waits for memory to be freed, up to `max_wait` seconds or its
+    deadline. Requests arriving while the RSS alone exceeds the budget are shed at
+    once, so an overloaded host answers quickly with 503 instead of swapping.
+
+    Counting the RSS and the reservations of running generations overlaps where
+    those generations have already allocated; the governor errs on the safe side.
+    Without a budget nothing is refused, but the metrics are still tracked.
+    """
+
+    def __init__(self, budget_bytes: int = None, kv_bytes_per_token: int = DEFAULT_KV_BYTES_PER_TOKEN,
+                 request_overhead_bytes: int = DEFAULT_REQUEST_OVERHEAD_BYTES, max_wait: float = 5.0,
+                 rss_reader=read_rss, clock=time.monotonic, poll_interval: float = 0.05):
+        """
+        Initializes the governor.
+
+        Args:
+            budget_bytes (int, optional): The memory the process may use, including the model.
+            kv_bytes_per_token (int): KV-cache bytes per context token of the served model.
+            request_overhead_bytes (int): Fixed memory per generation besides the KV cache.
+            max_wait (float): How long a request waits for memory before it is refused.
+            rss_reader (callable): Returns the current RSS in bytes (or None if unknown).
+            clock (callable): The monotonic time source, on the same clock as request deadlines.
+            poll_interval (float): How often a waiting request re-checks the memory.
+        """
+        self.budget_bytes = budget_bytes
+        self.kv_bytes_per_token = kv_bytes_per_token
+        self.request_overhead_bytes = request_overhead_bytes
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._read_rss = rss_reader
+        self._clock = clock
+        self.reserved_bytes = 0
+        self.in_flight = 0
+        # RSS without any generation running; what a single request can at most add to
+        self.idle_rss = None
+        self.stats = {'admitted': 0, 'deferred': 0, 'shed': 0, 'too_large': 0}
+
+    @classmethod
+    def from_env(cls) -> 'MemoryGovernor':
+        """
+        Creates a MemoryGovernor configured through environment variables:
+        HRM_MEMORY_BUDGET_MB (unset: no limit), HRM_KV_BYTES_PER_TOKEN and HRM_MEMORY_MAX_WAIT_S.
+        The budget covers the whole process, i.e. also the resident part of the model weights.
+        """
+        budget_mb = os.environ.get('HRM_MEMORY_BUDGET_MB')
+        return cls(
+            budget_bytes=int(float(budget_mb) * _MB) if budget_mb else None,
+            kv_bytes_per_token=int(os.environ.get('HRM_KV_BYTES_PER_TOKEN', DEFAULT_KV_BYTES_PER_TOKEN)),
+            max_wait=float(os.environ.get('HRM_MEMORY_MAX_WAIT_S', 5.0)),
+        )
+
+    def estimate(self, prompt_tokens: int, max_tokens: int) -> int:
+        """Returns the estimated peak memory of one generation in bytes."""
+        return (prompt_tokens + max_tokens) * self.kv_bytes_per_token + self.request_overhead_bytes
+
+    def _rss(self) -> int:
+        rss = self._read_rss() or 0
+        if self.in_flight == 0:
+            self.idle_rss = rss
+        return rss
+
+    def check(self, estimate: int):
+        """
+        Sheds a request before it is queued if it can never fit or the process is already over budget.
+
+        Raises:
+            MemoryBudgetExceeded: If the request should be refused.
+        """
+        if self.budget_bytes is None:
+            return
+        rss = self._rss()
+        if rss > self.budget_bytes:
+            self.stats['shed'] += 1
+            raise MemoryBudgetExceeded("The server is over its memory budget.", retry_after=self.max_wait)
+        if estimate > self.budget_bytes - (self.idle_rss if self.idle_rss is not None else rss):
+            self.stats['too_large'] += 1
+            raise MemoryBudgetExceeded(
+                f"The request needs about {estimate / _MB:.0f} MB, more than the memory budget leaves; "
+                "use a shorter prompt or fewer max_tokens.")
+
+    def over_budget(self) -> bool:
+        """Whether the RSS alone exceeds the budget, i.e. new requests are being shed."""
+        return self.budget_bytes is not None and self._rss() > self.budget_bytes
+
+    def _fits(self, estimate: int) -> bool:
+        return self._rss() + self.reserved_bytes + estimate <= self.budget_bytes
+
+    @asynccontextmanager
+    async def reserve(self, estimate: int, deadline: float = None):
+        """
+        Holds `estimate` bytes for the duration of the block, waiting until they fit.
+
+        Args:
+            estimate (int): The request's estimated memory (see `estimate`).
+            deadline (float, optional): Do not wait past this time on the governor's clock.
+
+        Raises:
+            MemoryBudgetExceeded: If the memory did not become available in time.
+        """
+        if self.budget_bytes is not None and not self._fits(estimate):
+            self.stats['deferred'] += 1
+            wait_until = self._clock() + self.max_wait
+            if deadline is not None:
+                wait_until = min(wait_until, deadline)
+            while not self._fits(estimate):
+                remaining = wait_until - self._clock()
+                if remaining <= 0:
+                    self.stats['shed'] += 1
+                    raise MemoryBudgetExceeded("Not enough memory became available in time.",
+                                               retry_after=self.max_wait)
+                await asyncio.sleep(min(self.poll_interval, remaining))
+        self.stats['admitted'] += 1
+        self.reserved_bytes += estimate
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.reserved_bytes -= estimate
+            self.in_flight -= 1
+
+    def get_metrics(self) -> dict:
+        rss = self._read_rss()
+        return {
+            'budget_mb': self.budget_bytes / _MB if self.budget_bytes is not None else None,
+            'rss_mb': round(rss / _MB, 1) if rss is not None else None,
+            'idle_rss_mb': round(self.idle_rss / _MB, 1) if self.idle_rss is not None else None,
+            'reserved_mb': round(self.reserved_bytes / _MB, 1),
+            'in_flight': self.in_flight,
+            'kv_bytes_per_token': self.kv_bytes_per_token,
+            **self.stats,
+        }
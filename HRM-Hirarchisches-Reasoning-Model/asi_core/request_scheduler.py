@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITY_CLASSES = (INTERACTIVE, BATCH)  # Strict priority order
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before it could be started."""
+
+class _Entry:
+    __slots__ = ('start_tag', 'seq', 'future', 'deadline', 'enqueued_at')
+
+    def __init__(self, start_tag: float, seq: int, future: asyncio.Future, deadline: float | None, enqueued_at: float):
+        self.start_tag = start_tag
+        self.seq = seq
+        self.future = future
+        self.deadline = deadline
+        self.enqueued_at = enqueued_at
+
+    def __lt__(self, other):
+        return (self.start_tag, self.seq) < (other.start_tag, other.seq)
+
+class _ClassQueue:
+    """Start-time fair queuing among the users of one priority class."""
+
+    def __init__(self):
+        self.heap = []
+        self.virtual_time = 0.0
+        self.last_finish = {}  # user -> finish tag of the user's last enqueued request
+        self.queued = 0
+        self.dispatched = 0
+        self.expired = 0
+        self.waits = deque(maxlen=1024)
+
+    def push(self, user: str, cost: float, weight: float, entry_args: tuple) -> _Entry:
+        start_tag = max(self.virtual_time, self.last_finish.get(user, 0.0))
+        self.last_finish[user] = start_tag + cost / weight
+        entry = _Entry(start_tag, *entry_args)
+        heapq.heappush(self.heap, entry)
+        self.queued += 1
+        return entry
+
+    def pop(self) -> _Entry | None:
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if not entry.future.done():
+                self.virtual_time = entry.start_tag
+                if not self.heap:
+                    # Idle class: forget finish tags so returning users are not penalized
+                    self.last_finish.clear()
+                return entry
+        return None
+
+class RequestScheduler:
+    """
+    Admits work to a limited number of model slots.
+
+    Requests are served in strict priority order of their class (interactive before
+    batch). Within a class, users share the slots by weighted fair queuing on the
+    request's cost (e.g. estimated tokens), so one user's long requests cannot starve
+    the others. Requests whose deadline passes while queued are dropped without running.
+    """
+
+    def __init__(self, concurrency: int = 1, clock=time.monotonic):
+        """
+        Initializes the scheduler.
+
+        Args:
+            concurrency (int): The number of requests that may run at the same time.
+            clock (callable): The monotonic time source used for deadlines and wait times.
+        """
+        self.concurrency = concurrency
+        self._clock = clock
+        self._available = concurrency
+        self._queues = {priority: _ClassQueue() for priority in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+
+    async def run(self, job, *, user: str, priority: str = INTERACTIVE, cost: float = 1.0,
+                  weight: float = 1.0, deadline: float | None = None):
+        """
+        Waits for a slot and runs the job in it.
+
+        Args:
+            job (callable): A zero-argument coroutine function performing the work.
+            user (str): The (pseudonymous) user the request is accounted to.
+            priority (str): `INTERACTIVE` or `BATCH`.
+            cost (float): The expected cost of the request, e.g. prompt plus max tokens.
+            weight (float): The user's share relative to other users of the class.
+            deadline (float, optional): The latest start time on the scheduler's clock.
+
+        Returns:
+            The job's result.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed before the job could start.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+        queue = self._queues[priority]
+        now = self._clock()
+        if deadline is not None and deadline <= now:
+            queue.expired += 1
+            raise DeadlineExceeded("Deadline passed before the request was queued.")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = queue.push(user, max(cost, 1.0), weight, (next(self._seq), future, deadline, now))
+        self._dispatch()
+
+        try:
+            if deadline is None:
+                await future
+            else:
+                await asyncio.wait_for(future, timeout=max(0.0, deadline - self._clock()))
+        except asyncio.TimeoutError:
+            if not future.done() or future.cancelled():
+                queue.queued -= 1
+                queue.expired += 1
+            elif future.exception() is None:
+                # The slot was granted as the timeout fired (wait_for may report both on 3.12+)
+                self._release()
+                queue.expired += 1
+            # Otherwise _dispatch already dropped the request as expired
+            raise DeadlineExceeded("Deadline passed while the request was queued.") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # The slot was granted just before the caller went away
+            else:
+                queue.queued -= 1
+            raise
+
+        try:
+            return await job()
+        finally:
+            self._release()
+
+    def _dispatch(self):
+        """Grants free slots to queued requests in priority and fair-share order."""
+        while self._available > 0:
+            for priority in PRIORITY_CLASSES:
+                queue = self._queues[priority]
+                entry = queue.pop()
+                if entry is not None:
+                    break
+            else:
+                return
+
+            queue.queued -= 1
+            now = self._clock()
+            if entry.deadline is not None and entry.deadline <= now:
+                queue.expired += 1
+                entry.future.set_exception(DeadlineExceeded("Deadline passed while the request was queued."))
+                continue
+            queue.dispatched += 1
+            queue.waits.append(now - entry.enqueued_at)
+            self._available -= 1
+            entry.future.set_result(None)
+
+    def _release(self):
+        self._available += 1
+        self._dispatch()
+
+    def get_metrics(self) -> dict:
+        """
+        Returns queue metrics per priority class.
+
+        Returns:
+            dict: In-flight count plus, per class, queue depth, dispatched and expired
+                counters and wait-time percentiles (seconds) over recent requests.
+        """
+        metrics = {'concurrency': self.concurrency, 'in_flight': self.concurrency - self._available}
+        for priority, queue in self._queues.items():
+            waits = sorted(queue.waits)
+            metrics[priority] = {
+                'queued': queue.queued,
+                'dispatched': queue.dispatched,
+                'expired': queue.expired,
+                'wait_p50_s': waits[len(waits) // 2] if waits else 0.0,
+                'wait_p99_s': waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+            }
+        return metrics
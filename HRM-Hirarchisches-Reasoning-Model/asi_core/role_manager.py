@@ -1,8 +1,136 @@
 import json
+import re
+import sys
+import threading
 from pathlib import Path
+from types import MappingProxyType
+
+if not __package__:
+    # Run as a script: add the project root to the Python path to allow importing from asi_core
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from asi_core.semantic_router import SemanticRoleRouter
+
+class RoleRouter:
+    """
+    A precompiled multi-pattern index that routes free text to roles.
+
+    All role names, aliases and capability keywords are merged into a single
+    trie-shaped regular expression, so routing is one linear scan over the input
+    regardless of how many roles are configured.
+    """
+
+    NAME_WEIGHT = 3.0
+    ALIAS_WEIGHT = 2.0
+    CAPABILITY_WEIGHT = 1.0
+
+    def __init__(self, roles: list):
+        """
+        Builds the routing index.
+
+        Args:
+            roles (list): The role definitions, in priority order for tie-breaking.
+        """
+        self._roles = roles
+        self._keywords = {}  # lowercased keyword -> list of (role index, weight)
+        for index, role in enumerate(roles):
+            self._add_keyword(role['name'], index, self.NAME_WEIGHT)
+            for alias in role.get('aliases', []):
+                self._add_keyword(alias, index, self.ALIAS_WEIGHT)
+            for capability in role['capabilities']:
+                self._add_keyword(capability, index, self.CAPABILITY_WEIGHT)
+                self._add_keyword(capability.replace('_', ' '), index, self.CAPABILITY_WEIGHT)
+        self._pattern = self._compile(self._keywords)
+
+    def _add_keyword(self, keyword: str, index: int, weight: float):
+        """Registers a keyword for a role, keeping the highest weight per role."""
+        entries = self._keywords.setdefault(keyword.lower(), [])
+        for i, (existing_index, existing_weight) in enumerate(entries):
+            if existing_index == index:
+                entries[i] = (index, max(existing_weight, weight))
+                return
+        entries.append((index, weight))
+
+    @staticmethod
+    def _compile(keywords: dict):
+        """Compiles the keywords into one regex whose alternations share common prefixes."""
+        if not keywords:
+            return None
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def to_regex(node: dict) -> str:
+            branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 and '' not in node else '(?:' + '|'.join(branches) + ')'
+            return body + '?' if '' in node else body
+
+        return re.compile(r'(?<!\w)' + to_regex(trie) + r'(?!\w)', re.IGNORECASE)
+
+    def score(self, user_input: str) -> dict:
+        """
+        Scores all roles mentioned in the input.
+
+        Args:
+            user_input (str): The raw user message.
+
+        Returns:
+            dict: A mapping of role index to accumulated keyword weight.
+        """
+        scores = {}
+        if self._pattern is None:
+            return scores
+        for match in self._pattern.finditer(user_input):
+            for index, weight in self._keywords.get(match.group(0).lower(), ()):
+                scores[index] = scores.get(index, 0.0) + weight
+        return scores
+
+    def route(self, user_input: str) -> dict | None:
+        """
+        Returns the highest scoring role for the input, or None if nothing matched.
+        Ties are resolved in favour of the role defined first.
+        """
+        scores = self.score(user_input)
+        if not scores:
+            return None
+        best_index = min(scores, key=lambda index: (-scores[index], index))
+        return self._roles[best_index]
+
+class RoleSnapshot:
+    """
+    An immutable, versioned view of the loaded roles together with their routing indexes.
+
+    Snapshots are built completely before they are published, so readers never see a
+    partially loaded configuration. The role dictionaries themselves must be treated
+    as read-only.
+    """
+
+    __slots__ = ('version', 'file_signature', 'roles', 'roles_by_name', 'router', 'semantic_router')
+
+    def __init__(self, version: int, file_signature: tuple, roles: tuple, roles_path: Path):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'file_signature', file_signature)
+        object.__setattr__(self, 'roles', roles)
+        object.__setattr__(self, 'roles_by_name', MappingProxyType({role['name']: role for role in roles}))
+        object.__setattr__(self, 'router', RoleRouter(list(roles)))
+        object.__setattr__(self, 'semantic_router', SemanticRoleRouter(roles_path, list(roles)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RoleSnapshot is immutable.")
 
 class RoleManager:
-    """Manages the loading and accessing of agent roles from a configuration file."""
+    """
+    Manages the loading and accessing of agent roles from a configuration file.
+
+    The roles file can be hot-reloaded: `reload_if_changed` (or the background watcher
+    started with `start_watching`) parses and validates a changed file and atomically
+    swaps in a new snapshot. An invalid file is reported and the previous roles stay active.
+    """
 
     def __init__(self, roles_path: Path):
         """
@@ -14,27 +142,116 @@ class RoleManager:
         if not roles_path.exists():
             raise FileNotFoundError(f"Roles configuration file not found at: {roles_path}")
         self.roles_path = roles_path
-        self._roles = self._load_roles()
+        self.last_reload_error = None
+        self._reload_lock = threading.Lock()
+        self._rejected_signature = None
+        self._watch_stop = None
+        self._watch_thread = None
+        signature = self._file_signature()
+        self._snapshot = RoleSnapshot(1, signature, self._load_roles(), roles_path)
 
-    def _load_roles(self) -> dict:
-        """Loads and validates roles from the JSON file, storing them in a dictionary keyed by role name."""
+    def _file_signature(self) -> tuple:
+        """Returns the (mtime, size) pair used to detect changes to the roles file."""
+        stat = self.roles_path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_roles(self) -> tuple:
+        """Loads and validates roles from the JSON file, returning them in file order."""
         with open(self.roles_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        if 'roles' not in data or not isinstance(data['roles'], list):
+        if not isinstance(data, dict) or not isinstance(data.get('roles'), list):
             raise ValueError(f"Invalid format in {self.roles_path}: 'roles' key missing or not a list.")
 
         roles_map = {}
         for role in data['roles']:
-            if not all(k in role for k in ['name', 'description', 'capabilities']):
+            if not isinstance(role, dict) or not all(k in role for k in ['name', 'description', 'capabilities']):
                 raise ValueError(f"Invalid role definition in {self.roles_path}. Missing required keys.")
+            if not isinstance(role['name'], str) or not isinstance(role['description'], str):
+                raise ValueError(f"Invalid role definition in {self.roles_path}: 'name' and 'description' must be strings.")
+            for key in ('capabilities', 'aliases'):
+                values = role.get(key, [])
+                if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                    raise ValueError(f"Invalid role definition in {self.roles_path}: '{key}' must be a list of strings.")
             roles_map[role['name']] = role
         
-        return roles_map
+        return tuple(roles_map.values())
+
+    @property
+    def snapshot(self) -> RoleSnapshot:
+        """The currently active role snapshot."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """The version of the active snapshot; incremented on every successful reload."""
+        return self._snapshot.version
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the roles file if its modification time or size changed.
+
+        Returns:
+            bool: True if a new snapshot was published, False otherwise.
+        """
+        with self._reload_lock:
+            try:
+                signature = self._file_signature()
+            except OSError as e:
+                self.last_reload_error = str(e)
+                return False
+            if signature == self._snapshot.file_signature or signature == self._rejected_signature:
+                return False
+
+            try:
+                roles = self._load_roles()
+                snapshot = RoleSnapshot(self._snapshot.version + 1, signature, roles, self.roles_path)
+            except (OSError, ValueError) as e:
+                # Keep serving the previous roles until the file is fixed
+                self._rejected_signature = signature
+                self.last_reload_error = str(e)
+                print(f"[ERROR] Failed to reload roles from {self.roles_path}: {e}", file=sys.stderr)
+                return False
+
+            self._snapshot = snapshot
+            self._rejected_signature = None
+            self.last_reload_error = None
+            return True
+
+    def start_watching(self, interval: float = 2.0):
+        """
+        Starts a daemon thread that polls the roles file for changes.
 
-    def get_all_roles(self) -> list:
-        """Returns a list of all loaded role definitions."""
-        return list(self._roles.values())
+        Args:
+            interval (float): Seconds between two checks of the file's modification time.
+        """
+        if self._watch_thread is not None:
+            return
+        self._watch_stop = threading.Event()
+
+        def watch(stop: threading.Event):
+            while not stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    # An unexpected failure must not end hot reloading; the previous roles stay active
+                    self.last_reload_error = str(e)
+                    print(f"[ERROR] Watching {self.roles_path} failed: {e}", file=sys.stderr)
+
+        self._watch_thread = threading.Thread(target=watch, args=(self._watch_stop,), name='RoleManagerWatcher', daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        """Stops the background watcher, if it is running."""
+        if self._watch_thread is None:
+            return
+        self._watch_stop.set()
+        self._watch_thread.join()
+        self._watch_thread = None
+
+    def get_all_roles(self) -> tuple:
+        """Returns all loaded role definitions as a cached, immutable tuple."""
+        return self._snapshot.roles
 
     def get_role_by_name(self, name: str) -> dict | None:
         """
@@ -46,7 +263,31 @@ class RoleManager:
         Returns:
             dict | None: The role definition as a dictionary, or None if not found.
         """
-        return self._roles.get(name)
+        return self._snapshot.roles_by_name.get(name)
+
+    def route(self, user_input: str, default: str = 'AURA') -> dict | None:
+        """
+        Selects the role that best matches the user input.
+
+        Role names, aliases and capability keywords (e.g. 'deep_research' or
+        'deep research') found in the input are scored with decreasing weights.
+        If none are mentioned, the semantically closest role is chosen.
+
+        Args:
+            user_input (str): The raw user message.
+            default (str): The role to fall back to when nothing matches.
+
+        Returns:
+            dict | None: The selected role, the default role, or the first role if the
+                default does not exist. None only if no roles are loaded.
+        """
+        snapshot = self._snapshot
+        role = snapshot.router.route(user_input) or snapshot.semantic_router.route(user_input)
+        if role is not None:
+            return role
+        if default in snapshot.roles_by_name:
+            return snapshot.roles_by_name[default]
+        return snapshot.roles[0] if snapshot.roles else None
 
 # Example Usage (for testing purposes)
 if __name__ == '__main__':
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: add the project root to the Python path to allow importing from asi_core
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from asi_core.role_manager import RoleManager
+
+def render_system_prompt(role: dict) -> str:
+    """
+    Renders the persona system prompt for a role from its description and capabilities.
+
+    The optional 'style' list holds answer-style directives (maintained by the
+    evolution engine); they are appended to the prompt but do not affect routing.
+
+    Args:
+        role (dict): The role definition.
+
+    Returns:
+        str: The system prompt.
+    """
+    capabilities = ', '.join(capability.replace('_', ' ') for capability in role['capabilities'])
+    style = ''.join(f" {directive}" for directive in role.get('style', ()))
+    return (
+        f"Du bist {role['name']}. {role['description']}\n"
+        f"Deine Fähigkeiten: {capabilities}.\n"
+        f"Antworte in dieser Rolle, klar strukturiert und auf den Punkt.{style}"
+    )
+
+def render_mode_prompt(mode: dict) -> str:
+    """
+    Renders the system prompt of a chat mode ('research', 'brainstorm', ...).
+
+    Args:
+        mode (dict): The mode definition with its base 'prompt' and optional 'style' directives.
+
+    Returns:
+        str: The system prompt.
+    """
+    return ' '.join([mode['prompt'], *mode.get('style', ())])
+
+class RoleConditionedResponder:
+    """
+    Answers routed messages with the local model, conditioned on the selected role.
+
+    All role system prompts are rendered once and registered with the model as
+    reusable prefixes, so a message only costs its own tokens. The prompts are
+    re-registered whenever the RoleManager publishes a new roles version.
+    """
+
+    def __init__(self, model, role_manager: RoleManager):
+        """
+        Initializes the responder and pre-evaluates the role prompts.
+
+        Args:
+            model: An object providing `register_prefixes(prefixes)` and the coroutine
+                `handle_prefixed_completion(key, prompt)`, such as `HRMMCPServer`.
+            role_manager (RoleManager): The RoleManager whose roles are served.
+        """
+        self.model = model
+        self.role_manager = role_manager
+        self._roles_version = None
+        self._sync_prefixes(prime=True)
+
+    def _sync_prefixes(self, prime: bool = False):
+        """
+        Registers the rendered prompts if the roles changed since the last registration.
+        After startup, changed prefixes are evaluated lazily on their next use.
+        """
+        snapshot = self.role_manager.snapshot
+        if snapshot.version == self._roles_version:
+            return
+        # The default role goes first so that it is among the pre-evaluated prefixes
+        roles = sorted(snapshot.roles, key=lambda role: role['name'] != 'AURA')
+        prefixes = {role['name']: render_system_prompt(role) for role in roles}
+        self.model.register_prefixes(prefixes, prime=prime)
+        self._roles_version = snapshot.version
+
+    async def __call__(self, role: dict, user_input: str) -> str:
+        """
+        Generates the response of `role` to the user input.
+
+        Returns:
+            str: The model's completion.
+        """
+        self._sync_prefixes()
+        result = await self.model.handle_prefixed_completion(role['name'], user_input)
+        return result['completion']
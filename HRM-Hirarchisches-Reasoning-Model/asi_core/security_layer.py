@@ -0,0 +1,304 @@
+import hashlib
+import ipaddress
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+class MemoryState:
+    """In-process rate-limit and quota counters, O(1) per request."""
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self):
+        self._buckets = {}  # client key -> [tokens, last refill time]
+        self._usage = {}  # client key -> [window start, used tokens]
+        self._lock = threading.Lock()
+        self._operations = 0
+
+    def take_token(self, key: str, rate: float, capacity: float, now: float) -> float:
+        """
+        Takes one token from the client's bucket.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until one is available.
+        """
+        with self._lock:
+            if self._prune_due():
+                self._prune(now, capacity / rate if rate > 0 else 0.0)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / rate if rate > 0 else float('inf')
+
+    def get_usage(self, key: str, window_start: float) -> int:
+        """Returns the tokens used by the client in the given quota window."""
+        with self._lock:
+            usage = self._usage.get(key)
+            return usage[1] if usage and usage[0] == window_start else 0
+
+    def add_usage(self, key: str, window_start: float, tokens: int) -> int:
+        """Adds tokens to the client's usage and returns the new total for the window."""
+        with self._lock:
+            if self._prune_due():
+                self._prune(window_start=window_start)
+            usage = self._usage.get(key)
+            if usage is None or usage[0] != window_start:
+                usage = self._usage[key] = [window_start, 0]
+            usage[1] += tokens
+            return usage[1]
+
+    def _prune_due(self) -> bool:
+        self._operations += 1
+        return self._operations % self.PRUNE_EVERY == 0
+
+    def _prune(self, now: float = None, refill_time: float = 0.0, window_start: float = None):
+        """
+        Drops buckets that are full again and usage of past quota windows; both are
+        recreated identically on demand.
+        """
+        if now is not None:
+            for key in [k for k, (_, updated) in self._buckets.items() if now - updated >= refill_time]:
+                del self._buckets[key]
+        if window_start is not None:
+            for key in [k for k, (start, _) in self._usage.items() if start < window_start]:
+                del self._usage[key]
+
+class SqliteState:
+    """
+    Rate-limit and quota counters in a SQLite file, shared by several worker processes.
+    Every update runs in its own immediate transaction, so workers never double-spend.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS buckets (client_key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS usage (client_key TEXT PRIMARY KEY, window_start REAL, used INTEGER)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns this thread's connection."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _transaction(self, fn):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(db)
+            db.execute("COMMIT")
+            return result
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def take_token(self, key: str, rate: float, capacity: float, now: float) -> float:
+        """See `MemoryState.take_token`."""
+        def update(db):
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE client_key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate if rate > 0 else float('inf')
+            db.execute("INSERT OR REPLACE INTO buckets (client_key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            return wait
+        return self._transaction(update)
+
+    def get_usage(self, key: str, window_start: float) -> int:
+        """See `MemoryState.get_usage`."""
+        row = self._connect().execute(
+            "SELECT used FROM usage WHERE client_key = ? AND window_start = ?", (key, window_start)).fetchone()
+        return row[0] if row else 0
+
+    def add_usage(self, key: str, window_start: float, tokens: int) -> int:
+        """See `MemoryState.add_usage`."""
+        def update(db):
+            db.execute(
+                "INSERT INTO usage (client_key, window_start, used) VALUES (?, ?, ?) "
+                "ON CONFLICT(client_key) DO UPDATE SET "
+                "used = CASE WHEN window_start = excluded.window_start THEN used + excluded.used ELSE excluded.used END, "
+                "window_start = excluded.window_start",
+                (key, window_start, tokens))
+            return db.execute("SELECT used FROM usage WHERE client_key = ?", (key,)).fetchone()[0]
+        return self._transaction(update)
+
+class SecurityLayer:
+    """
+    Admission control for the model server: per-client token-bucket rate limits and
+    quotas counted in prompt plus completion tokens over a fixed time window.
+
+    Clients are identified by their API key (`Authorization: Bearer ...` or `X-API-Key`)
+    or, without one, by their IP address. Keys are only kept as pseudonyms. Behind a
+    router or reverse proxy listed in `trusted_proxies`, the IP address is the client
+    that the proxies name in X-Forwarded-For instead of the proxy itself.
+    """
+
+    def __init__(self, requests_per_second: float = 1.0, burst: int = 5, token_quota: int = 200_000,
+                 quota_window: float = 3600.0, state=None, clock=time.time, trusted_proxies: tuple = ()):
+        """
+        Initializes the SecurityLayer.
+
+        Args:
+            requests_per_second (float): The sustained request rate per client; 0 disables rate limits.
+            burst (int): The bucket capacity, i.e. how many requests may arrive at once.
+            token_quota (int): Prompt plus completion tokens per client and window; 0 disables quotas.
+            quota_window (float): The quota window length in seconds.
+            state: The counter backend (`MemoryState` or `SqliteState`). Defaults to in-memory.
+            clock (callable): The wall-clock time source, replaceable for tests.
+            trusted_proxies (tuple): Addresses or networks (e.g. '10.0.0.0/8') of proxies whose
+                X-Forwarded-For header is believed.
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.token_quota = token_quota
+        self.quota_window = quota_window
+        self.state = state or MemoryState()
+        self._clock = clock
+        self.trusted_proxies = tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in trusted_proxies)
+        self.stats = {'admitted': 0, 'rate_limited': 0, 'quota_exceeded': 0}
+
+    @classmethod
+    def from_env(cls) -> 'SecurityLayer':
+        """
+        Creates a SecurityLayer configured through environment variables:
+        HRM_RATE_LIMIT_RPS (unset or 0: no rate limit), HRM_RATE_LIMIT_BURST, HRM_TOKEN_QUOTA, HRM_QUOTA_WINDOW_S and
+        HRM_SECURITY_STATE (path of a SQLite file shared by all workers) and
+        HRM_TRUSTED_PROXIES (comma-separated addresses or networks, e.g. of hrm_router.py).
+        """
+        state_path = os.environ.get('HRM_SECURITY_STATE')
+        trusted = os.environ.get('HRM_TRUSTED_PROXIES', '')
+        return cls(
+            requests_per_second=float(os.environ.get('HRM_RATE_LIMIT_RPS', 0.0)),
+            burst=int(os.environ.get('HRM_RATE_LIMIT_BURST', 5)),
+            token_quota=int(os.environ.get('HRM_TOKEN_QUOTA', 200_000)),
+            quota_window=float(os.environ.get('HRM_QUOTA_WINDOW_S', 3600.0)),
+            state=SqliteState(state_path) if state_path else None,
+            trusted_proxies=tuple(proxy for proxy in trusted.split(',') if proxy.strip()),
+        )
+
+    def _is_trusted(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host.strip())
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def client_address(self, headers: dict, peer: str | None) -> str | None:
+        """
+        Finds the address of the original client.
+
+        A request from a trusted proxy is attributed to the address the proxy appended to
+        X-Forwarded-For, skipping further trusted proxies in the chain. Entries left of
+        the first untrusted one are ignored, since that client could have written them.
+
+        Args:
+            headers (dict): Lowercased request header names mapped to values.
+            peer (str | None): The address of the connection's other end.
+        """
+        if not peer or not self._is_trusted(peer):
+            return peer
+        for host in reversed(headers.get('x-forwarded-for', '').split(',')):
+            host = host.strip()
+            if host and not self._is_trusted(host):
+                return host
+        return peer
+
+    @staticmethod
+    def client_key(headers: dict, client_host: str | None) -> str:
+        """
+        Derives the pseudonymous client key from request headers and the peer address.
+
+        Args:
+            headers (dict): Lowercased request header names mapped to values.
+            client_host (str | None): The client's IP address.
+        """
+        api_key = headers.get('x-api-key')
+        authorization = headers.get('authorization', '')
+        if not api_key and authorization.lower().startswith('bearer '):
+            api_key = authorization[7:].strip()
+        if api_key:
+            return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+        return f"ip:{client_host or 'unknown'}"
+
+    def _window_start(self, now: float) -> float:
+        return now - (now % self.quota_window)
+
+    def admit(self, key: str) -> tuple:
+        """
+        Decides whether a request of the client may proceed.
+
+        Returns:
+            tuple: (allowed, reason, retry_after_seconds); reason is None if allowed.
+        """
+        now = self._clock()
+        if self.token_quota:
+            window_start = self._window_start(now)
+            if self.state.get_usage(key, window_start) >= self.token_quota:
+                self.stats['quota_exceeded'] += 1
+                return False, 'Token quota exceeded.', window_start + self.quota_window - now
+
+        if self.requests_per_second > 0:
+            wait = self.state.take_token(key, self.requests_per_second, self.burst, now)
+            if wait > 0:
+                self.stats['rate_limited'] += 1
+                return False, 'Rate limit exceeded.', wait
+
+        self.stats['admitted'] += 1
+        return True, None, 0.0
+
+    def record_usage(self, key: str, tokens: int) -> int:
+        """Charges prompt plus completion tokens to the client's quota and returns the window total."""
+        return self.state.add_usage(key, self._window_start(self._clock()), tokens)
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that rejects requests over the rate limit or quota with HTTP 429
+    before they reach the application. The client key of admitted requests is stored
+    in the request state as `client_key`. Requests to `exempt_paths` (e.g. health
+    checks of a load balancer) are neither limited nor counted.
+    """
+
+    def __init__(self, app, security: SecurityLayer, exempt_paths: tuple = ()):
+        self.app = app
+        self.security = security
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS' or scope.get('path') in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+        client = scope.get('client')
+        key = self.security.client_key(headers, self.security.client_address(headers, client[0] if client else None))
+        allowed, reason, retry_after = self.security.admit(key)
+        if not allowed:
+            body = json.dumps({'detail': reason}).encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': 429,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode('latin-1')),
+                    (b'retry-after', str(max(1, math.ceil(min(retry_after, 86400.0)))).encode('latin-1')),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        scope.setdefault('state', {})['client_key'] = key
+        await self.app(scope, receive, send)
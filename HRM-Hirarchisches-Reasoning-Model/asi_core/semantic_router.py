@@ -0,0 +1,152 @@
+import hashlib
+import json
+import math
+import os
+import re
+from pathlib import Path
+
+class SemanticRoleRouter:
+    """
+    Routes free text to the semantically closest role using a precomputed TF-IDF index.
+
+    Each role is represented by a sparse, L2-normalized vector over word tokens and
+    character n-grams of its name, aliases, description and capabilities. The vectors
+    are persisted next to the roles file, keyed by a hash of the role definitions, and kept
+    as an inverted index so that a query only touches the features it contains.
+    """
+
+    INDEX_SUFFIX = '.router_index.json'
+    INDEX_FORMAT_VERSION = 1
+    NGRAM_SIZE = 4
+
+    _TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, roles_path: Path, roles: list, min_score: float = 0.05, persist: bool = True):
+        """
+        Loads the role-vector index from disk or builds it from the role definitions.
+
+        Args:
+            roles_path (Path): The roles file; the index is stored next to it.
+            roles (list): The role definitions loaded from `roles_path`.
+            min_score (float): The minimum cosine similarity for a match.
+            persist (bool): Whether to read and write the on-disk index.
+        """
+        self._roles = roles
+        self.min_score = min_score
+        self.index_path = Path(roles_path).with_suffix(self.INDEX_SUFFIX)
+        content_hash = self._content_hash(roles)
+
+        index = self._read_index(content_hash) if persist else None
+        if index is None:
+            index = self._build_index(roles, content_hash)
+            if persist:
+                self._write_index(index)
+
+        self._idf = index['idf']
+        # Terms never seen in a role count as maximally rare, so they dilute the query norm
+        self._unseen_idf = math.log(1 + len(roles)) + 1.0
+        self._postings = {}  # feature -> list of (role index, weight)
+        for role_index, vector in enumerate(index['vectors']):
+            for feature, weight in vector.items():
+                self._postings.setdefault(feature, []).append((role_index, weight))
+
+    @classmethod
+    def _content_hash(cls, roles: list) -> str:
+        """Hashes the role definitions together with the index format."""
+        payload = json.dumps([cls.INDEX_FORMAT_VERSION, cls.NGRAM_SIZE, roles], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _role_text(cls, role: dict) -> str:
+        """Flattens the routable fields of a role into a single document."""
+        parts = [role['name'], role['description']]
+        parts.extend(role.get('aliases', []))
+        parts.extend(capability.replace('_', ' ') for capability in role['capabilities'])
+        return ' '.join(parts)
+
+    @classmethod
+    def _term_counts(cls, text: str) -> dict:
+        """Extracts word tokens and padded character n-grams with their counts."""
+        counts = {}
+        for token in cls._TOKEN_PATTERN.findall(text.lower().replace('_', ' ')):
+            counts['w:' + token] = counts.get('w:' + token, 0) + 1
+            padded = f' {token} '
+            for i in range(len(padded) - cls.NGRAM_SIZE + 1):
+                gram = padded[i:i + cls.NGRAM_SIZE]
+                counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    @staticmethod
+    def _weigh(counts: dict, idf: dict, unseen_idf: float = 0.0) -> dict:
+        """Applies sublinear TF and IDF weighting and L2-normalizes the vector."""
+        vector = {term: (1.0 + math.log(count)) * idf.get(term, unseen_idf) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm == 0:
+            return {}
+        return {term: weight / norm for term, weight in vector.items() if term in idf}
+
+    def _build_index(self, roles: list, content_hash: str) -> dict:
+        """Computes IDF weights and one normalized vector per role."""
+        documents = [self._term_counts(self._role_text(role)) for role in roles]
+        document_frequency = {}
+        for counts in documents:
+            for term in counts:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        n_documents = len(documents)
+        idf = {term: math.log((1 + n_documents) / (1 + df)) + 1.0 for term, df in document_frequency.items()}
+        return {
+            'content_hash': content_hash,
+            'idf': idf,
+            'vectors': [self._weigh(counts, idf) for counts in documents],
+        }
+
+    def _read_index(self, content_hash: str) -> dict | None:
+        """Reads the persisted index if it matches the current role definitions."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if index.get('content_hash') != content_hash or len(index.get('vectors', [])) != len(self._roles):
+            return None
+        return index
+
+    def _write_index(self, index: dict):
+        """Persists the index; a read-only location only costs a rebuild on the next start."""
+        # Atomic, so an interrupted write or a concurrent reader never sees a truncated index
+        temp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+
+    def similarities(self, user_input: str) -> dict:
+        """
+        Computes the cosine similarity between the input and every role sharing a feature with it.
+
+        Args:
+            user_input (str): The raw user message.
+
+        Returns:
+            dict: A mapping of role index to cosine similarity.
+        """
+        query = self._weigh(self._term_counts(user_input), self._idf, self._unseen_idf)
+        scores = {}
+        for feature, query_weight in query.items():
+            for role_index, role_weight in self._postings.get(feature, ()):
+                scores[role_index] = scores.get(role_index, 0.0) + query_weight * role_weight
+        return scores
+
+    def route(self, user_input: str) -> dict | None:
+        """
+        Returns the most similar role, or None if no role reaches `min_score`.
+        """
+        scores = self.similarities(user_input)
+        if not scores:
+            return None
+        best_index = min(scores, key=lambda index: (-scores[index], index))
+        if scores[best_index] < self.min_score:
+            return None
+        return self._roles[best_index]
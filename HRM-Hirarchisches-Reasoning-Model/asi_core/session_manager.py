@@ -0,0 +1,161 @@
+import asyncio
+import inspect
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: add the project root to the Python path to allow importing from asi_core
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from asi_core.role_manager import RoleManager
+from asi_core.feedback_store import FeedbackStore
+from asi_core.user_interface import build_response
+
+class Session:
+    """The lightweight per-user state of a network session."""
+
+    __slots__ = ('session_id', 'user_id', 'active_role', 'last_seen')
+
+    def __init__(self, session_id: str, user_id: str, now: float):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.active_role = None  # Name of the last routed role; resolved via the RoleManager
+        self.last_seen = now
+
+class SessionManager:
+    """
+    Manages many concurrent user sessions on top of a shared RoleManager and FeedbackStore.
+
+    Sessions are kept in least-recently-used order, so evicting idle sessions only
+    inspects the sessions that have actually expired.
+    """
+
+    def __init__(self, role_manager: RoleManager, feedback_store: FeedbackStore,
+                 idle_timeout: float = 900.0, responder=None, clock=time.monotonic):
+        """
+        Initializes the SessionManager.
+
+        Args:
+            role_manager (RoleManager): The shared RoleManager instance.
+            feedback_store (FeedbackStore): The shared FeedbackStore instance.
+            idle_timeout (float): Seconds of inactivity after which a session is evicted.
+            responder (callable, optional): Called as `responder(role, user_input)` to produce
+                the answer; may be a coroutine function. Defaults to `build_response`.
+            clock (callable): The monotonic time source, replaceable for tests.
+        """
+        self.role_manager = role_manager
+        self.feedback_store = feedback_store
+        self.idle_timeout = idle_timeout
+        self.responder = responder or build_response
+        self._clock = clock
+        self._sessions = OrderedDict()  # session_id -> Session, least recently used first
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create_session(self, user_id: str | None = None) -> Session:
+        """
+        Opens a new session.
+
+        Args:
+            user_id (str, optional): The user's identifier; defaults to the session ID.
+
+        Returns:
+            Session: The new session.
+        """
+        session_id = secrets.token_urlsafe(16)
+        session = Session(session_id, user_id or session_id, self._clock())
+        self._sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> Session:
+        """
+        Looks up a session and marks it as active.
+
+        Raises:
+            KeyError: If the session does not exist or has expired.
+        """
+        session = self._sessions.get(session_id)
+        now = self._clock()
+        if session is None or now - session.last_seen > self.idle_timeout:
+            self._sessions.pop(session_id, None)
+            raise KeyError(f"Session not found or expired: {session_id}")
+        session.last_seen = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        """Closes a session, returning False if it did not exist."""
+        return self._sessions.pop(session_id, None) is not None
+
+    async def handle_message(self, session_id: str, user_input: str) -> dict:
+        """
+        Routes a message to a role and produces the response.
+
+        Returns:
+            dict: The selected role name and the response text.
+
+        Raises:
+            KeyError: If the session does not exist or has expired.
+            RuntimeError: If the roles file defines no roles.
+        """
+        session = self.get_session(session_id)
+        role = self.role_manager.route(user_input, default='AURA')
+        if role is None:
+            raise RuntimeError(f"No roles are configured in {self.role_manager.roles_path}.")
+        session.active_role = role['name']
+
+        response = self.responder(role, user_input)
+        if inspect.isawaitable(response):
+            response = await response
+        return {'role': role['name'], 'response': response}
+
+    async def add_feedback(self, session_id: str, feedback_text: str, metadata: dict = None) -> dict:
+        """
+        Records feedback for a session without blocking the event loop.
+
+        Returns:
+            dict: The stored feedback entry.
+        """
+        session = self.get_session(session_id)
+        return await asyncio.to_thread(
+            self.feedback_store.add_feedback,
+            user_id=session.user_id,
+            feedback_text=feedback_text,
+            context={'active_role': session.active_role or 'None'},
+            metadata=metadata
+        )
+
+    def evict_idle(self) -> int:
+        """
+        Removes all sessions that have been idle for longer than `idle_timeout`.
+
+        Returns:
+            int: The number of evicted sessions.
+        """
+        cutoff = self._clock() - self.idle_timeout
+        evicted = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    async def run_eviction(self, interval: float = 60.0):
+        """Periodically evicts idle sessions until the task is cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def get_stats(self) -> dict:
+        """Returns basic session statistics."""
+        return {
+            'active_sessions': len(self._sessions),
+            'idle_timeout_s': self.idle_timeout,
+            'roles_version': self.role_manager.version,
+        }
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# Set in the child process of `run_profiled`; enables phase reporting
+PROFILE_ENV = 'HRM_PROFILE_STARTUP'
+
+_PHASE_PREFIX = 'startup phase:'
+_IMPORT_PREFIX = 'import time:'
+
+def profiling() -> bool:
+    """Whether this process is being profiled; entry points stop once initialized."""
+    return os.environ.get(PROFILE_ENV) == '1'
+
+@contextmanager
+def phase(name: str):
+    """
+    Times an initialization phase (e.g. loading a component) when profiling.
+
+    The result is written to stderr in the same format as `-X importtime`, so the
+    profiler can collect imports and phases from one stream. Outside of profiling
+    this does nothing.
+    """
+    if not profiling():
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        print(f"{_PHASE_PREFIX} {(time.perf_counter_ns() - start) // 1000} | {name}", file=sys.stderr, flush=True)
+
+def parse_profile(stderr: str) -> tuple:
+    """
+    Splits the stderr of a profiled run into imports, phases and other output.
+
+    Returns:
+        tuple: (imports as (name, depth, self_us, cumulative_us), phases as (name, us), other lines)
+    """
+    imports, phases, other = [], [], []
+    for line in stderr.splitlines():
+        if line.startswith(_IMPORT_PREFIX):
+            fields = line[len(_IMPORT_PREFIX):].split('|')
+            if not fields[0].strip().isdigit():
+                continue  # The header line
+            name = fields[2].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            imports.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+        elif line.startswith(_PHASE_PREFIX):
+            micros, _, name = line[len(_PHASE_PREFIX):].partition('|')
+            phases.append((name.strip(), int(micros)))
+        else:
+            other.append(line)
+    return imports, phases, other
+
+def run_profiled(argv: list, top: int = 15) -> int:
+    """
+    Re-runs a command line under `-X importtime` and reports where startup time goes.
+
+    The child runs with PROFILE_ENV set, so entry points exit once they are
+    initialized instead of serving or waiting for input.
+
+    Args:
+        argv (list): The script and arguments to run (without the profiling flag).
+        top (int): How many modules to list.
+
+    Returns:
+        int: The child's exit code.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', *argv], env={**os.environ, PROFILE_ENV: '1'},
+                               stdin=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    imports, phases, other = parse_profile(completed.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+
+    top_level = sorted((entry for entry in imports if entry[1] == 0), key=lambda entry: -entry[3])
+    import_ms = sum(entry[3] for entry in top_level) / 1000
+    print(f"\nStartup profile: {wall_ms:.1f} ms wall clock, {len(imports)} modules imported in {import_ms:.1f} ms")
+    print("Slowest top-level imports (cumulative):")
+    for name, _, _, cumulative in top_level[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print("Slowest modules (self):")
+    for name, _, self_us, _ in sorted(imports, key=lambda entry: -entry[2])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+    if phases:
+        print("Initialization:")
+        for name, micros in phases:
+            print(f"  {micros / 1000:8.1f} ms  {name}")
+    return completed.returncode
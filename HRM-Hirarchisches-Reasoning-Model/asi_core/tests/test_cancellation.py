@@ -0,0 +1,79 @@
+import unittest
+import threading
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.cancellation import CancellationToken, GenerationCancelled
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCancellationToken(unittest.TestCase):
+    """Unit tests for the CancellationToken class."""
+
+    def test_not_cancelled_initially(self):
+        """Test that a fresh token does not fire."""
+        token = CancellationToken()
+        self.assertFalse(token.cancelled)
+        self.assertIsNone(token.reason)
+        token.raise_if_cancelled()
+
+    def test_cancel_keeps_first_reason(self):
+        """Test cancelling and the reported reason."""
+        token = CancellationToken()
+        token.cancel("Client disconnected.")
+        token.cancel("Later reason.")
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.reason, "Client disconnected.")
+
+    def test_deadline(self):
+        """Test that the token fires once its deadline has passed."""
+        clock = FakeClock()
+        token = CancellationToken(deadline=10.0, clock=clock)
+        clock.now = 9.9
+        self.assertFalse(token.cancelled)
+        clock.now = 10.0
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.reason, CancellationToken.DEADLINE_REASON)
+
+    def test_raise_if_cancelled_reports_progress(self):
+        """Test the exception raised by a cancelled generation loop."""
+        token = CancellationToken()
+        token.cancel("Client disconnected.")
+        with self.assertRaises(GenerationCancelled) as context:
+            token.raise_if_cancelled(completion_tokens=17)
+        self.assertEqual(context.exception.reason, "Client disconnected.")
+        self.assertEqual(context.exception.completion_tokens, 17)
+
+    def test_cancel_from_another_thread_stops_loop(self):
+        """Test a generation-style loop polling a token cancelled by another thread."""
+        token = CancellationToken()
+        generated = []
+        started = threading.Event()
+
+        def generate():
+            try:
+                while True:
+                    generated.append('x')
+                    started.set()
+                    token.raise_if_cancelled(len(generated))
+            except GenerationCancelled as e:
+                generated.append(e.completion_tokens)
+
+        worker = threading.Thread(target=generate)
+        worker.start()
+        started.wait(timeout=5)
+        token.cancel()
+        worker.join(timeout=5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(generated[-1], len(generated) - 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import asyncio
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.diagnostics import LoopLagMonitor, memory_profile, profile_event_loop, sample_stacks
+
+def busy_function(stop: threading.Event):
+    """Keeps a thread busy until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+def blocking_callback():
+    """Blocks the event loop like a synchronous call in a coroutine would."""
+    time.sleep(0.3)
+
+class TestDiagnostics(unittest.TestCase):
+    """Unit tests for the live profiling helpers and the event-loop lag monitor."""
+
+    def test_sample_stacks_are_collapsed(self):
+        """A busy thread shows up as 'thread;...;function count' lines."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_function, args=(stop,), name='busy-worker')
+        worker.start()
+        try:
+            collapsed = sample_stacks(0.2, interval=0.002)
+        finally:
+            stop.set()
+            worker.join()
+        lines = [line for line in collapsed.splitlines() if line.startswith('busy-worker;')]
+        self.assertTrue(lines)
+        self.assertTrue(any('test_diagnostics.py:busy_function' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+
+    def test_profile_event_loop(self):
+        """cProfile reports the functions run by the loop while profiling."""
+        async def run():
+            profile = asyncio.create_task(profile_event_loop(0.2))
+            await asyncio.sleep(0.05)
+            blocking_callback()
+            return await profile
+
+        self.assertIn('blocking_callback', asyncio.run(run()))
+
+    def test_memory_profile_reports_growth(self):
+        """Allocations made while measuring are reported with their stack, weighted by bytes."""
+        retained = []
+
+        async def run():
+            profile = asyncio.create_task(memory_profile(0.2))
+            await asyncio.sleep(0.05)
+            retained.append(bytearray(2_000_000))
+            return await profile
+
+        collapsed = asyncio.run(run())
+        top_stack, size = collapsed.splitlines()[0].rsplit(' ', 1)
+        self.assertIn('test_diagnostics.py', top_stack.split(';')[-1])
+        self.assertGreaterEqual(int(size), 2_000_000)
+
+    def test_loop_lag_monitor_reports_blocking_callback(self):
+        """A callback blocking the loop is counted and logged with its stack."""
+        messages = []
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02, log=messages.append)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            blocking_callback()
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(run())
+        metrics = monitor.get_metrics()
+        self.assertEqual(metrics['stalls'], 1)
+        self.assertGreaterEqual(metrics['max_lag_ms'], 150)
+        self.assertIn('blocking_callback', metrics['last_stall']['stack'])
+        self.assertIn('blocked for', messages[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+import sys
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.evolution_engine import (
+    EvolutionEngine, build_replay_set, mutate, score_prompt, DIRECTIVES, LENGTH_PENALTY,
+)
+
+def slow_scorer(text, cases):
+    """A scorer that takes longer than the round budget allows."""
+    time.sleep(1.0)
+    return 0.0
+
+class TestEvolutionEngine(unittest.TestCase):
+    """Unit tests for the feedback-driven prompt evolution."""
+
+    def setUp(self):
+        """Set up temporary roles, mode prompts and feedback files."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.roles_path = base / 'roles.json'
+        self.modes_path = base / 'mode_prompts.json'
+        self.feedback_path = base / 'feedback.json'
+        self.state_path = base / 'state.json'
+        roles = [
+            {"name": "Prometheus", "description": "Visionary.", "capabilities": ["visionary_ideation"]},
+            {"name": "AURA", "description": "General.", "capabilities": ["causal_inference"]},
+        ]
+        modes = {"research": {"prompt": "Du bist ein Rechercheexperte.", "style": []}}
+        feedback = [
+            {"feedback_text": "Bitte mehr konkrete Beispiele.", "context": {"active_role": "Prometheus"}},
+            {"feedback_text": "Ein Beispiel hätte geholfen.", "context": {"active_role": "Prometheus"}},
+            {"feedback_text": "Wo ist die Quelle dafür?", "context": {"mode": "research"}},
+            {"feedback_text": "Danke!", "context": {"active_role": "AURA"}},
+        ]
+        for path, data in [(self.roles_path, {"roles": roles}), (self.modes_path, {"modes": modes}),
+                           (self.feedback_path, feedback)]:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def _engine(self, **kwargs):
+        return EvolutionEngine(self.roles_path, self.modes_path, self.feedback_path, self.state_path,
+                               max_workers=2, seed=1, **kwargs)
+
+    def test_build_replay_set(self):
+        """Only feedback mentioning a criterion becomes a case, keyed by role or mode."""
+        with open(self.feedback_path, encoding='utf-8') as f:
+            replay = build_replay_set(json.load(f))
+        self.assertEqual(set(replay), {'role:Prometheus', 'mode:research'})
+        self.assertEqual(len(replay['role:Prometheus']), 2)
+        self.assertEqual(replay['mode:research'][0]['criteria'], ['evidence'])
+
+    def test_score_prefers_addressed_criteria(self):
+        """A prompt asking for what the feedback requests scores higher."""
+        cases = [{'text': 'Beispiele fehlen', 'criteria': ['examples']}]
+        self.assertGreater(score_prompt("Antworte. Nenne konkrete Beispiele.", cases), score_prompt("Antworte.", cases))
+        # Without feedback, longer prompts only cost
+        self.assertAlmostEqual(score_prompt("eins zwei", []), -2 * LENGTH_PENALTY)
+
+    def test_mutate_changes_style_by_one_directive(self):
+        """Each mutation adds, removes or replaces exactly one directive."""
+        rng = random.Random(0)
+        style = [DIRECTIVES[0]]
+        for _ in range(20):
+            mutated = mutate(style, rng)
+            self.assertNotEqual(mutated, style)
+            self.assertLessEqual(abs(len(mutated) - len(style)), 1)
+            self.assertEqual(len(set(mutated)), len(mutated))
+
+    def test_round_promotes_winners(self):
+        """Variants addressing the feedback are promoted and written back."""
+        stats = self._engine().run_round(budget_s=30)
+        self.assertEqual({promotion['key'] for promotion in stats['promotions']}, {'role:Prometheus', 'mode:research'})
+        with open(self.roles_path, encoding='utf-8') as f:
+            roles = {role['name']: role for role in json.load(f)['roles']}
+        self.assertIn("Nenne konkrete Beispiele.", roles['Prometheus']['style'])
+        self.assertNotIn('style', roles['AURA'])
+        with open(self.modes_path, encoding='utf-8') as f:
+            modes = json.load(f)['modes']
+        self.assertTrue(any('Quellen' in directive for directive in modes['research']['style']))
+
+    def test_dry_run_does_not_write(self):
+        """A dry run reports promotions without touching the prompt files."""
+        before = self.roles_path.read_text(encoding='utf-8')
+        stats = self._engine().run_round(budget_s=30, dry_run=True)
+        self.assertTrue(stats['promotions'])
+        self.assertEqual(self.roles_path.read_text(encoding='utf-8'), before)
+
+    def test_unchanged_variants_are_not_rescored(self):
+        """Evaluations are memoized by content hash, also across engine instances."""
+        first = self._engine().run_round(budget_s=30, dry_run=True)
+        self.assertGreater(first['evaluated'], 0)
+        second = self._engine().run_round(budget_s=30, dry_run=True)
+        self.assertEqual(second['evaluated'], 0)
+        self.assertEqual(second['cached'], second['variants'])
+
+    def test_score_cache_is_capped(self):
+        """Beyond SCORES_LIMIT the oldest scores are dropped, never those of the current round."""
+        engine = self._engine()
+        engine.state['scores'] = {f'old-{i}': 0.0 for i in range(5)}
+        with mock.patch('asi_core.evolution_engine.SCORES_LIMIT', 1):
+            stats = engine.run_round(budget_s=30, dry_run=True)
+        with open(self.state_path, encoding='utf-8') as f:
+            scores = json.load(f)['scores']
+        self.assertEqual(len(scores), stats['variants'])
+        self.assertFalse(any(key.startswith('old-') for key in scores))
+        # The kept scores are still reused
+        self.assertEqual(self._engine().run_round(budget_s=30, dry_run=True)['evaluated'], 0)
+
+    def test_round_respects_budget(self):
+        """Evaluations still running at the budget are abandoned and nothing is promoted."""
+        start = time.monotonic()
+        stats = self._engine(scorer=slow_scorer).run_round(budget_s=0.3)
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(stats['evaluated'], 0)
+        self.assertEqual(stats['timed_out'], stats['variants'])
+        self.assertEqual(stats['promotions'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import types
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from hrm_autotune import measure, select_profile, tune_model
+
+class TestSelectProfile(unittest.TestCase):
+    """Unit tests for the choice of the configuration to serve with."""
+
+    def setUp(self):
+        """Create model files whose sizes stand for their quantization."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name, size in (('q2', 100), ('q4', 200), ('q8', 400)):
+            path = os.path.join(self.temp_dir.name, f'hrm.{name}.gguf')
+            with open(path, 'wb') as f:
+                f.write(b'\0' * size)
+            self.paths[name] = path
+        self.candidates = [
+            self._candidate('q2', gen=20.0, rss=1000),
+            self._candidate('q4', gen=12.0, rss=2000),
+            self._candidate('q8', gen=6.0, rss=4000),
+        ]
+
+    def tearDown(self):
+        """Remove the model files."""
+        self.temp_dir.cleanup()
+
+    def _candidate(self, name: str, gen: float, rss: float, threads: int = 4) -> dict:
+        return {'model_path': self.paths[name], 'threads': threads, 'batch_size': 256,
+                'gen_tokens_per_sec': gen, 'prompt_tokens_per_sec': 10 * gen, 'peak_rss_mb': rss}
+
+    def _chosen(self, candidates=None, max_rss_mb=None, min_tokens_per_sec=None):
+        profile = select_profile(self.candidates if candidates is None else candidates, max_rss_mb, min_tokens_per_sec)
+        return profile and Path(profile['model_path']).name
+
+    def test_fastest_wins_without_speed_target(self):
+        self.assertEqual(self._chosen(), 'hrm.q2.gguf')
+
+    def test_largest_model_reaching_the_speed_target_wins(self):
+        self.assertEqual(self._chosen(min_tokens_per_sec=10), 'hrm.q4.gguf')
+        self.assertEqual(self._chosen(min_tokens_per_sec=5), 'hrm.q8.gguf')
+
+    def test_fastest_wins_if_no_model_reaches_the_target(self):
+        self.assertEqual(self._chosen(min_tokens_per_sec=50), 'hrm.q2.gguf')
+
+    def test_memory_budget_discards_candidates(self):
+        self.assertEqual(self._chosen(max_rss_mb=2500, min_tokens_per_sec=5), 'hrm.q4.gguf')
+        self.assertIsNone(self._chosen(max_rss_mb=500))
+        self.assertIsNone(self._chosen(candidates=[]))
+
+    def test_faster_configuration_of_the_same_model_wins(self):
+        candidates = [self._candidate('q8', gen=6.0, rss=4000, threads=4),
+                      self._candidate('q8', gen=7.5, rss=4000, threads=8)]
+        self.assertEqual(select_profile(candidates, None, 5)['threads'], 8)
+
+class TestTuneModel(unittest.TestCase):
+    """Unit tests for measuring and tuning one model with fake trials."""
+
+    def _trial(self, threads, batch_size, gen, prompt, rss) -> dict:
+        return {'model_path': 'hrm.gguf', 'threads': threads, 'batch_size': batch_size, 'load_s': 1.0,
+                'prompt_tokens_per_sec': prompt, 'gen_tokens_per_sec': gen, 'peak_rss_mb': rss}
+
+    def _tune(self, trials: dict, max_rss_mb=None):
+        """Runs tune_model with `trials` mapping (threads, batch_size) to a measured result."""
+        args = types.SimpleNamespace(prompt_tokens=16, gen_tokens=4, timeout=1.0, max_rss_mb=max_rss_mb)
+        def fake_measure(model_path, threads, batch_size, *rest):
+            return trials[threads, batch_size]
+
+        with mock.patch('hrm_autotune.measure', side_effect=fake_measure):
+            return tune_model('hrm.gguf', [2, 4], [8, 64], args)
+
+    def test_memory_budget_applies_before_picking(self):
+        """A faster configuration over the budget does not hide a slower one within it."""
+        trials = {
+            (2, 8): self._trial(2, 8, gen=5.0, prompt=50.0, rss=1000),
+            (4, 8): self._trial(4, 8, gen=9.0, prompt=90.0, rss=3000),
+            (2, 64): self._trial(2, 64, gen=5.0, prompt=80.0, rss=1500),
+            (4, 64): self._trial(4, 64, gen=9.0, prompt=150.0, rss=3500),
+        }
+        best, _ = self._tune(trials)
+        self.assertEqual((best['threads'], best['batch_size']), (4, 64))
+        best, results = self._tune(trials, max_rss_mb=2000)
+        self.assertEqual((best['threads'], best['batch_size']), (2, 64))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(self._tune(trials, max_rss_mb=500)[0], None)
+
+    def test_unreadable_trial_output_is_an_error_entry(self):
+        for stdout in ('', 'llama.cpp: loading model\n', '{"abgebrochen\n', '42\n'):
+            completed = subprocess.CompletedProcess([], 0, stdout=stdout, stderr='')
+            with mock.patch('hrm_autotune.subprocess.run', return_value=completed):
+                result = measure('hrm.gguf', 2, 8, 16, 4, 1.0)
+            self.assertEqual(result['threads'], 2)
+            self.assertIn('no result', result['error'])
+
+    def test_trial_result_after_stray_output(self):
+        trial = self._trial(2, 8, gen=5.0, prompt=50.0, rss=1000)
+        completed = subprocess.CompletedProcess([], 0, stdout='Lade Modell...\n' + json.dumps(trial) + '\n', stderr='')
+        with mock.patch('hrm_autotune.subprocess.run', return_value=completed), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(measure('hrm.gguf', 2, 8, 16, 4, 1.0), trial)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import contextlib
+import io
+import json
+from pathlib import Path
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from hrm_chat import HRMChat, MODE_SYSTEM_PROMPTS, _load_completed_ids, _percentile, load_batch_prompts, run_batch
+
+class FakeCompletions:
+    """Stands in for HRMChat.complete: answers with the prompt reversed, or fails for marked prompts."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, chat, messages, timeout=30, priority='interactive'):
+        with self._lock:
+            self.calls.append({'messages': messages, 'timeout': timeout, 'priority': priority})
+        prompt = messages[-1]['content']
+        if 'FEHLER' in prompt:
+            raise RuntimeError('Server nicht erreichbar')
+        return {'choices': [{'message': {'content': prompt[::-1]}}], 'usage': {'completion_tokens': 3}}
+
+    def prompts(self) -> set:
+        return {call['messages'][-1]['content'] for call in self.calls}
+
+class TestPercentile(unittest.TestCase):
+    """Unit tests for the nearest-rank percentile."""
+
+    def test_nearest_rank(self):
+        values = [float(v) for v in range(1, 11)]
+        self.assertEqual(_percentile(values, 50), 5.0)
+        self.assertEqual(_percentile(values, 90), 9.0)
+        self.assertEqual(_percentile(values, 99), 10.0)
+        self.assertEqual(_percentile(values, 0), 1.0)
+        self.assertEqual(_percentile(values, 100), 10.0)
+
+    def test_small_and_empty_lists(self):
+        self.assertEqual(_percentile([2.5], 99), 2.5)
+        self.assertEqual(_percentile([1.0, 3.0], 50), 1.0)
+        self.assertEqual(_percentile([], 50), 0.0)
+
+class TestRunBatch(unittest.TestCase):
+    """Unit tests for the batch mode with a fake completion call."""
+
+    def setUp(self):
+        """Create a prompt file with three chat prompts and one code prompt."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.input_path = base / 'prompts.jsonl'
+        self.output_path = base / 'prompts.results.jsonl'
+        prompts = [
+            {'id': 'a', 'prompt': 'eins'},
+            {'id': 'b', 'prompt': 'zwei FEHLER'},
+            {'id': 'c', 'prompt': 'drei'},
+            {'id': 'd', 'prompt': 'Was macht das?', 'mode': 'code', 'context': 'print(1)'},
+        ]
+        self.input_path.write_text(''.join(json.dumps(p) + '\n' for p in prompts), encoding='utf-8')
+        self.fake = FakeCompletions()
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def _run_batch(self):
+        with mock.patch.object(HRMChat, 'complete', autospec=True, side_effect=self.fake), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return run_batch(self.input_path, self.output_path, concurrency=2, timeout=5)
+
+    def _records(self) -> list:
+        with open(self.output_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_results_and_stats(self):
+        stats = self._run_batch()
+        self.assertEqual((stats['processed'], stats['succeeded'], stats['failed']), (4, 3, 1))
+        self.assertLessEqual(stats['latency_p50_s'], stats['latency_p90_s'])
+        self.assertLessEqual(stats['latency_p90_s'], stats['latency_p99_s'])
+
+        records = {record['id']: record for record in self._records()}
+        self.assertEqual(records['a']['response'], 'snie')
+        self.assertEqual(records['b'], {**records['b'], 'status': 'error', 'error': 'Server nicht erreichbar'})
+        self.assertEqual(records['d']['mode'], 'code')
+        # Batch requests carry no history, use the batch queue and the mode's system prompt
+        code_call = next(call for call in self.fake.calls if call['messages'][0]['role'] == 'system')
+        self.assertEqual(code_call['messages'][0]['content'], MODE_SYSTEM_PROMPTS['code'])
+        self.assertTrue(code_call['messages'][1]['content'].startswith('Code-Kontext: print(1)'))
+        self.assertTrue(all(call['priority'] == 'batch' and call['timeout'] == 5 for call in self.fake.calls))
+
+    def test_resume_after_partial_output(self):
+        """A rerun skips the successful IDs of an interrupted run and retries failed ones."""
+        self.output_path.write_text(
+            json.dumps({'id': 'a', 'status': 'ok', 'response': 'alt'}) + '\n'
+            + json.dumps({'id': 'c', 'status': 'error', 'error': 'timeout'}) + '\n'
+            + '{"id": "d", "status": "o',  # Cut off by a crash
+            encoding='utf-8')
+        self.assertEqual(_load_completed_ids(self.output_path), {'a'})
+
+        stats = self._run_batch()
+        self.assertEqual(stats['processed'], 3)
+        self.assertEqual(self.fake.prompts() & {'eins'}, set())
+        self.assertIn('drei', self.fake.prompts())
+        self.assertEqual(_load_completed_ids(self.output_path), {'a', 'c', 'd'})
+
+        # Only the failing entry is left for the next run
+        self.fake.calls.clear()
+        self.assertEqual(self._run_batch()['processed'], 1)
+        self.assertEqual(self.fake.prompts(), {'zwei FEHLER'})
+
+    def test_ids_are_kept_as_given(self):
+        """Falsy IDs stay IDs; only a missing ID falls back to the line number."""
+        self.input_path.write_text('{"id": 0, "prompt": "a"}\n{"id": "", "prompt": "b"}\n{"prompt": "c"}\n',
+                                   encoding='utf-8')
+        self.assertEqual([item['id'] for item in load_batch_prompts(self.input_path)], ['0', '', '3'])
+
+    def test_bad_rows_reject_the_file_up_front(self):
+        """Duplicate IDs and unknown modes are reported before any request is sent."""
+        for rows in ('{"id": "a", "prompt": "x"}\n{"id": "a", "prompt": "y"}\n',
+                     '{"prompt": "x"}\n{"prompt": "y", "mode": "poem"}\n'):
+            self.input_path.write_text(rows, encoding='utf-8')
+            with self.assertRaises(ValueError):
+                self._run_batch()
+        self.assertEqual(self.fake.calls, [])
+        self.assertFalse(self.output_path.exists())
+
+    def test_missing_output_file(self):
+        self.assertEqual(_load_completed_ids(self.output_path), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.cancellation import CancellationToken, GenerationCancelled
+from asi_core.memory_governor import MemoryBudgetExceeded
+from asi_core.request_scheduler import DeadlineExceeded
+from hrm_model_server import MAX_LINE_BYTES, InvalidRequest, ModelServer, RemoteHRMModel
+from mcp_hrm_server import HRMMCPServer
+
+# A stub model that produces 400 tokens at 200 tokens/s unless max_new_tokens stops it earlier
+STUB_ENV = {
+    'HRM_STUB_TOKENS_PER_SEC': '200', 'HRM_STUB_FIRST_TOKEN_MS': '0', 'HRM_STUB_PROMPT_MS_PER_TOKEN': '0',
+    'HRM_STUB_COMPLETION_TOKENS': '400', 'HRM_STUB_JITTER': '0',
+}
+
+class TestModelServer(unittest.TestCase):
+    """Tests of the Unix-socket protocol between ModelServer and RemoteHRMModel with the stub backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        with mock.patch.dict(os.environ, STUB_ENV):
+            model = HRMMCPServer(backend='stub', profile_path=os.devnull)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.server = ModelServer(model, os.path.join(cls.tmp.name, 'model.sock'))
+        # The server runs on its own loop: RemoteHRMModel's constructor blocks on the socket
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def listen():
+            cls.listener = await asyncio.start_unix_server(cls.server._handle_connection, path=cls.server.socket_path,
+                                                           limit=MAX_LINE_BYTES)
+            started.set()
+
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(listen(), cls.loop).result(5)
+        started.wait(5)
+        cls.remote = RemoteHRMModel(cls.server.socket_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.listener.close)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.server.memory.budget_bytes = None
+
+    def _run(self, coroutine, timeout=10):
+        return asyncio.run(asyncio.wait_for(coroutine, timeout))
+
+    def _wait_idle(self):
+        """Waits until the server finished every generation, e.g. after a cancelled request."""
+        for _ in range(100):
+            if self.server.scheduler.get_metrics()['in_flight'] == 0 and self.server.memory.in_flight == 0:
+                return
+            time.sleep(0.02)
+        self.fail("The model server did not become idle.")
+
+    def test_generation_settings_are_fetched(self):
+        self.assertEqual(self.remote.generation_settings, self.server.model.generation_settings)
+
+    def test_completion(self):
+        result = self._run(self.remote.handle_completion('Hallo Welt', 5))
+        self.assertEqual(result['usage'], {'prompt_tokens': 3, 'completion_tokens': 5})
+        self.assertEqual(len(result['completion'].split()), 5)
+
+    def test_streaming(self):
+        pieces = []
+        result = self._run(self.remote.handle_completion('Erzähl etwas', 6,
+                                                         on_text=lambda text, n: pieces.append((text, n))))
+        self.assertEqual(''.join(text for text, _ in pieces), result['completion'])
+        self.assertEqual([n for _, n in pieces], list(range(1, 7)))
+
+    def test_cancellation_token(self):
+        """A fired token stops the generation on the server between two tokens."""
+        async def scenario():
+            token = CancellationToken()
+            asyncio.get_running_loop().call_later(0.2, token.cancel, 'Abgebrochen.')
+            await self.remote.handle_completion('Lang', None, token)
+
+        with self.assertRaises(GenerationCancelled) as caught:
+            self._run(scenario())
+        self.assertGreater(caught.exception.completion_tokens, 0)
+        self.assertLess(caught.exception.completion_tokens, 400)
+        self._wait_idle()
+
+    def test_cancelled_task_stops_the_generation(self):
+        """A caller that goes away (its task is cancelled) cancels the request on the server."""
+        async def scenario():
+            task = asyncio.create_task(self.remote.handle_completion('Lang', None))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        started = time.monotonic()
+        self._run(scenario())
+        self._wait_idle()
+        self.assertLess(time.monotonic() - started, 1.5)  # The full completion would take 2 s
+
+    def test_deadline_while_queued(self):
+        """A request whose deadline passes behind a running generation gets DeadlineExceeded."""
+        async def scenario():
+            blocker = CancellationToken()
+            running = asyncio.create_task(self.remote.handle_completion('Lang', None, blocker))
+            await asyncio.sleep(0.1)
+            try:
+                await self.remote.handle_completion('Kurz', 5, CancellationToken(deadline=time.monotonic() + 0.2))
+            finally:
+                blocker.cancel()
+                with self.assertRaises(GenerationCancelled):
+                    await running
+
+        with self.assertRaises(DeadlineExceeded):
+            self._run(scenario())
+        self._wait_idle()
+
+    def test_memory_error(self):
+        self.server.memory.budget_bytes = 1  # Below any RSS: every request is shed
+        with self.assertRaises(MemoryBudgetExceeded) as caught:
+            self._run(self.remote.handle_completion('Hallo', 5))
+        self.assertIsNotNone(caught.exception.retry_after)
+
+    def test_unknown_prefix_is_a_key_error(self):
+        with self.assertRaises(KeyError):
+            self._run(self.remote.handle_prefixed_completion('unbekannt', 'Hallo'))
+
+    def test_prefixed_completion(self):
+        self.remote.register_prefixes({'mentor': 'Du bist ein geduldiger Mentor.'})
+        result = self._run(self.remote.handle_prefixed_completion('mentor', 'Hallo'))
+        self.assertGreater(result['usage']['prompt_tokens'], 2)
+        self.assertEqual(result['usage']['completion_tokens'], 400)
+
+    def test_bad_lines_fail_only_their_request(self):
+        """Malformed and oversized lines are answered with an error; a generation on the same connection goes on."""
+        async def scenario():
+            reader, writer = await asyncio.open_unix_connection(self.server.socket_path, limit=MAX_LINE_BYTES)
+            try:
+                writer.write(json.dumps({'id': 1, 'method': 'completion', 'params': {'prompt': 'Hallo', 'max_new_tokens': 20}}).encode() + b'\n')
+                writer.write(b'{kein json\n[1, 2]\n{"method": "info"}\n{"id": 2}\n{"id": 3, "method": "cancel"}\n')
+                writer.write(b'{"id": 4, "method": "info", "pad": "' + b'x' * MAX_LINE_BYTES + b'"}\n')
+                writer.write(b'{"id": 5, "method": "completion", "params": {"prompt": "Hallo", "timeout_s": "bald"}}\n')
+                await writer.drain()
+                responses = {}
+                while not {1, 5} <= responses.keys():
+                    response = json.loads(await reader.readline())
+                    if 'text' not in response:
+                        responses.setdefault(response['id'], []).append(response['error' if 'error' in response else 'result'])
+                return responses
+            finally:
+                writer.close()
+
+        responses = self._run(scenario())
+        self.assertEqual(len(responses[1][0]['completion'].split()), 20)
+        # The oversized line may be answered more than once, always without an id
+        self.assertGreaterEqual(len(responses[None]), 4)
+        self.assertTrue(all(error['type'] == 'invalid' for error in responses[None]))
+        self.assertEqual([error['type'] for error in responses[2] + responses[3]], ['invalid', 'invalid'])
+        self.assertEqual(responses[5][0]['type'], 'error')
+
+    def test_oversized_request_is_refused_by_the_client(self):
+        with self.assertRaises(InvalidRequest):
+            self._run(self.remote.handle_completion('x' * MAX_LINE_BYTES, 5))
+        self.assertEqual(len(self._run(self.remote.handle_completion('Hallo', 2))['completion'].split()), 2)
+
+    def test_memory_estimate_counts_tokens(self):
+        """The estimate uses the model's tokenizer, not the number of words."""
+        prompt = 'eins,zwei,drei,vier,fünf'
+        with mock.patch.object(self.server.memory, 'estimate', wraps=self.server.memory.estimate) as estimate:
+            self._run(self.remote.handle_completion(prompt, 2))
+        self.assertEqual(estimate.call_args.args, (self.server.model.count_tokens(prompt), 2))
+        self.assertGreater(estimate.call_args.args[0], len(prompt.split()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import unittest
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+import httpx
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.load_balancer import LoadBalancer
+from hrm_router import BACKEND_HEADER, create_app
+
+COMPLETION = {"object": "chat.completion", "choices": [{"message": {"role": "assistant", "content": "ok"}}]}
+
+def streamed(status_code: int, payload: dict) -> httpx.Response:
+    """A JSON response streamed like one from the network (byte content would count as already read)."""
+    async def body():
+        yield json.dumps(payload).encode()
+    return httpx.Response(status_code, content=body(), headers={"content-type": "application/json"})
+
+class FakeBackends:
+    """Backends behind an httpx.MockTransport; `behavior` maps a host to how its chat completions answer."""
+
+    def __init__(self, behavior: dict = None):
+        self.behavior = behavior or {}
+        self.chat_requests = []
+        self.cancelled = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if request.url.path == "/ready":
+            return httpx.Response(200, json={"status": "ready"})
+        self.chat_requests.append(host)
+        behavior = self.behavior.get(host, "ok")
+        if behavior == "refuse":
+            raise httpx.ConnectError("Connection refused", request=request)
+        if behavior == "busy":
+            return streamed(503, {"detail": "Over the memory budget."})
+        if behavior == "hang":
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(host)
+                raise
+        if behavior == "hang-body":
+            return httpx.Response(200, content=self._hanging_body(host), headers={"content-type": "text/event-stream"})
+        if behavior == "break":
+            return httpx.Response(200, content=self._broken_body(request))
+        return streamed(200, COMPLETION)
+
+    async def _hanging_body(self, host):
+        try:
+            await asyncio.Event().wait()
+            yield b""
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled.append(host)
+            raise
+
+    async def _broken_body(self, request):
+        yield b'{"partial": '
+        raise httpx.ReadError("Connection reset", request=request)
+
+class TestHRMRouter(unittest.TestCase):
+    """Tests of the router's HTTP layer against mocked backends."""
+
+    def _run(self, backends: FakeBackends, hosts: tuple, scenario):
+        """Runs `scenario(app, client, balancer)` with the router's lifespan started."""
+        balancer = LoadBalancer([f"http://{host}" for host in hosts])
+        app = create_app(balancer, health_interval=60.0, transport=httpx.MockTransport(backends.handle))
+
+        async def main():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://router") as client:
+                    return await scenario(app, client, balancer)
+        return asyncio.run(main())
+
+    @staticmethod
+    def _chat(client, session=None):
+        headers = {"X-HRM-Session": session} if session else {}
+        return client.post("/v1/chat/completions", headers=headers,
+                           json={"messages": [{"role": "user", "content": "Hallo"}], "max_tokens": 16})
+
+    def assertIdle(self, balancer):
+        for backend in balancer.backends:
+            self.assertEqual((backend.url, backend.outstanding_tokens, backend.in_flight), (backend.url, 0, 0))
+
+    def test_success_releases_tokens(self):
+        """Test that a completed request is relayed and leaves no outstanding tokens."""
+        async def scenario(app, client, balancer):
+            response = await self._chat(client)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), COMPLETION)
+            self.assertEqual(response.headers[BACKEND_HEADER], "http://a")
+            self.assertIdle(balancer)
+        self._run(FakeBackends(), ("a",), scenario)
+
+    def test_retry_on_connect_error(self):
+        """Test that refused connections take backends out and the request is retried on the next one."""
+        backends = FakeBackends({"a": "refuse", "b": "refuse"})
+
+        async def scenario(app, client, balancer):
+            response = await self._chat(client)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers[BACKEND_HEADER], "http://c")
+            self.assertEqual([backend.healthy for backend in balancer.backends], [False, False, True])
+            self.assertEqual([backend.stats["errors"] for backend in balancer.backends], [1, 1, 0])
+            self.assertIdle(balancer)
+        self._run(backends, ("a", "b", "c"), scenario)
+        self.assertEqual(backends.chat_requests, ["a", "b", "c"])
+
+    def test_retry_on_503(self):
+        """Test that a backend shedding load gets the request retried elsewhere but stays in rotation."""
+        backends = FakeBackends({"a": "busy"})
+
+        async def scenario(app, client, balancer):
+            response = await self._chat(client)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers[BACKEND_HEADER], "http://b")
+            self.assertTrue(balancer.backends[0].healthy)
+            self.assertEqual(balancer.backends[0].last_error, "HTTP 503")
+            self.assertIdle(balancer)
+        self._run(backends, ("a", "b"), scenario)
+
+    def test_last_backend_503_is_relayed(self):
+        """Test that without another backend to try, the 503 reaches the client."""
+        async def scenario(app, client, balancer):
+            response = await self._chat(client)
+            self.assertEqual(response.status_code, 503)
+            self.assertIdle(balancer)
+        self._run(FakeBackends({"a": "busy"}), ("a",), scenario)
+
+    def test_sticky_sessions(self):
+        """Test that the turns of a conversation go to the same backend through the HTTP layer."""
+        async def scenario(app, client, balancer):
+            served = {}
+            for session in ("s1", "s2", "s1", "s2", "s1"):
+                response = await self._chat(client, session)
+                served.setdefault(session, set()).add(response.headers[BACKEND_HEADER])
+            self.assertEqual([len(backends) for backends in served.values()], [1, 1])
+            self.assertEqual(balancer.stats["sticky"], 3)
+            self.assertIdle(balancer)
+        self._run(FakeBackends(), ("a", "b"), scenario)
+
+    def test_error_mid_stream_releases_tokens(self):
+        """Test that a backend failing while relaying counts as an error and leaves no outstanding tokens."""
+        async def scenario(app, client, balancer):
+            response = await self._chat(client)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'{"partial": ')
+            await asyncio.sleep(0)
+            self.assertEqual(balancer.backends[0].stats["errors"], 1)
+            self.assertIn("ReadError", balancer.backends[0].last_error)
+            self.assertIdle(balancer)
+        self._run(FakeBackends({"a": "break"}), ("a",), scenario)
+
+    def _disconnecting_call(self, app, disconnect_after: float):
+        """Calls the app directly with a client that disconnects `disconnect_after` seconds after sending."""
+        body = json.dumps({"messages": [{"role": "user", "content": "Hallo"}]}).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/v1/chat/completions", "raw_path": b"/v1/chat/completions",
+            "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 5000), "server": ("router", 80),
+        }
+        sent = []
+        gone = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.call_later(disconnect_after, gone.set)
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+        return app(scope, receive, send), sent
+
+    def test_disconnect_while_backend_works(self):
+        """Test that a client leaving before the response headers cancels the upstream request."""
+        backends = FakeBackends({"a": "hang"})
+
+        async def scenario(app, client, balancer):
+            call, sent = self._disconnecting_call(app, 0.05)
+            await asyncio.wait_for(call, timeout=5)
+            self.assertEqual(sent[0]["status"], 499)
+            await asyncio.sleep(0.01)
+            self.assertIdle(balancer)
+        self._run(backends, ("a",), scenario)
+        self.assertEqual(backends.cancelled, ["a"])
+
+    def test_disconnect_before_first_chunk(self):
+        """Test that a client leaving before the first relayed chunk releases the backend and closes the upstream."""
+        backends = FakeBackends({"a": "hang-body"})
+
+        async def scenario(app, client, balancer):
+            call, sent = self._disconnecting_call(app, 0.05)
+            await asyncio.wait_for(call, timeout=5)
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+            self.assertIdle(balancer)
+        self._run(backends, ("a",), scenario)
+        self.assertEqual(backends.cancelled, ["a"])
+
+if __name__ == '__main__':
+    unittest.main()
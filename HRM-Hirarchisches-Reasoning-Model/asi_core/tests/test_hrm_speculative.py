@@ -0,0 +1,150 @@
+import unittest
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from hrm_speculative import Sampler, SpeculativeDecoder
+
+VOCAB = 32
+EOS = 0
+PROMPT = [5, 9, 14]
+LENGTH = 40  # The target ends every sequence at this length
+
+def target_next(prefix: list) -> int:
+    """The target model's most likely next token."""
+    if len(prefix) >= LENGTH:
+        return EOS
+    return (prefix[-1] * 7 + len(prefix)) % (VOCAB - 1) + 1
+
+def logits_for(next_fn, prefix: list) -> np.ndarray:
+    """Deterministic logits peaking at next_fn(prefix), with a prefix-dependent spread over the rest."""
+    rng = np.random.default_rng(len(prefix) * 1000 + prefix[-1])
+    logits = rng.normal(0.0, 1.0, VOCAB)
+    logits[next_fn(prefix)] += 4.0
+    return logits
+
+class FakeLlama:
+    """The parts of `llama_cpp.Llama` the decoder uses, with logits from a function of the prefix."""
+
+    def __init__(self, next_fn, n_ctx: int = 128):
+        self.next_fn = next_fn
+        self.input_ids = np.zeros(n_ctx, dtype=np.int64)
+        self.scores = np.zeros((n_ctx, VOCAB))
+        self.n_tokens = 0
+        self.evals = 0
+
+    def token_eos(self) -> int:
+        return EOS
+
+    def eval(self, tokens: list):
+        self.evals += 1
+        for token in tokens:
+            self.input_ids[self.n_tokens] = token
+            self.n_tokens += 1
+            self.scores[self.n_tokens - 1] = logits_for(self.next_fn, list(self.input_ids[:self.n_tokens]))
+
+def target_only(sampler: Sampler) -> list:
+    """Plain autoregressive sampling from the target's logits."""
+    sequence, output = list(PROMPT), []
+    while True:
+        token = sampler.sample(logits_for(target_next, sequence), sequence)
+        sequence.append(token)
+        output.append(token)
+        if token == EOS:
+            return output
+
+class TestSampler(unittest.TestCase):
+    """Unit tests for the Sampler class."""
+
+    def test_greedy_picks_argmax(self):
+        sampler = Sampler(temperature=0, repetition_penalty=1.0)
+        self.assertEqual(sampler.sample([0.1, 3.0, 0.2], []), 1)
+
+    def test_repetition_penalty_demotes_recent_tokens(self):
+        sampler = Sampler(temperature=0, repetition_penalty=2.0)
+        self.assertEqual(sampler.sample([0.1, 3.0, 2.0], [1]), 2)
+
+    def test_top_k_and_seed(self):
+        """Only the top-k tokens are sampled, reproducibly for a seed."""
+        logits = np.arange(10, dtype=np.float64)
+        draws = [Sampler(temperature=1.0, top_k=2, top_p=1.0, repetition_penalty=1.0, seed=3).sample(logits, [])
+                 for _ in range(2)]
+        self.assertEqual(draws[0], draws[1])
+        sampler = Sampler(temperature=1.0, top_k=2, top_p=1.0, repetition_penalty=1.0, seed=4)
+        self.assertTrue({sampler.sample(logits, []) for _ in range(50)} <= {8, 9})
+
+class TestSpeculativeDecoder(unittest.TestCase):
+    """Unit tests for the SpeculativeDecoder class with fake llama.cpp contexts."""
+
+    def _decoder(self, draft_next, sampler, **kwargs):
+        target = FakeLlama(target_next)
+        decoder = SpeculativeDecoder(target, FakeLlama(draft_next), sampler, **kwargs)
+        return decoder, target
+
+    def test_greedy_output_equals_target_only(self):
+        def sometimes_wrong(prefix):
+            return target_next(prefix) % (VOCAB - 1) + 1 if len(prefix) % 4 == 0 else target_next(prefix)
+
+        expected = target_only(Sampler(temperature=0))
+        decoder, _ = self._decoder(sometimes_wrong, Sampler(temperature=0))
+        self.assertEqual(list(decoder.generate(PROMPT)), expected)
+        self.assertEqual(expected[-1], EOS)
+
+    def test_sampled_output_equals_target_only_with_same_seed(self):
+        """With the same seed, the draft only changes the speed, not the tokens."""
+        def unrelated(prefix):
+            return (prefix[-1] + 3) % (VOCAB - 1) + 1
+
+        expected = target_only(Sampler(temperature=0.8, seed=11))
+        decoder, _ = self._decoder(unrelated, Sampler(temperature=0.8, seed=11))
+        self.assertEqual(list(decoder.generate(PROMPT)), expected)
+
+    def test_perfect_draft_grows_k_and_saves_passes(self):
+        # Without repetition penalty, greedy sampling picks exactly what the draft proposes
+        decoder, target = self._decoder(target_next, Sampler(temperature=0, repetition_penalty=1.0), k=2, k_max=5)
+        output = list(decoder.generate(PROMPT))
+        metrics = decoder.get_metrics()
+        self.assertEqual(metrics['k'], 5)
+        self.assertEqual(metrics['acceptance_rate'], 1.0)
+        self.assertEqual(metrics['generated'], len(output))
+        self.assertGreater(metrics['tokens_per_pass'], 3.0)
+        self.assertEqual(target.evals, metrics['steps'])
+
+    def test_wrong_draft_shrinks_k(self):
+        def always_wrong(prefix):
+            return target_next(prefix) % (VOCAB - 1) + 1
+
+        decoder, _ = self._decoder(always_wrong, Sampler(temperature=0), k=4, k_min=1)
+        output = list(decoder.generate(PROMPT))
+        metrics = decoder.get_metrics()
+        self.assertEqual(output, target_only(Sampler(temperature=0)))
+        self.assertEqual(metrics['k'], 1)
+        self.assertEqual(metrics['accepted'], 0)
+        self.assertEqual(metrics['tokens_per_pass'], 1.0)
+
+    def test_from_paths_applies_threads_and_batch_size(self):
+        """Tuned threads and batch size reach both llama.cpp contexts."""
+        loaded = []
+
+        def Llama(**options):
+            loaded.append(options)
+            return SimpleNamespace(n_vocab=lambda: VOCAB, token_eos=lambda: EOS)
+
+        with mock.patch.dict(sys.modules, {'llama_cpp': SimpleNamespace(Llama=Llama)}):
+            SpeculativeDecoder.from_paths('main.gguf', 'draft.gguf', threads=6, batch_size=256)
+            SpeculativeDecoder.from_paths('main.gguf', 'draft.gguf')
+        self.assertEqual(loaded[0], {'model_path': 'main.gguf', 'logits_all': True, 'n_ctx': 4096, 'verbose': False,
+                                     'n_threads': 6, 'n_batch': 256})
+        self.assertEqual(loaded[1], {'model_path': 'draft.gguf', 'n_ctx': 4096, 'verbose': False,
+                                     'n_threads': 6, 'n_batch': 256})
+        self.assertNotIn('n_threads', loaded[2])
+        self.assertNotIn('n_batch', loaded[3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.load_balancer import LoadBalancer, NoBackendAvailable, session_key
+
+URLS = ['http://a:8000', 'http://b:8000', 'http://c:8000']
+
+class TestLoadBalancer(unittest.TestCase):
+    """Unit tests for least-outstanding-tokens balancing with sticky conversations."""
+
+    def setUp(self):
+        self.balancer = LoadBalancer(URLS, sticky_slack_tokens=100)
+        self.a, self.b, self.c = self.balancer.backends
+
+    def test_least_outstanding_tokens(self):
+        """New requests go to the backend with the fewest outstanding tokens."""
+        self.balancer.acquire(self.a, 500)
+        self.balancer.acquire(self.b, 200)
+        self.balancer.acquire(self.c, 300)
+        self.assertIs(self.balancer.choose(), self.b)
+        self.balancer.release(self.a, 500)
+        self.assertIs(self.balancer.choose(), self.a)
+        self.assertEqual(self.a.outstanding_tokens, 0)
+        self.assertEqual(self.a.in_flight, 0)
+
+    def test_idle_backends_take_turns(self):
+        """Equally loaded backends are chosen in rotation."""
+        chosen = {self.balancer.choose().url for _ in range(3)}
+        self.assertEqual(chosen, set(URLS))
+
+    def test_conversations_stick_within_slack(self):
+        """A conversation stays on its backend until that one carries more than the slack above the least loaded."""
+        first = self.balancer.choose('conversation')
+        self.balancer.acquire(first, 80)
+        self.assertIs(self.balancer.choose('conversation'), first)
+        self.balancer.acquire(first, 80)
+        moved = self.balancer.choose('conversation')
+        self.assertIsNot(moved, first)
+        self.assertIs(self.balancer.choose('conversation'), moved)
+        self.assertEqual(self.balancer.stats['moved'], 1)
+        self.assertEqual(self.balancer.stats['sticky'], 2)
+
+    def test_unhealthy_backends_are_skipped(self):
+        """Failed health checks take a backend out after `fall` checks; one success restores it."""
+        sticky = self.balancer.choose('conversation')
+        self.balancer.record_health(sticky, False, 'timeout')
+        self.assertIs(self.balancer.choose('conversation'), sticky)
+        self.balancer.record_health(sticky, False, 'timeout')
+        self.assertFalse(sticky.healthy)
+        self.assertIsNot(self.balancer.choose('conversation'), sticky)
+        self.balancer.record_health(sticky, True)
+        self.assertTrue(sticky.healthy)
+
+    def test_mark_down_and_exclude(self):
+        """A refused connection takes the backend out at once; with none left, choosing fails."""
+        self.balancer.mark_down(self.a, 'refused')
+        self.assertEqual(self.balancer.healthy_count(), 2)
+        for _ in range(4):
+            self.assertIsNot(self.balancer.choose(), self.a)
+        with self.assertRaises(NoBackendAvailable):
+            self.balancer.choose(exclude=(self.b, self.c))
+        self.assertEqual(self.balancer.stats['unavailable'], 1)
+
+    def test_sessions_are_bounded(self):
+        """Only the most recently used conversations are remembered."""
+        balancer = LoadBalancer(URLS, max_sessions=2)
+        for key in ('one', 'two', 'three'):
+            balancer.choose(key)
+        self.assertEqual(balancer.get_metrics()['sessions'], 2)
+
+    def test_session_key(self):
+        """The explicit session header wins; otherwise the opening messages identify the conversation."""
+        self.assertEqual(session_key({'x-hrm-session': 'abc'}, []), 'session:abc')
+        opening = [{'role': 'system', 'content': 'Sei hilfreich.'}, {'role': 'user', 'content': 'Hallo'}]
+        later_turn = opening + [{'role': 'assistant', 'content': 'Hi!'}, {'role': 'user', 'content': 'Und nun?'}]
+        other = [{'role': 'system', 'content': 'Sei hilfreich.'}, {'role': 'user', 'content': 'Servus'}]
+        self.assertEqual(session_key({}, opening), session_key({}, later_turn))
+        self.assertNotEqual(session_key({}, opening), session_key({}, other))
+        self.assertIsNone(session_key({}, []))
+
+if __name__ == '__main__':
+    unittest.main()
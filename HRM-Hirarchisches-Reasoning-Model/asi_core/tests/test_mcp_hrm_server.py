@@ -0,0 +1,214 @@
+import unittest
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from mcp_hrm_server import HRMMCPServer, MCPStdioServer, SUPPORTED_PROTOCOL_VERSIONS, TOOLS
+
+# A stub model that produces 400 tokens at 200 tokens/s unless max_new_tokens stops it earlier
+STUB_ENV = {
+    'HRM_STUB_TOKENS_PER_SEC': '200', 'HRM_STUB_FIRST_TOKEN_MS': '0', 'HRM_STUB_PROMPT_MS_PER_TOKEN': '0',
+    'HRM_STUB_COMPLETION_TOKENS': '400', 'HRM_STUB_JITTER': '0',
+}
+
+class FakeWriter:
+    """Collects the server's output lines as parsed messages."""
+
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    def write(self, data: bytes):
+        for line in data.decode('utf-8').splitlines():
+            self.messages.put_nowait(json.loads(line))
+
+    async def drain(self):
+        pass
+
+class Session:
+    """One MCPStdioServer.serve() run over an in-memory stream."""
+
+    def __init__(self, model, limit: int = 2**16):
+        self.server = MCPStdioServer(model)
+        self.reader = asyncio.StreamReader(limit=limit)
+        self.writer = FakeWriter()
+        self.serving = asyncio.create_task(self.server.serve(self.reader, self.writer))
+
+    def send(self, message):
+        self.feed(json.dumps(message).encode('utf-8') + b'\n')
+
+    def feed(self, data: bytes):
+        self.reader.feed_data(data)
+
+    async def receive(self, timeout: float = 5) -> dict:
+        return await asyncio.wait_for(self.writer.messages.get(), timeout)
+
+    async def close(self):
+        self.reader.feed_eof()
+        await asyncio.wait_for(self.serving, 5)
+
+class TestMCPStdioServer(unittest.TestCase):
+    """Tests of the MCP stdio transport with the stub backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        with mock.patch.dict(os.environ, STUB_ENV):
+            cls.model = HRMMCPServer(backend='stub', profile_path=os.devnull)
+
+    def _run(self, scenario):
+        async def run():
+            session = Session(self.model)
+            try:
+                return await scenario(session)
+            finally:
+                await session.close()
+        return asyncio.run(asyncio.wait_for(run(), 10))
+
+    def _call(self, request_id, prompt, **extra):
+        params = {'name': 'completion', 'arguments': {'prompt': prompt, **extra.pop('arguments', {})}, **extra}
+        return {'jsonrpc': '2.0', 'id': request_id, 'method': 'tools/call', 'params': params}
+
+    def test_initialize_and_tools_list(self):
+        async def scenario(session):
+            session.send({'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',
+                          'params': {'protocolVersion': '2025-03-26', 'capabilities': {}}})
+            initialized = await session.receive()
+            session.send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+            session.send({'jsonrpc': '2.0', 'id': 2, 'method': 'initialize', 'params': {'protocolVersion': '1999-01-01'}})
+            fallback = await session.receive()
+            session.send({'jsonrpc': '2.0', 'id': 3, 'method': 'tools/list'})
+            return initialized, fallback, await session.receive()
+
+        initialized, fallback, tools = self._run(scenario)
+        self.assertEqual(initialized['id'], 1)
+        self.assertEqual(initialized['result']['protocolVersion'], '2025-03-26')
+        self.assertEqual(initialized['result']['serverInfo']['name'], 'hrm-mcp-server')
+        self.assertEqual(fallback['result']['protocolVersion'], SUPPORTED_PROTOCOL_VERSIONS[-1])
+        self.assertEqual(tools, {'jsonrpc': '2.0', 'id': 3, 'result': {'tools': TOOLS}})
+
+    def test_tools_call(self):
+        async def scenario(session):
+            session.send(self._call(1, 'Hallo Welt', arguments={'max_new_tokens': 5}))
+            return await session.receive()
+
+        response = self._run(scenario)
+        self.assertEqual(response['id'], 1)
+        self.assertFalse(response['result']['isError'])
+        self.assertEqual(len(response['result']['content'][0]['text'].split()), 5)
+        self.assertEqual(response['result']['_meta']['usage'], {'prompt_tokens': 3, 'completion_tokens': 5})
+
+    def test_progress_notifications(self):
+        """With a progressToken, every token is reported before the result."""
+        async def scenario(session):
+            session.send(self._call(1, 'Erzähl etwas', arguments={'max_new_tokens': 4}, _meta={'progressToken': 'p'}))
+            messages = [await session.receive()]
+            while 'id' not in messages[-1]:
+                messages.append(await session.receive())
+            return messages
+
+        *progress, response = self._run(scenario)
+        self.assertEqual([message['method'] for message in progress], ['notifications/progress'] * 4)
+        self.assertEqual([message['params']['progress'] for message in progress], [1, 2, 3, 4])
+        self.assertTrue(all(message['params']['progressToken'] == 'p' and message['params']['total'] == 4
+                            for message in progress))
+        self.assertEqual(''.join(message['params']['message'] for message in progress),
+                         response['result']['content'][0]['text'])
+
+    def test_cancelled_request_is_stopped_and_not_answered(self):
+        """notifications/cancelled stops the generation; later requests are still served."""
+        async def scenario(session):
+            session.send(self._call('lang', 'Lang'))
+            await asyncio.sleep(0.2)
+            session.send({'jsonrpc': '2.0', 'method': 'notifications/cancelled',
+                          'params': {'requestId': 'lang', 'reason': 'Nicht mehr nötig.'}})
+            # The full completion would take 2 s
+            for _ in range(50):
+                if not session.server._requests:
+                    break
+                await asyncio.sleep(0.02)
+            self.assertEqual(session.server._requests, {})
+            session.send({'jsonrpc': '2.0', 'id': 2, 'method': 'ping'})
+            return await session.receive()
+
+        self.assertEqual(self._run(scenario), {'jsonrpc': '2.0', 'id': 2, 'result': {}})
+
+    def test_responses_do_not_wait_for_slow_requests(self):
+        async def scenario(session):
+            session.send(self._call(1, 'Lang'))
+            session.send({'jsonrpc': '2.0', 'id': 2, 'method': 'ping'})
+            return await session.receive(timeout=1)
+
+        self.assertEqual(self._run(scenario)['id'], 2)
+
+    def test_malformed_input(self):
+        async def scenario(session):
+            session.feed(b'{kein json\n')
+            responses = [await session.receive()]
+            session.feed(b'\n')  # Empty lines are skipped
+            session.send([{'jsonrpc': '2.0', 'id': 1, 'method': 'ping'}])
+            responses.append(await session.receive())
+            session.send({'jsonrpc': '2.0', 'id': 2, 'method': 'resources/list'})
+            responses.append(await session.receive())
+            session.send({'jsonrpc': '2.0', 'id': 3, 'method': 'tools/call', 'params': {'name': 'unbekannt'}})
+            responses.append(await session.receive())
+            session.send(self._call(4, ''))
+            responses.append(await session.receive())
+            session.send({'jsonrpc': '2.0', 'id': 5, 'result': {}})  # A response is ignored
+            session.send({'jsonrpc': '2.0', 'id': 6, 'method': 'ping'})
+            responses.append(await session.receive())
+            return responses
+
+        responses = self._run(scenario)
+        self.assertEqual([(response['id'], response.get('error', {}).get('code')) for response in responses],
+                         [(None, -32700), (None, -32600), (2, -32601), (3, -32602), (4, -32602), (6, None)])
+
+    def test_oversized_message_is_skipped(self):
+        """A line over the reader's limit gets an error; the next message is still served."""
+        async def scenario(session):
+            session.feed(b'{"jsonrpc": "2.0", "id": 1, "method": "ping", "params": {"pad": "' + b'x' * 300 + b'"}}\n')
+            session.send({'jsonrpc': '2.0', 'id': 2, 'method': 'ping'})
+            return [await session.receive(), await session.receive()]
+
+        async def run():
+            session = Session(self.model, limit=100)
+            try:
+                return await scenario(session)
+            finally:
+                await session.close()
+
+        too_large, ping = asyncio.run(asyncio.wait_for(run(), 10))
+        self.assertEqual((too_large['id'], too_large['error']['code']), (None, -32600))
+        self.assertEqual(ping, {'jsonrpc': '2.0', 'id': 2, 'result': {}})
+
+    def test_invalid_max_new_tokens(self):
+        async def scenario(session):
+            responses = []
+            for request_id, value in enumerate(('5', -1, 0, 2.5, True), start=1):
+                session.send(self._call(request_id, 'Hallo', arguments={'max_new_tokens': value}))
+                responses.append(await session.receive())
+            return responses
+
+        self.assertEqual([response['error']['code'] for response in self._run(scenario)], [-32602] * 5)
+
+    def test_model_errors_are_tool_errors(self):
+        """An unloaded model or a failed inference is reported with isError."""
+        async def scenario(session):
+            session.send(self._call(1, 'Hallo', arguments={'max_new_tokens': 3}))
+            return await session.receive()
+
+        with mock.patch.object(self.model, 'llm', None):
+            unavailable = self._run(scenario)
+        with mock.patch.object(self.model, '_complete', side_effect=RuntimeError('kaputt')):
+            failed = self._run(scenario)
+        for response in (unavailable, failed):
+            self.assertTrue(response['result']['isError'])
+        self.assertIn('kaputt', failed['result']['content'][0]['text'])
+        self.assertFalse(self._run(scenario)['result']['isError'])
+
+if __name__ == '__main__':
+    unittest.main()
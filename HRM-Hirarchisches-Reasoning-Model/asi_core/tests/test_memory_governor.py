@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import time
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.memory_governor import MemoryGovernor, MemoryBudgetExceeded, read_rss
+
+MB = 2**20
+
+class FakeRss:
+    """An RSS reading the test sets."""
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+class TestMemoryGovernor(unittest.TestCase):
+    """Unit tests for memory-aware admission."""
+
+    def setUp(self):
+        self.rss = FakeRss(100 * MB)
+        # 1 MB per token and no overhead keep the arithmetic readable
+        self.governor = MemoryGovernor(budget_bytes=200 * MB, kv_bytes_per_token=MB, request_overhead_bytes=0,
+                                       max_wait=0.2, rss_reader=self.rss, poll_interval=0.01)
+
+    def test_read_rss(self):
+        """The real RSS of this process is readable and plausible."""
+        rss = read_rss()
+        self.assertIsNotNone(rss)
+        self.assertGreater(rss, MB)
+
+    def test_estimate(self):
+        """The estimate covers the KV cache of prompt and completion plus the overhead."""
+        governor = MemoryGovernor(kv_bytes_per_token=1000, request_overhead_bytes=500)
+        self.assertEqual(governor.estimate(10, 20), 30 * 1000 + 500)
+
+    def test_check_refuses_requests_that_never_fit(self):
+        """A request larger than the budget minus the idle RSS is refused without retry."""
+        with self.assertRaises(MemoryBudgetExceeded) as context:
+            self.governor.check(150 * MB)
+        self.assertIsNone(context.exception.retry_after)
+        self.assertEqual(self.governor.stats['too_large'], 1)
+        self.governor.check(50 * MB)
+
+    def test_check_sheds_when_over_budget(self):
+        """While the RSS alone exceeds the budget, new requests are shed with a retry hint."""
+        self.governor.check(10 * MB)  # Records the idle RSS
+        self.rss.value = 250 * MB
+        with self.assertRaises(MemoryBudgetExceeded) as context:
+            self.governor.check(10 * MB)
+        self.assertIsNotNone(context.exception.retry_after)
+        self.assertEqual(self.governor.stats['shed'], 1)
+        self.assertTrue(self.governor.over_budget())
+        self.rss.value = 150 * MB
+        self.assertFalse(self.governor.over_budget())
+
+    def test_reserve_defers_until_memory_is_released(self):
+        """A request that does not fit next to a running one starts once that one finishes."""
+        order = []
+
+        async def generation(name, estimate, duration):
+            async with self.governor.reserve(estimate):
+                order.append(f"{name} start")
+                await asyncio.sleep(duration)
+            order.append(f"{name} end")
+
+        async def run():
+            first = asyncio.create_task(generation('first', 60 * MB, 0.1))
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.governor.reserved_bytes, 60 * MB)
+            await asyncio.gather(first, generation('second', 60 * MB, 0.0))
+
+        asyncio.run(run())
+        self.assertEqual(order, ['first start', 'first end', 'second start', 'second end'])
+        self.assertEqual(self.governor.stats['deferred'], 1)
+        self.assertEqual(self.governor.reserved_bytes, 0)
+        self.assertEqual(self.governor.in_flight, 0)
+
+    def test_reserve_sheds_after_waiting(self):
+        """A deferred request is refused once `max_wait` or its deadline passes."""
+        self.rss.value = 190 * MB
+
+        async def run(deadline=None):
+            async with self.governor.reserve(20 * MB, deadline):
+                pass
+
+        start = time.monotonic()
+        with self.assertRaises(MemoryBudgetExceeded):
+            asyncio.run(run())
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+        start = time.monotonic()
+        with self.assertRaises(MemoryBudgetExceeded):
+            asyncio.run(run(deadline=time.monotonic() + 0.05))
+        self.assertLess(time.monotonic() - start, 0.15)
+        self.assertEqual(self.governor.stats['shed'], 2)
+
+    def test_without_budget_nothing_is_refused(self):
+        """Without a budget the governor only keeps metrics."""
+        governor = MemoryGovernor(rss_reader=FakeRss(10**12))
+        governor.check(10**12)
+
+        async def run():
+            async with governor.reserve(10**12):
+                return governor.get_metrics()
+
+        metrics = asyncio.run(run())
+        self.assertIsNone(metrics['budget_mb'])
+        self.assertEqual(metrics['in_flight'], 1)
+        self.assertEqual(metrics['admitted'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
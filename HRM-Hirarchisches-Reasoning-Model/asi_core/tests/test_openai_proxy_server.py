@@ -0,0 +1,104 @@
+import unittest
+import json
+import os
+from pathlib import Path
+import sys
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.cancellation import GenerationCancelled
+import openai_proxy_server as proxy
+from mcp_hrm_server import HRMMCPServer
+
+# A stub model that produces 400 tokens at 200 tokens/s unless max_tokens stops it earlier
+STUB_ENV = {
+    'HRM_STUB_TOKENS_PER_SEC': '200', 'HRM_STUB_FIRST_TOKEN_MS': '0', 'HRM_STUB_PROMPT_MS_PER_TOKEN': '0',
+    'HRM_STUB_COMPLETION_TOKENS': '400', 'HRM_STUB_JITTER': '0',
+}
+
+def request_body(max_tokens=None, stream=True):
+    return {'model': 'hrm-local-model', 'messages': [{'role': 'user', 'content': 'Hallo Welt'}],
+            'max_tokens': max_tokens, 'stream': stream}
+
+class TestStreamChatCompletion(unittest.TestCase):
+    """Tests of the server-sent events of /v1/chat/completions with stream=true and the stub backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        with mock.patch.dict(os.environ, STUB_ENV):
+            cls.model = HRMMCPServer(backend='stub', profile_path=os.devnull)
+        cls.patcher = mock.patch.object(proxy, '_hrm_model', cls.model)
+        cls.patcher.start()
+        cls.client = TestClient(proxy.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patcher.stop()
+
+    def _events(self, body, headers=None) -> list:
+        """Posts a streaming request and returns the decoded `data:` payloads."""
+        with mock.patch.object(proxy.security, 'record_usage') as self.record_usage:
+            with self.client.stream('POST', '/v1/chat/completions', json=body, headers=headers) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+                lines = [line for line in response.iter_lines() if line]
+        self.assertTrue(all(line.startswith('data: ') for line in lines))
+        self.assertEqual(proxy.scheduler.get_metrics()['in_flight'], 0)
+        return [line[len('data: '):] if line == 'data: [DONE]' else json.loads(line[len('data: '):]) for line in lines]
+
+    def test_chunks_usage_and_done(self):
+        events = self._events(request_body(max_tokens=5))
+        first, *pieces, final, done = events
+        self.assertEqual(first['object'], 'chat.completion.chunk')
+        self.assertEqual(first['choices'][0]['delta'], {'role': 'assistant'})
+        self.assertEqual(len(pieces), 5)
+        text = ''.join(piece['choices'][0]['delta']['content'] for piece in pieces)
+        self.assertEqual(len(text.split()), 5)
+        self.assertEqual(final['choices'][0], {'index': 0, 'delta': {}, 'finish_reason': 'stop'})
+        # The model's own token counts replace the word-count estimate
+        self.assertEqual(final['usage'], {'prompt_tokens': 3, 'completion_tokens': 5, 'total_tokens': 8})
+        self.assertEqual(done, '[DONE]')
+        self.record_usage.assert_called_once_with(mock.ANY, 8)
+
+    def test_deadline_after_start_is_an_error_event(self):
+        """A deadline that passes mid-generation ends the stream with an error event instead of [DONE]."""
+        events = self._events(request_body(), headers={'X-HRM-Deadline-Ms': '150'})
+        self.assertEqual(events[0]['choices'][0]['delta'], {'role': 'assistant'})
+        error = events[-1]['error']
+        self.assertEqual((error['type'], error['code']), ('cancelled', 504))
+        pieces = events[1:-1]
+        self.assertGreater(len(pieces), 0)
+        self.assertLess(len(pieces), 400)
+        # The tokens generated before the deadline still count against the quota (prompt by word count)
+        self.record_usage.assert_called_once_with(mock.ANY, 2 + len(pieces))
+
+    def test_model_error_after_start_is_an_error_event(self):
+        with mock.patch.object(self.model, 'handle_completion', side_effect=RuntimeError('Modell kaputt')):
+            events = self._events(request_body(max_tokens=5))
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[-1]['error'], {'message': 'Error processing with HRM model: Modell kaputt',
+                                               'type': 'server_error', 'code': 500})
+
+    def test_cancelled_generation_reports_its_tokens(self):
+        async def cancelled(*args, **kwargs):
+            kwargs['on_text']('eins ', 1)
+            raise GenerationCancelled('Client disconnected.', completion_tokens=1)
+
+        with mock.patch.object(self.model, 'handle_completion', side_effect=cancelled):
+            events = self._events(request_body(max_tokens=5))
+        self.assertEqual(events[1]['choices'][0]['delta'], {'content': 'eins '})
+        self.assertEqual(events[-1]['error'], {'message': 'Client disconnected.', 'type': 'cancelled', 'code': 499})
+        self.record_usage.assert_called_once_with(mock.ANY, 3)
+
+    def test_memory_shortage_is_rejected_before_streaming(self):
+        with mock.patch.object(proxy.memory_governor, 'budget_bytes', 1):
+            response = self.client.post('/v1/chat/completions', json=request_body(max_tokens=5))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
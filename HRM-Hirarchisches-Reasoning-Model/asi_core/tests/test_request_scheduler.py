@@ -0,0 +1,159 @@
+import unittest
+import asyncio
+from pathlib import Path
+import sys
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.request_scheduler import RequestScheduler, DeadlineExceeded, INTERACTIVE, BATCH
+
+class TestRequestScheduler(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for the RequestScheduler class."""
+
+    async def _occupy(self, scheduler, started: list, release: asyncio.Event, label: str, **kwargs):
+        """Submits a job that records its start and then blocks until released."""
+        async def job():
+            started.append(label)
+            await release.wait()
+            return label
+        return await scheduler.run(job, **kwargs)
+
+    async def _run_all(self, scheduler, submissions):
+        """Blocks the only slot, queues the submissions, then drains the queue."""
+        started = []
+        release = asyncio.Event()
+        blocker = asyncio.create_task(self._occupy(scheduler, started, release, 'blocker', user='x'))
+        await asyncio.sleep(0)
+        tasks = []
+        for label, kwargs in submissions:
+            tasks.append(asyncio.create_task(self._occupy(scheduler, started, release, label, **kwargs)))
+            await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(blocker, *tasks, return_exceptions=True)
+        return started[1:], results[1:]
+
+    async def test_interactive_runs_before_batch(self):
+        """Test strict priority of interactive over batch requests."""
+        scheduler = RequestScheduler(concurrency=1)
+        order, _ = await self._run_all(scheduler, [
+            ('batch-1', {'user': 'a', 'priority': BATCH}),
+            ('batch-2', {'user': 'a', 'priority': BATCH}),
+            ('chat-1', {'user': 'b', 'priority': INTERACTIVE}),
+        ])
+        self.assertEqual(order, ['chat-1', 'batch-1', 'batch-2'])
+
+    async def test_users_share_fairly_within_a_class(self):
+        """Test that a user with many queued requests cannot starve another user."""
+        scheduler = RequestScheduler(concurrency=1)
+        order, _ = await self._run_all(scheduler, [
+            ('a-1', {'user': 'a', 'cost': 10}),
+            ('a-2', {'user': 'a', 'cost': 10}),
+            ('a-3', {'user': 'a', 'cost': 10}),
+            ('b-1', {'user': 'b', 'cost': 10}),
+            ('b-2', {'user': 'b', 'cost': 10}),
+        ])
+        self.assertEqual(order, ['a-1', 'b-1', 'a-2', 'b-2', 'a-3'])
+
+    async def test_expensive_requests_count_more(self):
+        """Test that fair queuing accounts for request cost."""
+        scheduler = RequestScheduler(concurrency=1)
+        order, _ = await self._run_all(scheduler, [
+            ('big-1', {'user': 'a', 'cost': 100}),
+            ('big-2', {'user': 'a', 'cost': 100}),
+            ('small-1', {'user': 'b', 'cost': 10}),
+            ('small-2', {'user': 'b', 'cost': 10}),
+            ('small-3', {'user': 'b', 'cost': 10}),
+        ])
+        self.assertEqual(order, ['big-1', 'small-1', 'small-2', 'small-3', 'big-2'])
+
+    async def test_expired_requests_are_dropped(self):
+        """Test that requests whose deadline passes in the queue never run."""
+        scheduler = RequestScheduler(concurrency=1)
+        started = []
+        release = asyncio.Event()
+        blocker = asyncio.create_task(self._occupy(scheduler, started, release, 'blocker', user='x'))
+        await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        with self.assertRaises(DeadlineExceeded):
+            await self._occupy(scheduler, started, release, 'late', user='a', deadline=scheduler._clock() + 0.01)
+        release.set()
+        await blocker
+        self.assertEqual(started, ['blocker'])
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics[INTERACTIVE]['expired'], 1)
+        self.assertEqual(metrics[INTERACTIVE]['queued'], 0)
+        self.assertEqual(metrics['in_flight'], 0)
+
+    async def test_past_deadline_is_rejected_immediately(self):
+        """Test that an already expired request is not queued at all."""
+        scheduler = RequestScheduler(concurrency=1)
+        with self.assertRaises(DeadlineExceeded):
+            await scheduler.run(lambda: None, user='a', deadline=scheduler._clock() - 1)
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test that a request cancelled while queued frees its place."""
+        scheduler = RequestScheduler(concurrency=1)
+        started = []
+        release = asyncio.Event()
+        blocker = asyncio.create_task(self._occupy(scheduler, started, release, 'blocker', user='x'))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self._occupy(scheduler, started, release, 'gone', user='a'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await blocker
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        async def job():
+            return 'ok'
+        self.assertEqual(await scheduler.run(job, user='b'), 'ok')
+        self.assertEqual(started, ['blocker'])
+        self.assertEqual(scheduler.get_metrics()['in_flight'], 0)
+
+    async def test_timeout_after_grant_does_not_leak_slot(self):
+        """Test that a deadline firing just after the slot was granted gives the slot back."""
+        scheduler = RequestScheduler(concurrency=1)
+        started = []
+        release = asyncio.Event()
+        blocker = asyncio.create_task(self._occupy(scheduler, started, release, 'blocker', user='x'))
+        await asyncio.sleep(0)
+
+        async def late_wait_for(future, timeout):
+            await future
+            raise asyncio.TimeoutError
+
+        with mock.patch('asi_core.request_scheduler.asyncio.wait_for', late_wait_for):
+            waiter = asyncio.create_task(self._occupy(scheduler, started, release, 'late', user='a',
+                                                      deadline=scheduler._clock() + 60))
+            await asyncio.sleep(0)
+            release.set()
+            await blocker
+            with self.assertRaises(DeadlineExceeded):
+                await waiter
+
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual(metrics[INTERACTIVE]['queued'], 0)
+        self.assertEqual(metrics[INTERACTIVE]['expired'], 1)
+        self.assertEqual(started, ['blocker'])
+
+    async def test_metrics(self):
+        """Test the reported queue metrics."""
+        scheduler = RequestScheduler(concurrency=2)
+        _, results = await self._run_all(scheduler, [('a', {'user': 'a', 'priority': BATCH})])
+        self.assertEqual(results, ['a'])
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics['concurrency'], 2)
+        self.assertEqual(metrics[BATCH]['dispatched'], 1)
+        self.assertEqual(metrics[INTERACTIVE]['dispatched'], 1)
+
+    async def test_unknown_priority(self):
+        """Test that unknown priority classes are rejected."""
+        with self.assertRaises(ValueError):
+            await RequestScheduler().run(lambda: None, user='a', priority='urgent')
+
+if __name__ == '__main__':
+    unittest.main()
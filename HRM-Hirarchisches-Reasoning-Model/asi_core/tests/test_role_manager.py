@@ -1,13 +1,14 @@
 import unittest
 import json
 import os
+import time
 from pathlib import Path
 import sys
 
 # Add the project root to the Python path to allow importing from asi_core
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from asi_core.role_manager import RoleManager
+from asi_core.role_manager import RoleManager, RoleRouter
 
 class TestRoleManager(unittest.TestCase):
     """Unit tests for the RoleManager class."""
@@ -28,6 +29,20 @@ class TestRoleManager(unittest.TestCase):
         with open(self.valid_roles_path, 'w') as f:
             json.dump(valid_data, f)
 
+        # Create a roles file for routing tests
+        self.routing_roles_path = Path('test_routing_roles.json')
+        routing_data = {
+            "roles": [
+                {"name": "AURA", "description": "General", "capabilities": ["causal_inference"]},
+                {"name": "Genie-Forscher", "aliases": ["Forscher"], "description": "Research",
+                 "capabilities": ["deep_research", "knowledge_discovery"]},
+                {"name": "Athena Workflow", "aliases": ["Athena"], "description": "Process",
+                 "capabilities": ["process_optimization"]}
+            ]
+        }
+        with open(self.routing_roles_path, 'w') as f:
+            json.dump(routing_data, f)
+
         # Create an invalid roles file (missing 'description')
         invalid_data = {
             "roles": [
@@ -44,9 +59,11 @@ class TestRoleManager(unittest.TestCase):
 
     def tearDown(self):
         """Remove temporary files after tests."""
-        for path in [self.valid_roles_path, self.invalid_roles_path, self.malformed_roles_path]:
-            if os.path.exists(path):
-                os.remove(path)
+        for path in [self.valid_roles_path, self.invalid_roles_path, self.malformed_roles_path,
+                     self.routing_roles_path]:
+            for file_path in [path, path.with_suffix('.router_index.json')]:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
 
     def test_successful_loading(self):
         """Test loading roles from a valid configuration file."""
@@ -57,7 +74,8 @@ class TestRoleManager(unittest.TestCase):
         """Test retrieving all roles."""
         rm = RoleManager(self.valid_roles_path)
         roles = rm.get_all_roles()
-        self.assertIsInstance(roles, list)
+        self.assertIsInstance(roles, tuple)
+        self.assertIs(roles, rm.get_all_roles())
         self.assertEqual(len(roles), 2)
         self.assertEqual(roles[0]['name'], 'TestRole1')
 
@@ -89,5 +107,179 @@ class TestRoleManager(unittest.TestCase):
         with self.assertRaises(ValueError):
             RoleManager(self.malformed_roles_path)
 
+    def test_route_by_role_name(self):
+        """Test that an explicitly mentioned role name is selected, case-insensitively."""
+        rm = RoleManager(self.routing_roles_path)
+        self.assertEqual(rm.route("athena workflow, plan my week")['name'], 'Athena Workflow')
+        self.assertEqual(rm.route("Genie-Forscher: what is HRM?")['name'], 'Genie-Forscher')
+
+    def test_route_by_alias_and_capability(self):
+        """Test routing via aliases and capability keywords in both spellings."""
+        rm = RoleManager(self.routing_roles_path)
+        self.assertEqual(rm.route("Frag den Forscher")['name'], 'Genie-Forscher')
+        self.assertEqual(rm.route("I need deep research on this")['name'], 'Genie-Forscher')
+        self.assertEqual(rm.route("process_optimization please")['name'], 'Athena Workflow')
+
+    def test_route_requires_whole_words(self):
+        """Test that keywords embedded in other words do not match."""
+        rm = RoleManager(self.routing_roles_path)
+        router = RoleRouter(rm.get_all_roles())
+        self.assertIsNone(router.route("Athenaeum tour"))
+        self.assertEqual(router.route("Athena tour")['name'], 'Athena Workflow')
+
+    def test_route_uses_weighted_scoring(self):
+        """Test that a role name outweighs a single capability keyword of another role."""
+        rm = RoleManager(self.routing_roles_path)
+        role = rm.route("Athena, summarize the deep research results")
+        self.assertEqual(role['name'], 'Athena Workflow')
+        role = rm.route("Athena: deep research on knowledge discovery and deep_research")
+        self.assertEqual(role['name'], 'Genie-Forscher')
+
+    def test_route_falls_back_to_semantic_match(self):
+        """Test that inputs without role keywords are routed by description similarity."""
+        rm = RoleManager(self.routing_roles_path)
+        self.assertEqual(rm.route("Can you optimize this process?")['name'], 'Athena Workflow')
+
+    def test_route_falls_back_to_default(self):
+        """Test the fallback to the default role, or the first role if it is missing."""
+        rm = RoleManager(self.routing_roles_path)
+        self.assertEqual(rm.route("Hello there")['name'], 'AURA')
+        rm = RoleManager(self.valid_roles_path)
+        self.assertEqual(rm.route("Hello there")['name'], 'TestRole1')
+
+    def _rewrite_roles(self, path: Path, data):
+        """Overwrites a roles file and moves its mtime forward so the change is detected."""
+        with open(path, 'w') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_reload_publishes_new_snapshot(self):
+        """Test that a changed file is picked up as a new snapshot version."""
+        rm = RoleManager(self.valid_roles_path)
+        self.assertEqual(rm.version, 1)
+        self.assertFalse(rm.reload_if_changed())
+
+        self._rewrite_roles(self.valid_roles_path, {"roles": [
+            {"name": "TestRole3", "description": "Desc3", "capabilities": ["cap3"]}
+        ]})
+        self.assertTrue(rm.reload_if_changed())
+        self.assertEqual(rm.version, 2)
+        self.assertEqual([role['name'] for role in rm.get_all_roles()], ['TestRole3'])
+        self.assertIsNone(rm.get_role_by_name('TestRole1'))
+        self.assertEqual(rm.route("TestRole3 please")['name'], 'TestRole3')
+
+    def test_invalid_reload_keeps_previous_snapshot(self):
+        """Test that a broken file is rejected without affecting the active roles."""
+        rm = RoleManager(self.valid_roles_path)
+        snapshot = rm.snapshot
+        self._rewrite_roles(self.valid_roles_path, "{not json")
+        self.assertFalse(rm.reload_if_changed())
+        self.assertIs(rm.snapshot, snapshot)
+        self.assertIsNotNone(rm.last_reload_error)
+        self.assertEqual(len(rm.get_all_roles()), 2)
+
+    def test_wrongly_shaped_reload_is_rejected(self):
+        """Test that valid JSON of the wrong shape is rejected like a syntax error."""
+        rm = RoleManager(self.valid_roles_path)
+        for data in ("5", {"roles": [5]}, {"roles": [{"name": 1, "description": "D", "capabilities": []}]},
+                     {"roles": [{"name": "R", "description": "D", "capabilities": 5}]},
+                     {"roles": [{"name": "R", "description": "D", "capabilities": [], "aliases": [1]}]}):
+            self._rewrite_roles(self.valid_roles_path, data)
+            self.assertFalse(rm.reload_if_changed())
+            self.assertIn("Invalid", rm.last_reload_error)
+            self.assertEqual(rm.version, 1)
+
+    def test_routing_index_is_rebuilt_only_on_new_version(self):
+        """Test that routing indexes belong to the snapshot and survive unchanged polls."""
+        rm = RoleManager(self.routing_roles_path)
+        router = rm.snapshot.router
+        rm.reload_if_changed()
+        self.assertIs(rm.snapshot.router, router)
+
+        data = json.loads(self.routing_roles_path.read_text())
+        data['roles'][1]['aliases'] = ["Scholar"]
+        self._rewrite_roles(self.routing_roles_path, data)
+        rm.reload_if_changed()
+        self.assertIsNot(rm.snapshot.router, router)
+        self.assertEqual(rm.route("Ask the Scholar")['name'], 'Genie-Forscher')
+
+    def test_snapshot_is_immutable(self):
+        """Test that snapshots cannot be modified by readers."""
+        rm = RoleManager(self.valid_roles_path)
+        with self.assertRaises(AttributeError):
+            rm.snapshot.version = 99
+        with self.assertRaises(TypeError):
+            rm.snapshot.roles_by_name['Injected'] = {}
+
+    def test_watcher_reloads_in_background(self):
+        """Test that the polling watcher applies changes without an explicit reload."""
+        rm = RoleManager(self.valid_roles_path)
+        rm.start_watching(interval=0.01)
+        try:
+            self._rewrite_roles(self.valid_roles_path, {"roles": [
+                {"name": "Watched", "description": "Desc", "capabilities": []}
+            ]})
+            deadline = time.monotonic() + 2.0
+            while rm.version == 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            rm.stop_watching()
+        self.assertEqual(rm.version, 2)
+        self.assertIsNotNone(rm.get_role_by_name('Watched'))
+
+    def _wait_for_version(self, rm: RoleManager, version: int):
+        deadline = time.monotonic() + 2.0
+        while rm.version < version and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_watcher_survives_malformed_file(self):
+        """Test that a malformed file does not stop the watcher from loading a later valid one."""
+        rm = RoleManager(self.valid_roles_path)
+        rm.start_watching(interval=0.01)
+        try:
+            self._rewrite_roles(self.valid_roles_path, {"roles": [
+                {"name": "Broken", "description": "Desc", "capabilities": 5}
+            ]})
+            deadline = time.monotonic() + 2.0
+            while rm.last_reload_error is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIsNotNone(rm.last_reload_error)
+            self.assertEqual(rm.version, 1)
+
+            self._rewrite_roles(self.valid_roles_path, {"roles": [
+                {"name": "Fixed", "description": "Desc", "capabilities": ["cap"]}
+            ]})
+            self._wait_for_version(rm, 2)
+        finally:
+            rm.stop_watching()
+        self.assertEqual(rm.version, 2)
+        self.assertIsNotNone(rm.get_role_by_name('Fixed'))
+        self.assertIsNone(rm.last_reload_error)
+
+    def test_watcher_survives_unexpected_errors(self):
+        """Test that an unexpected exception is logged and the watcher keeps polling."""
+        rm = RoleManager(self.valid_roles_path)
+        original = rm.reload_if_changed
+        calls = []
+
+        def flaky_reload():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return original()
+
+        rm.reload_if_changed = flaky_reload
+        rm.start_watching(interval=0.01)
+        try:
+            self._rewrite_roles(self.valid_roles_path, {"roles": [
+                {"name": "Later", "description": "Desc", "capabilities": []}
+            ]})
+            self._wait_for_version(rm, 2)
+        finally:
+            rm.stop_watching()
+        self.assertGreater(len(calls), 1)
+        self.assertIsNotNone(rm.get_role_by_name('Later'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.role_manager import RoleManager
+from asi_core.role_prompts import render_system_prompt, RoleConditionedResponder
+
+class FakeModel:
+    """Records prefix registrations and completions instead of running a model."""
+
+    def __init__(self):
+        self.registrations = []
+        self.calls = []
+
+    def register_prefixes(self, prefixes, prime=True):
+        self.registrations.append((dict(prefixes), prime))
+
+    async def handle_prefixed_completion(self, key, prompt):
+        self.calls.append((key, prompt))
+        return {"completion": f"{key} answers {prompt}", "usage": {}}
+
+class TestRolePrompts(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for role-conditioned generation."""
+
+    def setUp(self):
+        """Set up a temporary roles file."""
+        self.roles_path = Path('test_prompt_roles.json')
+        self.roles = [
+            {"name": "Prometheus", "description": "Visionary.", "capabilities": ["visionary_ideation"]},
+            {"name": "AURA", "description": "General.", "capabilities": ["causal_inference", "proactive_support"]}
+        ]
+        self._write_roles()
+        self.role_manager = RoleManager(self.roles_path)
+
+    def tearDown(self):
+        """Remove temporary files after each test."""
+        for path in [self.roles_path, self.roles_path.with_suffix('.router_index.json')]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_roles(self):
+        with open(self.roles_path, 'w') as f:
+            json.dump({"roles": self.roles}, f)
+
+    def test_render_system_prompt(self):
+        """Test that the prompt contains the role's name, description and capabilities."""
+        prompt = render_system_prompt(self.roles[1])
+        self.assertIn("AURA", prompt)
+        self.assertIn("General.", prompt)
+        self.assertIn("causal inference, proactive support", prompt)
+
+    async def test_prefixes_are_registered_once_at_startup(self):
+        """Test that prompts are pre-evaluated at startup and reused for every message."""
+        model = FakeModel()
+        responder = RoleConditionedResponder(model, self.role_manager)
+        self.assertEqual(len(model.registrations), 1)
+        prefixes, prime = model.registrations[0]
+        self.assertTrue(prime)
+        self.assertEqual(list(prefixes), ['AURA', 'Prometheus'])
+
+        answer = await responder(self.role_manager.get_role_by_name('Prometheus'), "Idea?")
+        await responder(self.role_manager.get_role_by_name('AURA'), "Hi")
+        self.assertEqual(answer, "Prometheus answers Idea?")
+        self.assertEqual(model.calls, [('Prometheus', 'Idea?'), ('AURA', 'Hi')])
+        self.assertEqual(len(model.registrations), 1)
+
+    async def test_prefixes_follow_role_reloads(self):
+        """Test that a new roles version re-registers the prompts without priming."""
+        model = FakeModel()
+        responder = RoleConditionedResponder(model, self.role_manager)
+        self.roles[0]['description'] = "Radically visionary."
+        self._write_roles()
+        stat = os.stat(self.roles_path)
+        os.utime(self.roles_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.role_manager.reload_if_changed()
+
+        await responder(self.role_manager.get_role_by_name('Prometheus'), "Idea?")
+        self.assertEqual(len(model.registrations), 2)
+        prefixes, prime = model.registrations[1]
+        self.assertFalse(prime)
+        self.assertIn("Radically visionary.", prefixes['Prometheus'])
+
+if __name__ == '__main__':
+    unittest.main()
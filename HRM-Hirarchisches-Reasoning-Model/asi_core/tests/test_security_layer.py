@@ -0,0 +1,215 @@
+import unittest
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.security_layer import MemoryState, SqliteState, SecurityLayer, RateLimitMiddleware
+
+class FakeClock:
+    """A manually advanced clock."""
+
+    def __init__(self):
+        self.now = 7200.0
+
+    def __call__(self):
+        return self.now
+
+class TestSecurityLayer(unittest.TestCase):
+    """Unit tests for the SecurityLayer class."""
+
+    def setUp(self):
+        """Set up a security layer with a controllable clock."""
+        self.clock = FakeClock()
+        self.security = SecurityLayer(requests_per_second=1.0, burst=2, token_quota=100,
+                                      quota_window=3600.0, clock=self.clock)
+        self.db_path = 'test_security_state.db'
+
+    def tearDown(self):
+        """Remove the SQLite state files."""
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_burst_then_rate_limit(self):
+        """Test that a client may send `burst` requests and is then limited."""
+        self.assertTrue(self.security.admit('a')[0])
+        self.assertTrue(self.security.admit('a')[0])
+        allowed, reason, retry_after = self.security.admit('a')
+        self.assertFalse(allowed)
+        self.assertEqual(reason, 'Rate limit exceeded.')
+        self.assertAlmostEqual(retry_after, 1.0)
+
+    def test_bucket_refills_over_time(self):
+        """Test that tokens are refilled at the configured rate."""
+        for _ in range(2):
+            self.security.admit('a')
+        self.clock.now += 1.0
+        self.assertTrue(self.security.admit('a')[0])
+        self.assertFalse(self.security.admit('a')[0])
+
+    def test_clients_are_limited_independently(self):
+        """Test that one client exhausting its bucket does not affect others."""
+        for _ in range(3):
+            self.security.admit('a')
+        self.assertTrue(self.security.admit('b')[0])
+
+    def test_token_quota(self):
+        """Test that recorded usage blocks the client until the next window."""
+        self.security.record_usage('a', 60)
+        self.assertTrue(self.security.admit('a')[0])
+        self.assertEqual(self.security.record_usage('a', 40), 100)
+        allowed, reason, retry_after = self.security.admit('a')
+        self.assertFalse(allowed)
+        self.assertEqual(reason, 'Token quota exceeded.')
+        self.assertAlmostEqual(retry_after, 3600.0)
+
+        self.clock.now += 3600.0
+        self.assertTrue(self.security.admit('a')[0])
+
+    def test_client_key(self):
+        """Test client identification by API key or IP address."""
+        bearer = SecurityLayer.client_key({'authorization': 'Bearer secret'}, '10.0.0.1')
+        header = SecurityLayer.client_key({'x-api-key': 'secret'}, '10.0.0.2')
+        self.assertEqual(bearer, header)
+        self.assertTrue(bearer.startswith('key:'))
+        self.assertNotIn('secret', bearer)
+        self.assertEqual(SecurityLayer.client_key({}, '10.0.0.1'), 'ip:10.0.0.1')
+
+    def test_sqlite_state_is_shared(self):
+        """Test that two layers on the same SQLite file share buckets and quotas."""
+        first = SecurityLayer(requests_per_second=1.0, burst=2, token_quota=100,
+                              state=SqliteState(self.db_path), clock=self.clock)
+        second = SecurityLayer(requests_per_second=1.0, burst=2, token_quota=100,
+                               state=SqliteState(self.db_path), clock=self.clock)
+        self.assertTrue(first.admit('a')[0])
+        self.assertTrue(second.admit('a')[0])
+        self.assertFalse(first.admit('a')[0])
+
+        first.record_usage('a', 70)
+        self.assertEqual(second.record_usage('a', 30), 100)
+        self.assertEqual(first.admit('b')[0], True)
+        self.clock.now += 10
+        self.assertEqual(first.admit('a')[1], 'Token quota exceeded.')
+
+    def test_memory_state_prunes_full_buckets(self):
+        """Test that idle buckets are dropped so memory stays bounded."""
+        state = MemoryState()
+        state.PRUNE_EVERY = 2
+        state.take_token('old', 1.0, 2.0, 0.0)
+        state.take_token('new', 1.0, 2.0, 10.0)
+        self.assertNotIn('old', state._buckets)
+
+    def test_memory_state_prunes_past_quota_windows(self):
+        """Test that usage of past windows is dropped so memory does not grow with every client."""
+        state = MemoryState()
+        state.PRUNE_EVERY = 2
+        state.add_usage('old', 0.0, 10)
+        state.add_usage('new', 3600.0, 5)
+        self.assertNotIn('old', state._usage)
+        self.assertEqual(state.get_usage('new', 3600.0), 5)
+
+    def test_rate_limit_is_opt_in(self):
+        """Test that without HRM_RATE_LIMIT_RPS only the token quota applies."""
+        with mock.patch.dict(os.environ):
+            os.environ.pop('HRM_RATE_LIMIT_RPS', None)
+            security = SecurityLayer.from_env()
+        self.assertEqual(security.requests_per_second, 0.0)
+        self.assertTrue(all(security.admit('a')[0] for _ in range(100)))
+        security.record_usage('a', security.token_quota)
+        self.assertEqual(security.admit('a')[1], 'Token quota exceeded.')
+
+class TestRateLimitMiddleware(unittest.TestCase):
+    """Unit tests for the ASGI middleware."""
+
+    def setUp(self):
+        """Set up an application that records the requests reaching it."""
+        self.app_calls = []
+
+        async def app(scope, receive, send):
+            self.app_calls.append(scope)
+        self.app = app
+
+    def _request(self, middleware, method='POST', path='/v1/chat/completions', headers=(), client='1.2.3.4'):
+        """Sends one request through the middleware and returns the sent messages."""
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers), 'client': (client, 5000)}
+        asyncio.run(middleware(scope, None, send))
+        return messages
+
+    def test_rejected_requests_never_reach_the_app(self):
+        """Test that requests over the limit get a 429 without calling the app."""
+        middleware = RateLimitMiddleware(self.app, SecurityLayer(requests_per_second=1.0, burst=1))
+        self._request(middleware)
+        self.assertEqual(len(self.app_calls), 1)
+        self.assertEqual(self.app_calls[0]['state']['client_key'], 'ip:1.2.3.4')
+
+        messages = self._request(middleware)
+        self.assertEqual(len(self.app_calls), 1)
+        self.assertEqual(messages[0]['status'], 429)
+        self.assertIn((b'retry-after', b'1'), messages[0]['headers'])
+        self.assertEqual(json.loads(messages[1]['body']), {'detail': 'Rate limit exceeded.'})
+
+    def test_preflight_requests_are_not_limited(self):
+        """Test that CORS preflight requests pass without consuming tokens."""
+        security = SecurityLayer(requests_per_second=1.0, burst=1)
+        middleware = RateLimitMiddleware(self.app, security)
+        for _ in range(3):
+            self._request(middleware, method='OPTIONS')
+        self.assertEqual(len(self.app_calls), 3)
+        self.assertEqual(security.stats['admitted'], 0)
+
+    def test_exempt_paths_are_not_limited(self):
+        """Test that health checks on exempt paths neither get limited nor use up the client's tokens."""
+        security = SecurityLayer(requests_per_second=1.0, burst=1)
+        middleware = RateLimitMiddleware(self.app, security, exempt_paths=('/ready',))
+        for _ in range(3):
+            self._request(middleware, method='GET', path='/ready')
+        self.assertEqual(len(self.app_calls), 3)
+        self._request(middleware)
+        self.assertEqual(len(self.app_calls), 4)
+        self.assertEqual(security.stats['admitted'], 1)
+
+    def test_trusted_proxy_requests_are_keyed_by_forwarded_client(self):
+        """Test that clients behind a trusted router get their own buckets, and others cannot spoof one."""
+        security = SecurityLayer(requests_per_second=1.0, burst=1, trusted_proxies=('10.0.0.0/24',))
+        middleware = RateLimitMiddleware(self.app, security)
+        for client in ('192.168.1.5', '192.168.1.6'):
+            self._request(middleware, headers=[(b'x-forwarded-for', client.encode())], client='10.0.0.7')
+        self.assertEqual([call['state']['client_key'] for call in self.app_calls],
+                         ['ip:192.168.1.5', 'ip:192.168.1.6'])
+
+        # The same client again through the router: its own bucket is empty
+        messages = self._request(middleware, headers=[(b'x-forwarded-for', b'192.168.1.5')], client='10.0.0.7')
+        self.assertEqual(messages[0]['status'], 429)
+
+        # An untrusted peer's header is ignored, as are entries left of the first untrusted hop
+        self._request(middleware, headers=[(b'x-forwarded-for', b'192.168.1.9')], client='1.2.3.4')
+        self.assertEqual(self.app_calls[-1]['state']['client_key'], 'ip:1.2.3.4')
+        self._request(middleware, headers=[(b'x-forwarded-for', b'192.168.1.9, 172.16.0.1, 10.0.0.8')],
+                      client='10.0.0.7')
+        self.assertEqual(self.app_calls[-1]['state']['client_key'], 'ip:172.16.0.1')
+
+    def test_trusted_proxies_from_env(self):
+        """Test that HRM_TRUSTED_PROXIES configures the trusted addresses."""
+        os.environ['HRM_TRUSTED_PROXIES'] = '127.0.0.1, 10.0.0.0/8'
+        try:
+            security = SecurityLayer.from_env()
+        finally:
+            del os.environ['HRM_TRUSTED_PROXIES']
+        self.assertEqual(security.client_address({'x-forwarded-for': '8.8.8.8'}, '10.1.2.3'), '8.8.8.8')
+        self.assertEqual(security.client_address({'x-forwarded-for': '8.8.8.8'}, '127.0.0.1'), '8.8.8.8')
+        self.assertEqual(security.client_address({'x-forwarded-for': '8.8.8.8'}, '11.0.0.1'), '11.0.0.1')
+        self.assertEqual(security.client_address({}, '10.1.2.3'), '10.1.2.3')
+
+if __name__ == '__main__':
+    unittest.main()
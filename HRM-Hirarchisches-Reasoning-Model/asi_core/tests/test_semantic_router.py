@@ -0,0 +1,90 @@
+import unittest
+import json
+import os
+from pathlib import Path
+import sys
+from unittest import mock
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.semantic_router import SemanticRoleRouter
+
+class TestSemanticRoleRouter(unittest.TestCase):
+    """Unit tests for the SemanticRoleRouter class."""
+
+    def setUp(self):
+        """Set up role definitions and the expected index location."""
+        self.roles_path = Path('test_semantic_roles.json')
+        self.index_path = Path('test_semantic_roles.router_index.json')
+        self.roles = [
+            {"name": "Planner", "description": "Organizes workflows and schedules tasks efficiently.",
+             "capabilities": ["task_management", "process_optimization"]},
+            {"name": "Researcher", "description": "Performs deep scientific research into first principles.",
+             "capabilities": ["deep_research", "knowledge_discovery"]},
+            {"name": "Visionary", "description": "Generates radical, creative ideas and disruptive strategies.",
+             "capabilities": ["visionary_ideation", "creative_catalysis"]}
+        ]
+
+    def tearDown(self):
+        """Remove the persisted index after each test."""
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def test_routes_by_meaning(self):
+        """Test that paraphrased requests reach the matching role."""
+        router = SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertEqual(router.route("Please schedule my tasks for the week")['name'], 'Planner')
+        self.assertEqual(router.route("I want some creative ideas for a startup")['name'], 'Visionary')
+        self.assertEqual(router.route("Explain the scientific principles of fusion")['name'], 'Researcher')
+
+    def test_unrelated_input_returns_none(self):
+        """Test that inputs below the similarity threshold are not routed."""
+        router = SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertIsNone(router.route("hello"))
+        self.assertIsNone(router.route(""))
+
+    def test_index_is_persisted_and_reused(self):
+        """Test that the index is written next to the roles file and read back."""
+        SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertTrue(self.index_path.exists())
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        index['vectors'][0] = {'w:marker': 1.0}
+        index['idf']['w:marker'] = 1.0
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+
+        router = SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertEqual(router.route("marker")['name'], 'Planner')
+
+    def test_index_is_rebuilt_when_roles_change(self):
+        """Test that a stale index is ignored once the role definitions change."""
+        SemanticRoleRouter(self.roles_path, self.roles)
+        self.roles[0]['description'] = "Cooks delicious pasta recipes."
+        router = SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertEqual(router.route("a pasta recipe please")['name'], 'Planner')
+        self.assertNotEqual((router.route("schedule my tasks") or {}).get('name'), 'Researcher')
+
+    def test_failed_write_keeps_the_previous_index(self):
+        """Test that an interrupted write leaves the persisted index intact and no temp file behind."""
+        SemanticRoleRouter(self.roles_path, self.roles)
+        previous = self.index_path.read_text(encoding='utf-8')
+
+        def failing_dump(data, f, **kwargs):
+            f.write('{"content_hash": ')
+            raise OSError("No space left on device")
+
+        self.roles[0]['description'] = "Cooks delicious pasta recipes."
+        with mock.patch('asi_core.semantic_router.json.dump', side_effect=failing_dump):
+            SemanticRoleRouter(self.roles_path, self.roles)
+        self.assertEqual(self.index_path.read_text(encoding='utf-8'), previous)
+        self.assertFalse(self.index_path.with_name(self.index_path.name + '.tmp').exists())
+
+    def test_persistence_can_be_disabled(self):
+        """Test that no index file is written when persistence is off."""
+        SemanticRoleRouter(self.roles_path, self.roles, persist=False)
+        self.assertFalse(self.index_path.exists())
+
+if __name__ == '__main__':
+    unittest.main()
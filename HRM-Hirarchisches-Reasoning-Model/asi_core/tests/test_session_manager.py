@@ -0,0 +1,131 @@
+import unittest
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.role_manager import RoleManager
+from asi_core.feedback_store import FeedbackStore
+from asi_core.session_manager import SessionManager
+
+class FakeClock:
+    """A manually advanced clock for deterministic eviction tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestSessionManager(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for the SessionManager class."""
+
+    def setUp(self):
+        """Set up shared components backed by temporary files."""
+        self.roles_path = Path('test_session_roles.json')
+        self.feedback_path = 'test_session_feedback.json'
+        with open(self.roles_path, 'w') as f:
+            json.dump({"roles": [
+                {"name": "AURA", "description": "General", "capabilities": ["causal_inference"]},
+                {"name": "Prometheus", "description": "Ideas", "capabilities": ["visionary_ideation"]}
+            ]}, f)
+        self.clock = FakeClock()
+        self.manager = SessionManager(RoleManager(self.roles_path), FeedbackStore(self.feedback_path),
+                                      idle_timeout=60.0, clock=self.clock)
+
+    def tearDown(self):
+        """Remove temporary files after each test."""
+        for path in [self.roles_path, self.roles_path.with_suffix('.router_index.json'), Path(self.feedback_path)]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def test_sessions_have_independent_active_roles(self):
+        """Test that routing state is kept per session."""
+        first = self.manager.create_session('user_1')
+        second = self.manager.create_session('user_2')
+        result = await self.manager.handle_message(first.session_id, "Prometheus, give me an idea")
+        await self.manager.handle_message(second.session_id, "Hello")
+
+        self.assertEqual(result['role'], 'Prometheus')
+        self.assertIn('Prometheus', result['response'])
+        self.assertEqual(first.active_role, 'Prometheus')
+        self.assertEqual(second.active_role, 'AURA')
+
+    async def test_feedback_is_recorded_with_session_context(self):
+        """Test that feedback uses the session's user and active role."""
+        session = self.manager.create_session('user_1')
+        await self.manager.handle_message(session.session_id, "Prometheus, go")
+        entry = await self.manager.add_feedback(session.session_id, "Great idea")
+
+        self.assertEqual(entry['context'], {'active_role': 'Prometheus'})
+        stored = self.manager.feedback_store.get_feedback_by_user('user_1')
+        self.assertEqual(len(stored), 1)
+
+    async def test_concurrent_feedback_is_not_lost(self):
+        """Test that concurrent writes to the shared store are serialized."""
+        session_ids = [self.manager.create_session(f'user_{i}').session_id for i in range(20)]
+        await asyncio.gather(*(self.manager.add_feedback(sid, "ok") for sid in session_ids))
+
+        entries = self.manager.feedback_store.get_all_feedback()
+        self.assertEqual(len(entries), 20)
+        self.assertEqual(sorted(e['feedback_id'] for e in entries), list(range(1, 21)))
+
+    async def test_no_roles_is_a_clear_error(self):
+        """Test that a roles file without roles raises a descriptive error instead of a TypeError."""
+        with open(self.roles_path, 'w') as f:
+            json.dump({"roles": []}, f)
+        self.manager.role_manager = RoleManager(self.roles_path)
+        session = self.manager.create_session()
+        with self.assertRaisesRegex(RuntimeError, "No roles"):
+            await self.manager.handle_message(session.session_id, "hi")
+
+    async def test_async_responder_is_awaited(self):
+        """Test that coroutine responders are supported."""
+        async def responder(role, user_input):
+            return f"{role['name']}:{user_input}"
+
+        self.manager.responder = responder
+        session = self.manager.create_session()
+        result = await self.manager.handle_message(session.session_id, "hi")
+        self.assertEqual(result['response'], 'AURA:hi')
+
+    def test_idle_sessions_are_evicted(self):
+        """Test that only sessions idle past the timeout are evicted."""
+        idle = self.manager.create_session()
+        self.clock.now += 50
+        active = self.manager.create_session()
+        self.clock.now += 20
+
+        self.assertEqual(self.manager.evict_idle(), 1)
+        self.assertEqual(len(self.manager), 1)
+        with self.assertRaises(KeyError):
+            self.manager.get_session(idle.session_id)
+        self.assertIs(self.manager.get_session(active.session_id), active)
+
+    def test_activity_postpones_eviction(self):
+        """Test that using a session keeps it alive."""
+        session = self.manager.create_session()
+        self.clock.now += 50
+        self.manager.get_session(session.session_id)
+        self.clock.now += 50
+        self.assertEqual(self.manager.evict_idle(), 0)
+
+    def test_expired_session_is_rejected_before_sweep(self):
+        """Test that an expired session cannot be used even if not yet evicted."""
+        session = self.manager.create_session()
+        self.clock.now += 61
+        with self.assertRaises(KeyError):
+            self.manager.get_session(session.session_id)
+
+    def test_close_session(self):
+        """Test closing sessions explicitly."""
+        session = self.manager.create_session()
+        self.assertTrue(self.manager.close_session(session.session_id))
+        self.assertFalse(self.manager.close_session(session.session_id))
+
+if __name__ == '__main__':
+    unittest.main()
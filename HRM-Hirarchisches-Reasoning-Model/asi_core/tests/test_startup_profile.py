@@ -0,0 +1,42 @@
+import unittest
+import os
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.startup_profile import PROFILE_ENV, parse_profile, phase, profiling
+
+class TestStartupProfile(unittest.TestCase):
+    """Unit tests for the startup profiler."""
+
+    def test_parse_profile(self):
+        """Import lines, phase lines and other output are separated."""
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   _io",
+            "import time:      3000 |       3500 | asyncio",
+            "startup phase: 2500 | HRM model",
+            "a warning",
+        ])
+        imports, phases, other = parse_profile(stderr)
+        self.assertEqual(imports, [('_io', 1, 120, 120), ('asyncio', 0, 3000, 3500)])
+        self.assertEqual(phases, [('HRM model', 2500)])
+        self.assertEqual(other, ["a warning"])
+
+    def test_phase_is_silent_without_profiling(self):
+        """Outside of a profiled run, phases only run their body."""
+        previous = os.environ.pop(PROFILE_ENV, None)
+        try:
+            self.assertFalse(profiling())
+            ran = []
+            with phase('component'):
+                ran.append(True)
+            self.assertEqual(ran, [True])
+        finally:
+            if previous is not None:
+                os.environ[PROFILE_ENV] = previous
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import asyncio
+import json
+import random
+import tempfile
+import threading
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path to allow importing from asi_core
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from asi_core.tracing import (
+    JsonlExporter, Tracer, current_span, current_traceparent, load_traces, parse_traceparent, render_trace,
+)
+
+class ListExporter:
+    """Collects exported spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+class TestTracing(unittest.TestCase):
+    """Unit tests for the request tracing spans and exporter."""
+
+    def setUp(self):
+        self.exporter = ListExporter()
+        self.tracer = Tracer(self.exporter, sample_rate=1.0)
+
+    def test_parse_traceparent(self):
+        """Valid headers yield trace id, parent id and the sampled flag; invalid ones are ignored."""
+        header = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+        self.assertEqual(parse_traceparent(header), ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True))
+        self.assertFalse(parse_traceparent(header[:-1] + '0')[2])
+        for invalid in ['', 'garbage', '00-' + '0' * 32 + '-00f067aa0ba902b7-01',
+                        'ff-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01']:
+            self.assertIsNone(parse_traceparent(invalid))
+
+    def test_nested_spans_share_the_trace(self):
+        """A span started inside another becomes its child; the context is restored afterwards."""
+        with self.tracer.span('outer') as outer:
+            with self.tracer.span('inner', step=1) as inner:
+                self.assertIs(current_span(), inner)
+            self.assertIs(current_span(), outer)
+        self.assertIsNone(current_span())
+        inner_dict, outer_dict = self.exporter.spans
+        self.assertEqual(inner_dict['trace_id'], outer_dict['trace_id'])
+        self.assertEqual(inner_dict['parent_id'], outer_dict['span_id'])
+        self.assertIsNone(outer_dict['parent_id'])
+        self.assertEqual(inner_dict['attributes'], {'step': 1})
+        self.assertGreaterEqual(outer_dict['end_ns'] - outer_dict['start_ns'], inner_dict['end_ns'] - inner_dict['start_ns'])
+
+    def test_traceparent_continues_remote_trace(self):
+        """A span started from a traceparent header joins that trace and keeps its sampling decision."""
+        with self.tracer.span('client') as client:
+            header = current_traceparent()
+        with self.tracer.span('server', header) as server:
+            pass
+        self.assertEqual(server.trace_id, client.trace_id)
+        self.assertEqual(server.parent_id, client.span_id)
+
+        unsampled = Tracer(self.exporter, sample_rate=1.0)
+        with unsampled.span('server', header[:-2] + '00'):
+            pass
+        self.assertEqual(len(self.exporter.spans), 2)
+
+    def test_sampling(self):
+        """New traces are recorded at the sample rate, with all their spans or none."""
+        tracer = Tracer(self.exporter, sample_rate=0.25, rng=random.Random(3))
+        for _ in range(400):
+            with tracer.span('root'):
+                with tracer.span('child'):
+                    pass
+        traces = {}
+        for span in self.exporter.spans:
+            traces.setdefault(span['trace_id'], []).append(span['name'])
+        self.assertTrue(60 < len(traces) < 140)
+        self.assertTrue(all(sorted(names) == ['child', 'root'] for names in traces.values()))
+
+    def test_without_exporter_nothing_is_recorded(self):
+        """Tracing without an exporter still passes on context but records nothing."""
+        tracer = Tracer()
+        with tracer.span('root') as root:
+            self.assertFalse(root.sampled)
+            self.assertTrue(current_traceparent().endswith('-00'))
+
+    def test_errors_and_records(self):
+        """Exceptions are recorded on the span; finished operations are recorded as children."""
+        with self.assertRaises(ValueError):
+            with self.tracer.span('failing') as failing:
+                self.tracer.record('queue', failing.start_ns)
+                raise ValueError('boom')
+        queue, failed = self.exporter.spans
+        self.assertEqual(queue['parent_id'], failed['span_id'])
+        self.assertEqual(failed['error'], 'ValueError: boom')
+
+    def test_context_follows_tasks(self):
+        """Tasks started inside a span are part of it."""
+        async def child():
+            with self.tracer.span('task'):
+                pass
+
+        async def parent():
+            with self.tracer.span('request'):
+                await asyncio.create_task(child())
+
+        asyncio.run(parent())
+        task, request = self.exporter.spans
+        self.assertEqual(task['parent_id'], request['span_id'])
+
+    def test_jsonl_exporter_batches_from_threads(self):
+        """Spans from many threads are written as complete JSON lines."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'traces.jsonl'
+            exporter = JsonlExporter(str(path), batch_size=16, flush_interval=0.05)
+            tracer = Tracer(exporter)
+
+            def worker():
+                for _ in range(50):
+                    with tracer.span('request'):
+                        with tracer.span('model'):
+                            pass
+
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            exporter.shutdown()
+
+            lines = path.read_text(encoding='utf-8').splitlines()
+            self.assertEqual(len(lines), 400)
+            self.assertTrue(all(json.loads(line)['name'] in ('request', 'model') for line in lines))
+            traces = load_traces(str(path))
+            self.assertEqual(len(traces), 200)
+
+    def test_render_trace(self):
+        """The rendering shows every span, indented below its parent."""
+        with self.tracer.span('chat.turn'):
+            with self.tracer.span('proxy.chat_completion'):
+                pass
+        rendered = render_trace(self.exporter.spans).splitlines()
+        self.assertIn('2 spans', rendered[0])
+        self.assertTrue(rendered[1].endswith('chat.turn'))
+        self.assertTrue(rendered[2].endswith('  proxy.chat_completion'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,314 @@
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Tracing is enabled by naming the file spans are appended to
+TRACE_FILE_ENV = 'HRM_TRACE_FILE'
+# Share of new traces that are recorded (0.0 - 1.0); continued traces follow their parent
+TRACE_SAMPLE_RATE_ENV = 'HRM_TRACE_SAMPLE_RATE'
+
+TRACEPARENT_HEADER = 'traceparent'
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_SAMPLED_FLAG = 0x01
+
+_current_span = contextvars.ContextVar('hrm_current_span', default=None)
+
+def parse_traceparent(header: str):
+    """
+    Parses a W3C `traceparent` header.
+
+    Returns:
+        tuple: (trace_id, parent span_id, sampled), or None if the header is missing or invalid.
+    """
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == 'ff' or trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & _SAMPLED_FLAG)
+
+class Span:
+    """One timed operation of a trace. Created by `Tracer.start_span` or `Tracer.span`."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'sampled', 'attributes', 'start_ns',
+                 '_start_perf', 'end_ns', 'error', '_tracer')
+
+    def __init__(self, tracer, name: str, trace_id: str, parent_id: str, sampled: bool, attributes: dict):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def traceparent(self) -> str:
+        """The W3C `traceparent` header continuing the trace below this span."""
+        return f"00-{self.trace_id}-{self.span_id}-{_SAMPLED_FLAG if self.sampled else 0:02x}"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: BaseException = None):
+        """Ends the span and hands it to the exporter if it is sampled. Ending twice has no effect."""
+        if self.end_ns is not None:
+            return
+        # Durations come from the monotonic clock; only the start is wall-clock time
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_perf
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.sampled:
+            self._tracer.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id, 'name': self.name,
+            'start_ns': self.start_ns, 'end_ns': self.end_ns, 'pid': os.getpid(),
+            'attributes': self.attributes, 'error': self.error,
+        }
+
+class JsonlExporter:
+    """
+    Appends finished spans to a JSONL file from a background thread.
+
+    `export` never blocks the caller: spans are queued and written in batches,
+    and spans arriving while the queue is full are dropped and counted.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if item is None:
+                return
+
+    def _write(self, batch: list):
+        data = ''.join(json.dumps(span, ensure_ascii=False) + '\n' for span in batch)
+        try:
+            # One append per batch keeps lines from several processes sharing the file intact
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+        except OSError as e:
+            self.dropped += len(batch)
+            print(f"[WARNING] Could not write traces to {self.path}: {e}", file=sys.stderr)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Writes the queued spans and stops the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+class Tracer:
+    """
+    Creates spans and decides which traces are recorded.
+
+    A new trace is sampled with probability `sample_rate`; a trace continued from a
+    `traceparent` keeps the caller's decision, so a trace is recorded in every
+    process or in none. Without an exporter nothing is recorded, but incoming
+    trace context is still passed on.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0, rng: random.Random = None):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._rng = rng or random.Random()
+
+    def start_span(self, name: str, traceparent: str = None, **attributes) -> Span:
+        """
+        Starts a span without making it current; the caller must `end()` it.
+
+        The parent is the trace in `traceparent` if it is valid, otherwise the current
+        span; without either the span starts a new trace.
+        """
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent:
+            trace_id, parent_id, sampled = parent
+        elif (current := _current_span.get()) is not None:
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = self._rng.random() < self.sample_rate
+        return Span(self, name, trace_id, parent_id, sampled and self.exporter is not None, attributes)
+
+    @contextmanager
+    def span(self, name: str, traceparent: str = None, **attributes):
+        """Runs the block as a span, current for everything it calls; errors are recorded on it."""
+        span = self.start_span(name, traceparent, **attributes)
+        with use_span(span):
+            try:
+                yield span
+            except BaseException as e:
+                span.end(e)
+                raise
+        span.end()
+
+    def record(self, name: str, start_ns: int, end_ns: int = None, **attributes):
+        """
+        Records an already finished operation (e.g. time spent waiting in a queue) as a
+        child of the current span, if that span is sampled.
+        """
+        current = _current_span.get()
+        if current is None or not current.sampled:
+            return
+        span = Span(self, name, current.trace_id, current.span_id, True, attributes)
+        span.start_ns = start_ns
+        span.end_ns = end_ns if end_ns is not None else time.time_ns()
+        self.export(span)
+
+    def export(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+@contextmanager
+def use_span(span: Span):
+    """Makes `span` the current span for the block (and for tasks and threads started with its context)."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+def current_span():
+    """Returns the current span, or None outside of any span."""
+    return _current_span.get()
+
+def current_traceparent():
+    """Returns the `traceparent` header for calls made from the current span, or None."""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer, configured from HRM_TRACE_FILE and HRM_TRACE_SAMPLE_RATE on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                path = os.environ.get(TRACE_FILE_ENV)
+                exporter = JsonlExporter(path) if path else None
+                if exporter:
+                    atexit.register(exporter.shutdown)
+                _tracer = Tracer(exporter, float(os.environ.get(TRACE_SAMPLE_RATE_ENV, 1.0)))
+    return _tracer
+
+def span(name: str, traceparent: str = None, **attributes):
+    """`Tracer.span` on the process-wide tracer."""
+    return get_tracer().span(name, traceparent, **attributes)
+
+def record(name: str, start_ns: int, end_ns: int = None, **attributes):
+    """`Tracer.record` on the process-wide tracer."""
+    get_tracer().record(name, start_ns, end_ns, **attributes)
+
+# --- Report ---
+
+def load_traces(path: str) -> dict:
+    """Reads a span file and groups the spans by trace id."""
+    traces = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces.setdefault(span['trace_id'], []).append(span)
+    return traces
+
+def _trace_bounds(spans: list) -> tuple:
+    return min(s['start_ns'] for s in spans), max(s['end_ns'] for s in spans)
+
+def render_trace(spans: list, width: int = 40) -> str:
+    """
+    Renders one trace as an indented tree with a timeline bar per span.
+
+    Spans whose parent was not recorded (e.g. a client without tracing) are shown at the top level.
+    """
+    start, end = _trace_bounds(spans)
+    total = max(end - start, 1)
+    ids = {s['span_id'] for s in spans}
+    children = {}
+    for s in sorted(spans, key=lambda s: s['start_ns']):
+        parent = s['parent_id'] if s['parent_id'] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"trace {spans[0]['trace_id']}  {total / 1e6:.1f} ms, {len(spans)} spans"]
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            offset = round((s['start_ns'] - start) / total * width)
+            length = max(1, round((s['end_ns'] - s['start_ns']) / total * width))
+            bar = ' ' * offset + '█' * min(length, width - offset)
+            error = f"  ✗ {s['error']}" if s.get('error') else ''
+            lines.append(f"  {bar:<{width}}  {(s['end_ns'] - s['start_ns']) / 1e6:9.1f} ms  "
+                         f"{'  ' * depth}{s['name']}{error}")
+            walk(s['span_id'], depth + 1)
+
+    walk(None, 0)
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Shows the slowest recorded traces as a timeline per span.")
+    parser.add_argument('trace_file', nargs='?', default=os.environ.get(TRACE_FILE_ENV), help="The JSONL span file")
+    parser.add_argument('--top', type=int, default=5, help="How many traces to show")
+    parser.add_argument('--name', help="Only traces containing a span with this name")
+    args = parser.parse_args()
+    if not args.trace_file:
+        parser.error(f"no trace file given and {TRACE_FILE_ENV} is not set")
+
+    traces = load_traces(args.trace_file)
+    if args.name:
+        traces = {tid: spans for tid, spans in traces.items() if any(s['name'] == args.name for s in spans)}
+    slowest = sorted(traces.values(), key=lambda spans: -(_trace_bounds(spans)[1] - _trace_bounds(spans)[0]))
+    print(f"{len(traces)} traces in {args.trace_file}")
+    for spans in slowest[:args.top]:
+        print()
+        print(render_trace(spans))
+
+if __name__ == '__main__':
+    main()
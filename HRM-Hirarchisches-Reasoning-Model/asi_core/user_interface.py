@@ -1,41 +1,45 @@
 import sys
 from pathlib import Path
 
-# Add the project root to the Python path to allow importing from asi_core
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script: make the asi_core package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from asi_core.role_manager import RoleManager
 from asi_core.feedback_store import FeedbackStore
 
+def build_response(role: dict, user_input: str) -> str:
+    """
+    Builds the response for a routed message.
+    This is a placeholder until the roles are backed by a language model.
+    """
+    return f"As {role['name']}, I acknowledge your input: '{user_input}'. My capabilities include: {', '.join(role['capabilities'])}."
+
 class UserInterface:
     """Handles the interactive user session, including input and output."""
 
-    def __init__(self, role_manager: RoleManager, feedback_store: FeedbackStore):
+    def __init__(self, role_manager: RoleManager, feedback_store: FeedbackStore, responder=None):
         """
         Initializes the UserInterface with necessary components.
 
         Args:
             role_manager (RoleManager): An instance of the RoleManager.
             feedback_store (FeedbackStore): An instance of the FeedbackStore.
+            responder (callable, optional): Called as `responder(role, user_input)` to produce
+                the answer; may be a coroutine function. Defaults to `build_response`.
         """
         self.role_manager = role_manager
         self.feedback_store = feedback_store
+        self.responder = responder or build_response
         self.active_role = None
         self.user_id = "interactive_user_001" # Static for now
 
     def _select_role(self, user_input: str) -> dict:
         """
         Selects the most appropriate role based on user input.
-        This is a placeholder for a more sophisticated selection logic.
+        Falls back to the general-purpose role AURA if no role keyword matches.
         """
-        # Simple keyword-based routing for demonstration
-        all_roles = self.role_manager.get_all_roles()
-        for role in all_roles:
-            if role['name'].lower() in user_input.lower():
-                return role
-        
-        # Default to a general-purpose role if no keyword matches
-        return self.role_manager.get_role_by_name('AURA') or all_roles[0]
+        return self.role_manager.route(user_input, default='AURA')
 
     def start_interaction(self):
         """Starts the main interactive loop for the user."""
@@ -63,8 +67,12 @@ class UserInterface:
             # 1. Select a role for this interaction
             self.active_role = self._select_role(user_input)
 
-            # 2. Generate a response (placeholder)
-            response = f"As {self.active_role['name']}, I acknowledge your input: '{user_input}'. My capabilities include: {', '.join(self.active_role['capabilities'])}."
+            # 2. Generate a response in the selected role
+            response = self.responder(self.active_role, user_input)
+            if hasattr(response, '__await__'):
+                import asyncio  # Only model-backed responders are coroutines
+
+                response = asyncio.run(response)
             print(f"\n[ASI Response]: {response}\n")
 
     def handle_feedback(self):
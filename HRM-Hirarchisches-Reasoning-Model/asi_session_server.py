@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-Session Server for the ASI Core
+
+This server exposes the ASI core (role routing and feedback collection)
+over HTTP so that many users can interact with it at the same time.
+All sessions share one RoleManager and one FeedbackStore; each session
+only keeps its user ID, active role and last activity time.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+
+from asi_core.role_manager import RoleManager
+from asi_core.feedback_store import FeedbackStore
+from asi_core.session_manager import SessionManager
+from asi_core.role_prompts import RoleConditionedResponder
+
+# --- Pydantic Models ---
+
+class CreateSessionRequest(BaseModel):
+    user_id: Optional[str] = None
+
+class CreateSessionResponse(BaseModel):
+    session_id: str
+    user_id: str
+
+class MessageRequest(BaseModel):
+    message: str
+
+class MessageResponse(BaseModel):
+    role: str
+    response: str
+
+class FeedbackRequest(BaseModel):
+    feedback: str
+    metadata: Optional[dict] = None
+
+class FeedbackResponse(BaseModel):
+    feedback_id: int
+
+# --- FastAPI Application ---
+
+app = FastAPI(
+    title="ASI Core Session Server",
+    description="Serves the ASI core to many concurrent user sessions.",
+    version="1.0.0",
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+base_path = Path(__file__).parent / 'asi_core'
+role_manager = RoleManager(base_path / 'data' / 'roles.json')
+feedback_store = FeedbackStore(base_path / 'data' / 'feedback_archive.json')
+
+# Set ASI_USE_MODEL=1 to answer with the local model instead of placeholder responses
+responder = None
+if os.environ.get("ASI_USE_MODEL") == "1":
+    from mcp_hrm_server import HRMMCPServer
+    responder = RoleConditionedResponder(HRMMCPServer(), role_manager)
+
+sessions = SessionManager(role_manager, feedback_store, idle_timeout=900.0, responder=responder)
+
+_eviction_task = None
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Starts the roles file watcher and the idle-session eviction loop."""
+    global _eviction_task
+    role_manager.start_watching()
+    _eviction_task = asyncio.create_task(sessions.run_eviction(interval=60.0))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Stops the background tasks started at startup."""
+    if _eviction_task:
+        _eviction_task.cancel()
+    role_manager.stop_watching()
+
+@app.post("/sessions", response_model=CreateSessionResponse)
+async def create_session(request: CreateSessionRequest):
+    """Opens a new session."""
+    session = sessions.create_session(request.user_id)
+    return CreateSessionResponse(session_id=session.session_id, user_id=session.user_id)
+
+@app.post("/sessions/{session_id}/messages", response_model=MessageResponse)
+async def send_message(session_id: str, request: MessageRequest):
+    """Routes a message to the most suitable role and returns its response."""
+    try:
+        result = await sessions.handle_message(session_id, request.message)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found or expired.")
+    except RuntimeError as e:
+        # No roles to answer with until the roles file is fixed
+        raise HTTPException(status_code=503, detail=str(e))
+    return MessageResponse(**result)
+
+@app.post("/sessions/{session_id}/feedback", response_model=FeedbackResponse)
+async def send_feedback(session_id: str, request: FeedbackRequest):
+    """Stores feedback in the context of the session's active role."""
+    if not request.feedback:
+        raise HTTPException(status_code=400, detail="Feedback must not be empty.")
+    try:
+        entry = await sessions.add_feedback(session_id, request.feedback, request.metadata)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found or expired.")
+    return FeedbackResponse(feedback_id=entry['feedback_id'])
+
+@app.delete("/sessions/{session_id}")
+async def close_session(session_id: str):
+    """Closes a session."""
+    if not sessions.close_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return {"closed": session_id}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Returns the number of active sessions and the active roles version."""
+    return sessions.get_stats()
+
+if __name__ == "__main__":
+    print("🚀 Starting ASI Core Session Server...")
+    print("✅ Server is running on http://127.0.0.1:8001")
+    uvicorn.run(app, host="127.0.0.1", port=8001)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Autotuning of the HRM Model for the Local Host
+
+Benchmarks the available GGUF quantizations, thread counts and batch sizes on this
+machine and writes the best configuration to a profile, which `HRMMCPServer`
+loads at startup (see HRM_PROFILE_PATH).
+
+Every configuration runs in a fresh subprocess, so load time, tokens/sec and peak
+RSS are measured in isolation. Per model, the thread count is tuned first on
+generation speed, then the batch size on prompt-processing speed.
+
+Usage:
+    python hrm_autotune.py                          # all ./*.gguf files
+    python hrm_autotune.py --models ./a.gguf ./b.gguf --max-rss-mb 6000
+    python hrm_autotune.py --min-tokens-per-sec 8   # best quality that reaches 8 tok/s
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from mcp_hrm_server import DEFAULT_GENERATION_SETTINGS, PROFILE_PATH
+
+PROMPT_TEXT = (
+    "Erkläre Schritt für Schritt, wie ein hierarchisches Reasoning-Modell ein Problem in "
+    "Teilprobleme zerlegt, diese löst und die Ergebnisse wieder zusammenführt. "
+)
+
+def _peak_rss_bytes() -> int:
+    """Returns the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+def run_trial(model_path: str, threads: int, batch_size: int, prompt_tokens: int, gen_tokens: int) -> dict:
+    """
+    Loads the model with one configuration and measures it (runs in the trial subprocess).
+
+    Returns:
+        dict: The configuration with load time, prompt and generation tokens/sec and peak RSS.
+    """
+    from ctransformers import AutoModelForCausalLM
+
+    start = time.perf_counter()
+    llm = AutoModelForCausalLM.from_pretrained(
+        model_path, model_type="mistral", gpu_layers=0,
+        threads=threads, batch_size=batch_size, context_length=prompt_tokens + gen_tokens + 16,
+    )
+    load_s = time.perf_counter() - start
+
+    tokens = llm.tokenize(PROMPT_TEXT)
+    tokens = (tokens + llm.tokenize(PROMPT_TEXT * (prompt_tokens // max(len(tokens), 1) + 1), add_bos_token=False))[:prompt_tokens]
+    start = time.perf_counter()
+    llm.eval(tokens)
+    prompt_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(gen_tokens):
+        llm.eval([llm.sample()])
+    gen_s = time.perf_counter() - start
+
+    return {
+        'model_path': model_path,
+        'threads': threads,
+        'batch_size': batch_size,
+        'load_s': round(load_s, 3),
+        'prompt_tokens_per_sec': round(len(tokens) / prompt_s, 2) if prompt_s > 0 else 0.0,
+        'gen_tokens_per_sec': round(gen_tokens / gen_s, 2) if gen_s > 0 else 0.0,
+        'peak_rss_mb': round(_peak_rss_bytes() / 2**20, 1),
+    }
+
+def measure(model_path: str, threads: int, batch_size: int, prompt_tokens: int, gen_tokens: int, timeout: float) -> dict:
+    """Runs one trial in a fresh subprocess and returns its result, or an error entry."""
+    config = {'model_path': model_path, 'threads': threads, 'batch_size': batch_size,
+              'prompt_tokens': prompt_tokens, 'gen_tokens': gen_tokens}
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--trial', json.dumps(config)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1:] or ['unknown error']
+            return {**config, 'error': error[0]}
+    except subprocess.TimeoutExpired:
+        return {**config, 'error': f'timeout after {timeout}s'}
+    # The result is the last line; the model library may print to stdout before it
+    last_line = (completed.stdout.strip().splitlines() or [''])[-1]
+    try:
+        result = json.loads(last_line)
+    except json.JSONDecodeError:
+        result = None
+    if not isinstance(result, dict):
+        return {**config, 'error': f'no result in the trial output: {last_line[:200]!r}'}
+    print(f"  threads={threads:<3} batch={batch_size:<4} "
+          f"gen={result['gen_tokens_per_sec']:>7.2f} tok/s  prompt={result['prompt_tokens_per_sec']:>8.2f} tok/s  "
+          f"rss={result['peak_rss_mb']:.0f} MB")
+    return result
+
+def thread_candidates() -> list:
+    """Returns a handful of thread counts between a quarter of and all logical CPUs."""
+    cpus = os.cpu_count() or 1
+    return sorted({max(1, cpus // 4), max(1, cpus // 2), max(1, 3 * cpus // 4), cpus})
+
+def tune_model(model_path: str, threads_list: list, batch_sizes: list, args) -> tuple:
+    """
+    Tunes one model: threads on generation speed at the first batch size, then the
+    batch size on prompt speed at the best thread count. Configurations over
+    `args.max_rss_mb` are never picked.
+
+    Returns:
+        tuple: (best result or None, all results)
+    """
+    def usable(result: dict) -> bool:
+        return 'error' not in result and (not args.max_rss_mb or result['peak_rss_mb'] <= args.max_rss_mb)
+
+    results = []
+    for threads in threads_list:
+        results.append(measure(model_path, threads, batch_sizes[0], args.prompt_tokens, args.gen_tokens, args.timeout))
+    ok = [r for r in results if usable(r)]
+    if not ok:
+        return None, results
+    best_threads = max(ok, key=lambda r: r['gen_tokens_per_sec'])['threads']
+
+    for batch_size in batch_sizes[1:]:
+        results.append(measure(model_path, best_threads, batch_size, args.prompt_tokens, args.gen_tokens, args.timeout))
+    ok = [r for r in results if usable(r) and r['threads'] == best_threads]
+    return max(ok, key=lambda r: r['prompt_tokens_per_sec']), results
+
+def select_profile(candidates: list, max_rss_mb: float | None, min_tokens_per_sec: float | None) -> dict | None:
+    """
+    Picks the configuration to serve with.
+
+    Configurations over the memory budget are discarded. With `min_tokens_per_sec`, the
+    largest model file (the highest-quality quantization) reaching that speed wins;
+    otherwise, or if none reaches it, the fastest one.
+    """
+    if max_rss_mb:
+        candidates = [c for c in candidates if c['peak_rss_mb'] <= max_rss_mb]
+    if not candidates:
+        return None
+    if min_tokens_per_sec:
+        fast_enough = [c for c in candidates if c['gen_tokens_per_sec'] >= min_tokens_per_sec]
+        if fast_enough:
+            return max(fast_enough, key=lambda c: (os.path.getsize(c['model_path']), c['gen_tokens_per_sec']))
+    return max(candidates, key=lambda c: c['gen_tokens_per_sec'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks GGUF quantizations, threads and batch sizes and writes a tuned HRM profile.")
+    parser.add_argument('--models', nargs='+', help="GGUF files to compare (default: ./*.gguf)")
+    parser.add_argument('--threads', type=int, nargs='+', help="Thread counts to try (default: derived from the CPU count)")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 32, 128, 512], help="Batch sizes to try")
+    parser.add_argument('--prompt-tokens', type=int, default=256, help="Prompt length of each trial")
+    parser.add_argument('--gen-tokens', type=int, default=64, help="Generated tokens per trial")
+    parser.add_argument('--max-rss-mb', type=float, help="Discard configurations with a higher peak RSS")
+    parser.add_argument('--min-tokens-per-sec', type=float, help="Prefer the highest-quality model reaching this generation speed")
+    parser.add_argument('--timeout', type=float, default=600.0, help="Seconds before a trial is aborted")
+    parser.add_argument('--output', default=PROFILE_PATH, help="Where to write the profile")
+    parser.add_argument('--trial', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trial:
+        config = json.loads(args.trial)
+        print(json.dumps(run_trial(**config)))
+        return
+
+    models = args.models or sorted(glob.glob('./*.gguf'))
+    if not models:
+        print("❌ Keine GGUF-Modelle gefunden. Bitte mit --models angeben.")
+        sys.exit(1)
+    threads_list = args.threads or thread_candidates()
+
+    results, candidates = [], []
+    for model_path in models:
+        print(f"⏳ Benchmarke {model_path} ...")
+        best, model_results = tune_model(model_path, threads_list, args.batch_sizes, args)
+        results.extend(model_results)
+        if best is None:
+            errors = [r['error'] for r in model_results if 'error' in r]
+            print(f"❌ {model_path}: {errors[0] if errors else 'keine Konfiguration unter --max-rss-mb'}")
+            continue
+        candidates.append(best)
+
+    chosen = select_profile(candidates, args.max_rss_mb, args.min_tokens_per_sec)
+    if chosen is None:
+        print("❌ Keine Konfiguration erfüllt die Vorgaben; es wurde kein Profil geschrieben.")
+        sys.exit(1)
+
+    profile = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {'hostname': socket.gethostname(), 'machine': platform.machine(), 'cpu_count': os.cpu_count()},
+        'model_path': chosen['model_path'],
+        'threads': chosen['threads'],
+        'batch_size': chosen['batch_size'],
+        'gpu_layers': 0,
+        'generation': dict(DEFAULT_GENERATION_SETTINGS),
+        'measured': {k: chosen[k] for k in ('load_s', 'prompt_tokens_per_sec', 'gen_tokens_per_sec', 'peak_rss_mb')},
+        'benchmarks': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✅ Profil gespeichert: {args.output}")
+    print(f"   Modell: {chosen['model_path']}  Threads: {chosen['threads']}  Batch: {chosen['batch_size']}")
+    print(f"   {chosen['gen_tokens_per_sec']} tok/s Generierung, {chosen['prompt_tokens_per_sec']} tok/s Prompt, "
+          f"{chosen['peak_rss_mb']} MB Peak-RSS")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model Backends for the HRM Server
+
+`HRMMCPServer` talks to its model through the small ctransformers interface:
+`tokenize`, `detokenize`, `eval`, `prepare_inputs_for_generation` and `generate`.
+A backend is a loader that returns an object with that interface.
+
+- `ctransformers`: the local GGUF model (default).
+- `stub`: a deterministic fake model without weights. It produces a fixed word
+  sequence at a configurable speed and latency distribution, so the serving stack
+  (proxy, scheduler, model server) can be load-tested offline and in CI.
+
+The backend is chosen with the HRM_BACKEND environment variable. The stub is tuned
+with HRM_STUB_* variables (see `StubModel.from_env`).
+
+Usage:
+    HRM_BACKEND=stub HRM_STUB_TOKENS_PER_SEC=50 python openai_proxy_server.py
+"""
+
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+DEFAULT_BACKEND = "ctransformers"
+
+# The stub's output vocabulary; generated text cycles through it
+STUB_WORDS = (
+    "Das", "hierarchische", "Modell", "zerlegt", "die", "Aufgabe", "in", "Teilprobleme",
+    "und", "löst", "sie", "Schritt", "für", "Schritt.", "Danach", "werden", "Ergebnisse",
+    "geprüft", "zusammengeführt.",
+)
+
+# Text is split into words with their trailing whitespace, so detokenize(tokenize(text)) == text
+_WORD_PATTERN = re.compile(r"\S+\s*|\s+")
+
+class StubModel:
+    """
+    A deterministic stand-in for a language model.
+
+    The generated tokens depend only on the prompt, so equal requests get equal
+    answers. Timing follows a simple model: the prompt costs `prompt_ms_per_token`
+    per token, the first generated token additionally `first_token_ms`, and every
+    token after that arrives at `tokens_per_sec`. Each delay is multiplied by a
+    mean-one log-normal factor with spread `jitter` (0 makes it exact), drawn from
+    a seeded random generator. Delays are slept in the calling thread, like the
+    blocking compute of a real model.
+    """
+
+    BOS_TOKEN = 1
+    EOS_TOKEN = 2  # Never generated: the stub just stops
+
+    def __init__(self, tokens_per_sec: float = 20.0, first_token_ms: float = 50.0, prompt_ms_per_token: float = 0.5,
+                 jitter: float = 0.0, completion_tokens: int = 64, seed: int = 0):
+        """
+        Initializes the stub.
+
+        Args:
+            tokens_per_sec (float): Generation speed after the first token (0 means no delay).
+            first_token_ms (float): Extra latency before the first generated token.
+            prompt_ms_per_token (float): Prompt evaluation cost per token.
+            jitter (float): The sigma of the log-normal delay factor.
+            completion_tokens (int): Tokens generated before the end-of-sequence token.
+            seed (int): Seed of the delay distribution.
+        """
+        self.tokens_per_sec = tokens_per_sec
+        self.first_token_ms = first_token_ms
+        self.prompt_ms_per_token = prompt_ms_per_token
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self._rng = random.Random(seed)
+        # Token ids for the text pieces seen so far; ids of STUB_WORDS are fixed
+        self._pieces = ["", "", "", *(f"{word} " for word in STUB_WORDS)]
+        self._ids = {piece: i for i, piece in enumerate(self._pieces) if i > self.EOS_TOKEN}
+        self._vocab_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'StubModel':
+        """
+        Creates a stub configured by HRM_STUB_TOKENS_PER_SEC, HRM_STUB_FIRST_TOKEN_MS,
+        HRM_STUB_PROMPT_MS_PER_TOKEN, HRM_STUB_JITTER, HRM_STUB_COMPLETION_TOKENS and
+        HRM_STUB_SEED.
+        """
+        return cls(
+            tokens_per_sec=float(os.environ.get('HRM_STUB_TOKENS_PER_SEC', 20.0)),
+            first_token_ms=float(os.environ.get('HRM_STUB_FIRST_TOKEN_MS', 50.0)),
+            prompt_ms_per_token=float(os.environ.get('HRM_STUB_PROMPT_MS_PER_TOKEN', 0.5)),
+            jitter=float(os.environ.get('HRM_STUB_JITTER', 0.0)),
+            completion_tokens=int(os.environ.get('HRM_STUB_COMPLETION_TOKENS', 64)),
+            seed=int(os.environ.get('HRM_STUB_SEED', 0)),
+        )
+
+    def _sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+        if self.jitter:
+            # exp(N(-sigma²/2, sigma)) has mean 1, so the configured speed stays the average
+            seconds *= self._rng.lognormvariate(-self.jitter ** 2 / 2, self.jitter)
+        time.sleep(seconds)
+
+    def tokenize(self, text: str, add_bos_token: bool = None) -> list:
+        tokens = [self.BOS_TOKEN] if add_bos_token is not False else []
+        with self._vocab_lock:
+            for piece in _WORD_PATTERN.findall(text):
+                if piece not in self._ids:
+                    self._ids[piece] = len(self._pieces)
+                    self._pieces.append(piece)
+                tokens.append(self._ids[piece])
+        return tokens
+
+    def detokenize(self, tokens: list, decode: bool = True) -> str | bytes:
+        text = "".join(self._pieces[token] for token in tokens)
+        return text if decode else text.encode('utf-8')
+
+    def prepare_inputs_for_generation(self, tokens: list, reset: bool = None) -> list:
+        return tokens
+
+    def eval(self, tokens: list, **kwargs):
+        self._sleep(len(tokens) * self.prompt_ms_per_token / 1000)
+
+    def generate(self, tokens: list, **kwargs):
+        """Yields `completion_tokens` words and stops, like at an end-of-sequence token; sampling settings are ignored."""
+        self.eval(tokens)
+        self._sleep(self.first_token_ms / 1000)
+        offset = zlib.crc32(repr(tokens).encode('ascii'))
+        for i in range(self.completion_tokens):
+            if i and self.tokens_per_sec > 0:
+                self._sleep(1 / self.tokens_per_sec)
+            yield self.EOS_TOKEN + 1 + (offset + i) % len(STUB_WORDS)
+
+def _load_ctransformers(model_path: str, **config):
+    from ctransformers import AutoModelForCausalLM
+
+    return AutoModelForCausalLM.from_pretrained(model_path, model_type="mistral", **config)
+
+def _load_stub(model_path: str, **config):
+    return StubModel.from_env()
+
+BACKENDS = {
+    "ctransformers": _load_ctransformers,
+    "stub": _load_stub,
+}
+
+def load_backend(name: str, model_path: str, **config):
+    """
+    Loads one model context with the named backend.
+
+    Args:
+        name (str): A key of BACKENDS.
+        model_path (str): The model file (ignored by the stub).
+        **config: Backend options such as `threads`, `batch_size` and `gpu_layers`.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes Backend '{name}'. Verfügbar: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_path, **config)
@@ -5,16 +5,75 @@ Diese Datei ermöglicht die direkte Kommunikation mit Ihrem lokalen HRM-Modell
 über die OpenAI-kompatible API. Sie können sie direkt in Trae ausführen.
 """
 
-import requests
+import argparse
+import csv
 import json
+import math
+import os
 import sys
-from typing import List, Dict, Optional
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import requests
+
+from asi_core import tracing
+from asi_core.role_prompts import render_mode_prompt
+
+# Von asi_core/evolution_engine.py weiterentwickelte Modus-Prompts
+MODE_PROMPTS_PATH = Path(__file__).parent / "asi_core" / "data" / "mode_prompts.json"
+
+# System-Prompts der Spezialmodi (werden auch vom Batch-Modus verwendet)
+MODE_SYSTEM_PROMPTS = {
+    "research": """Du bist ein Experte für tiefgründige Recherche und Analyse. 
+        Strukturiere deine Antworten klar und tiefgründig. Berücksichtige verschiedene Perspektiven 
+        und liefere konkrete, umsetzbare Erkenntnisse.""",
+    "brainstorm": """Du bist ein kreativer Brainstorming-Partner. Denke unkonventionell 
+        und liefere innovative, aber praktikable Lösungsansätze. Sei mutig in deinen Ideen.""",
+    "code": """Du bist ein erfahrener Software-Entwickler. Analysiere Code 
+        gründlich und gib präzise, umsetzbare Verbesserungsvorschläge.""",
+}
+
+
+def load_mode_prompts(path: Path = MODE_PROMPTS_PATH) -> Dict[str, str]:
+    """Liest die gepflegten Modus-Prompts; fehlt die Datei oder ist sie defekt, bleibt es bei den Standardwerten."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            modes = json.load(f)["modes"]
+        return {mode: render_mode_prompt(entry) for mode, entry in modes.items()}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Modus-Prompts aus '{path}' nicht verfügbar ({e}); verwende Standardwerte.", file=sys.stderr)
+        return {}
+
+
+MODE_SYSTEM_PROMPTS.update(load_mode_prompts())
+
+
+# Modi, die build_mode_request kennt
+BATCH_MODES = ("chat", "research", "brainstorm", "code")
+
+
+def build_mode_request(mode: str, prompt: str, code_context: str = "") -> Tuple[str, Optional[str]]:
+    """Baut Nachricht und System-Prompt für einen Modus ('chat', 'research', 'brainstorm', 'code')."""
+    if mode == "research":
+        return f"Bitte analysiere folgendes Thema tiefgründig: {prompt}", MODE_SYSTEM_PROMPTS["research"]
+    if mode == "brainstorm":
+        return f"Brainstorming-Auftrag: {prompt}", MODE_SYSTEM_PROMPTS["brainstorm"]
+    if mode == "code":
+        return f"Code-Kontext: {code_context}\n\nAnfrage: {prompt}", MODE_SYSTEM_PROMPTS["code"]
+    if mode == "chat":
+        return prompt, None
+    raise ValueError(f"Unbekannter Modus: {mode}")
 
 class HRMChat:
     def __init__(self, base_url="http://127.0.0.1:8000"):
         self.base_url = base_url
         self.model = "hrm-local-model"
         self.conversation_history: List[Dict[str, str]] = []
+        # Hält die Konversation hinter hrm_router.py auf dem Backend mit ihrem Prompt-Cache
+        self.session_id = uuid.uuid4().hex
     
     def chat(self, message: str, system_prompt: Optional[str] = None) -> str:
         """Sendet eine Nachricht an das HRM-Modell und gibt die Antwort zurück."""
@@ -28,25 +87,9 @@ class HRMChat:
         messages.extend(self.conversation_history)
         messages.append({"role": "user", "content": message})
         
-        # API-Anfrage
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "max_tokens": 2000,
-            "temperature": 0.7
-        }
-        
         try:
-            response = requests.post(
-                f"{self.base_url}/v1/chat/completions",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            assistant_message = result["choices"][0]["message"]["content"]
+            with tracing.span("chat.turn", history_messages=len(self.conversation_history)):
+                assistant_message = self.complete(messages)["choices"][0]["message"]["content"]
             
             # Speichere die Nachrichten in der Historie
             self.conversation_history.append({"role": "user", "content": message})
@@ -63,35 +106,231 @@ class HRMChat:
         except Exception as e:
             return f"❌ Fehler: {str(e)}"
     
+    def complete(self, messages: List[Dict[str, str]], timeout: float = 30, priority: str = "interactive") -> Dict:
+        """
+        Sendet eine Messages-Liste an die API und gibt die rohe JSON-Antwort zurück (wirft bei Fehlern).
+
+        `priority` ('interactive' oder 'batch') bestimmt die Warteschlange im Proxy. Der Timeout wird
+        als Deadline mitgeschickt, damit der Server Anfragen verwirft, auf die niemand mehr wartet.
+        Innerhalb eines Tracing-Spans wird der Trace per 'traceparent'-Header fortgesetzt.
+        'X-HRM-Session' benennt die Konversation für den Router (hrm_router.py).
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 2000,
+            "temperature": 0.7
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "X-HRM-Priority": priority,
+            "X-HRM-Deadline-Ms": str(int(timeout * 1000)),
+            "X-HRM-Session": self.session_id,
+        }
+        traceparent = tracing.current_traceparent()
+        if traceparent:
+            headers[tracing.TRACEPARENT_HEADER] = traceparent
+        response = requests.post(
+            f"{self.base_url}/v1/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
     def clear_history(self):
-        """Löscht die Konversationshistorie."""
+        """Löscht die Konversationshistorie und beginnt eine neue Sitzung."""
         self.conversation_history = []
+        self.session_id = uuid.uuid4().hex
     
     def research_mode(self, topic: str) -> str:
         """Spezialmodus für tiefgreifende Recherche."""
-        system_prompt = """Du bist ein Experte für tiefgründige Recherche und Analyse. 
-        Strukturiere deine Antworten klar und tiefgründig. Berücksichtige verschiedene Perspektiven 
-        und liefere konkrete, umsetzbare Erkenntnisse."""
-        
-        return self.chat(f"Bitte analysiere folgendes Thema tiefgründig: {topic}", system_prompt)
+        return self.chat(*build_mode_request("research", topic))
     
     def brainstorm_mode(self, problem: str) -> str:
         """Spezialmodus für Brainstorming und kreative Lösungen."""
-        system_prompt = """Du bist ein kreativer Brainstorming-Partner. Denke unkonventionell 
-        und liefere innovative, aber praktikable Lösungsansätze. Sei mutig in deinen Ideen."""
-        
-        return self.chat(f"Brainstorming-Auftrag: {problem}", system_prompt)
+        return self.chat(*build_mode_request("brainstorm", problem))
     
     def code_mode(self, code_context: str, request: str) -> str:
         """Spezialmodus für Code-Analyse und -Verbesserung."""
-        system_prompt = """Du bist ein erfahrener Software-Entwickler. Analysiere Code 
-        gründlich und gib präzise, umsetzbare Verbesserungsvorschläge."""
-        
-        return self.chat(f"Code-Kontext: {code_context}\n\nAnfrage: {request}", system_prompt)
+        return self.chat(*build_mode_request("code", request, code_context))
+
+# --- Batch-Modus ---
+
+def load_batch_prompts(path: Path) -> List[Dict[str, str]]:
+    """
+    Liest Prompts aus einer JSONL- oder CSV-Datei.
+
+    Jeder Eintrag braucht ein Feld 'prompt'; optional sind 'id', 'mode'
+    ('chat', 'research', 'brainstorm', 'code') und 'context' (für den Code-Modus).
+    Fehlt 'id', wird die Zeilennummer verwendet.
+    """
+    if path.suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items = []
+    seen_ids = set()
+    for line_no, row in enumerate(rows, start=1):
+        if not row.get("prompt"):
+            raise ValueError(f"Eintrag {line_no} in {path} hat kein Feld 'prompt'.")
+        item_id = str(row["id"] if "id" in row else line_no)
+        if item_id in seen_ids:
+            # Resume erkennt erledigte Einträge an der ID
+            raise ValueError(f"Eintrag {line_no} in {path} hat die doppelte ID '{item_id}'.")
+        seen_ids.add(item_id)
+        mode = row.get("mode") or "chat"
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Eintrag {line_no} in {path} hat den unbekannten Modus '{mode}' "
+                             f"(erlaubt: {', '.join(BATCH_MODES)}).")
+        items.append({
+            "id": item_id,
+            "mode": mode,
+            "prompt": row["prompt"],
+            "context": row.get("context") or "",
+        })
+    return items
+
+
+def _load_completed_ids(output_path: Path) -> set:
+    """Liefert die IDs aller bereits erfolgreich verarbeiteten Einträge (für Resume)."""
+    completed = set()
+    if not output_path.exists():
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Abgebrochene letzte Zeile nach einem Absturz
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+
+def _terminate_partial_line(output_path: Path):
+    """Schließt eine nach einem Absturz abgebrochene letzte Zeile ab, damit neue Ergebnisse in eigenen Zeilen stehen."""
+    if not output_path.exists() or output_path.stat().st_size == 0:
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank-Perzentil einer bereits sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _run_batch_item(base_url: str, item: Dict[str, str], timeout: float) -> Dict:
+    """Verarbeitet einen Batch-Eintrag ohne Konversationshistorie."""
+    message, system_prompt = build_mode_request(item["mode"], item["prompt"], item["context"])
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": message})
+
+    start = time.perf_counter()
+    try:
+        result = HRMChat(base_url).complete(messages, timeout=timeout, priority="batch")
+        record = {
+            "status": "ok",
+            "response": result["choices"][0]["message"]["content"],
+            "usage": result.get("usage", {}),
+        }
+    except Exception as e:
+        record = {"status": "error", "error": str(e)}
+    record.update({"id": item["id"], "mode": item["mode"], "latency_s": time.perf_counter() - start})
+    return record
+
+
+def run_batch(input_path: Path, output_path: Path, base_url: str = "http://127.0.0.1:8000",
+              concurrency: int = 4, timeout: float = 30) -> Dict:
+    """
+    Verarbeitet eine Prompt-Datei parallel und schreibt jedes Ergebnis sofort als JSONL-Zeile.
+
+    Bereits erfolgreich verarbeitete IDs in `output_path` werden übersprungen, sodass ein
+    abgebrochener Lauf einfach neu gestartet werden kann. Fehlgeschlagene Einträge werden
+    beim nächsten Lauf erneut versucht.
+
+    Returns:
+        dict: Statistiken (Anzahl, Durchsatz, Latenz-Perzentile).
+    """
+    items = load_batch_prompts(input_path)
+    completed_ids = _load_completed_ids(output_path)
+    _terminate_partial_line(output_path)
+    pending = [item for item in items if item["id"] not in completed_ids]
+    print(f"📦 {len(items)} Prompts geladen, {len(items) - len(pending)} bereits erledigt, "
+          f"{len(pending)} offen (Parallelität: {concurrency})")
+
+    latencies = []
+    errors = 0
+    completion_tokens = 0
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_run_batch_item, base_url, item, timeout) for item in pending]
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+            progress = f"{done_count}/{len(pending)} [{record['id']}] {record['latency_s']:.2f}s"
+            if record["status"] == "ok":
+                latencies.append(record["latency_s"])
+                completion_tokens += record["usage"].get("completion_tokens", 0)
+                print(f"✅ {progress}")
+            else:
+                errors += 1
+                print(f"❌ {progress}: {record['error']}")
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    stats = {
+        "processed": len(pending),
+        "succeeded": len(latencies),
+        "failed": errors,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(pending) / elapsed if elapsed > 0 else 0.0,
+        "completion_tokens_per_s": completion_tokens / elapsed if elapsed > 0 else 0.0,
+        "latency_p50_s": _percentile(latencies, 50),
+        "latency_p90_s": _percentile(latencies, 90),
+        "latency_p99_s": _percentile(latencies, 99),
+    }
+
+    print("-" * 50)
+    print(f"📊 {stats['succeeded']} erfolgreich, {stats['failed']} fehlgeschlagen in {elapsed:.1f}s")
+    print(f"⚡ Durchsatz: {stats['requests_per_s']:.2f} Anfragen/s, "
+          f"{stats['completion_tokens_per_s']:.1f} Tokens/s")
+    print(f"⏱️ Latenz p50={stats['latency_p50_s']:.2f}s p90={stats['latency_p90_s']:.2f}s "
+          f"p99={stats['latency_p99_s']:.2f}s")
+    return stats
 
 # Interaktive Nutzung im Terminal
 if __name__ == "__main__":
-    chat = HRMChat()
+    parser = argparse.ArgumentParser(description="HRM Chat Interface")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Basis-URL des HRM-Proxys")
+    parser.add_argument("--batch", type=Path, help="JSONL- oder CSV-Datei mit Prompts (Batch-Modus)")
+    parser.add_argument("--output", type=Path, help="JSONL-Ergebnisdatei (Standard: <batch>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Anzahl paralleler Anfragen")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout pro Anfrage in Sekunden")
+    args = parser.parse_args()
+
+    if args.batch:
+        output = args.output or args.batch.with_suffix(".results.jsonl")
+        run_batch(args.batch, output, args.url, args.concurrency, args.timeout)
+        sys.exit(0)
+
+    chat = HRMChat(args.url)
     
     print("🧠 HRM Chat Interface gestartet")
     print("💡 Tipp: Der Server läuft auf http://127.0.0.1:8000")
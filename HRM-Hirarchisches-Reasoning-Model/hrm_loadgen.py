@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load Generator for the HRM OpenAI-Compatible Proxy
+
+Drives `/v1/chat/completions` with an open-loop workload: requests arrive as a
+Poisson process at the target rate, independent of how fast earlier requests
+finish. A saturated server therefore shows up as growing latency and a dropping
+completion rate, not as a politely slowed-down client. Prompt sizes are drawn
+from a weighted mix, and a configurable share of the requests streams.
+
+Each rate step reports latency percentiles (time to first token for streaming
+requests), status codes and the achieved completion throughput. With several
+rates the saturation throughput is reported: the highest rate the server still
+completed at least 95% of within the latency objective.
+
+Start the proxy with the stub backend (and no HRM_RATE_LIMIT_RPS) for an offline soak test:
+    HRM_BACKEND=stub HRM_STUB_TOKENS_PER_SEC=200 python openai_proxy_server.py
+    python hrm_loadgen.py --rates 1 2 4 8 --duration 30 --stream-ratio 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+
+import httpx
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+MODEL_NAME = "hrm-local-model"
+
+PROMPT_WORDS = (
+    "Erkläre", "wie", "ein", "hierarchisches", "Modell", "komplexe", "Aufgaben", "plant,",
+    "zerlegt", "und", "Schritt", "für", "Schritt", "löst.",
+)
+
+def parse_prompt_mix(spec: str) -> list:
+    """Parses 'words:weight,...' (e.g. '16:0.6,256:0.3,1024:0.1') into (words, weight) pairs."""
+    mix = []
+    for part in spec.split(","):
+        words, _, weight = part.partition(":")
+        mix.append((int(words), float(weight or 1)))
+    return mix
+
+def make_prompt(words: int, rng: random.Random) -> str:
+    start = rng.randrange(len(PROMPT_WORDS))
+    return " ".join(PROMPT_WORDS[(start + i) % len(PROMPT_WORDS)] for i in range(words))
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+async def send_request(client: httpx.AsyncClient, prompt: str, stream: bool, max_tokens: int, priority: str) -> dict:
+    """Sends one chat completion and returns its outcome and timings (in seconds)."""
+    payload = {"model": MODEL_NAME, "messages": [{"role": "user", "content": prompt}],
+               "max_tokens": max_tokens, "stream": stream}
+    headers = {"X-HRM-Priority": priority}
+    start = time.perf_counter()
+    outcome = {"stream": stream, "status": None, "ttft": None, "latency": None, "completion_tokens": 0}
+    try:
+        if not stream:
+            response = await client.post("/v1/chat/completions", json=payload, headers=headers)
+            outcome["status"] = response.status_code
+            if response.status_code == 200:
+                outcome["completion_tokens"] = response.json()["usage"]["completion_tokens"]
+        else:
+            async with client.stream("POST", "/v1/chat/completions", json=payload, headers=headers) as response:
+                outcome["status"] = response.status_code
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: ") or line == "data: [DONE]":
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if "error" in event:
+                        outcome["status"] = event["error"]["code"]
+                        break
+                    if outcome["ttft"] is None and event["choices"][0]["delta"].get("content"):
+                        outcome["ttft"] = time.perf_counter() - start
+                    if event.get("usage"):
+                        outcome["completion_tokens"] = event["usage"]["completion_tokens"]
+    except httpx.HTTPError as e:
+        outcome["status"] = type(e).__name__
+    outcome["latency"] = time.perf_counter() - start
+    return outcome
+
+async def run_step(client: httpx.AsyncClient, rate: float, duration: float, args, arrivals: random.Random,
+                   requests: random.Random) -> tuple:
+    """
+    Issues requests at `rate` per second for `duration` seconds and waits for all of them.
+
+    Returns:
+        tuple: (outcomes, seconds until the last request finished)
+    """
+    sizes, weights = zip(*args.prompt_mix)
+    tasks = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    next_arrival = start
+    while True:
+        next_arrival += arrivals.expovariate(rate)
+        if next_arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+        prompt = make_prompt(requests.choices(sizes, weights)[0], requests)
+        stream = requests.random() < args.stream_ratio
+        tasks.append(asyncio.create_task(send_request(client, prompt, stream, args.max_tokens, args.priority)))
+    outcomes = await asyncio.gather(*tasks)
+    return outcomes, loop.time() - start
+
+def summarize(rate: float, elapsed: float, outcomes: list, slo: float) -> dict:
+    """Computes latency percentiles, status counts and throughput of one rate step."""
+    ok = [o for o in outcomes if o["status"] == 200]
+    latencies = sorted(o["latency"] for o in ok)
+    ttfts = sorted(o["ttft"] for o in ok if o["ttft"] is not None)
+    statuses = {}
+    for o in outcomes:
+        statuses[str(o["status"])] = statuses.get(str(o["status"]), 0) + 1
+    within_slo = sum(1 for latency in latencies if latency <= slo)
+    return {
+        "offered_rps": rate,
+        "requests": len(outcomes),
+        "statuses": statuses,
+        "completed_rps": len(ok) / elapsed,
+        "goodput_rps": within_slo / elapsed,
+        "tokens_per_sec": sum(o["completion_tokens"] for o in ok) / elapsed,
+        "latency_ms": {f"p{p}": percentile(latencies, p) * 1000 for p in (50, 95, 99)},
+        "ttft_ms": {f"p{p}": percentile(ttfts, p) * 1000 for p in (50, 95, 99)},
+        "slo_attainment": within_slo / len(outcomes) if outcomes else 0.0,
+    }
+
+def print_step(step: dict):
+    latency, ttft = step["latency_ms"], step["ttft_ms"]
+    print(f"  {step['offered_rps']:>7.2f}/s angeboten  {step['completed_rps']:>7.2f}/s fertig  "
+          f"p50={latency['p50']:>8.1f}ms p95={latency['p95']:>8.1f}ms p99={latency['p99']:>8.1f}ms  "
+          f"TTFT p50={ttft['p50']:>7.1f}ms  SLO={step['slo_attainment']:.0%}  {step['statuses']}")
+
+async def main_async(args) -> dict:
+    # Separate generators keep the arrival times independent of the request mix
+    arrivals, requests = random.Random(args.seed), random.Random(args.seed + 1)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    steps = []
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        for rate in args.rates:
+            print(f"⏳ {rate}/s für {args.duration}s ...")
+            # Requests still finishing after the arrival window count towards the step's duration
+            outcomes, elapsed = await run_step(client, rate, args.duration, args, arrivals, requests)
+            step = summarize(rate, elapsed, outcomes, args.slo_ms / 1000)
+            print_step(step)
+            steps.append(step)
+
+    sustained = [s for s in steps if s["slo_attainment"] >= 0.95]
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "steps": steps,
+        "saturation_rps": max((s["offered_rps"] for s in sustained), default=None),
+        "peak_completed_rps": max((s["completed_rps"] for s in steps), default=0.0),
+    }
+    if report["saturation_rps"] is None:
+        print("⚠️  Keine Stufe erreicht das Latenzziel; bitte niedrigere Raten wählen.")
+    else:
+        print(f"\n✅ Sättigungsdurchsatz: {report['saturation_rps']}/s "
+              f"(≥95% der Anfragen unter {args.slo_ms:.0f}ms), Spitze {report['peak_completed_rps']:.2f}/s fertig")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the HRM OpenAI-compatible proxy.")
+    parser.add_argument('--url', default=DEFAULT_URL, help="Base URL of the proxy")
+    parser.add_argument('--rates', type=float, nargs='+', default=[1.0, 2.0, 4.0], help="Arrival rates to step through (requests/s)")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of arrivals per rate")
+    parser.add_argument('--prompt-mix', type=parse_prompt_mix, default=parse_prompt_mix("16:0.6,256:0.3,1024:0.1"),
+                        help="Prompt sizes in words with weights, e.g. '16:0.6,256:0.3,1024:0.1'")
+    parser.add_argument('--stream-ratio', type=float, default=0.5, help="Share of streaming requests")
+    parser.add_argument('--max-tokens', type=int, default=64, help="max_tokens of each request")
+    parser.add_argument('--priority', default="interactive", help="X-HRM-Priority of each request")
+    parser.add_argument('--slo-ms', type=float, default=5000.0, help="Latency objective for the saturation throughput")
+    parser.add_argument('--max-connections', type=int, default=1000, help="Connection pool size")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of arrivals, prompt sizes and streaming choice")
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    if not args.rates or min(args.rates) <= 0:
+        parser.error("--rates must be positive")
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📊 Bericht gespeichert: {args.output}")
+    sys.exit(0 if report["saturation_rps"] is not None else 1)
+
+if __name__ == "__main__":
+    main()
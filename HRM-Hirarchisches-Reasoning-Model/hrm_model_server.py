@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HRM Model Server
+
+Holds the one copy of the model in a dedicated process and serves it to any number
+of HTTP worker processes over a Unix socket. The workers stay small, so they can
+scale with the CPU cores while model memory stays constant.
+
+The protocol is newline-delimited JSON. A request is
+`{"id": 1, "method": "completion", "params": {...}}` and is answered with
+`{"id": 1, "result": ...}` or `{"id": 1, "error": {"type": ..., "message": ...}}`.
+A completion with `"stream": true` is preceded by `{"id": 1, "text": ..., "completion_tokens": n}`
+messages carrying the generated text as it is produced.
+A malformed or oversized line is answered with an `invalid` error and only fails
+that request. Requests on one connection are served concurrently. `{"method": "cancel",
+"params": {"id": 1}}` stops a running generation between two tokens. Closing the
+connection cancels all of its generations.
+
+Usage:
+    python hrm_model_server.py --workers 4          # model server plus 4 HTTP workers on :8000
+    python hrm_model_server.py --socket /tmp/hrm_model.sock
+    HRM_MODEL_SOCKET=/tmp/hrm_model.sock uvicorn openai_proxy_server:app --workers 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+from asi_core import tracing
+from asi_core.cancellation import CancellationToken, GenerationCancelled
+from asi_core.memory_governor import MemoryGovernor, MemoryBudgetExceeded
+from asi_core.request_scheduler import RequestScheduler, DeadlineExceeded, INTERACTIVE
+
+DEFAULT_SOCKET_PATH = "/tmp/hrm_model.sock"
+
+# How often a waiting client checks whether its cancellation token fired
+CANCEL_POLL_INTERVAL = 0.1
+
+# Maximum size of one protocol line (prompts and completions travel in one line)
+MAX_LINE_BYTES = 2**24
+
+class InvalidRequest(ValueError):
+    """
+    Raised for a protocol line that is not a well-formed request.
+
+    `request_id` is the id to answer with, or None if the line has none.
+    """
+
+    def __init__(self, message: str, request_id=None):
+        super().__init__(message)
+        self.request_id = request_id
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+class ModelServer:
+    """Serves one HRMMCPServer to many worker connections."""
+
+    def __init__(self, model, socket_path: str = DEFAULT_SOCKET_PATH):
+        """
+        Initializes the server.
+
+        Args:
+            model (HRMMCPServer): The loaded model.
+            socket_path (str): The Unix socket to listen on.
+        """
+        self.model = model
+        self.socket_path = socket_path
+        # Fair ordering across all workers; the model runs one plain completion at a time
+        self.scheduler = RequestScheduler(concurrency=1)
+        # The model lives in this process, so its memory is governed here (HRM_MEMORY_BUDGET_MB)
+        self.memory = MemoryGovernor.from_env()
+
+    async def serve_forever(self, args=None):
+        """
+        Listens on the socket until cancelled. If `args.workers` is set, the HTTP workers
+        are started once the socket accepts connections and stopped on exit.
+        """
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Left over from a previous run
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path, limit=MAX_LINE_BYTES)
+        os.chmod(self.socket_path, 0o600)
+        print(f"✅ Modell-Server lauscht auf {self.socket_path}", file=sys.stderr)
+        # Shut down cleanly on SIGTERM too, so the HTTP workers are not left behind
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+        workers = None
+        if args is not None and args.workers:
+            workers = await asyncio.create_subprocess_exec(
+                sys.executable, '-m', 'uvicorn', 'openai_proxy_server:app',
+                '--host', args.host, '--port', str(args.port), '--workers', str(args.workers),
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env={**os.environ, 'HRM_MODEL_SOCKET': self.socket_path},
+            )
+            print(f"✅ {args.workers} HTTP-Worker auf http://{args.host}:{args.port}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if workers is not None and workers.returncode is None:
+                workers.terminate()
+                await workers.wait()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tokens = {}  # request id -> CancellationToken of this connection's running requests
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE_BYTES; the rest of the line fails to parse and is answered the same way
+                    self._write(writer, _encode({'id': None, 'error': {'type': 'invalid', 'message': "Message too large"}}))
+                    continue
+                if not line:
+                    break
+                try:
+                    request_id, method, params = self._parse(line)
+                except InvalidRequest as e:
+                    # Only this request fails; the connection and its other generations go on
+                    self._write(writer, _encode({'id': e.request_id, 'error': {'type': 'invalid', 'message': str(e)}}))
+                    continue
+                if method == 'cancel':
+                    token = tokens.get(params['id'])
+                    if token:
+                        token.cancel("Die Anfrage wurde vom Client abgebrochen.")
+                    continue
+                task = asyncio.create_task(self._serve(request_id, method, params, tokens, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError as e:
+            print(f"⚠️ Verbindung zum Worker fehlerhaft: {e}", file=sys.stderr)
+        finally:
+            # The worker went away: nobody will read these results
+            for token in tokens.values():
+                token.cancel("Der Worker hat die Verbindung getrennt.")
+            writer.close()
+
+    @staticmethod
+    def _parse(line: bytes) -> tuple:
+        """
+        Returns the id, method and params of one request line.
+
+        Raises:
+            InvalidRequest: If the line is not valid JSON or misses a field.
+        """
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            raise InvalidRequest(f"Invalid JSON: {e}") from e
+        if not isinstance(message, dict):
+            raise InvalidRequest("A request must be a JSON object.")
+        request_id, method, params = message.get('id'), message.get('method'), message.get('params', {})
+        if not isinstance(request_id, (int, str)) or isinstance(request_id, bool):
+            raise InvalidRequest("A request needs an integer or string 'id'.")
+        if not isinstance(method, str) or not isinstance(params, dict):
+            raise InvalidRequest("A request needs a string 'method' and object 'params'.", request_id)
+        if method == 'cancel' and 'id' not in params:
+            raise InvalidRequest("A cancel request needs the id of the request to cancel.", request_id)
+        return request_id, method, params
+
+    async def _serve(self, request_id, method: str, params: dict, tokens: dict, writer: asyncio.StreamWriter):
+        on_text = None
+        if params.get('stream'):
+            loop = asyncio.get_running_loop()
+
+            def on_text(text: str, completion_tokens: int):
+                # Called from the generating thread
+                data = _encode({'id': request_id, 'text': text, 'completion_tokens': completion_tokens})
+                loop.call_soon_threadsafe(self._write, writer, data)
+        try:
+            timeout = params.get('timeout_s')
+            token = tokens[request_id] = CancellationToken(deadline=time.monotonic() + timeout if timeout is not None else None)
+            result = await self._dispatch(method, params, token, on_text)
+            response = {'id': request_id, 'result': result}
+        except GenerationCancelled as e:
+            response = {'id': request_id, 'error': {'type': 'cancelled', 'message': e.reason,
+                                                    'completion_tokens': e.completion_tokens}}
+        except DeadlineExceeded as e:
+            response = {'id': request_id, 'error': {'type': 'deadline', 'message': str(e)}}
+        except MemoryBudgetExceeded as e:
+            response = {'id': request_id, 'error': {'type': 'memory', 'message': str(e), 'retry_after': e.retry_after}}
+        except KeyError as e:
+            response = {'id': request_id, 'error': {'type': 'key', 'message': str(e)}}
+        except Exception as e:
+            response = {'id': request_id, 'error': {'type': 'error', 'message': str(e)}}
+        finally:
+            tokens.pop(request_id, None)
+        self._write(writer, _encode(response))
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, data: bytes):
+        if not writer.is_closing():
+            writer.write(data)
+
+    async def _dispatch(self, method: str, params: dict, token: CancellationToken, on_text=None):
+        if method == 'completion':
+            max_new_tokens = params.get('max_new_tokens') or self.model.generation_settings['max_new_tokens']
+            memory_estimate = self.memory.estimate(self.model.count_tokens(params['prompt']), max_new_tokens)
+            self.memory.check(memory_estimate)
+            # Continues the worker's trace; the model's spans become children of this one
+            with tracing.span('model_server.completion', params.get('traceparent')):
+                queued_ns = time.time_ns()
+
+                async def job():
+                    tracing.record('model_server.queue', queued_ns, priority=params.get('priority', INTERACTIVE))
+                    async with self.memory.reserve(memory_estimate, token.deadline):
+                        return await self.model.handle_completion(params['prompt'], params.get('max_new_tokens'), token,
+                                                                  on_text=on_text)
+
+                return await self.scheduler.run(
+                    job,
+                    user=params.get('user', 'anonymous'),
+                    priority=params.get('priority', INTERACTIVE),
+                    cost=params.get('cost', 1.0),
+                    deadline=token.deadline,
+                )
+        if method == 'prefixed_completion':
+            # The prefix stays in the context too, so it counts towards the generation's memory
+            memory_estimate = self.memory.estimate(
+                self.model.prefix_length(params['key']) + self.model.count_tokens(params['prompt']),
+                self.model.generation_settings['max_new_tokens'])
+            self.memory.check(memory_estimate)
+            async with self.memory.reserve(memory_estimate, token.deadline):
+                return await self.model.handle_prefixed_completion(params['key'], params['prompt'], token)
+        if method == 'register_prefixes':
+            await asyncio.to_thread(self.model.register_prefixes, params['prefixes'], params.get('prime', True))
+            return None
+        if method == 'info':
+            return {'generation_settings': self.model.generation_settings, **(await self.model.get_metrics()),
+                    'scheduler': self.scheduler.get_metrics(), 'memory': self.memory.get_metrics()}
+        raise ValueError(f"Unbekannte Methode: {method}")
+
+class RemoteHRMModel:
+    """
+    Talks to a ModelServer with the same interface as HRMMCPServer.
+
+    Each event loop (i.e. each worker process) keeps one multiplexed connection.
+    Completions additionally accept the `user`, `priority` and `cost` the model
+    server schedules by.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        """
+        Connects to the model server and fetches its generation settings.
+
+        Raises:
+            ConnectionError: If no model server is listening on `socket_path`.
+        """
+        self.socket_path = socket_path
+        self._ids = itertools.count(1)
+        self._pending = {}  # request id -> future of the response
+        self._streams = {}  # request id -> on_text callback of a streaming completion
+        self._loop = None
+        self._writer = None
+        self._connect_lock = None
+        info = self._call_blocking('info', {})
+        self.generation_settings = info['generation_settings']
+
+    def _call_blocking(self, method: str, params: dict):
+        """Sends one request over a short-lived connection, for use outside an event loop."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+                sock.sendall(_encode({'id': 0, 'method': method, 'params': params}))
+                with sock.makefile('rb') as stream:
+                    line = stream.readline()
+        except OSError as e:
+            raise ConnectionError(f"Modell-Server unter '{self.socket_path}' nicht erreichbar: {e}") from e
+        if not line:
+            raise ConnectionError("Der Modell-Server hat die Verbindung geschlossen.")
+        return self._unwrap(json.loads(line))
+
+    @staticmethod
+    def _unwrap(response: dict):
+        """Returns the result of a response or raises the error it carries."""
+        error = response.get('error')
+        if error is None:
+            return response.get('result')
+        if error['type'] == 'cancelled':
+            raise GenerationCancelled(error['message'], error.get('completion_tokens', 0))
+        if error['type'] == 'deadline':
+            raise DeadlineExceeded(error['message'])
+        if error['type'] == 'memory':
+            raise MemoryBudgetExceeded(error['message'], error.get('retry_after'))
+        if error['type'] == 'key':
+            raise KeyError(error['message'])
+        if error['type'] == 'invalid':
+            raise InvalidRequest(error['message'])
+        raise RuntimeError(error['message'])
+
+    async def _ensure_connected(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._writer, self._connect_lock = loop, None, asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(self.socket_path, limit=MAX_LINE_BYTES)
+                loop.create_task(self._read_responses(reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while line := await reader.readline():
+                response = json.loads(line)
+                if 'text' in response:
+                    on_text = self._streams.get(response['id'])
+                    if on_text:
+                        on_text(response['text'], response['completion_tokens'])
+                    continue
+                future = self._pending.pop(response['id'], None)
+                if future and not future.done():
+                    future.set_result(response)
+        finally:
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Die Verbindung zum Modell-Server wurde getrennt."))
+            self._pending.clear()
+
+    async def _request(self, method: str, params: dict, cancel_token: CancellationToken = None, on_text=None):
+        await self._ensure_connected()
+        request_id = next(self._ids)
+        data = _encode({'id': request_id, 'method': method, 'params': params})
+        if len(data) > MAX_LINE_BYTES:
+            # The server could not tell which request it was, so it is refused here
+            raise InvalidRequest(f"The request is larger than {MAX_LINE_BYTES} bytes.")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if on_text:
+            self._streams[request_id] = on_text
+        writer = self._writer
+        writer.write(data)
+        cancel_sent = False
+        try:
+            await writer.drain()
+            while not future.done():
+                await asyncio.wait({future}, timeout=CANCEL_POLL_INTERVAL if cancel_token else None)
+                if cancel_token and cancel_token.cancelled and not cancel_sent:
+                    writer.write(_encode({'id': 0, 'method': 'cancel', 'params': {'id': request_id}}))
+                    cancel_sent = True
+        except asyncio.CancelledError:
+            if not writer.is_closing():
+                writer.write(_encode({'id': 0, 'method': 'cancel', 'params': {'id': request_id}}))
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+            self._streams.pop(request_id, None)
+        return self._unwrap(future.result())
+
+    @staticmethod
+    def _timeout(cancel_token: CancellationToken | None) -> float | None:
+        if cancel_token is None or cancel_token.deadline is None:
+            return None
+        return cancel_token.deadline - time.monotonic()
+
+    async def handle_completion(self, prompt: str, max_new_tokens: int = None, cancel_token: CancellationToken = None,
+                                on_text=None, user: str = 'anonymous', priority: str = INTERACTIVE,
+                                cost: float = 1.0) -> dict:
+        """
+        See `HRMMCPServer.handle_completion`; the request is scheduled by the model server.
+        `on_text` is called on the event loop rather than a worker thread.
+        """
+        return await self._request('completion', {
+            'prompt': prompt, 'max_new_tokens': max_new_tokens, 'timeout_s': self._timeout(cancel_token),
+            'user': user, 'priority': priority, 'cost': cost, 'stream': on_text is not None,
+            'traceparent': tracing.current_traceparent(),
+        }, cancel_token, on_text)
+
+    async def handle_prefixed_completion(self, key: str, prompt: str, cancel_token: CancellationToken = None) -> dict:
+        """See `HRMMCPServer.handle_prefixed_completion`."""
+        return await self._request('prefixed_completion', {
+            'key': key, 'prompt': prompt, 'timeout_s': self._timeout(cancel_token),
+        }, cancel_token)
+
+    def register_prefixes(self, prefixes: dict, prime: bool = True):
+        """See `HRMMCPServer.register_prefixes`."""
+        self._call_blocking('register_prefixes', {'prefixes': prefixes, 'prime': prime})
+
+    async def get_metrics(self) -> dict:
+        """Returns the model server's model and scheduler metrics."""
+        info = await self._request('info', {})
+        info.pop('generation_settings', None)
+        return info
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves the HRM model to HTTP worker processes over a Unix socket.")
+    parser.add_argument('--socket', default=os.environ.get('HRM_MODEL_SOCKET', DEFAULT_SOCKET_PATH), help="Unix socket path")
+    parser.add_argument('--workers', type=int, default=0, help="Also start this many openai_proxy_server HTTP workers")
+    parser.add_argument('--host', default="127.0.0.1", help="Host of the HTTP workers")
+    parser.add_argument('--port', type=int, default=8000, help="Port of the HTTP workers")
+    args = parser.parse_args()
+
+    from mcp_hrm_server import HRMMCPServer
+    server = ModelServer(HRMMCPServer(), args.socket)
+    try:
+        asyncio.run(server.serve_forever(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
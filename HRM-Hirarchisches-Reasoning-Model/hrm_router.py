@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI-Compatible Front Router for Several HRM Proxies
+
+One `openai_proxy_server.py` host generates with one box's CPUs. This router
+accepts the same API and spreads chat completions across N such proxies:
+
+- Balancing by least outstanding tokens: each request counts its prompt plus its
+  maximum completion on the backend it runs on, until it finishes.
+- Sticky conversations: later turns of a conversation go to the backend whose
+  prompt cache already holds it (see `asi_core.load_balancer`). HRMChat and the
+  web UI name their conversation in 'X-HRM-Session'.
+- Active health checks against each backend's `/ready`; a backend that refuses a
+  connection is taken out at once, and a request it could not take (connection
+  refused, or 503 while it sheds load) is retried on another backend.
+
+Streaming responses are relayed as they arrive. A client that disconnects, also
+while the backend is still working on a non-streaming request, closes its upstream
+request, so the backend cancels the generation. Other GET endpoints (/v1/models,
+/files/...) are forwarded to the least loaded backend.
+
+The router appends its client to X-Forwarded-For. Start the backends with
+HRM_TRUSTED_PROXIES set to the router's address, so they rate-limit and schedule
+by the original client instead of treating all traffic as one client.
+
+Usage:
+    python hrm_router.py --backend http://10.0.0.2:8000 --backend http://10.0.0.3:8000 --port 8080
+    python hrm_chat.py --url http://127.0.0.1:8080
+
+Try it locally with stub backends:
+    for port in 8001 8002 8003; do
+        HRM_BACKEND=stub HRM_TRUSTED_PROXIES=127.0.0.1 python openai_proxy_server.py --port $port &
+    done
+    python hrm_router.py --backend http://127.0.0.1:8001 --backend http://127.0.0.1:8002 --backend http://127.0.0.1:8003
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+
+from asi_core.load_balancer import LoadBalancer, NoBackendAvailable, session_key
+
+DEFAULT_PORT = 8080
+# What the proxy generates when a request sets no max_tokens (the model's max_new_tokens)
+DEFAULT_MAX_TOKENS = 2048
+BACKEND_HEADER = "X-HRM-Backend"
+# How often a request waiting for its backend checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+# Connection-level headers that must not be forwarded (RFC 9110, section 7.6.1); the
+# body is re-framed, and the backend answers uncompressed so it can be relayed as is
+_HOP_BY_HOP = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length", "accept-encoding",
+))
+
+def forward_headers(headers, client_host: str = None) -> dict:
+    """Copies the end-to-end request headers and appends the client to X-Forwarded-For."""
+    forwarded = {name: value for name, value in headers.items() if name.lower() not in _HOP_BY_HOP}
+    if client_host:
+        previous = headers.get("x-forwarded-for")
+        forwarded["x-forwarded-for"] = f"{previous}, {client_host}" if previous else client_host
+    return forwarded
+
+def estimate_cost(messages: list, max_tokens, default_max_tokens: int = DEFAULT_MAX_TOKENS) -> int:
+    """A request's cost in tokens as the proxy schedules it: last user message plus maximum completion."""
+    prompt = next((message.get("content") or "" for message in reversed(messages)
+                   if isinstance(message, dict) and message.get("role") == "user"), "")
+    return len(str(prompt).split()) + (max_tokens if isinstance(max_tokens, int) and max_tokens > 0 else default_max_tokens)
+
+# Upstream closes running in the background; referenced here so they are not collected early
+_closing = set()
+
+def _close_in_background(upstream: httpx.Response):
+    task = asyncio.get_running_loop().create_task(upstream.aclose())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+class _Lease:
+    """One request's claim on a backend: its outstanding tokens and, once it answered, the upstream response."""
+
+    def __init__(self, balancer: LoadBalancer, backend, cost: int):
+        self.balancer = balancer
+        self.backend = backend
+        self.cost = cost
+        self.upstream = None
+        self.error = None
+        self._closed = False
+        balancer.acquire(backend, cost)
+
+    def close(self, error: str = None):
+        """
+        Releases the backend's tokens and closes the upstream request. Safe to call more
+        than once and from code that is being cancelled: the release happens at once,
+        and the close (which does I/O) runs as its own task.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        error = error or self.error
+        if error is None and self.upstream is not None and self.upstream.status_code >= 500:
+            error = f"HTTP {self.upstream.status_code}"
+        self.balancer.release(self.backend, self.cost, error)
+        if self.upstream is not None:
+            # Closing the upstream request makes the backend cancel the generation
+            _close_in_background(self.upstream)
+
+class RelayResponse(StreamingResponse):
+    """
+    Relays an upstream response as it arrives.
+
+    The lease is closed however the response ends: completed, failed, or cancelled
+    because the client went away, also before the first chunk was sent.
+    """
+
+    def __init__(self, lease: _Lease, **kwargs):
+        self.lease = lease
+        super().__init__(self._chunks(), **kwargs)
+
+    async def _chunks(self):
+        try:
+            async for chunk in self.lease.upstream.aiter_raw():
+                yield chunk
+        except httpx.HTTPError as e:
+            self.lease.error = repr(e)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.lease.close()
+
+def create_app(balancer: LoadBalancer, health_interval: float = 2.0, health_timeout: float = 1.0,
+               request_timeout: float = 600.0, default_max_tokens: int = DEFAULT_MAX_TOKENS,
+               transport: httpx.AsyncBaseTransport = None) -> FastAPI:
+    """
+    Creates the router application.
+
+    Args:
+        balancer (LoadBalancer): The backends and the balancing policy.
+        health_interval (float): Seconds between health checks of each backend.
+        health_timeout (float): How long a backend may take to answer `/ready`.
+        request_timeout (float): Read timeout for forwarded requests (also between streamed chunks).
+        default_max_tokens (int): The completion length assumed for requests without max_tokens.
+        transport (httpx.AsyncBaseTransport, optional): How to reach the backends (e.g. a mock in tests).
+    """
+    client = None
+
+    async def check_backend(backend):
+        try:
+            response = await client.get(f"{backend.url}/ready", timeout=health_timeout)
+            ok = response.status_code == 200
+            balancer.record_health(backend, ok, None if ok else f"/ready returned {response.status_code}")
+        except httpx.HTTPError as e:
+            balancer.record_health(backend, False, f"/ready failed: {e!r}")
+
+    async def health_checks():
+        while True:
+            await asyncio.gather(*(check_backend(backend) for backend in balancer.backends))
+            await asyncio.sleep(health_interval)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        nonlocal client
+        client = httpx.AsyncClient(timeout=httpx.Timeout(request_timeout, connect=health_timeout),
+                                   limits=httpx.Limits(max_connections=None, max_keepalive_connections=64),
+                                   transport=transport)
+        # Know the backends' state before the first request arrives
+        await asyncio.gather(*(check_backend(backend) for backend in balancer.backends))
+        checker = asyncio.create_task(health_checks())
+        yield
+        checker.cancel()
+        await client.aclose()
+
+    app = FastAPI(
+        title="HRM Router",
+        description="Spreads OpenAI-compatible requests across several HRM proxies.",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[BACKEND_HEADER],
+    )
+
+    def unavailable(e: NoBackendAvailable) -> HTTPException:
+        return HTTPException(status_code=503, detail=str(e),
+                             headers={"Retry-After": str(max(1, round(health_interval)))})
+
+    async def send_unless_disconnected(upstream_request: httpx.Request, http_request: Request):
+        """
+        Sends the request to the backend and waits for its response headers.
+
+        Returns None if the client disconnects first; the upstream request is then
+        cancelled, which closes its connection so the backend stops generating.
+        """
+        sending = asyncio.ensure_future(client.send(upstream_request, stream=True))
+        try:
+            while True:
+                done, _ = await asyncio.wait({sending}, timeout=DISCONNECT_POLL_INTERVAL)
+                if done:
+                    return sending.result()
+                if await http_request.is_disconnected():
+                    if sending.done() and not sending.cancelled() and sending.exception() is None:
+                        _close_in_background(sending.result())
+                    return None
+        finally:
+            if not sending.done():
+                sending.cancel()
+
+    async def forward(method: str, path: str, http_request: Request, body: bytes = b"", key: str = None,
+                      cost: int = 0) -> Response:
+        """Sends the request to a backend, retrying on another one if it could not take it."""
+        client_host = http_request.client.host if http_request.client else None
+        headers = forward_headers(http_request.headers, client_host)
+        url_suffix = path + (f"?{http_request.url.query}" if http_request.url.query else "")
+        tried = []
+        while True:
+            try:
+                backend = balancer.choose(key, exclude=tuple(tried))
+            except NoBackendAvailable as e:
+                raise unavailable(e)
+            lease = _Lease(balancer, backend, cost)
+            try:
+                lease.upstream = await send_unless_disconnected(
+                    client.build_request(method, backend.url + url_suffix, content=body, headers=headers), http_request)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                # The request never reached the backend: take it out and try the next one
+                lease.close(repr(e))
+                balancer.mark_down(backend, repr(e))
+                tried.append(backend)
+                continue
+            except httpx.HTTPError as e:
+                lease.close(repr(e))
+                raise HTTPException(status_code=502, detail=f"Backend {backend.url} failed: {e!r}")
+            except BaseException:
+                lease.close()
+                raise
+            if lease.upstream is None:
+                # The client left while the backend was still working on the request
+                lease.close()
+                return Response(status_code=499)
+            if lease.upstream.status_code == 503 and len(tried) + 1 < len(balancer.backends):
+                # Shedding load (e.g. over its memory budget): another backend may have room
+                lease.close("HTTP 503")
+                tried.append(backend)
+                continue
+            break
+        response_headers = {name: value for name, value in lease.upstream.headers.items()
+                            if name.lower() not in _HOP_BY_HOP}
+        response_headers[BACKEND_HEADER] = backend.url
+        return RelayResponse(lease, status_code=lease.upstream.status_code, headers=response_headers)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(http_request: Request):
+        """Routes a chat completion to the backend chosen by load and conversation."""
+        body = await http_request.body()
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="The request body must be JSON.")
+        messages = payload.get("messages") if isinstance(payload, dict) else None
+        if not isinstance(messages, list):
+            raise HTTPException(status_code=400, detail="The request must contain a list of messages.")
+        key = session_key({name.lower(): value for name, value in http_request.headers.items()}, messages)
+        cost = estimate_cost(messages, payload.get("max_tokens"), default_max_tokens)
+        return await forward("POST", "/v1/chat/completions", http_request, body, key, cost)
+
+    @app.get("/ready")
+    async def ready():
+        """Ready while at least one backend is."""
+        healthy = balancer.healthy_count()
+        if not healthy:
+            raise unavailable(NoBackendAvailable("No healthy backend is available."))
+        return {"status": "ready", "healthy_backends": healthy, "backends": len(balancer.backends)}
+
+    @app.get("/router/metrics")
+    async def router_metrics():
+        """Returns the load, health and stickiness of each backend."""
+        return balancer.get_metrics()
+
+    @app.get("/{path:path}")
+    async def forward_get(path: str, http_request: Request):
+        """Forwards other reads (models, metrics, files) to the least loaded backend."""
+        return await forward("GET", "/" + path, http_request)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible router across several HRM proxies.")
+    parser.add_argument("--backend", action="append", default=[],
+                        help="Base URL of a backend proxy (repeatable; default: HRM_ROUTER_BACKENDS, comma-separated)")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--health-interval", type=float, default=2.0, help="Seconds between health checks")
+    parser.add_argument("--sticky-slack", type=int, default=4096,
+                        help="Extra outstanding tokens a conversation's backend may carry before the conversation moves")
+    parser.add_argument("--default-max-tokens", type=int, default=DEFAULT_MAX_TOKENS,
+                        help="Completion length assumed for requests without max_tokens")
+    args = parser.parse_args()
+
+    backends = args.backend or [url for url in os.environ.get("HRM_ROUTER_BACKENDS", "").split(",") if url.strip()]
+    if not backends:
+        parser.error("at least one --backend (or HRM_ROUTER_BACKENDS) is required")
+
+    import uvicorn
+
+    balancer = LoadBalancer([url.strip() for url in backends], sticky_slack_tokens=args.sticky_slack)
+    app = create_app(balancer, health_interval=args.health_interval, default_max_tokens=args.default_max_tokens)
+    print(f"🚀 Starting HRM Router for {len(backends)} backend(s): {', '.join(backends)}", file=sys.stderr)
+    print(f"✅ Point HRMChat or the web UI at http://{args.host}:{args.port}", file=sys.stderr)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
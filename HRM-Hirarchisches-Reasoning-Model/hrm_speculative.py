@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Speculative Decoding for the HRM Model
+
+A small draft model proposes the next k tokens, and the main model scores all of
+them in one batched forward pass. On CPU a forward pass costs about the same for one
+token as for a handful, because it is bound by memory bandwidth. Every accepted
+draft token therefore saves a full pass of the main model.
+
+Verification samples every position from the main model's own distribution and
+only keeps a draft token if it equals that sample. The output is therefore
+distributed exactly like ordinary sampling from the main model. With the same seed
+it is even the same token sequence, whatever the draft proposes. The draft model
+only affects speed.
+
+Requires `llama-cpp-python` (and with it numpy): ctransformers only exposes the
+logits of the last evaluated token, which is not enough to verify a batch.
+"""
+
+import threading
+
+import numpy as np
+
+class Sampler:
+    """Temperature, top-k, top-p and repetition-penalty sampling on raw logits."""
+
+    def __init__(self, temperature: float = 0.7, top_k: int = 50, top_p: float = 0.95,
+                 repetition_penalty: float = 1.1, penalty_window: int = 64, seed: int | None = None):
+        """
+        Initializes the sampler.
+
+        Args:
+            temperature (float): Softmax temperature; 0 selects the most likely token.
+            top_k (int): Only the k most likely tokens are considered (0 disables).
+            top_p (float): Only the smallest set of tokens reaching this probability mass is considered.
+            repetition_penalty (float): Penalty for tokens among the last `penalty_window` tokens.
+            penalty_window (int): How many recent tokens the repetition penalty looks at.
+            seed (int, optional): The random seed.
+        """
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self.repetition_penalty = repetition_penalty
+        self.penalty_window = penalty_window
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, logits, history: list) -> int:
+        """
+        Samples the next token.
+
+        Exactly one random number is drawn per call, so a sequence of calls is
+        reproducible for a given seed no matter how the logits were computed.
+
+        Args:
+            logits: The unnormalized scores of the vocabulary.
+            history (list): The tokens so far, for the repetition penalty.
+        """
+        logits = np.array(logits, dtype=np.float64)
+        u = self.rng.random()
+        if self.repetition_penalty != 1.0 and history:
+            recent = np.unique(np.asarray(history[-self.penalty_window:], dtype=np.int64))
+            values = logits[recent]
+            logits[recent] = np.where(values > 0, values / self.repetition_penalty, values * self.repetition_penalty)
+        if self.temperature <= 0:
+            return int(np.argmax(logits))
+
+        if 0 < self.top_k < len(logits):
+            candidates = np.argpartition(-logits, self.top_k - 1)[:self.top_k]
+        else:
+            candidates = np.arange(len(logits))
+        candidates = candidates[np.argsort(-logits[candidates], kind='stable')]
+
+        scaled = logits[candidates] / self.temperature
+        probs = np.exp(scaled - scaled[0])
+        probs /= probs.sum()
+        cumulative = np.cumsum(probs)
+        if self.top_p < 1.0:
+            keep = int(np.searchsorted(cumulative, self.top_p)) + 1
+            cumulative = cumulative[:keep]
+        index = int(np.searchsorted(cumulative, u * cumulative[-1], side='right'))
+        return int(candidates[min(index, len(cumulative) - 1)])
+
+class LlamaContext:
+    """The evaluated token sequence of one llama.cpp context, with cheap rollback."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def sync(self, tokens: list, min_rows: int = 1) -> np.ndarray:
+        """
+        Makes the context hold exactly `tokens`, keeping the longest evaluated common
+        prefix and evaluating only the rest.
+
+        Args:
+            tokens (list): The token sequence the context should hold.
+            min_rows (int): How many trailing tokens are evaluated even if already cached.
+
+        Returns:
+            np.ndarray: One row of logits per newly evaluated token, at least `min_rows`
+                (only the last row is valid if the model was not loaded with `logits_all`).
+        """
+        evaluated = self.llm.input_ids[:self.llm.n_tokens]
+        common = 0
+        limit = min(len(evaluated), len(tokens))
+        while common < limit and evaluated[common] == tokens[common]:
+            common += 1
+        common = min(common, len(tokens) - min_rows)  # Their logits are needed again
+        self.llm.n_tokens = common  # llama.cpp drops the KV cache past n_tokens on the next eval
+        self.llm.eval(tokens[common:])
+        return self.llm.scores[common:self.llm.n_tokens]
+
+class SpeculativeDecoder:
+    """
+    Generates with a main and a draft model, adapting the number of drafted tokens
+    per step to the measured acceptance rate.
+    """
+
+    def __init__(self, target, draft, sampler: Sampler = None, k: int = 4, k_min: int = 1, k_max: int = 8):
+        """
+        Initializes the decoder.
+
+        Args:
+            target: The main `llama_cpp.Llama`, loaded with `logits_all=True`.
+            draft: The draft `llama_cpp.Llama` sharing the main model's vocabulary.
+            sampler (Sampler, optional): The sampler applied to the main model's logits.
+            k (int): The initial number of drafted tokens per step.
+            k_min (int): The smallest number of drafted tokens per step.
+            k_max (int): The largest number of drafted tokens per step.
+        """
+        self.target = LlamaContext(target)
+        self.draft = LlamaContext(draft)
+        self.sampler = sampler or Sampler()
+        self.k = k
+        self.k_min = k_min
+        self.k_max = k_max
+        self.eos_token = target.token_eos()
+        self._lock = threading.Lock()
+        self.stats = {'steps': 0, 'drafted': 0, 'accepted': 0, 'generated': 0}
+
+    @classmethod
+    def from_paths(cls, model_path: str, draft_model_path: str, n_ctx: int = 4096, threads: int = None,
+                   batch_size: int = None, **kwargs) -> 'SpeculativeDecoder':
+        """
+        Loads the main and the draft model from GGUF files.
+
+        `threads` and `batch_size` (e.g. from a tuned profile) apply to both models,
+        which never evaluate at the same time; llama.cpp's defaults are used otherwise.
+        """
+        from llama_cpp import Llama
+
+        options = {'n_ctx': n_ctx, 'verbose': False}
+        if threads:
+            options['n_threads'] = threads
+        if batch_size:
+            options['n_batch'] = batch_size
+        target = Llama(model_path=model_path, logits_all=True, **options)
+        draft = Llama(model_path=draft_model_path, **options)
+        if draft.n_vocab() != target.n_vocab():
+            raise ValueError("Das Draft-Modell muss dasselbe Vokabular wie das Hauptmodell verwenden.")
+        return cls(target, draft, **kwargs)
+
+    def tokenize(self, text: str, add_bos_token: bool = None) -> list:
+        return self.target.llm.tokenize(text.encode('utf-8'), add_bos=add_bos_token is not False)
+
+    def detokenize(self, tokens: list, decode: bool = True) -> str | bytes:
+        text = self.target.llm.detokenize(tokens)
+        return text.decode('utf-8', errors='ignore') if decode else text
+
+    def generate(self, tokens: list, temperature: float = None, top_k: int = None, top_p: float = None,
+                 repetition_penalty: float = None):
+        """
+        Yields generated tokens until the end-of-sequence token, like ctransformers'
+        `generate`. Sampling parameters override the sampler's settings.
+        """
+        for name, value in (('temperature', temperature), ('top_k', top_k), ('top_p', top_p),
+                            ('repetition_penalty', repetition_penalty)):
+            if value is not None:
+                setattr(self.sampler, name, value)
+
+        with self._lock:
+            # Invariant: both contexts hold sequence[:-1]; the last token is still pending
+            sequence = list(tokens)
+            while True:
+                drafted = self._draft(sequence, self.k)
+                rows = self.target.sync(sequence + drafted, min_rows=len(drafted) + 1)
+                self.stats['steps'] += 1
+                self.stats['drafted'] += len(drafted)
+
+                accepted = 0
+                for i, row in enumerate(rows[-(len(drafted) + 1):]):
+                    token = self.sampler.sample(row, sequence)
+                    sequence.append(token)
+                    self.stats['generated'] += 1
+                    yield token
+                    if token == self.eos_token:
+                        return
+                    if i == len(drafted) or token != drafted[i]:
+                        break
+                    accepted += 1
+                    self.stats['accepted'] += 1  # Counted at once: the step may end at EOS
+
+                if drafted:
+                    self._adapt_k(accepted, len(drafted))
+
+    def _draft(self, sequence: list, k: int) -> list:
+        """Proposes the k most likely continuations one by one with the draft model."""
+        drafted = []
+        logits = self.draft.sync(sequence)[-1]
+        for _ in range(k):
+            token = int(np.argmax(logits))
+            if token == self.eos_token:
+                break
+            drafted.append(token)
+            logits = self.draft.sync(sequence + drafted)[-1]
+        return drafted
+
+    def _adapt_k(self, accepted: int, drafted: int):
+        """Drafts more after a fully accepted step and fewer after a rejection early in the draft."""
+        if accepted == drafted:
+            self.k = min(self.k + 1, self.k_max)
+        elif accepted < drafted // 2:
+            self.k = max(self.k - 1, self.k_min)
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the acceptance rate, the tokens produced per main-model pass and the
+        current draft length.
+        """
+        stats = self.stats
+        return {
+            **stats,
+            'k': self.k,
+            'acceptance_rate': stats['accepted'] / stats['drafted'] if stats['drafted'] else 0.0,
+            'tokens_per_pass': stats['generated'] / stats['steps'] if stats['steps'] else 0.0,
+        }
@@ -8,58 +8,580 @@ It provides two main functionalities:
 1.  `completion`: Generates a text completion based on a prompt.
 2.  `run_tool`: A placeholder for future tool-running capabilities.
 
-The server uses the `trae-mcp` library to communicate over stdio.
+The server speaks MCP (JSON-RPC 2.0, one message per line) over stdio.
+Requests are handled concurrently: many tool calls can be in flight at once,
+generations run on a worker thread pool, and generated text is streamed back
+as progress notifications when the client sends a progress token.
+
+Usage:
+    python mcp_hrm_server.py
 """
 
 import asyncio
+import codecs
+import contextvars
+import json
+import os
+import socket
 import sys
-from ctransformers import AutoModelForCausalLM
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from asi_core import tracing
+from asi_core.cancellation import CancellationToken, GenerationCancelled
+from hrm_backends import DEFAULT_BACKEND, load_backend
+
+# HINWEIS: Laden eines lokalen Modells.
+# BITTE LADEN SIE DAS MODELL MANUELL HERUNTER UND PLATZIEREN SIE ES IM PROJEKTVERZEICHNIS.
+# Download-URL: https://huggingface.co/TheBloke/Mistral-7B-Instruct-v0.2-GGUF/resolve/main/mistral-7b-instruct-v0.2.Q4_K_M.gguf
+# Ziel-Pfad: ./mistral-7b-instruct-v0.2.Q4_K_M.gguf
+MODEL_PATH = "./mistral-7b-instruct-v0.2.Q4_K_M.gguf"
+
+# Written by hrm_autotune.py; overrides the model path, threads, batch size and generation settings
+PROFILE_PATH = os.environ.get("HRM_PROFILE_PATH", "./hrm_profile.json")
+
+DEFAULT_GENERATION_SETTINGS = {
+    "max_new_tokens": 2048,
+    "temperature": 0.7,
+    "top_k": 50,
+    "top_p": 0.95,
+    "repetition_penalty": 1.1,
+}
+
+def load_profile(path: str) -> dict:
+    """
+    Loads a tuned profile written by hrm_autotune.py.
+
+    Returns:
+        dict: The profile, or an empty dict if there is none or it cannot be read.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Profil '{path}' konnte nicht gelesen werden ({e}); verwende Standardwerte.", file=sys.stderr)
+        return {}
+    hostname = profile.get("host", {}).get("hostname")
+    if hostname and hostname != socket.gethostname():
+        print(f"⚠️ Profil '{path}' wurde auf '{hostname}' erstellt; bitte hrm_autotune.py auf diesem Rechner ausführen.", file=sys.stderr)
+    return profile
+
+class PrefixSlot:
+    """A model context whose KV cache starts with one pre-evaluated system-prompt prefix."""
+
+    __slots__ = ('llm', 'prefix_text', 'prefix_tokens', 'lock')
+
+    def __init__(self, llm, lock: threading.Lock = None):
+        self.llm = llm
+        self.prefix_text = None
+        self.prefix_tokens = []
+        self.lock = lock or threading.Lock()  # A context can only serve one generation at a time
 
 class HRMMCPServer:
     """A Hierarchical Reasoning Model server using a real local model."""
 
-    def __init__(self):
+    def __init__(self, max_prefix_slots: int = None, draft_model_path: str = None, profile_path: str = None,
+                 backend: str = None):
+        """
+        Loads the local model.
+
+        Args:
+            max_prefix_slots (int, optional): How many system-prompt prefixes (e.g. role personas)
+                stay evaluated at the same time in contexts of their own. Each slot is a full
+                model context with its own KV cache (the weights are memory-mapped and shared).
+                With 0, prefixed completions share the default context, which reuses the
+                evaluated prefix as long as the same prefix was used last. Defaults to the
+                HRM_PREFIX_SLOTS environment variable, or 0.
+            draft_model_path (str, optional): A small GGUF model with the same vocabulary. If set,
+                plain completions use speculative decoding (see hrm_speculative.py). Defaults to
+                the HRM_DRAFT_MODEL_PATH environment variable.
+            profile_path (str, optional): A tuned profile from hrm_autotune.py. Defaults to PROFILE_PATH.
+            backend (str, optional): The model backend (see hrm_backends.py), e.g. 'stub' for load
+                tests without model weights. Defaults to the HRM_BACKEND environment variable.
+        """
+        self.backend = backend or os.environ.get("HRM_BACKEND", DEFAULT_BACKEND)
+        profile = load_profile(profile_path or PROFILE_PATH)
+        self.model_path = profile.get("model_path", MODEL_PATH)
+        self.model_config = {"gpu_layers": profile.get("gpu_layers", 0)}  # 0 für CPU-Nutzung
+        for key in ("threads", "batch_size"):
+            if key in profile:
+                self.model_config[key] = profile[key]
+        self.generation_settings = {**DEFAULT_GENERATION_SETTINGS, **profile.get("generation", {})}
+        if profile:
+            print(f"⚙️ Profil geladen: {self.model_config}", file=sys.stderr)
+
         print("⏳ Initialisiere HRM-Modell...", file=sys.stderr)
-        try:
-            # HINWEIS: Laden eines lokalen Modells.
-            # BITTE LADEN SIE DAS MODELL MANUELL HERUNTER UND PLATZIEREN SIE ES IM PROJEKTVERZEICHNIS.
-            # Download-URL: https://huggingface.co/TheBloke/Mistral-7B-Instruct-v0.2-GGUF/resolve/main/mistral-7b-instruct-v0.2.Q4_K_M.gguf
-            # Ziel-Pfad: ./mistral-7b-instruct-v0.2.Q4_K_M.gguf
-            model_path = "./mistral-7b-instruct-v0.2.Q4_K_M.gguf"
-            self.llm = AutoModelForCausalLM.from_pretrained(
-                model_path,
-                model_type="mistral",
-                gpu_layers=0  # Auf 0 für CPU-Nutzung belassen
-            )
+        self.llm = self._load_model()
+        if self.llm:
             print("✅ HRM-Modell erfolgreich geladen.", file=sys.stderr)
+        self.speculative = self._load_speculative(draft_model_path or os.environ.get("HRM_DRAFT_MODEL_PATH"))
+        if max_prefix_slots is None:
+            max_prefix_slots = int(os.environ.get("HRM_PREFIX_SLOTS", 0))
+        self.max_prefix_slots = max_prefix_slots
+        self._prefix_prompts = {}
+        self._prefix_slots = OrderedDict()  # key -> PrefixSlot, least recently used first
+        self._slots_lock = threading.Lock()
+        self._llm_lock = threading.Lock()  # The default context serves one generation at a time
+        # Without slots of their own, prefixes are evaluated into the default context
+        self._default_slot = PrefixSlot(self.llm, self._llm_lock)
+        # One worker per context that can generate at the same time
+        self.executor = ThreadPoolExecutor(max_workers=max_prefix_slots + 1, thread_name_prefix="hrm-generate")
+
+    def _load_model(self):
+        """Loads one model context, or returns None if the model is unavailable."""
+        try:
+            return load_backend(self.backend, self.model_path, **self.model_config)
         except Exception as e:
-            print(f"❌ Fehler beim Laden des Modells von Pfad '{model_path}': {e}", file=sys.stderr)
+            print(f"❌ Fehler beim Laden des Modells von Pfad '{self.model_path}': {e}", file=sys.stderr)
             print("👉 Bitte stellen Sie sicher, dass das Modell heruntergeladen und unter dem korrekten Pfad im Projektverzeichnis abgelegt wurde.", file=sys.stderr)
-            self.llm = None
+            return None
+
+    def _load_speculative(self, draft_model_path: str):
+        """Loads the speculative decoder, or returns None if it is not configured or unavailable."""
+        if not draft_model_path or not self.llm or self.backend != DEFAULT_BACKEND:
+            return None
+        try:
+            from hrm_speculative import SpeculativeDecoder
+            decoder = SpeculativeDecoder.from_paths(self.model_path, draft_model_path,
+                                                    threads=self.model_config.get("threads"),
+                                                    batch_size=self.model_config.get("batch_size"))
+        except Exception as e:
+            print(f"⚠️ Spekulatives Dekodieren nicht verfügbar ({e}); verwende normales Sampling.", file=sys.stderr)
+            return None
+        print(f"✅ Spekulatives Dekodieren mit Draft-Modell '{draft_model_path}' aktiviert.", file=sys.stderr)
+        return decoder
+
+    def register_prefixes(self, prefixes: dict, prime: bool = True):
+        """
+        Registers system prompts that completions can be conditioned on.
+
+        If `prime` is set, up to `max_prefix_slots` prompts (the first one without slots)
+        are evaluated right away, so the first request for them only pays for its own
+        tokens. Slots whose prompt did not change keep their evaluated prefix.
 
-    async def handle_completion(self, prompt: str) -> dict:
-        """Handles a completion request using the loaded local model."""
+        Args:
+            prefixes (dict): A mapping of key (e.g. role name) to system prompt.
+            prime (bool): Whether to pre-evaluate the prefixes now.
+        """
+        with self._slots_lock:
+            self._prefix_prompts = dict(prefixes)
+        if prime and self.llm:
+            for key in list(self._prefix_prompts)[:max(1, self.max_prefix_slots)]:
+                slot = self._acquire_slot(key)
+                slot.lock.release()
+
+    def _acquire_slot(self, key: str) -> PrefixSlot:
+        """
+        Returns the locked slot for `key`, evaluating its prefix into a new or the least
+        recently used slot if it is not resident. The caller must release `slot.lock`.
+        """
+        prefix_text = f"[INST] {self._prefix_prompts[key]}\n\n"
+        if not self.max_prefix_slots:
+            slot = self._default_slot
+        else:
+            with self._slots_lock:
+                slot = self._prefix_slots.pop(key, None)
+                if slot is None:
+                    if len(self._prefix_slots) < self.max_prefix_slots:
+                        llm = self._load_model()
+                        if llm is None:
+                            raise RuntimeError("Das Sprachmodell konnte nicht geladen werden.")
+                        slot = PrefixSlot(llm)
+                    else:
+                        _, slot = self._prefix_slots.popitem(last=False)
+                self._prefix_slots[key] = slot
+
+        slot.lock.acquire()
+        # Re-checked under the slot lock: a concurrent miss may have re-assigned this slot
+        if slot.prefix_text != prefix_text:
+            # Evaluate the prefix once; later generations only evaluate what follows it
+            slot.prefix_text = prefix_text
+            slot.prefix_tokens = slot.llm.tokenize(prefix_text)
+            slot.llm.eval(slot.llm.prepare_inputs_for_generation(slot.prefix_tokens, reset=True))
+        return slot
+
+    def _generate(self, llm, tokens: list, max_new_tokens: int = None, cancel_token: CancellationToken = None,
+                  on_text=None) -> tuple:
+        """
+        Generates from already tokenized input, reusing any matching evaluated prefix.
+
+        The cancellation token is checked before the prompt is evaluated and between
+        generated tokens, so a cancelled request frees the context after at most one token.
+        If given, `on_text(text, completion_tokens)` is called from the generating thread
+        with each newly decoded piece of text.
+
+        Raises:
+            GenerationCancelled: If `cancel_token` fired.
+        """
+        sampling = {key: value for key, value in self.generation_settings.items() if key != "max_new_tokens"}
+        max_new_tokens = max_new_tokens or self.generation_settings["max_new_tokens"]
+        cancel_token = cancel_token or CancellationToken()
+        cancel_token.raise_if_cancelled()
+        # Tokens can end inside a multi-byte character, so streamed text is decoded incrementally
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore") if on_text else None
+        completion_tokens = []
+        # The prompt is evaluated before the first token comes out of the generator
+        start_ns = first_token_ns = time.time_ns()
+        for token in llm.generate(tokens, **sampling):
+            if not completion_tokens:
+                first_token_ns = time.time_ns()
+                tracing.record("model.prompt_eval", start_ns, first_token_ns, prompt_tokens=len(tokens))
+            completion_tokens.append(token)
+            if decoder:
+                text = decoder.decode(llm.detokenize([token], decode=False))
+                if text:
+                    on_text(text, len(completion_tokens))
+            if len(completion_tokens) >= max_new_tokens:
+                break
+            cancel_token.raise_if_cancelled(len(completion_tokens))
+        tracing.record("model.decode", first_token_ns, completion_tokens=len(completion_tokens))
+        return llm.detokenize(completion_tokens), len(completion_tokens)
+
+    def _complete(self, prompt: str, max_new_tokens: int, cancel_token: CancellationToken, on_text=None) -> dict:
+        """Runs a plain completion in the default context (blocking)."""
+        llm = self.speculative or self.llm
+        waiting_ns = time.time_ns()
+        with self._llm_lock:
+            tracing.record("model.lock_wait", waiting_ns)
+            if llm is self.llm:
+                self._default_slot.prefix_text = None  # This prompt replaces any evaluated prefix
+            tokens = llm.tokenize(prompt)
+            completion_text, completion_tokens = self._generate(llm, tokens, max_new_tokens, cancel_token, on_text)
+        return {
+            "completion": completion_text,
+            "usage": {"prompt_tokens": len(tokens), "completion_tokens": completion_tokens}
+        }
+
+    def _complete_with_prefix(self, key: str, prompt: str, cancel_token: CancellationToken = None) -> dict:
+        """Runs a completion in the slot holding `key`'s prefix (blocking)."""
+        slot = self._acquire_slot(key)
+        try:
+            tokens = slot.prefix_tokens + slot.llm.tokenize(f"{prompt} [/INST]", add_bos_token=False)
+            completion_text, completion_tokens = self._generate(slot.llm, tokens, cancel_token=cancel_token)
+        finally:
+            slot.lock.release()
+        return {
+            "completion": completion_text,
+            "usage": {"prompt_tokens": len(tokens), "completion_tokens": completion_tokens}
+        }
+
+    async def _run_cancellable(self, fn, cancel_token: CancellationToken, *args, **kwargs):
+        """
+        Runs a blocking generation on the worker pool. If the awaiting task is cancelled
+        (e.g. the client went away), the token is cancelled too so the thread stops.
+        The thread runs in the caller's context, so its spans join the caller's trace.
+        """
+        context = contextvars.copy_context()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, lambda: context.run(fn, *args, cancel_token=cancel_token, **kwargs))
+        except asyncio.CancelledError:
+            cancel_token.cancel("Die Anfrage wurde abgebrochen.")
+            raise
+
+    def count_tokens(self, text: str) -> int:
+        """Returns the number of tokens of `text`; without a loaded model, its UTF-8 length as an upper bound."""
+        if not self.llm:
+            return len(text.encode("utf-8"))
+        return len(self.llm.tokenize(text))
+
+    def prefix_length(self, key: str) -> int:
+        """Returns the length in tokens of the registered prefix `key` (0 if unknown)."""
+        prefix = self._prefix_prompts.get(key)
+        return self.count_tokens(prefix) if prefix else 0
+
+    async def handle_prefixed_completion(self, key: str, prompt: str, cancel_token: CancellationToken = None) -> dict:
+        """
+        Handles a completion conditioned on a registered system prompt.
+
+        Only the tokens of `prompt` are evaluated when the prefix for `key` is resident,
+        so switching between the most recently used prefixes is cheap.
+
+        Raises:
+            GenerationCancelled: If `cancel_token` fired before the completion finished.
+        """
         if not self.llm:
             return {
                 "completion": "Fehler: Das Sprachmodell konnte nicht geladen werden. Bitte überprüfen Sie die Server-Logs.",
-                "usage": {"prompt_tokens": 0, "completion_tokens": 0}
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0},
+                "error": "model_unavailable",
             }
+        if key not in self._prefix_prompts:
+            raise KeyError(f"Unbekannter Prompt-Präfix: {key}")
 
         try:
-            # Generate completion
-            completion_text = self.llm(prompt, max_new_tokens=2048, temperature=0.7, top_k=50, top_p=0.95, repetition_penalty=1.1)
-            
-            # Simulate token usage (ctransformers doesn't provide this directly)
-            prompt_tokens = len(prompt.split())
-            completion_tokens = len(completion_text.split())
+            return await self._run_cancellable(self._complete_with_prefix, cancel_token or CancellationToken(), key, prompt)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            print(f"❌ Fehler bei der Inferenz: {e}", file=sys.stderr)
+            return {
+                "completion": f"Ein Fehler ist bei der Verarbeitung aufgetreten: {e}",
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 0},
+                "error": "inference_failed",
+            }
+
+    async def get_metrics(self) -> dict:
+        """Returns the served model and, if enabled, speculative-decoding statistics."""
+        return {
+            "model_path": self.model_path,
+            "backend": self.backend,
+            "speculative": self.speculative.get_metrics() if self.speculative else None,
+        }
+
+    async def handle_completion(self, prompt: str, max_new_tokens: int = None, cancel_token: CancellationToken = None,
+                                on_text=None) -> dict:
+        """
+        Handles a completion request using the loaded local model.
+
+        Args:
+            prompt (str): The prompt to complete.
+            max_new_tokens (int, optional): The maximum number of tokens to generate; defaults to
+                the profile's generation settings.
+            cancel_token (CancellationToken, optional): Stops the generation between tokens once
+                it fires, e.g. because the client disconnected or its deadline passed.
+            on_text (callable, optional): Receives each newly generated piece of text and the
+                token count so far; called from the worker thread.
+
+        Returns:
+            dict: 'completion' and 'usage'; if the model is not loaded or inference failed, the
+                completion describes the problem and 'error' names it.
 
+        Raises:
+            GenerationCancelled: If `cancel_token` fired before the completion finished.
+        """
+        if not self.llm:
             return {
-                "completion": completion_text,
-                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+                "completion": "Fehler: Das Sprachmodell konnte nicht geladen werden. Bitte überprüfen Sie die Server-Logs.",
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0},
+                "error": "model_unavailable",
             }
+
+        try:
+            with tracing.span("model.completion", backend=self.backend, max_new_tokens=max_new_tokens):
+                # Generate completion in a worker thread so the event loop stays responsive
+                return await self._run_cancellable(self._complete, cancel_token or CancellationToken(), prompt,
+                                                   max_new_tokens, on_text=on_text)
+        except GenerationCancelled:
+            raise
         except Exception as e:
             print(f"❌ Fehler bei der Inferenz: {e}", file=sys.stderr)
             return {
                 "completion": f"Ein Fehler ist bei der Verarbeitung aufgetreten: {e}",
-                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 0}
-            }
\ No newline at end of file
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 0},
+                "error": "inference_failed",
+            }
+
+# --- MCP stdio transport ---
+
+SUPPORTED_PROTOCOL_VERSIONS = ("2024-11-05", "2025-03-26", "2025-06-18")
+
+# Maximum size of one JSON-RPC message line
+MAX_MESSAGE_BYTES = 2**24
+
+TOOLS = [
+    {
+        "name": "completion",
+        "description": "Generates a text completion for a prompt with the local HRM model.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "prompt": {"type": "string", "description": "The prompt to complete."},
+                "max_new_tokens": {"type": "integer", "minimum": 1, "description": "The maximum number of tokens to generate."},
+            },
+            "required": ["prompt"],
+        },
+    },
+    {
+        "name": "run_tool",
+        "description": "Placeholder for future tool-running capabilities.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+]
+
+class JsonRpcError(Exception):
+    """An error that is reported to the client as a JSON-RPC error response."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class MCPStdioServer:
+    """
+    Serves an HRMMCPServer over the MCP stdio transport.
+
+    Every request runs in its own task, so a slow completion never blocks the pipe;
+    responses are written as soon as they are ready, in any order. A
+    `notifications/cancelled` stops the matching generation between two tokens.
+    """
+
+    def __init__(self, model: HRMMCPServer):
+        self.model = model
+        self._writer = None
+        self._loop = None
+        self._requests = {}  # JSON-RPC id -> (task, CancellationToken) of requests in flight
+
+    async def serve(self, reader: asyncio.StreamReader = None, writer: asyncio.StreamWriter = None):
+        """Handles messages until the input is closed; defaults to stdin and stdout."""
+        self._loop = asyncio.get_running_loop()
+        if reader is None:
+            reader = asyncio.StreamReader(limit=MAX_MESSAGE_BYTES)
+            await self._loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        if writer is None:
+            transport, protocol = await self._loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+            writer = asyncio.StreamWriter(transport, protocol, None, self._loop)
+        self._writer = writer
+
+        while True:
+            try:
+                line = await self._read_line(reader)
+            except ValueError as e:
+                self._send({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": str(e)}})
+                continue
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                self._send({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+                continue
+            self._dispatch(message)
+
+        # The client closed the pipe: nobody will read the outstanding results
+        for task, token in list(self._requests.values()):
+            token.cancel("Der Client hat die Verbindung getrennt.")
+            task.cancel()
+        await writer.drain()
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        """
+        Reads one message line; returns b"" at the end of the input.
+
+        Raises:
+            ValueError: If the line is longer than the reader's limit. The whole line is
+                skipped, so reading continues with the next message.
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial  # The last line without a newline
+        except asyncio.LimitOverrunError:
+            pass
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                break
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                break
+        raise ValueError("Message too large")
+
+    def _send(self, message: dict):
+        """Writes one message; must be called on the event loop thread."""
+        self._writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _dispatch(self, message: dict):
+        if not isinstance(message, dict):
+            # JSON-RPC batches are not part of current MCP versions
+            self._send({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            return
+        if "method" not in message:
+            return  # A response to a request we never send
+        method = message["method"]
+        params = message.get("params") or {}
+        if "id" not in message:
+            if method == "notifications/cancelled":
+                request = self._requests.get(params.get("requestId"))
+                if request:
+                    request[1].cancel(params.get("reason") or "Die Anfrage wurde vom Client abgebrochen.")
+            return  # Other notifications (e.g. notifications/initialized) need no action
+
+        request_id = message["id"]
+        token = CancellationToken()
+        task = self._loop.create_task(self._handle_request(request_id, method, params, token))
+        self._requests[request_id] = (task, token)
+
+    async def _handle_request(self, request_id, method: str, params: dict, token: CancellationToken):
+        try:
+            result = await self._call(method, params, token)
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except GenerationCancelled:
+            return  # Cancelled requests are not answered
+        except JsonRpcError as e:
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            print(f"❌ Fehler bei der Anfrage {method}: {e}", file=sys.stderr)
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32603, "message": str(e)}}
+        finally:
+            self._requests.pop(request_id, None)
+        self._send(response)
+
+    async def _call(self, method: str, params: dict, token: CancellationToken):
+        if method == "initialize":
+            requested = params.get("protocolVersion")
+            return {
+                "protocolVersion": requested if requested in SUPPORTED_PROTOCOL_VERSIONS else SUPPORTED_PROTOCOL_VERSIONS[-1],
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "hrm-mcp-server", "version": "1.0.0"},
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": TOOLS}
+        if method == "tools/call":
+            return await self._call_tool(params, token)
+        raise JsonRpcError(-32601, f"Method not found: {method}")
+
+    async def _call_tool(self, params: dict, token: CancellationToken) -> dict:
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if name == "run_tool":
+            return {"content": [{"type": "text", "text": "run_tool ist noch nicht implementiert."}], "isError": True}
+        if name != "completion":
+            raise JsonRpcError(-32602, f"Unknown tool: {name}")
+        prompt = arguments.get("prompt")
+        if not isinstance(prompt, str) or not prompt:
+            raise JsonRpcError(-32602, "The 'prompt' argument must be a non-empty string.")
+        max_new_tokens = arguments.get("max_new_tokens")
+        if max_new_tokens is None:
+            max_new_tokens = self.model.generation_settings["max_new_tokens"]
+        elif not isinstance(max_new_tokens, int) or isinstance(max_new_tokens, bool) or max_new_tokens < 1:
+            raise JsonRpcError(-32602, "The 'max_new_tokens' argument must be a positive integer.")
+
+        on_text = None
+        progress_token = (params.get("_meta") or {}).get("progressToken")
+        if progress_token is not None:
+            def on_text(text: str, completion_tokens: int):
+                self._loop.call_soon_threadsafe(self._send, {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {"progressToken": progress_token, "progress": completion_tokens,
+                               "total": max_new_tokens, "message": text},
+                })
+
+        result = await self.model.handle_completion(prompt, max_new_tokens, token, on_text=on_text)
+        return {
+            "content": [{"type": "text", "text": result["completion"]}],
+            # The model reports an unloaded model or a failed inference as an error completion
+            "isError": "error" in result,
+            "_meta": {"usage": result["usage"]},
+        }
+
+def main():
+    server = MCPStdioServer(HRMMCPServer())
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
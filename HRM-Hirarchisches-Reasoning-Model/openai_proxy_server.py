@@ -8,16 +8,27 @@ through an OpenAI-compatible API endpoint. This allows Trae
 to connect to it as if it were a standard OpenAI-compatible provider.
 """
 
-import uvicorn
+import argparse
 import os
-from fastapi import FastAPI, HTTPException
+import secrets
+import sys
+import threading
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
 
-# Import the existing HRM server logic
-from mcp_hrm_server import HRMMCPServer
+from asi_core import diagnostics, tracing
+from asi_core.security_layer import SecurityLayer, RateLimitMiddleware
+from asi_core.request_scheduler import RequestScheduler, DeadlineExceeded, PRIORITY_CLASSES, INTERACTIVE
+from asi_core.cancellation import CancellationToken, GenerationCancelled
+from asi_core.memory_governor import MemoryGovernor, MemoryBudgetExceeded
+from asi_core.startup_profile import phase, profiling, run_profiled
 
 # --- Pydantic Models for OpenAI Compatibility ---
 
@@ -50,14 +61,88 @@ class ChatCompletionResponse(BaseModel):
     choices: List[ChatCompletionChoice]
     usage: Usage
 
+class ChatCompletionChunkChoice(BaseModel):
+    index: int = 0
+    delta: Dict[str, str]
+    finish_reason: Optional[str] = None
+
+class ChatCompletionChunk(BaseModel):
+    id: str = Field(default_factory=lambda: f"chatcmpl-{''.join(str(ord(c)) for c in 'local-hrm')}")
+    object: str = "chat.completion.chunk"
+    created: int = Field(default_factory=lambda: int(time.time()))
+    model: str
+    choices: List[ChatCompletionChunkChoice]
+    usage: Optional[Usage] = None
+
+# --- Model ---
+
+# Clients choose a class with 'X-HRM-Priority: interactive|batch' and may send
+# 'X-HRM-Deadline-Ms' to have the request dropped if it cannot finish in time.
+MODEL_SOCKET = os.environ.get("HRM_MODEL_SOCKET")
+if MODEL_SOCKET:
+    # Multi-worker mode (python hrm_model_server.py --workers N): the model lives in the
+    # model server process, which also decides across
+    # all workers who goes next. Locally we only bound the requests in flight per worker.
+    scheduler = RequestScheduler(concurrency=int(os.environ.get("HRM_WORKER_INFLIGHT", 8)))
+else:
+    # The model serves one generation at a time; the scheduler decides who goes next.
+    scheduler = RequestScheduler(concurrency=1)
+
+# Keeps generations within HRM_MEMORY_BUDGET_MB. With a model server, that process holds
+# the model and governs its memory; here the governor then only reports.
+memory_governor = MemoryGovernor() if MODEL_SOCKET else MemoryGovernor.from_env()
+
+_hrm_model = None
+_hrm_model_lock = threading.Lock()
+
+def get_hrm_model():
+    """
+    Returns the HRM model, loading it (and ctransformers) on first use, so importing
+    this module stays cheap. The server preloads it at startup.
+    """
+    global _hrm_model
+    with _hrm_model_lock:
+        if _hrm_model is None:
+            with phase("HRM model"):
+                if MODEL_SOCKET:
+                    from hrm_model_server import RemoteHRMModel
+                    _hrm_model = RemoteHRMModel(MODEL_SOCKET)
+                else:
+                    # Instantiate the local HRM server
+                    from mcp_hrm_server import HRMMCPServer
+                    _hrm_model = HRMMCPServer()
+    return _hrm_model
+
+# Callbacks blocking the event loop longer than this are logged (0 disables the monitor)
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get("HRM_LOOP_LAG_MS", 100))
+loop_monitor = diagnostics.LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD_MS / 1000.0)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if LOOP_LAG_THRESHOLD_MS > 0:
+        loop_monitor.start()
+    # Load the model before the first request instead of during it
+    await asyncio.to_thread(get_hrm_model)
+    yield
+    await loop_monitor.stop()
+
 # --- FastAPI Application ---
 
 app = FastAPI(
     title="HRM OpenAI-Compatible Proxy",
     description="Exposes the local HRM model via an OpenAI-compatible API.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Per-client token quotas and opt-in rate limits (see HRM_* variables in SecurityLayer.from_env).
+# Added before CORS so that rejections still carry CORS headers; rejected requests
+# never reach the model.
+with phase("SecurityLayer"):
+    security = SecurityLayer.from_env()
+# Health checks, model listings (polled by the web UI) and metrics scrapes are never limited.
+app.add_middleware(RateLimitMiddleware, security=security, exempt_paths=("/ready", "/v1/models", "/metrics"))
+
 # Add CORS middleware to allow requests from the local HTML file
 app.add_middleware(
     CORSMiddleware,
@@ -67,11 +152,19 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Instantiate the local HRM server
-hrm_model = HRMMCPServer()
+# How often an in-flight request checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+async def watch_disconnect(http_request: Request, cancel_token: CancellationToken):
+    """Cancels the token as soon as the client closes the connection."""
+    while not cancel_token.cancelled:
+        if await http_request.is_disconnected():
+            cancel_token.cancel("Client disconnected.")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
 
 @app.post("/v1/chat/completions", response_model=ChatCompletionResponse)
-async def create_chat_completion(request: ChatCompletionRequest):
+async def create_chat_completion(request: ChatCompletionRequest, http_request: Request):
     """Handles chat completion requests, mimicking the OpenAI API."""
     # Validate the model name
     if request.model != "hrm-local-model":
@@ -80,12 +173,6 @@ async def create_chat_completion(request: ChatCompletionRequest):
             detail=f"Model '{request.model}' not found. Please use 'hrm-local-model'."
         )
 
-    if request.stream:
-        raise HTTPException(
-            status_code=400,
-            detail="Streaming is not supported by this local proxy."
-        )
-
     # Extract the last user message as the prompt
     last_user_message = next((msg.content for msg in reversed(request.messages) if msg.role == 'user'), None)
     if not last_user_message:
@@ -94,14 +181,92 @@ async def create_chat_completion(request: ChatCompletionRequest):
             detail="No user message found in the request."
         )
 
+    priority = http_request.headers.get("x-hrm-priority", INTERACTIVE)
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}'. Use one of: {', '.join(PRIORITY_CLASSES)}.")
+    deadline = None
+    if "x-hrm-deadline-ms" in http_request.headers:
+        try:
+            deadline = time.monotonic() + float(http_request.headers["x-hrm-deadline-ms"]) / 1000.0
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-HRM-Deadline-Ms must be a number of milliseconds.")
+
+    # Generation stops between tokens once the client disconnects or the deadline passes;
+    # a request whose client left while it was queued ends as soon as it is dispatched.
+    hrm_model = get_hrm_model()
+    max_tokens = request.max_tokens or hrm_model.generation_settings["max_new_tokens"]
+    memory_estimate = memory_governor.estimate(len(last_user_message.split()), max_tokens)
+    try:
+        # Shed at once rather than queue a request that cannot be served
+        memory_governor.check(memory_estimate)
+    except MemoryBudgetExceeded as e:
+        raise memory_error(e)
+    cancel_token = CancellationToken(deadline=deadline)
+    watcher = asyncio.create_task(watch_disconnect(http_request, cancel_token))
+
+    cost = len(last_user_message.split()) + max_tokens
+    scheduling = {}
+    if MODEL_SOCKET:
+        scheduling = {"user": http_request.state.client_key, "priority": priority, "cost": cost}
+
+    # Continues the caller's trace if it sent a 'traceparent' header
+    trace = tracing.get_tracer().start_span("proxy.chat_completion", http_request.headers.get(tracing.TRACEPARENT_HEADER),
+                                            priority=priority, stream=bool(request.stream), max_tokens=max_tokens)
+
+    def run_completion(on_text=None):
+        queued_ns = time.time_ns()
+
+        async def job():
+            tracing.record("proxy.queue", queued_ns, priority=priority)
+            async with memory_governor.reserve(memory_estimate, deadline):
+                return await hrm_model.handle_completion(last_user_message, max_new_tokens=max_tokens,
+                                                         cancel_token=cancel_token, on_text=on_text, **scheduling)
+
+        return scheduler.run(
+            job,
+            user=http_request.state.client_key,
+            priority=priority,
+            cost=cost,
+            deadline=deadline,
+        )
+
+    if request.stream:
+        events = stream_chat_completion(request.model, run_completion, http_request.state.client_key,
+                                        last_user_message, watcher, trace)
+        return StreamingResponse(events, media_type="text/event-stream")
+
     # Get the completion from the local HRM model
     try:
-        hrm_result = await hrm_model.handle_completion(last_user_message)
+        with tracing.use_span(trace):
+            hrm_result = await run_completion()
         completion_text = hrm_result.get("completion", "")
         usage_info = hrm_result.get("usage", {"prompt_tokens": 0, "completion_tokens": 0})
+        trace.set_attribute("completion_tokens", usage_info.get("completion_tokens", 0))
 
+    except DeadlineExceeded as e:
+        trace.end(e)
+        raise HTTPException(status_code=504, detail=str(e))
+    except MemoryBudgetExceeded as e:
+        trace.end(e)
+        raise memory_error(e)
+    except GenerationCancelled as e:
+        trace.end(e)
+        # The tokens generated before stopping were real work and still count
+        security.record_usage(http_request.state.client_key, len(last_user_message.split()) + e.completion_tokens)
+        status_code = 504 if e.reason == CancellationToken.DEADLINE_REASON else 499
+        raise HTTPException(status_code=status_code, detail=e.reason)
     except Exception as e:
+        trace.end(e)
         raise HTTPException(status_code=500, detail=f"Error processing with HRM model: {str(e)}")
+    finally:
+        watcher.cancel()
+        trace.end()
+
+    # Charge the tokens to the client's quota
+    security.record_usage(
+        http_request.state.client_key,
+        usage_info.get("prompt_tokens", 0) + usage_info.get("completion_tokens", 0)
+    )
 
     # Format the response to be OpenAI-compatible
     response_message = ChatMessage(role="assistant", content=completion_text)
@@ -118,6 +283,146 @@ async def create_chat_completion(request: ChatCompletionRequest):
         usage=usage
     )
 
+def memory_error(e: MemoryBudgetExceeded) -> HTTPException:
+    """503 with Retry-After while memory is short; 413 for a request that can never fit."""
+    if e.retry_after is None:
+        return HTTPException(status_code=413, detail=str(e))
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+
+def _sse(payload) -> str:
+    data = payload.model_dump_json() if isinstance(payload, BaseModel) else json.dumps(payload)
+    return f"data: {data}\n\n"
+
+async def stream_chat_completion(model: str, run_completion, client_key: str, prompt: str, watcher: asyncio.Task,
+                                 trace: tracing.Span):
+    """
+    Streams a completion as OpenAI-style server-sent events: one `chat.completion.chunk`
+    per generated piece of text, a final chunk with the finish reason and usage, then
+    `[DONE]`. Errors after the response has started are sent as an `error` event.
+    `trace` ends once the stream does.
+    """
+    loop = asyncio.get_running_loop()
+    pieces = asyncio.Queue()
+    completion_tokens = 0
+
+    def on_text(text: str, tokens_so_far: int):
+        # Called from the generating thread (or the event loop for a remote model)
+        loop.call_soon_threadsafe(pieces.put_nowait, (text, tokens_so_far))
+
+    with tracing.use_span(trace):
+        task = asyncio.create_task(run_completion(on_text))
+    task.add_done_callback(lambda _: pieces.put_nowait(None))
+    prompt_tokens = len(prompt.split())
+    try:
+        yield _sse(ChatCompletionChunk(model=model, choices=[ChatCompletionChunkChoice(delta={"role": "assistant"})]))
+        while (piece := await pieces.get()) is not None:
+            text, completion_tokens = piece
+            yield _sse(ChatCompletionChunk(model=model, choices=[ChatCompletionChunkChoice(delta={"content": text})]))
+
+        try:
+            usage_info = task.result().get("usage", {})
+        except DeadlineExceeded as e:
+            trace.end(e)
+            yield _sse({"error": {"message": str(e), "type": "deadline_exceeded", "code": 504}})
+            return
+        except MemoryBudgetExceeded as e:
+            trace.end(e)
+            yield _sse({"error": {"message": str(e), "type": "memory_exhausted", "code": memory_error(e).status_code}})
+            return
+        except GenerationCancelled as e:
+            trace.end(e)
+            completion_tokens = e.completion_tokens
+            status_code = 504 if e.reason == CancellationToken.DEADLINE_REASON else 499
+            yield _sse({"error": {"message": e.reason, "type": "cancelled", "code": status_code}})
+            return
+        except Exception as e:
+            trace.end(e)
+            yield _sse({"error": {"message": f"Error processing with HRM model: {str(e)}", "type": "server_error", "code": 500}})
+            return
+
+        prompt_tokens = usage_info.get("prompt_tokens", prompt_tokens)
+        completion_tokens = usage_info.get("completion_tokens", completion_tokens)
+        usage = Usage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                      total_tokens=prompt_tokens + completion_tokens)
+        yield _sse(ChatCompletionChunk(model=model, choices=[ChatCompletionChunkChoice(delta={}, finish_reason="stop")],
+                                       usage=usage))
+        yield "data: [DONE]\n\n"
+    finally:
+        # Also reached when the client disconnects mid-stream: stop the generation
+        watcher.cancel()
+        task.cancel()
+        # Charge the tokens to the client's quota, including those of a cancelled generation
+        security.record_usage(client_key, prompt_tokens + completion_tokens)
+        trace.set_attribute("completion_tokens", completion_tokens)
+        trace.end()
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness for load balancers such as hrm_router.py: 503 until the model is loaded
+    and while the process is over its memory budget (new requests would be shed).
+    """
+    if _hrm_model is None:
+        raise HTTPException(status_code=503, detail="The model is still loading.")
+    if memory_governor.over_budget():
+        raise HTTPException(status_code=503, detail="The server is over its memory budget.")
+    metrics = scheduler.get_metrics()
+    return {
+        "status": "ready",
+        "in_flight": metrics["in_flight"],
+        "queued": sum(metrics[priority]["queued"] for priority in PRIORITY_CLASSES),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Returns scheduler queue metrics, admission-control counters and model statistics."""
+    return {
+        "scheduler": scheduler.get_metrics(),
+        "security": security.stats,
+        "event_loop": loop_monitor.get_metrics(),
+        "memory": memory_governor.get_metrics(),
+        "model": await get_hrm_model().get_metrics(),
+    }
+
+# --- Diagnostics ---
+
+# The /debug endpoints exist only if a token is configured, and require it in 'X-HRM-Debug-Token'
+DEBUG_TOKEN = os.environ.get("HRM_DEBUG_TOKEN")
+MAX_DEBUG_SECONDS = 60.0
+# One measurement at a time: overlapping profiles would distort each other
+_debug_lock = asyncio.Lock()
+
+def check_debug_access(http_request: Request):
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = http_request.headers.get("x-hrm-debug-token", "")
+    if not secrets.compare_digest(token.encode("utf-8"), DEBUG_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid debug token.")
+    if _debug_lock.locked():
+        raise HTTPException(status_code=409, detail="Another measurement is in progress.")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(http_request: Request, seconds: float = Query(10.0, gt=0, le=MAX_DEBUG_SECONDS),
+                        mode: str = Query("sample", pattern="^(sample|cprofile)$")):
+    """
+    Profiles the live server for `seconds`.
+
+    'sample' (default) returns collapsed stacks of all threads for flame graphs;
+    'cprofile' returns per-function totals of the event loop thread.
+    """
+    check_debug_access(http_request)
+    async with _debug_lock:
+        if mode == "cprofile":
+            return await diagnostics.profile_event_loop(seconds)
+        return await asyncio.to_thread(diagnostics.sample_stacks, seconds)
+
+@app.get("/debug/memory", response_class=PlainTextResponse)
+async def debug_memory(http_request: Request, seconds: float = Query(10.0, ge=0, le=MAX_DEBUG_SECONDS)):
+    """Returns the memory allocated during the next `seconds` as collapsed stacks weighted by bytes."""
+    check_debug_access(http_request)
+    async with _debug_lock:
+        return await diagnostics.memory_profile(seconds)
+
 @app.get("/v1/models")
 async def list_models():
     """Provides a list of available models, mimicking the OpenAI API."""
@@ -166,6 +471,20 @@ async def read_project_file(path: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HRM OpenAI-compatible proxy server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and initialization time per module, then exit.")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        sys.exit(run_profiled([sys.argv[0], *(arg for arg in sys.argv[1:] if arg != "--profile-startup")]))
+    if profiling():
+        get_hrm_model()
+        sys.exit(0)
+
+    import uvicorn
+
     print("🚀 Starting HRM OpenAI-Compatible Proxy Server...")
-    print("✅ Server is running. Configure Trae to connect to http://127.0.0.1:8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    print(f"✅ Server is running. Configure Trae to connect to http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
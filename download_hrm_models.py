@@ -2,45 +2,234 @@
 """
 Download-Skript für HRM-Modelle von Hugging Face
 Phase 2: Trainierte Modelle einbinden und Mock-Systeme ersetzen
+
+Verwaltet die HRM-Checkpoints als Modell-Artefakte:
+- paralleler Download aller Dateien aller Checkpoints (abgebrochene Downloads werden fortgesetzt)
+- SHA-256-Prüfung jeder Datei, festgehalten in <root>/manifest.json; bereits geprüfte,
+  unveränderte Dateien werden bei weiteren Läufen ohne erneutes Hashen übersprungen
+- optionaler lokaler Mirror (z. B. ein Cache auf Offline- oder CI-Rechnern), aus dem per
+  Hardlink oder Kopie installiert wird
+
+Aufruf:
+    python download_hrm_models.py --root ./models
+    python download_hrm_models.py --root ./models --mirror /mnt/cache/hrm-models
 """
 
+import argparse
+import hashlib
+import json
 import os
-from huggingface_hub import snapshot_download
-
-def download_hrm_checkpoints():
-    """Lade die verfügbaren HRM-Checkpoints herunter."""
-    
-    # Verzeichnis für Modelle erstellen
-    models_dir = "/Users/bigsur/Desktop/ASI und HRM /models"
-    os.makedirs(models_dir, exist_ok=True)
-    
-    # Verfügbare Checkpoints
-    checkpoints = {
-        "arc-2": "sapientinc/HRM-checkpoint-ARC-2",
-        "sudoku-extreme": "sapientinc/HRM-checkpoint-sudoku-extreme", 
-        "maze-30x30": "sapientinc/HRM-checkpoint-maze-30x30-hard"
-    }
-    
-    downloaded = {}
-    
-    for name, repo_id in checkpoints.items():
-        print(f"Lade {name} herunter...")
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Verfügbare Checkpoints
+CHECKPOINTS = {
+    "arc-2": "sapientinc/HRM-checkpoint-ARC-2",
+    "sudoku-extreme": "sapientinc/HRM-checkpoint-sudoku-extreme",
+    "maze-30x30": "sapientinc/HRM-checkpoint-maze-30x30-hard"
+}
+
+DEFAULT_ROOT = os.environ.get("HRM_MODELS_DIR", "./models")
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1 << 20
+
+def sha256_file(path: str) -> str:
+    """Berechnet den SHA-256-Hash einer Datei blockweise."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copy_with_sha256(source: str, dest: str) -> str:
+    """Kopiert eine Datei und berechnet dabei ihren SHA-256-Hash in einem Durchgang."""
+    digest = hashlib.sha256()
+    partial = dest + ".part"
+    with open(source, "rb") as src, open(partial, "wb") as dst:
+        while chunk := src.read(CHUNK_SIZE):
+            digest.update(chunk)
+            dst.write(chunk)
+    shutil.copystat(source, partial)
+    os.replace(partial, dest)
+    return digest.hexdigest()
+
+class Manifest:
+    """
+    Threadsicheres Verzeichnis der geprüften Dateien unter einem Modell-Root.
+
+    Zu jeder Datei werden Hash, Größe und Änderungszeit gespeichert. Stimmen Größe und
+    Änderungszeit noch überein, gilt die Datei als geprüft, ohne dass sie neu gehasht wird.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.data = {"files": {}, "checkpoints": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def entry(self, relpath: str) -> dict | None:
+        """Liefert den Eintrag einer Datei, sofern sie seit der Prüfung unverändert ist."""
+        entry = self.data["files"].get(relpath)
         try:
-            path = snapshot_download(
-                repo_id=repo_id,
-                cache_dir=os.path.join(models_dir, name),
-                local_dir=os.path.join(models_dir, name)
-            )
-            downloaded[name] = path
-            print(f"✓ {name} erfolgreich heruntergeladen: {path}")
-        except Exception as e:
-            print(f"✗ Fehler beim Download von {name}: {e}")
-    
+            stat = os.stat(os.path.join(self.root, relpath))
+        except FileNotFoundError:
+            return None
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def checkpoint_complete(self, name: str) -> bool:
+        """Prüft, ob alle Dateien eines Checkpoints geprüft und unverändert vorliegen."""
+        files = self.data["checkpoints"].get(name, {}).get("files")
+        return bool(files) and all(self.entry(f"{name}/{filename}") for filename in files)
+
+    def record_file(self, relpath: str, sha256: str, source: str):
+        stat = os.stat(os.path.join(self.root, relpath))
+        with self._lock:
+            self.data["files"][relpath] = {
+                "sha256": sha256,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "source": source,
+                "verified_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save()
+
+    def record_checkpoint(self, name: str, repo_id: str, files: list):
+        with self._lock:
+            self.data["checkpoints"][name] = {"repo_id": repo_id, "files": sorted(files)}
+            self._save()
+
+    def _save(self):
+        # Atomar schreiben, damit ein Abbruch kein halbes Manifest hinterlässt
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+def list_remote_files(repo_id: str) -> dict:
+    """Listet die Dateien eines Hugging-Face-Repos mit ihrem SHA-256 (nur für LFS-Dateien bekannt)."""
+    from huggingface_hub import HfApi
+
+    info = HfApi().model_info(repo_id, files_metadata=True)
+    files = {}
+    for sibling in info.siblings:
+        lfs = sibling.lfs
+        files[sibling.rfilename] = lfs.get("sha256") if isinstance(lfs, dict) else getattr(lfs, "sha256", None)
+    return files
+
+def list_mirror_files(mirror: Manifest, name: str) -> dict | None:
+    """Listet die Dateien eines Checkpoints im Mirror mit ihrem dort geprüften SHA-256."""
+    checkpoint = mirror.data["checkpoints"].get(name)
+    if not checkpoint:
+        return None
+    return {filename: mirror.data["files"].get(f"{name}/{filename}", {}).get("sha256") for filename in checkpoint["files"]}
+
+def fetch_file(manifest: Manifest, name: str, repo_id: str, filename: str, expected_sha256: str | None,
+               mirror: Manifest | None) -> str:
+    """
+    Stellt eine Datei unter dem Root bereit und prüft sie.
+
+    Returns:
+        str: Woher die Datei stammt: 'cached', 'mirror' oder 'hub'.
+    """
+    relpath = f"{name}/{filename}"
+    if manifest.entry(relpath):
+        return "cached"
+    dest = os.path.join(manifest.root, relpath)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    mirror_entry = mirror.entry(relpath) if mirror else None
+    if mirror_entry:
+        source = "mirror"
+        if os.path.exists(dest):
+            os.remove(dest)
+        try:
+            # Ein Hardlink ist dieselbe, im Mirror bereits geprüfte Datei
+            os.link(os.path.join(mirror.root, relpath), dest)
+            sha256 = mirror_entry["sha256"]
+        except OSError:
+            sha256 = copy_with_sha256(os.path.join(mirror.root, relpath), dest)
+    else:
+        from huggingface_hub import hf_hub_download
+
+        source = "hub"
+        # Unvollständige Downloads liegen unter <root>/<name>/.cache und werden fortgesetzt
+        hf_hub_download(repo_id=repo_id, filename=filename, local_dir=os.path.join(manifest.root, name))
+        sha256 = sha256_file(dest)
+
+    if expected_sha256 and sha256 != expected_sha256:
+        os.remove(dest)
+        raise ValueError(f"SHA-256 von {relpath} stimmt nicht: erwartet {expected_sha256}, erhalten {sha256}")
+    manifest.record_file(relpath, sha256, source)
+    return source
+
+def download_hrm_checkpoints(root: str = DEFAULT_ROOT, mirror_root: str = None, max_workers: int = 8,
+                             checkpoints: dict = None) -> dict:
+    """
+    Lade die verfügbaren HRM-Checkpoints herunter bzw. installiere sie aus dem Mirror.
+
+    Returns:
+        dict: Name -> lokaler Pfad aller vollständig geprüften Checkpoints.
+    """
+    checkpoints = checkpoints or CHECKPOINTS
+    os.makedirs(root, exist_ok=True)
+    manifest = Manifest(root)
+    mirror = Manifest(mirror_root) if mirror_root else None
+
+    downloaded = {}
+    jobs = {}  # future -> (name, filename)
+    failed = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for name, repo_id in checkpoints.items():
+            if manifest.checkpoint_complete(name):
+                print(f"✓ {name} bereits geprüft vorhanden")
+                downloaded[name] = os.path.join(root, name)
+                continue
+            try:
+                files = (list_mirror_files(mirror, name) if mirror else None) or list_remote_files(repo_id)
+            except Exception as e:
+                print(f"✗ Dateiliste von {name} nicht verfügbar: {e}")
+                failed.add(name)
+                continue
+            manifest.record_checkpoint(name, repo_id, list(files))
+            print(f"Lade {name} herunter ({len(files)} Dateien)...")
+            for filename, expected_sha256 in files.items():
+                future = executor.submit(fetch_file, manifest, name, repo_id, filename, expected_sha256, mirror)
+                jobs[future] = (name, filename)
+
+        for future in as_completed(jobs):
+            name, filename = jobs[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"✗ Fehler bei {name}/{filename}: {e}")
+                failed.add(name)
+
+    for name in checkpoints:
+        if name not in downloaded and name not in failed:
+            downloaded[name] = os.path.join(root, name)
+            print(f"✓ {name} erfolgreich heruntergeladen und geprüft: {downloaded[name]}")
     return downloaded
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lädt die HRM-Checkpoints parallel, fortsetzbar und SHA-256-geprüft.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Zielverzeichnis der Modelle (Standard: $HRM_MODELS_DIR oder ./models)")
+    parser.add_argument("--mirror", help="Lokales Verzeichnis mit bereits geprüften Checkpoints (gleiche Struktur wie --root)")
+    parser.add_argument("--workers", type=int, default=8, help="Anzahl paralleler Downloads")
+    parser.add_argument("--only", nargs="+", choices=sorted(CHECKPOINTS), help="Nur diese Checkpoints laden")
+    args = parser.parse_args()
+
     print("=== Phase 2: HRM-Modelle herunterladen ===")
-    models = download_hrm_checkpoints()
-    print(f"\nInsgesamt {len(models)} Modelle heruntergeladen.")
+    selected = {name: CHECKPOINTS[name] for name in args.only} if args.only else CHECKPOINTS
+    start = time.perf_counter()
+    models = download_hrm_checkpoints(args.root, args.mirror, args.workers, selected)
+    print(f"\nInsgesamt {len(models)} Modelle bereit ({time.perf_counter() - start:.1f}s).")
     for name, path in models.items():
-        print(f"- {name}: {path}")
\ No newline at end of file
+        print(f"- {name}: {path}")
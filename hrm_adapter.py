@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+HRM-Modell-Adapter für das ASI-System
+
+Wird von hrm_integration_bridge.py in das ASI-Projekt kopiert.
+"""
+
+import functools
+import json
+import random
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Any, Iterator, List, Optional
+
+INTERMEDIATES = (
+    "Analysiere Problemstruktur",
+    "Identifiziere Muster",
+    "Wende logische Regeln an",
+    "Validiere Zwischenergebnisse",
+    "Optimiere Lösungsweg"
+)
+
+@functools.lru_cache(maxsize=None)
+def _describe(task_type: str, step: int) -> str:
+    """Beschreibung eines Schritts; jede Kombination existiert nur einmal im Speicher."""
+    return f"Analysiere {task_type} - Schritt {step}"
+
+class ReasoningStep(Mapping):
+    """
+    Ein Reasoning-Schritt in kompakter Form.
+
+    Beschreibung und Zwischenergebnis werden aus Aufgabentyp und Schrittnummer
+    abgeleitet; das Dict der bisherigen Ausgabe entsteht erst in `to_dict`.
+    Als nur lesbares Mapping verhält er sich wie dieses Dict (`step["confidence"]`,
+    `"confidence" in step`, `dict(step)`).
+    """
+
+    __slots__ = ("step", "task_type", "confidence")
+    type = "reasoning"
+    FIELDS = ("step", "type", "description", "confidence", "intermediate_result")
+
+    def __init__(self, step: int, task_type: str, confidence: float):
+        self.step = step
+        self.task_type = task_type
+        self.confidence = confidence
+
+    @property
+    def description(self) -> str:
+        return _describe(self.task_type, self.step)
+
+    @property
+    def intermediate_result(self) -> str:
+        return INTERMEDIATES[min(self.step - 1, len(INTERMEDIATES) - 1)]
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"ReasoningStep({self.step}, {self.task_type!r}, {self.confidence})"
+
+class ReasoningTrace(Sequence):
+    """
+    Die Schritte eines Ergebnisses: nur Aufgabentyp und ein Array der Konfidenzen.
+
+    Eine nur lesbare Sequenz von `ReasoningStep`, die beim Zugriff erzeugt werden.
+    """
+
+    __slots__ = ("task_type", "confidences")
+
+    def __init__(self, task_type: str, confidences=()):
+        self.task_type = task_type
+        self.confidences = array("d", confidences)
+
+    def append(self, step: ReasoningStep):
+        self.confidences.append(step.confidence)
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ReasoningTrace index out of range")
+        return ReasoningStep(index + 1, self.task_type, self.confidences[index])
+
+    def __iter__(self) -> Iterator[ReasoningStep]:
+        for index, confidence in enumerate(self.confidences):
+            yield ReasoningStep(index + 1, self.task_type, confidence)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [step.to_dict() for step in self]
+
+def json_default(value):
+    """Für `json.dumps(result, default=json_default)`: erst hier werden die Schritte zu Dicts."""
+    if isinstance(value, ReasoningTrace):
+        return value.to_list()
+    if isinstance(value, ReasoningStep):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class HRMModelAdapter:
+    """Adapter für HRM-Integration ohne PyTorch-Abhängigkeit"""
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.reasoning_depth = config.get("max_reasoning_depth", 8)
+        self.halt_threshold = config.get("halt_threshold", 0.95)
+        
+    def iter_reasoning_steps(self, task: str, context: Optional[Dict[str, Any]] = None) -> Iterator[ReasoningStep]:
+        """
+        Liefert die Reasoning-Schritte, sobald sie entstehen.
+
+        Endet nach `max_reasoning_depth` Schritten oder beim ersten Schritt, dessen
+        Konfidenz die Abbruchschwelle erreicht; der Aufrufer kann schon vorher abbrechen.
+        """
+        return self._steps(self._classify_task(task))
+
+    def _steps(self, task_type: str) -> Iterator[ReasoningStep]:
+        for step_num in range(1, self.reasoning_depth + 1):
+            step = ReasoningStep(step_num, task_type, min(0.9, 0.3 + (step_num * 0.1)))
+            yield step
+            
+            # Prüfe Abbruchbedingung
+            if step.confidence >= self.halt_threshold:
+                break
+        
+    def process_reasoning_task(self, task: str, context: Dict[str, Any], compact: bool = False) -> Dict[str, Any]:
+        """
+        Verarbeite Reasoning-Aufgabe mit HRM-Logik
+
+        `steps` ist eine Liste von Dicts, das Ergebnis also direkt JSON-serialisierbar.
+        Mit `compact=True` ist es ein `ReasoningTrace`; für JSON dann `json_default` verwenden.
+        """
+        
+        # Simulierte HRM-Verarbeitung
+        task_type = self._classify_task(task)
+        steps = ReasoningTrace(task_type)
+        confidence = 0.0
+        for step in self._steps(task_type):
+            steps.append(step)
+            if step.confidence >= self.halt_threshold:
+                confidence = step.confidence
+        
+        # Generiere finale Antwort
+        result = {
+            "task": task,
+            "type": task_type,
+            "steps": steps if compact else steps.to_list(),
+            "final_answer": self._generate_answer(task, steps),
+            "confidence": confidence,
+            "reasoning_depth": len(steps),
+            "model": "hrm-v1"
+        }
+        
+        return result
+    
+    def _classify_task(self, task: str) -> str:
+        """Klassifiziere den Aufgabentyp"""
+        task_lower = task.lower()
+        if "sudoku" in task_lower or "rätsel" in task_lower:
+            return "sudoku"
+        elif "maze" in task_lower or "labyrinth" in task_lower:
+            return "maze"
+        elif "arc" in task_lower or "abstrakt" in task_lower:
+            return "arc"
+        else:
+            return "general_reasoning"
+    
+    def _generate_answer(self, task: str, steps: List[Dict]) -> str:
+        """Generiere finale Antwort basierend auf Reasoning-Schritten"""
+        confidence = steps[-1]["confidence"] if steps else 0.5
+        
+        if confidence > 0.8:
+            return f"Basierend auf {len(steps)} Reasoning-Schritten: Lösung gefunden mit {confidence:.0%} Konfidenz."
+        else:
+            return f"Analyse abgeschlossen - {len(steps)} Schritte durchlaufen, weitere Überprüfung empfohlen."
+
+# Integration mit ASI
+if __name__ == "__main__":
+    config = {
+        "max_reasoning_depth": 8,
+        "halt_threshold": 0.95
+    }
+    
+    adapter = HRMModelAdapter(config)
+    result = adapter.process_reasoning_task("Löse komplexes Sudoku-Rätsel", {})
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=json_default))
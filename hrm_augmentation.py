@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Augmentierung von ARC-, Sudoku- und Labyrinth-Daten zur Laufzeit
+
+Statt 1000 augmentierte Kopien jedes Rätsels auf der Platte abzulegen
+(`arc-2-aug-1000`, `sudoku-extreme-1k-aug-1000`), werden die Transformationen
+batchweise und vektorisiert mit NumPy erzeugt, erst wenn ein Batch gebraucht wird:
+
+- ARC:     die 8 Diedertransformationen (Drehungen, Spiegelungen) und eine
+           Permutation der Farben 1-9 (Schwarz bleibt)
+- Sudoku:  Ziffernpermutation, Vertauschen von Bändern und Stapeln sowie der
+           Zeilen/Spalten darin, optional transponiert
+- Labyrinth: die 8 Diedertransformationen
+
+Die Daten liegen im Token-Format der HRM-Datensätze (flache Sequenzen eines
+quadratischen Gitters). Jede Augmentierung hängt nur von (Seed, Beispiel,
+Augmentierungsindex) ab, nicht von Batchgröße oder Reihenfolge; Index 0 ist immer
+das unveränderte Beispiel, wie in den vorberechneten Datensätzen.
+
+Aufruf (Durchsatz auf einem HRM-Datensatz ohne Augmentierung messen):
+    python hrm_augmentation.py data/sudoku-extreme-1k --kind sudoku --num-aug 1000
+"""
+
+import argparse
+import functools
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ARC, SUDOKU, MAZE = "arc", "sudoku", "maze"
+KINDS = (ARC, SUDOKU, MAZE)
+
+DIHEDRAL_TRANSFORMS = 8
+
+# Token-Format der ARC-Daten: 0 = Padding, 1 = Ende einer Zeile/Spalte, 2-11 = Farben 0-9
+ARC_PAD, ARC_EOS, ARC_COLOR_OFFSET = 0, 1, 2
+ARC_COLORS = 10
+# Token-Format der Sudoku-Daten: 0 = Padding, 1 = leeres Feld, 2-10 = Ziffern 1-9
+SUDOKU_DIGIT_OFFSET = 1
+
+_U64 = np.uint64
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Zählerbasierter Zufallsgenerator: bildet uint64-Werte auf gut verteilte uint64-Werte ab."""
+    x = x + _U64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+    return x ^ (x >> _U64(31))
+
+def item_keys(seed: int, example_ids: np.ndarray, aug_ids: np.ndarray, count: int) -> np.ndarray:
+    """
+    Liefert `count` Zufallsschlüssel je (Beispiel, Augmentierung), reproduzierbar aus dem Seed.
+
+    Returns:
+        np.ndarray: uint64-Array der Form (Batch, count).
+    """
+    with np.errstate(over="ignore"):
+        item = _splitmix64(_splitmix64(np.asarray(example_ids, dtype=_U64) ^ _U64(seed))
+                           ^ np.asarray(aug_ids, dtype=_U64) * _U64(0xD1B54A32D192ED03))
+        return _splitmix64(item[:, None] + np.arange(1, count + 1, dtype=_U64))
+
+def permutations_from_keys(keys: np.ndarray) -> np.ndarray:
+    """Eine zufällige Permutation von 0..n-1 je Zeile der Schlüssel (Form (..., n))."""
+    return np.argsort(keys, axis=-1)
+
+# Quellkoordinaten je Diedertransformation als affine Abbildung der Zielposition (r, c):
+# Quellzeile = a*r + b*c + d*(Höhe-1), Quellspalte = e*r + f*c + g*(Breite-1).
+# Die Nummerierung folgt den HRM-Datensätzen: 0 Identität, 1-3 Drehung um 90/180/270 Grad
+# (gegen den Uhrzeigersinn), 4 links-rechts gespiegelt, 5 oben-unten gespiegelt,
+# 6 transponiert, 7 Drehung um 90 Grad und dann links-rechts gespiegelt.
+_DIHEDRAL_COEFFICIENTS = np.array([
+    [1, 0, 0, 0, 1, 0],
+    [0, 1, 0, -1, 0, 1],
+    [-1, 0, 1, 0, -1, 1],
+    [0, -1, 1, 1, 0, 0],
+    [1, 0, 0, 0, -1, 1],
+    [-1, 0, 1, 0, 1, 0],
+    [0, 1, 0, 1, 0, 0],
+    [0, -1, 1, -1, 0, 1],
+], dtype=np.int32)
+# Drehungen um 90/270 Grad und Transpositionen vertauschen Höhe und Breite
+_DIHEDRAL_SWAPS_AXES = np.array([False, True, False, True, False, False, True, True])
+
+def dihedral(grids: np.ndarray, transform_ids: np.ndarray, shapes: np.ndarray = None, pad_value: int = 0) -> tuple:
+    """
+    Wendet je Gitter eine der 8 Diedertransformationen an.
+
+    Args:
+        grids (np.ndarray): Gitter der Form (B, N, N); der Inhalt liegt oben links.
+        transform_ids (np.ndarray): Transformation 0-7 je Gitter.
+        shapes (np.ndarray, optional): Inhaltsgröße (Höhe, Breite) je Gitter; Standard: volles Gitter.
+        pad_value (int): Wert der Felder außerhalb des Inhalts.
+
+    Returns:
+        tuple: (transformierte Gitter, neue Inhaltsgrößen)
+    """
+    batch, size = grids.shape[0], grids.shape[1]
+    transform_ids = np.asarray(transform_ids, dtype=np.intp)
+    flat = _dihedral_tables(size)[transform_ids]
+    if shapes is None:
+        result = np.take_along_axis(grids.reshape(batch, -1), flat, axis=1).reshape(grids.shape)
+        return result, np.full((batch, 2), size)
+
+    heights = shapes[:, 0].astype(np.int32)[:, None]
+    widths = shapes[:, 1].astype(np.int32)[:, None]
+    swapped = _DIHEDRAL_SWAPS_AXES[transform_ids][:, None]
+    out_h, out_w = np.where(swapped, widths, heights), np.where(swapped, heights, widths)
+    # Die Tabellen spiegeln am vollen Gitter; für kleineren Inhalt verschiebt sich die Quelle um
+    # (Höhe - N) bzw. (Breite - N), soweit die Transformation die Achse umkehrt
+    _, _, d, _, _, g = (coefficient[:, None] for coefficient in _DIHEDRAL_COEFFICIENTS[transform_ids].T)
+    flat = flat + (d * (heights - size) * size + g * (widths - size))
+    rows, cols = np.divmod(np.arange(size * size, dtype=np.int32), size)
+    inside = (rows < out_h) & (cols < out_w)
+    result = np.take_along_axis(grids.reshape(batch, -1), np.where(inside, flat, 0), axis=1)
+    result = np.where(inside, result, np.asarray(pad_value, dtype=grids.dtype)).reshape(grids.shape)
+    return result, np.concatenate([out_h, out_w], axis=1)
+
+@functools.lru_cache(maxsize=None)
+def _dihedral_tables(size: int) -> np.ndarray:
+    """Flache Quellindizes der 8 Diedertransformationen eines vollen size×size-Gitters, Form (8, size²)."""
+    rows, cols = np.divmod(np.arange(size * size, dtype=np.int32), size)
+    a, b, d, e, f, g = (coefficient[:, None] for coefficient in _DIHEDRAL_COEFFICIENTS.T)
+    return (a * rows + b * cols + d * (size - 1)) * size + (e * rows + f * cols + g * (size - 1))
+
+def remap_values(grids: np.ndarray, tables: np.ndarray) -> np.ndarray:
+    """Ersetzt jeden Wert v im Gitter i durch tables[i, v]."""
+    batch = grids.shape[0]
+    return np.take_along_axis(tables, grids.reshape(batch, -1), axis=1).reshape(grids.shape)
+
+def _arc_shapes(grids: np.ndarray) -> np.ndarray:
+    """Inhaltsgröße je ARC-Gitter: die Ausdehnung der Farbfelder ab oben links."""
+    colored = grids >= ARC_COLOR_OFFSET
+    size = grids.shape[1]
+
+    def extent(any_axis):
+        return np.where(any_axis.any(axis=1), size - np.argmax(any_axis[:, ::-1], axis=1), 0)
+
+    return np.stack([extent(colored.any(axis=2)), extent(colored.any(axis=1))], axis=1)
+
+def _add_arc_eos(grids: np.ndarray, shapes: np.ndarray) -> np.ndarray:
+    """Setzt die Ende-Markierungen unter und rechts neben den Inhalt, wie im HRM-Format."""
+    size = grids.shape[1]
+    rows, cols = np.indices((size, size))
+    h, w = shapes[:, 0, None, None], shapes[:, 1, None, None]
+    eos = ((rows == h) & (cols < w)) | ((cols == w) & (rows < h))
+    return np.where(eos & (h > 0) & (w > 0), np.asarray(ARC_EOS, dtype=grids.dtype), grids)
+
+def augment_arc(grids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Diedertransformation und Farbpermutation; `keys` braucht 10 Spalten je Beispiel."""
+    batch = grids.shape[0]
+    content = np.where(grids >= ARC_COLOR_OFFSET, grids, ARC_PAD)
+    transformed, shapes = dihedral(content, keys[:, 0] % DIHEDRAL_TRANSFORMS, _arc_shapes(grids), ARC_PAD)
+    # Schwarz (Farbe 0) bleibt, die Farben 1-9 werden permutiert
+    tables = np.empty((batch, ARC_COLOR_OFFSET + ARC_COLORS), dtype=grids.dtype)
+    tables[:, :ARC_COLOR_OFFSET + 1] = np.arange(ARC_COLOR_OFFSET + 1)
+    tables[:, ARC_COLOR_OFFSET + 1:] = permutations_from_keys(keys[:, 1:ARC_COLORS]) + ARC_COLOR_OFFSET + 1
+    return _add_arc_eos(remap_values(transformed, tables), shapes)
+
+def augment_sudoku(grids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Ziffern-, Band-, Stapel-, Zeilen- und Spaltenpermutation; `keys` braucht 34 Spalten je Beispiel."""
+    batch = grids.shape[0]
+    bands = permutations_from_keys(keys[:, 1:4])
+    rows_in_band = permutations_from_keys(keys[:, 4:13].reshape(batch, 3, 3))
+    stacks = permutations_from_keys(keys[:, 13:16])
+    cols_in_stack = permutations_from_keys(keys[:, 16:25].reshape(batch, 3, 3))
+    # Zeile r des Ergebnisses stammt aus Band bands[r // 3], dort aus Zeile rows_in_band[band, r % 3]
+    index = np.arange(batch)[:, None]
+    rows = (bands[:, :, None] * 3 + rows_in_band[index, bands]).reshape(batch, 9)
+    cols = (stacks[:, :, None] * 3 + cols_in_stack[index, stacks]).reshape(batch, 9)
+    transpose = (keys[:, 0] & _U64(1)).astype(bool)[:, None, None]
+    flat = np.where(transpose, cols[:, None, :] * 9 + rows[:, :, None], rows[:, :, None] * 9 + cols[:, None, :])
+    permuted = np.take_along_axis(grids.reshape(batch, -1), flat.reshape(batch, -1), axis=1).reshape(grids.shape)
+    # Padding und leere Felder bleiben, die Ziffern 1-9 werden permutiert
+    tables = np.empty((batch, SUDOKU_DIGIT_OFFSET + 10), dtype=grids.dtype)
+    tables[:, :SUDOKU_DIGIT_OFFSET + 1] = np.arange(SUDOKU_DIGIT_OFFSET + 1)
+    tables[:, SUDOKU_DIGIT_OFFSET + 1:] = permutations_from_keys(keys[:, 25:34]) + SUDOKU_DIGIT_OFFSET + 1
+    return remap_values(permuted, tables)
+
+def augment_maze(grids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Diedertransformation; `keys` braucht eine Spalte je Beispiel."""
+    return dihedral(grids, keys[:, 0] % DIHEDRAL_TRANSFORMS)[0]
+
+AUGMENTERS = {ARC: (augment_arc, 10), SUDOKU: (augment_sudoku, 34), MAZE: (augment_maze, 1)}
+
+class AugmentationPipeline:
+    """
+    Erzeugt augmentierte Batches aus einem Datensatz ohne Augmentierung.
+
+    Der virtuelle Datensatz hat `len(inputs) * num_augmentations` Einträge; Eintrag
+    k ist Augmentierung k % num_augmentations von Beispiel k // num_augmentations.
+    Eingabe und Lösung eines Eintrags werden gleich transformiert.
+    """
+
+    def __init__(self, kind: str, inputs: np.ndarray, labels: np.ndarray, num_augmentations: int = 1000,
+                 seed: int = 0):
+        """
+        Args:
+            kind (str): 'arc', 'sudoku' oder 'maze'.
+            inputs (np.ndarray): Eingaben als flache Sequenzen (Beispiele, N*N).
+            labels (np.ndarray): Lösungen in derselben Form.
+            num_augmentations (int): Augmentierungen je Beispiel, einschließlich des Originals.
+            seed (int): Seed der Transformationen.
+        """
+        if kind not in AUGMENTERS:
+            raise ValueError(f"Unbekannte Datenart: {kind} (erlaubt: {', '.join(KINDS)})")
+        size = math.isqrt(inputs.shape[1])
+        if size * size != inputs.shape[1] or inputs.shape != labels.shape:
+            raise ValueError("Eingaben und Lösungen müssen flache quadratische Gitter gleicher Form sein.")
+        self.kind = kind
+        self.inputs = inputs
+        self.labels = labels
+        self.size = size
+        self.num_augmentations = num_augmentations
+        self.seed = seed
+        self._augment, self._key_count = AUGMENTERS[kind]
+
+    def __len__(self) -> int:
+        return len(self.inputs) * self.num_augmentations
+
+    def augment(self, example_ids: np.ndarray, aug_ids: np.ndarray) -> tuple:
+        """Liefert (Eingaben, Lösungen) für die gegebenen Beispiele und Augmentierungsindizes."""
+        example_ids, aug_ids = np.asarray(example_ids), np.asarray(aug_ids)
+        keys = item_keys(self.seed, example_ids, aug_ids, self._key_count)
+        shape = (len(example_ids), self.size, self.size)
+        # Eingabe und Lösung als ein Batch, damit beide dieselben Schlüssel verwenden
+        grids = np.concatenate([self.inputs[example_ids].reshape(shape), self.labels[example_ids].reshape(shape)])
+        augmented = self._augment(grids, np.concatenate([keys, keys])).reshape(2, len(example_ids), -1)
+        original = aug_ids == 0
+        augmented[0][original], augmented[1][original] = self.inputs[example_ids[original]], self.labels[example_ids[original]]
+        return augmented[0], augmented[1]
+
+    def iter_batches(self, batch_size: int = 256, shuffle: bool = False, epoch: int = 0):
+        """
+        Iteriert in Batches über den virtuellen Datensatz.
+
+        Yields:
+            tuple: (Eingaben, Lösungen, Beispielindizes, Augmentierungsindizes)
+        """
+        order = np.arange(len(self))
+        if shuffle:
+            order = np.random.default_rng([self.seed, epoch]).permutation(order)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            example_ids, aug_ids = np.divmod(indices, self.num_augmentations)
+            inputs, labels = self.augment(example_ids, aug_ids)
+            yield inputs, labels, example_ids, aug_ids
+
+def load_split(dataset_dir: Path, split: str) -> tuple:
+    """Lädt Eingaben und Lösungen eines Splits im Verzeichnisformat der HRM-Datensätze."""
+    split_dir = Path(dataset_dir) / split
+    return np.load(split_dir / "all__inputs.npy"), np.load(split_dir / "all__labels.npy")
+
+def main():
+    parser = argparse.ArgumentParser(description="Misst die Augmentierung zur Laufzeit auf einem HRM-Datensatz.")
+    parser.add_argument("dataset", nargs="?", help="Datensatzverzeichnis ohne Augmentierung (mit <split>/all__inputs.npy)")
+    parser.add_argument("--kind", choices=KINDS, required=True, help="Art der Rätsel")
+    parser.add_argument("--split", default="train", help="Split des Datensatzes")
+    parser.add_argument("--num-aug", type=int, default=1000, help="Augmentierungen je Beispiel")
+    parser.add_argument("--batch-size", type=int, default=768, help="Batchgröße")
+    parser.add_argument("--batches", type=int, default=200, help="Anzahl gemessener Batches")
+    parser.add_argument("--seed", type=int, default=0, help="Seed der Transformationen")
+    args = parser.parse_args()
+
+    if args.dataset:
+        inputs, labels = load_split(Path(args.dataset), args.split)
+    else:
+        # Ohne Datensatz: zufällige Gitter in der Größe der HRM-Daten
+        rng = np.random.default_rng(args.seed)
+        size = {ARC: 30, SUDOKU: 9, MAZE: 30}[args.kind]
+        high = {ARC: ARC_COLOR_OFFSET + ARC_COLORS, SUDOKU: SUDOKU_DIGIT_OFFSET + 10, MAZE: 6}[args.kind]
+        inputs = rng.integers(ARC_COLOR_OFFSET if args.kind == ARC else 1, high, (1000, size * size), dtype=np.uint8)
+        labels = inputs.copy()
+        print(f"ℹ️  Kein Datensatz angegeben; verwende {len(inputs)} zufällige Gitter.")
+
+    pipeline = AugmentationPipeline(args.kind, inputs, labels, args.num_aug, args.seed)
+    start = time.perf_counter()
+    examples = 0
+    for batch_inputs, _, _, _ in pipeline.iter_batches(args.batch_size, shuffle=True):
+        examples += len(batch_inputs)
+        if examples >= args.batches * args.batch_size:
+            break
+    elapsed = time.perf_counter() - start
+
+    base_bytes = inputs.nbytes + labels.nbytes
+    print(f"✅ {examples / elapsed:,.0f} augmentierte Beispiele/s ({args.kind}, Batchgröße {args.batch_size})")
+    print(f"💾 Auf der Platte: {base_bytes / 2**20:.1f} MB statt {base_bytes * args.num_aug / 2**20:,.1f} MB "
+          f"für {len(pipeline):,} Einträge")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Benchmark-Suite für HRM-Adapter, Proxy und FeedbackStore
+
+Jeder Benchmark wird zuerst aufgewärmt und dann in wiederholten Durchläufen mit
+`time.perf_counter_ns` gemessen. Ausgegeben werden p50/p95/p99, Mittelwert und
+Durchsatz. Die Ergebnisse werden als JSON gespeichert. Ist eine Baseline vorhanden,
+werden Regressionen markiert; der Exit-Code ist dann 1 (für CI).
+
+Suiten:
+- adapter:  HRMModelAdapter.process_reasoning_task mit realistischen Aufgaben, dazu ein
+            Cache-Treffer für eine symmetrische Sudoku-Variante (hrm_result_cache.py)
+- proxy:    POST /v1/chat/completions durch Middleware, Scheduler und Routing,
+            mit dem Stub-Backend statt des Sprachmodells
+- feedback: FeedbackStore.add_feedback bei wachsender Archivgröße
+- augmentation: ein Batch ARC-/Sudoku-/Labyrinth-Augmentierungen (hrm_augmentation.py)
+
+Aufruf:
+    python hrm_benchmark.py                                  # alle Suiten
+    python hrm_benchmark.py --suite adapter --trials 500
+    python hrm_benchmark.py --save-baseline                  # aktuelle Werte als Baseline
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent
+HRM_DIR = ROOT / "HRM-Hirarchisches-Reasoning-Model"
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+
+ADAPTER_SCENARIOS = [
+    ("sudoku-einfach", "Löse einfaches 4x4 Sudoku", {"difficulty": "easy"}),
+    ("sudoku-extrem", "Löse komplexes 9x9 Sudoku mit gegebenen Zahlen", {"difficulty": "extreme"}),
+    ("maze-klein", "Finde Weg durch 10x10 Labyrinth", {"size": "10x10", "difficulty": "easy"}),
+    ("maze-gross", "Finde kürzesten Weg durch 30x30 Labyrinth", {"size": "30x30", "difficulty": "hard"}),
+    ("arc-standard", "Erkenne Muster in ARC-Aufgabe", {"type": "arc", "difficulty": "medium"}),
+]
+
+FEEDBACK_ARCHIVE_SIZES = [100, 1_000, 10_000]
+# Batchgröße der Augmentierungs-Suite (wie beim HRM-Training)
+AUGMENTATION_BATCH_SIZE = 768
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Perzentil nach der Nearest-Rank-Methode."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(samples_ns: list) -> dict:
+    """Fasst die gemessenen Laufzeiten eines Benchmarks zusammen (Zeiten in Millisekunden)."""
+    ordered = sorted(samples_ns)
+    total_s = sum(ordered) / 1e9
+    return {
+        "trials": len(ordered),
+        "p50_ms": percentile(ordered, 50) / 1e6,
+        "p95_ms": percentile(ordered, 95) / 1e6,
+        "p99_ms": percentile(ordered, 99) / 1e6,
+        "mean_ms": total_s * 1e3 / len(ordered),
+        "min_ms": ordered[0] / 1e6,
+        "max_ms": ordered[-1] / 1e6,
+        "throughput_per_s": len(ordered) / total_s if total_s > 0 else 0.0,
+    }
+
+def measure(fn, warmup: int, trials: int) -> dict:
+    """Misst eine synchrone Funktion nach `warmup` unbewerteten Aufrufen."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+async def measure_async(fn, warmup: int, trials: int) -> dict:
+    """Misst eine Coroutine-Funktion nach `warmup` unbewerteten Aufrufen."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter_ns()
+        await fn()
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+def hrm_on_path():
+    """Macht die Module im HRM-Verzeichnis importierbar, solange der Block läuft."""
+    return mock.patch.object(sys, "path", [str(HRM_DIR), *sys.path])
+
+# --- Suiten ---
+
+def bench_adapter(warmup: int, trials: int) -> dict:
+    from hrm_adapter import HRMModelAdapter
+
+    adapter = HRMModelAdapter({"max_reasoning_depth": 8, "halt_threshold": 0.95})
+    results = {}
+    for name, task, context in ADAPTER_SCENARIOS:
+        results[f"adapter/{name}"] = measure(lambda: adapter.process_reasoning_task(task, context), warmup, trials)
+
+    # Kanonisieren und Nachschlagen: gedrehtes Sudoku mit vertauschten Ziffern nach einem Lösungslauf
+    from hrm_result_cache import CachedHRMAdapter, DEMO_SUDOKU, SUDOKU, dihedral
+
+    cache = CachedHRMAdapter(adapter)
+    task = "Löse komplexes 9x9 Sudoku mit gegebenen Zahlen"
+    cache.process_reasoning_task(task, {"puzzle": {"type": SUDOKU, "grid": DEMO_SUDOKU}})
+    digits = {0: 0, **{d: 10 - d for d in range(1, 10)}}
+    variant = {"puzzle": {"type": SUDOKU, "grid": [[digits[v] for v in row] for row in dihedral(DEMO_SUDOKU, 1)]}}
+    results["adapter/cache-treffer-sudoku"] = measure(lambda: cache.process_reasoning_task(task, variant), warmup, trials)
+    return results
+
+def bench_proxy(warmup: int, trials: int) -> dict:
+    # Kein Rate-Limit, keine Token-Quote und ein Stub-Modell ohne Wartezeiten (siehe hrm_backends.py):
+    # gemessen wird nur der Serving-Stack. Umgebung und sys.path werden danach wiederhergestellt.
+    env = {
+        "HRM_RATE_LIMIT_RPS": "0",
+        "HRM_TOKEN_QUOTA": "0",
+        "HRM_BACKEND": "stub",
+        "HRM_STUB_TOKENS_PER_SEC": "0",
+        "HRM_STUB_FIRST_TOKEN_MS": "0",
+        "HRM_STUB_PROMPT_MS_PER_TOKEN": "0",
+        "HRM_STUB_COMPLETION_TOKENS": "2",
+    }
+    with mock.patch.dict(os.environ, env), hrm_on_path():
+        return _bench_proxy(warmup, trials)
+
+def _bench_proxy(warmup: int, trials: int) -> dict:
+    import httpx
+    import openai_proxy_server
+
+    payload = {"model": "hrm-local-model", "messages": [{"role": "user", "content": "Wie funktioniert hierarchisches Reasoning?"}]}
+
+    async def run() -> dict:
+        transport = httpx.ASGITransport(app=openai_proxy_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def request():
+                response = await client.post("/v1/chat/completions", json=payload)
+                response.raise_for_status()
+            return {"proxy/chat_completions": await measure_async(request, warmup, trials)}
+
+    return asyncio.run(run())
+
+def bench_feedback(warmup: int, trials: int) -> dict:
+    with hrm_on_path():
+        from asi_core.feedback_store import FeedbackStore
+
+    results = {}
+    temp_dir = tempfile.mkdtemp(prefix="hrm_bench_")
+    try:
+        for size in FEEDBACK_ARCHIVE_SIZES:
+            path = os.path.join(temp_dir, f"archive_{size}.json")
+            archive = [{
+                "feedback_id": i + 1,
+                "user_pseudonym": f"{i:064x}",
+                "timestamp_utc": "2024-01-01T00:00:00",
+                "feedback_text": f"Feedback Nummer {i}",
+                "context": {"active_role": "AURA"},
+                "metadata": {},
+            } for i in range(size)]
+
+            def reset():
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(archive, f)
+
+            reset()
+            store = FeedbackStore(path)
+            # Jeder Durchlauf beginnt mit genau `size` Einträgen
+            def add():
+                store.add_feedback("benchmark_user", "Sehr hilfreich.", {"active_role": "AURA"})
+            samples = []
+            for i in range(warmup + trials):
+                reset()
+                start = time.perf_counter_ns()
+                add()
+                if i >= warmup:
+                    samples.append(time.perf_counter_ns() - start)
+            results[f"feedback/add_feedback@{size}"] = summarize(samples)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+def bench_augmentation(warmup: int, trials: int) -> dict:
+    import numpy as np
+    from hrm_augmentation import AugmentationPipeline, ARC_COLOR_OFFSET
+
+    rng = np.random.default_rng(0)
+    grids = {
+        "arc": rng.integers(ARC_COLOR_OFFSET, ARC_COLOR_OFFSET + 10, (100, 900), dtype=np.uint8),
+        "sudoku": rng.integers(1, 11, (100, 81), dtype=np.uint8),
+        "maze": rng.integers(1, 6, (100, 900), dtype=np.uint8),
+    }
+    results = {}
+    for kind, inputs in grids.items():
+        pipeline = AugmentationPipeline(kind, inputs, inputs.copy(), num_augmentations=1000)
+        example_ids = rng.integers(0, len(inputs), AUGMENTATION_BATCH_SIZE)
+        aug_ids = rng.integers(1, 1000, AUGMENTATION_BATCH_SIZE)
+        results[f"augmentation/{kind}@{AUGMENTATION_BATCH_SIZE}"] = measure(
+            lambda: pipeline.augment(example_ids, aug_ids), warmup, trials)
+    return results
+
+SUITES = {
+    "adapter": bench_adapter,
+    "proxy": bench_proxy,
+    "feedback": bench_feedback,
+    "augmentation": bench_augmentation,
+}
+
+# --- Baseline-Vergleich ---
+
+def compare(results: dict, baseline: dict, threshold_pct: float, min_delta_ms: float) -> dict:
+    """
+    Vergleicht p50 und p95 mit der Baseline. Eine Regression liegt vor, wenn einer der
+    Werte um mehr als `threshold_pct` Prozent und mehr als `min_delta_ms` steigt.
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        entry = {"regression": False}
+        for metric in ("p50_ms", "p95_ms"):
+            delta = current[metric] - previous[metric]
+            change_pct = 100.0 * delta / previous[metric] if previous[metric] else 0.0
+            entry[metric] = {"baseline": previous[metric], "current": current[metric], "change_pct": round(change_pct, 1)}
+            if change_pct > threshold_pct and delta > min_delta_ms:
+                entry["regression"] = True
+        comparison[name] = entry
+    return comparison
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def run_benchmarks(suites: list, warmup: int, trials: int) -> dict:
+    """Führt die gewählten Suiten aus und liefert alle Ergebnisse nach Benchmark-Namen."""
+    random.seed(0)
+    results = {}
+    for suite in suites:
+        print(f"⏳ Suite '{suite}'...")
+        try:
+            suite_results = SUITES[suite](warmup, trials)
+        except ImportError as e:
+            print(f"⚠️  Suite '{suite}' übersprungen: {e}")
+            continue
+        for name, stats in suite_results.items():
+            print(f"  {name:<34} p50={stats['p50_ms']:8.3f}ms  p95={stats['p95_ms']:8.3f}ms  "
+                  f"p99={stats['p99_ms']:8.3f}ms  {stats['throughput_per_s']:10.1f}/s")
+        results.update(suite_results)
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reproduzierbare Benchmarks für HRM-Adapter, Proxy und FeedbackStore.")
+    parser.add_argument("--suite", nargs="+", choices=sorted(SUITES), default=list(SUITES), help="Auszuführende Suiten")
+    parser.add_argument("--warmup", type=int, default=20, help="Unbewertete Aufwärmdurchläufe je Benchmark")
+    parser.add_argument("--trials", type=int, default=200, help="Gemessene Durchläufe je Benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Ergebnisdatei (JSON)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline zum Vergleich")
+    parser.add_argument("--save-baseline", action="store_true", help="Die Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--threshold", type=float, default=15.0, help="Regression ab dieser Verschlechterung in Prozent")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Kleinere absolute Verschlechterungen ignorieren")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.suite, args.warmup, args.trials)
+    report = {"environment": environment(), "config": {"warmup": args.warmup, "trials": args.trials}, "results": results}
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists() and not args.save_baseline:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": str(baseline_path), "environment": baseline.get("environment")}
+        report["comparison"] = compare(results, baseline.get("results", {}), args.threshold, args.min_delta_ms)
+        regressions = [name for name, entry in report["comparison"].items() if entry["regression"]]
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n📊 Ergebnisse gespeichert: {args.output}")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📌 Baseline gespeichert: {baseline_path}")
+    elif regressions:
+        print("❌ Regressionen gegenüber der Baseline:")
+        for name in regressions:
+            entry = report["comparison"][name]
+            print(f"  {name}: p50 {entry['p50_ms']['change_pct']:+.1f}%, p95 {entry['p95_ms']['change_pct']:+.1f}%")
+        return 1
+    elif "comparison" in report:
+        print("✅ Keine Regressionen gegenüber der Baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,11 +25,26 @@ class HRMIntegrationBridge:
             "model_type": "hrm",
             "model_path": str(self.hrm_path / "models" / "hrm"),
             "config_path": str(self.hrm_path / "config"),
+            # Datensätze ohne vorberechnete Augmentierung; hrm_augmentation.py erzeugt
+            # die 1000 Varianten je Rätsel erst beim Laden der Batches
             "datasets": {
-                "arc": str(self.hrm_path / "data" / "arc-2-aug-1000"),
-                "sudoku": str(self.hrm_path / "data" / "sudoku-extreme-1k-aug-1000"),
+                "arc": str(self.hrm_path / "data" / "arc-2"),
+                "sudoku": str(self.hrm_path / "data" / "sudoku-extreme-1k"),
                 "maze": str(self.hrm_path / "data" / "maze-30x30-hard-1k")
             },
+            "augmentation": {
+                "mode": "on_the_fly",
+                "num_augmentations": {"arc": 1000, "sudoku": 1000, "maze": 1},
+                "seed": 0
+            },
+            # Ergebnis-Cache nach Symmetrieklasse (hrm_result_cache.py, siehe wrap_adapter).
+            # Standardmäßig aus: ein Treffer kostet die Kanonisierung (Sudoku ~4 ms), der
+            # simulierte Adapter antwortet in ~0,02 ms; lohnt erst mit dem echten Modell
+            "result_cache": {
+                "enabled": False,
+                "max_entries": 1024,
+                "db_path": str(self.config_path.parent / "data" / "hrm_results.sqlite")
+            },
             "integration": {
                 "mode": "hybrid",
                 "fallback_to_mock": True,
@@ -51,101 +66,8 @@ class HRMIntegrationBridge:
     def create_mock_adapter(self):
         """Erstelle einen Mock-Adapter für die Integration"""
         
-        adapter_code = '''
-import json
-import random
-from typing import Dict, Any, List
-
-class HRMModelAdapter:
-    """Adapter für HRM-Integration ohne PyTorch-Abhängigkeit"""
-    
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.reasoning_depth = config.get("max_reasoning_depth", 8)
-        self.halt_threshold = config.get("halt_threshold", 0.95)
-        
-    def process_reasoning_task(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Verarbeite Reasoning-Aufgabe mit HRM-Logik"""
-        
-        # Simulierte HRM-Verarbeitung
-        steps = []
-        confidence = 0.0
-        
-        # Analysiere Aufgabentyp
-        task_type = self._classify_task(task)
-        
-        # Generiere Reasoning-Schritte
-        for step_num in range(1, self.reasoning_depth + 1):
-            step = {
-                "step": step_num,
-                "type": "reasoning",
-                "description": f"Analysiere {task_type} - Schritt {step_num}",
-                "confidence": min(0.9, 0.3 + (step_num * 0.1)),
-                "intermediate_result": self._generate_intermediate(task, step_num)
-            }
-            steps.append(step)
-            
-            # Prüfe Abbruchbedingung
-            if step["confidence"] >= self.halt_threshold:
-                confidence = step["confidence"]
-                break
-        
-        # Generiere finale Antwort
-        result = {
-            "task": task,
-            "type": task_type,
-            "steps": steps,
-            "final_answer": self._generate_answer(task, steps),
-            "confidence": confidence,
-            "reasoning_depth": len(steps),
-            "model": "hrm-v1"
-        }
-        
-        return result
-    
-    def _classify_task(self, task: str) -> str:
-        """Klassifiziere den Aufgabentyp"""
-        task_lower = task.lower()
-        if "sudoku" in task_lower or "rätsel" in task_lower:
-            return "sudoku"
-        elif "maze" in task_lower or "labyrinth" in task_lower:
-            return "maze"
-        elif "arc" in task_lower or "abstrakt" in task_lower:
-            return "arc"
-        else:
-            return "general_reasoning"
-    
-    def _generate_intermediate(self, task: str, step: int) -> str:
-        """Generiere Zwischenschritt"""
-        intermediates = [
-            "Analysiere Problemstruktur",
-            "Identifiziere Muster",
-            "Wende logische Regeln an",
-            "Validiere Zwischenergebnisse",
-            "Optimiere Lösungsweg"
-        ]
-        return intermediates[min(step-1, len(intermediates)-1)]
-    
-    def _generate_answer(self, task: str, steps: List[Dict]) -> str:
-        """Generiere finale Antwort basierend auf Reasoning-Schritten"""
-        confidence = steps[-1]["confidence"] if steps else 0.5
-        
-        if confidence > 0.8:
-            return f"Basierend auf {len(steps)} Reasoning-Schritten: Lösung gefunden mit {confidence:.0%} Konfidenz."
-        else:
-            return f"Analyse abgeschlossen - {len(steps)} Schritte durchlaufen, weitere Überprüfung empfohlen."
-
-# Integration mit ASI
-if __name__ == "__main__":
-    config = {
-        "max_reasoning_depth": 8,
-        "halt_threshold": 0.95
-    }
-    
-    adapter = HRMModelAdapter(config)
-    result = adapter.process_reasoning_task("Löse komplexes Sudoku-Rätsel", {})
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-'''
+        # Der Adapter liegt als eigenes Modul neben dieser Bridge (hrm_adapter.py)
+        adapter_code = (Path(__file__).parent / "hrm_adapter.py").read_text(encoding="utf-8")
         
         # Speichere Adapter
         adapter_file = Path("/Users/bigsur/Desktop/ASI und HRM /ASI/src/services/hrm_adapter.py")
@@ -154,6 +76,11 @@ if __name__ == "__main__":
         with open(adapter_file, 'w') as f:
             f.write(adapter_code)
         
+        # Der Ergebnis-Cache importiert den Adapter und liegt deshalb daneben
+        cache_file = adapter_file.with_name("hrm_result_cache.py")
+        cache_file.write_text((Path(__file__).parent / "hrm_result_cache.py").read_text(encoding="utf-8"),
+                              encoding="utf-8")
+        
         print(f"✓ HRM-Adapter erstellt: {adapter_file}")
         return adapter_file
     
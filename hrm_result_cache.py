@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Ergebnis-Cache für HRMModelAdapter, geschlüsselt nach der Symmetrieklasse des Rätsels
+
+Ein gedrehtes Labyrinth, ein Sudoku mit vertauschten Ziffern oder eine ARC-Aufgabe
+mit permutierten Farben ist dasselbe Rätsel wie das Original. Der Cache bringt jedes
+strukturierte Rätsel deshalb in eine kanonische Form unter seiner Symmetriegruppe,
+schlägt diese in einem begrenzten LRU-Cache (optional mit SQLite-Datei dahinter)
+nach und bildet eine gespeicherte Lösung über die inverse Transformation auf das
+gestellte Rätsel zurück. So wird jede Symmetrieklasse nur einmal gelöst.
+
+Symmetriegruppen (wie in hrm_augmentation.py):
+- Labyrinth: die 8 Diedertransformationen
+- ARC:       die 8 Diedertransformationen und Permutationen der Farben 1-9 (Schwarz bleibt)
+- Sudoku:    Ziffernpermutation, Vertauschen von Bändern und Stapeln sowie der
+             Zeilen/Spalten darin und Transposition
+
+Das Rätsel steht in `context["puzzle"]`, z.B. {"type": "sudoku", "grid": [[5, 3, 0, ...], ...]}
+(0 = leeres Feld) oder {"type": "arc", "grids": [Eingabe 1, Ausgabe 1, ..., Testeingabe]}.
+Liefert der Adapter eine gelöste Gitterlösung, steht sie in `result["solution"]`.
+Aufgaben ohne strukturiertes Rätsel gehen ungecacht an den Adapter.
+
+Mit der HRM-Konfiguration der Integration (hrm_integration_bridge.py) setzt
+`wrap_adapter` den Cache nur dann vor den Adapter, wenn "result_cache" aktiviert ist.
+
+Aufruf (Demo mit dem simulierten Adapter):
+    python hrm_result_cache.py --db hrm_results.sqlite
+"""
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from hrm_adapter import json_default
+
+ARC, SUDOKU, MAZE = "arc", "sudoku", "maze"
+
+# Quellkoordinaten je Diedertransformation (Nummerierung wie in hrm_augmentation.py):
+# Quellzeile = a*r + b*c + d*(Höhe-1), Quellspalte = e*r + f*c + g*(Breite-1)
+_DIHEDRAL_COEFFICIENTS = (
+    (1, 0, 0, 0, 1, 0),
+    (0, 1, 0, -1, 0, 1),
+    (-1, 0, 1, 0, -1, 1),
+    (0, -1, 1, 1, 0, 0),
+    (1, 0, 0, 0, -1, 1),
+    (-1, 0, 1, 0, 1, 0),
+    (0, 1, 0, 1, 0, 0),
+    (0, -1, 1, -1, 0, 1),
+)
+# Drehung um 90 Grad wird durch 270 Grad aufgehoben; Spiegelungen heben sich selbst auf
+_DIHEDRAL_INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+
+# Weniger Vorgaben lassen kein eindeutig lösbares Sudoku zu; solche Gitter werden nicht gecacht
+MIN_SUDOKU_GIVENS = 17
+# Obergrenze gleichwertiger Kandidaten bei der Sudoku-Suche (sehr symmetrische Gitter)
+_MAX_SUDOKU_CANDIDATES = 20_000
+
+# Reihenfolgen von drei Bändern/Stapeln bzw. der drei Zeilen/Spalten darin
+_BLOCK_ORDERS = list(itertools.permutations(range(3)))
+
+def dihedral(grid: List[list], transform: int) -> List[list]:
+    """Wendet eine der 8 Diedertransformationen auf ein (auch nicht quadratisches) Gitter an."""
+    height = len(grid)
+    width = len(grid[0]) if height else 0
+    a, b, d, e, f, g = _DIHEDRAL_COEFFICIENTS[transform]
+    out_height, out_width = (width, height) if a == 0 else (height, width)
+    return [[grid[a * r + b * c + d * (height - 1)][e * r + f * c + g * (width - 1)]
+             for c in range(out_width)] for r in range(out_height)]
+
+def _relabel(grid: List[list], mapping: dict) -> List[list]:
+    return [[mapping[value] for value in row] for row in grid]
+
+def _is_grid(grid: Any) -> bool:
+    return (isinstance(grid, list) and len(grid) > 0 and all(isinstance(row, list) for row in grid)
+            and len(grid[0]) > 0 and all(len(row) == len(grid[0]) for row in grid))
+
+class DihedralTransform:
+    """Diedertransformation, optional gefolgt von einer Umbenennung der Farben (ARC, Labyrinth)."""
+
+    def __init__(self, transform: int, colors: Optional[Dict[int, int]] = None):
+        self.transform = transform
+        self.colors = colors
+
+    def forward(self, grid: List[list]) -> List[list]:
+        """Bildet ein Gitter des gestellten Rätsels in den kanonischen Raum ab."""
+        grid = dihedral(grid, self.transform)
+        return _relabel(grid, self.colors) if self.colors is not None else grid
+
+    def inverse(self, grid: List[list]) -> List[list]:
+        """Bildet ein Gitter aus dem kanonischen Raum auf das gestellte Rätsel zurück."""
+        if self.colors is not None:
+            grid = _relabel(grid, {label: color for color, label in self.colors.items()})
+        return dihedral(grid, _DIHEDRAL_INVERSE[self.transform])
+
+class SudokuTransform:
+    """Transposition, Zeilen- und Spaltenreihenfolge und Ziffernumbenennung eines Sudokus."""
+
+    def __init__(self, transposed: bool, rows: tuple, cols: tuple, digits: Dict[int, int]):
+        self.transposed = transposed
+        self.rows = rows
+        self.cols = cols
+        self.digits = digits
+
+    def forward(self, grid: List[list]) -> List[list]:
+        if self.transposed:
+            grid = [list(column) for column in zip(*grid)]
+        return [[self.digits[grid[r][c]] for c in self.cols] for r in self.rows]
+
+    def inverse(self, grid: List[list]) -> List[list]:
+        values = {label: digit for digit, label in self.digits.items()}
+        row_position = {r: i for i, r in enumerate(self.rows)}
+        col_position = {c: j for j, c in enumerate(self.cols)}
+        original = [[values[grid[row_position[r]][col_position[c]]] for c in range(9)] for r in range(9)]
+        return [list(column) for column in zip(*original)] if self.transposed else original
+
+def _canonical_dihedral(grids: List[List[list]], relabel_colors: bool) -> tuple:
+    """
+    Kleinste Form der Gitter über die 8 Diedertransformationen (alle Gitter gleich transformiert).
+
+    Mit `relabel_colors` werden die Farben 1-9 nach ihrem ersten Auftreten in
+    Lesereihenfolge neu nummeriert, über alle Gitter hinweg; 0 (Schwarz) bleibt.
+    """
+    best = None
+    for transform in range(len(_DIHEDRAL_COEFFICIENTS)):
+        transformed = [dihedral(grid, transform) for grid in grids]
+        colors = None
+        if relabel_colors:
+            colors = {0: 0}
+            for grid in transformed:
+                for row in grid:
+                    for value in row:
+                        if value not in colors:
+                            colors[value] = len(colors)
+            transformed = [_relabel(grid, colors) for grid in transformed]
+        key = json.dumps(transformed, separators=(",", ":"))
+        if best is None or key < best[0]:
+            best = (key, DihedralTransform(transform, colors))
+    return best
+
+def _valid_sudoku(grid: List[list]) -> bool:
+    if len(grid) != 9 or any(len(row) != 9 for row in grid):
+        return False
+    if any(not isinstance(value, int) or not 0 <= value <= 9 for row in grid for value in row):
+        return False
+    if sum(1 for row in grid for value in row if value) < MIN_SUDOKU_GIVENS:
+        return False
+    units = [row for row in grid]
+    units += [[grid[r][c] for r in range(9)] for c in range(9)]
+    units += [[grid[r][c] for r in range(br, br + 3) for c in range(bc, bc + 3)]
+              for br in range(0, 9, 3) for bc in range(0, 9, 3)]
+    for unit in units:
+        digits = [value for value in unit if value]
+        if len(digits) != len(set(digits)):
+            return False
+    return True
+
+def _minimal_column_orders(given: List[int]) -> tuple:
+    """
+    Kleinstes Muster (0 = leer, 1 = vorgegeben) einer Zeile über alle Spaltenreihenfolgen,
+    die Stapel erhalten, und alle Reihenfolgen, die es erreichen.
+
+    Innerhalb eines Stapels kommen die leeren Felder nach vorne, danach werden die
+    Stapel nach ihrem Muster sortiert; nur Gleichstände ergeben mehrere Reihenfolgen.
+    """
+    inner_orders = []
+    for stack in range(3):
+        cells = [given[3 * stack + line] for line in range(3)]
+        best = sorted(cells)
+        inner_orders.append((best, [tuple(3 * stack + line for line in order) for order in _BLOCK_ORDERS
+                                    if [cells[line] for line in order] == best]))
+    best_pattern = sum(sorted(pattern for pattern, _ in inner_orders), [])
+    orders = []
+    for stacks in _BLOCK_ORDERS:
+        if sum((inner_orders[stack][0] for stack in stacks), []) == best_pattern:
+            for inners in itertools.product(*(inner_orders[stack][1] for stack in stacks)):
+                orders.append(sum(inners, ()))
+    return best_pattern, orders
+
+def _canonical_sudoku(grid: List[list]) -> Optional[tuple]:
+    """
+    Lexikographisch kleinste Form eines Sudokus über seine ganze Symmetriegruppe.
+
+    Gesucht wird Zeile für Zeile: Die erste Zeile legt zusammen mit der
+    Spaltenreihenfolge fest, welche Felder vorne leer sind; da die Ziffern einer
+    Zeile verschieden sind, bestimmt dieses Muster die umbenannte Zeile bereits
+    (siehe `_minimal_column_orders`). Danach
+    werden nur die Kandidaten weiterverfolgt, die auf allen bisherigen Zeilen das
+    Minimum erreichen, und Gleichstände erst durch spätere Zeilen aufgelöst.
+    Bleiben dabei zu viele Kandidaten gleichauf, wird None geliefert.
+    """
+    candidates = []
+    best_first = None
+    for transposed in (False, True):
+        g = [list(column) for column in zip(*grid)] if transposed else grid
+        for first in range(9):
+            pattern, orders = _minimal_column_orders([1 if value else 0 for value in g[first]])
+            if best_first is None or pattern < best_first:
+                best_first, candidates = pattern, []
+            if pattern == best_first:
+                for cols in orders:
+                    digits = {}
+                    for c in cols:
+                        if g[first][c]:
+                            digits[g[first][c]] = len(digits) + 1
+                    candidates.append((g, transposed, cols, (first,), digits))
+
+    for position in range(1, 9):
+        if len(candidates) > _MAX_SUDOKU_CANDIDATES:
+            return None
+        best_row, survivors = None, []
+        for g, transposed, cols, rows, digits in candidates:
+            if position % 3:
+                band = rows[-1] // 3
+                options = [r for r in range(3 * band, 3 * band + 3) if r not in rows]
+            else:
+                used_bands = {r // 3 for r in rows}
+                options = [r for r in range(9) if r // 3 not in used_bands]
+            for r in options:
+                extended = dict(digits)
+                row = []
+                for c in cols:
+                    value = g[r][c]
+                    if value and value not in extended:
+                        extended[value] = len(extended) + 1
+                    row.append(extended[value] if value else 0)
+                if best_row is None or row < best_row:
+                    best_row, survivors = row, []
+                if row == best_row:
+                    survivors.append((g, transposed, cols, rows + (r,), extended))
+        candidates = survivors
+
+    g, transposed, cols, rows, digits = candidates[0]
+    digits = dict(digits)
+    # Ziffern, die im Rätsel fehlen, bekommen die übrigen Nummern in aufsteigender Reihenfolge
+    for digit in range(1, 10):
+        if digit not in digits:
+            digits[digit] = len(digits) + 1
+    digits[0] = 0
+    transform = SudokuTransform(transposed, rows, cols, digits)
+    return json.dumps(transform.forward(grid), separators=(",", ":")), transform
+
+def canonicalize(puzzle: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Bringt ein strukturiertes Rätsel in die kanonische Form seiner Symmetrieklasse.
+
+    Returns:
+        tuple: (kanonische Form als JSON-Text, Transformation mit `forward`/`inverse`)
+        oder None, wenn das Rätsel keinem unterstützten Format entspricht.
+    """
+    kind = puzzle.get("type")
+    grids = puzzle.get("grids") or ([puzzle["grid"]] if "grid" in puzzle else [])
+    if not grids or not all(_is_grid(grid) for grid in grids):
+        return None
+    if kind == SUDOKU:
+        return _canonical_sudoku(grids[0]) if len(grids) == 1 and _valid_sudoku(grids[0]) else None
+    if kind == ARC:
+        if any(not isinstance(value, int) or not 0 <= value <= 9 for grid in grids for row in grid for value in row):
+            return None
+        return _canonical_dihedral(grids, relabel_colors=True)
+    if kind == MAZE:
+        return _canonical_dihedral(grids, relabel_colors=False)
+    return None
+
+class SqliteResultStore:
+    """Persistente Stufe des Caches: kanonischer Schlüssel -> Ergebnis (JSON) in einer SQLite-Datei."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT, created REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, result: dict):
+        self._connect().execute("INSERT OR REPLACE INTO results (key, result, created) VALUES (?, ?, ?)",
+                                (key, json.dumps(result, ensure_ascii=False, default=json_default), time.time()))
+
+class CachedHRMAdapter:
+    """
+    Setzt einen Ergebnis-Cache vor `HRMModelAdapter.process_reasoning_task`.
+
+    Hat dieselbe Schnittstelle wie der Adapter; jedes Ergebnis bekommt zusätzlich
+    `cached` (True, wenn es aus dem Cache kam). Gespeichert wird die Lösung im
+    kanonischen Raum, sodass ein Treffer auch für jede symmetrische Variante gilt.
+    Der Schlüssel enthält neben der kanonischen Form die Adapter-Konfiguration und
+    den übrigen Kontext, nicht aber den Aufgabentext.
+    """
+
+    def __init__(self, adapter, max_entries: int = 1024, db_path: Optional[str] = None):
+        """
+        Args:
+            adapter: Der HRMModelAdapter (oder ein Objekt mit derselben Schnittstelle).
+            max_entries (int): Größe des LRU-Caches im Speicher.
+            db_path (str, optional): SQLite-Datei für Ergebnisse über Neustarts hinweg.
+        """
+        self.adapter = adapter
+        self.max_entries = max_entries
+        self.store = SqliteResultStore(db_path) if db_path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._config = json.dumps(getattr(adapter, "config", {}), sort_keys=True, default=str)
+        self.stats = {"hits": 0, "store_hits": 0, "misses": 0, "uncached": 0, "evictions": 0}
+
+    def _key(self, kind: str, canonical: str, context: Dict[str, Any]) -> str:
+        rest = {name: value for name, value in context.items() if name != "puzzle"}
+        material = json.dumps([kind, canonical, self._config, rest], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+        if self.store is not None:
+            result = self.store.get(key)
+            if result is not None:
+                self._remember(key, result)
+                with self._lock:
+                    self.stats["store_hits"] += 1
+                return result
+        return None
+
+    def _remember(self, key: str, result: dict):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def process_reasoning_task(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Wie `HRMModelAdapter.process_reasoning_task`, aber jede Symmetrieklasse wird nur einmal gelöst."""
+        puzzle = context.get("puzzle") if isinstance(context, dict) else None
+        canonical = canonicalize(puzzle) if isinstance(puzzle, dict) else None
+        if canonical is None:
+            with self._lock:
+                self.stats["uncached"] += 1
+            return {**self.adapter.process_reasoning_task(task, context), "cached": False}
+
+        form, transform = canonical
+        key = self._key(puzzle["type"], form, context)
+        stored = self._lookup(key)
+        if stored is not None:
+            result = copy.deepcopy(stored)
+            result["task"] = task
+            if "solution" in result:
+                result["solution"] = transform.inverse(result["solution"])
+            result["cached"] = True
+            return result
+
+        result = self.adapter.process_reasoning_task(task, context)
+        with self._lock:
+            self.stats["misses"] += 1
+        stored = copy.deepcopy(result)
+        if _is_grid(result.get("solution")):
+            try:
+                stored["solution"] = transform.forward(result["solution"])
+            except (KeyError, IndexError):
+                # Die Lösung passt nicht zur Symmetrie des Rätsels, z.B. eine ARC-Ausgabe
+                # mit einer Farbe, die in keiner Eingabe vorkommt: nicht cachen
+                return {**result, "cached": False}
+        elif "solution" in result:
+            return {**result, "cached": False}
+        self._remember(key, stored)
+        if self.store is not None:
+            self.store.put(key, stored)
+        return {**result, "cached": False}
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "persistent": self.store is not None, **self.stats}
+
+def wrap_adapter(adapter, config: Dict[str, Any]):
+    """
+    Setzt den Cache vor `adapter`, wenn `config["result_cache"]["enabled"]` gesetzt ist.
+
+    Args:
+        adapter: Der HRMModelAdapter.
+        config (dict): Die HRM-Konfiguration, wie sie hrm_integration_bridge.py schreibt.
+
+    Returns:
+        Den CachedHRMAdapter oder, ohne aktivierten Cache, den Adapter selbst.
+    """
+    settings = config.get("result_cache") or {}
+    if not settings.get("enabled"):
+        return adapter
+    return CachedHRMAdapter(adapter, max_entries=settings.get("max_entries", 1024), db_path=settings.get("db_path"))
+
+# Demo: dasselbe Sudoku gedreht und mit vertauschten Ziffern trifft den Cache
+DEMO_SUDOKU = [
+    [5, 3, 0, 0, 7, 0, 0, 0, 0],
+    [6, 0, 0, 1, 9, 5, 0, 0, 0],
+    [0, 9, 8, 0, 0, 0, 0, 6, 0],
+    [8, 0, 0, 0, 6, 0, 0, 0, 3],
+    [4, 0, 0, 8, 0, 3, 0, 0, 1],
+    [7, 0, 0, 0, 2, 0, 0, 0, 6],
+    [0, 6, 0, 0, 0, 0, 2, 8, 0],
+    [0, 0, 0, 4, 1, 9, 0, 0, 5],
+    [0, 0, 0, 0, 8, 0, 0, 7, 9],
+]
+
+def main():
+    from hrm_adapter import HRMModelAdapter
+
+    parser = argparse.ArgumentParser(description="Demo des kanonisierenden Ergebnis-Caches")
+    parser.add_argument("--db", help="SQLite-Datei für die persistente Stufe")
+    parser.add_argument("--max-entries", type=int, default=1024)
+    args = parser.parse_args()
+
+    cache = CachedHRMAdapter(HRMModelAdapter({"max_reasoning_depth": 8, "halt_threshold": 0.95}),
+                             max_entries=args.max_entries, db_path=args.db)
+    digits = {0: 0, **{d: 10 - d for d in range(1, 10)}}
+    variant = [[digits[value] for value in row] for row in dihedral(DEMO_SUDOKU, 1)]
+    for name, grid in (("Original", DEMO_SUDOKU), ("gedreht + umbenannt", variant)):
+        start = time.perf_counter()
+        result = cache.process_reasoning_task("Löse das Sudoku", {"puzzle": {"type": SUDOKU, "grid": grid}})
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{'✅ Treffer' if result['cached'] else '🧮 Gelöst'}: {name} ({elapsed_ms:.1f} ms)")
+    print(json.dumps(cache.get_metrics(), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Unit-Tests für download_hrm_models.py: Manifest, SHA-256-Prüfung und Installation aus dem Mirror
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from download_hrm_models import Manifest, download_hrm_checkpoints, fetch_file
+
+CONTENT = {"config.json": b'{"hidden_size": 512}', "model.safetensors": b"\x00\x01" * 1000}
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def fake_hub(calls: list, content: dict = CONTENT):
+    """Ein huggingface_hub-Modul, dessen hf_hub_download die Datei wie das Original unter local_dir ablegt."""
+    def hf_hub_download(repo_id, filename, local_dir):
+        calls.append((repo_id, filename))
+        path = os.path.join(local_dir, filename)
+        with open(path, "wb") as f:
+            f.write(content[filename])
+        return path
+    return types.SimpleNamespace(hf_hub_download=hf_hub_download)
+
+class ManifestTestCase(unittest.TestCase):
+    """Legt ein Modell-Root und einen Mirror in einem temporären Verzeichnis an"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "models")
+        self.mirror_root = os.path.join(self.temp_dir.name, "mirror")
+        self.calls = []
+        patcher = mock.patch.dict(sys.modules, {"huggingface_hub": fake_hub(self.calls)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, root: str, relpath: str, data: bytes) -> str:
+        path = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def make_mirror(self) -> Manifest:
+        """Ein Mirror, in dem der Checkpoint 'arc' vollständig geprüft vorliegt."""
+        mirror = Manifest(self.mirror_root)
+        for filename, data in CONTENT.items():
+            self.write(self.mirror_root, f"arc/{filename}", data)
+            mirror.record_file(f"arc/{filename}", sha256(data), "hub")
+        mirror.record_checkpoint("arc", "org/arc", list(CONTENT))
+        return mirror
+
+class TestManifest(ManifestTestCase):
+    """Tests für Speichern, Laden und Gültigkeit der Einträge"""
+
+    def test_save_and_load(self):
+        self.write(self.root, "arc/config.json", CONTENT["config.json"])
+        manifest = Manifest(self.root)
+        manifest.record_file("arc/config.json", sha256(CONTENT["config.json"]), "hub")
+        manifest.record_checkpoint("arc", "org/arc", ["config.json"])
+
+        loaded = Manifest(self.root)
+        self.assertEqual(loaded.data, manifest.data)
+        self.assertEqual(loaded.entry("arc/config.json")["sha256"], sha256(CONTENT["config.json"]))
+        self.assertTrue(loaded.checkpoint_complete("arc"))
+        self.assertFalse(loaded.checkpoint_complete("maze"))
+        self.assertFalse(os.path.exists(loaded.path + ".tmp"))
+
+    def test_changed_or_missing_file_is_not_verified(self):
+        path = self.write(self.root, "arc/config.json", CONTENT["config.json"])
+        manifest = Manifest(self.root)
+        manifest.record_file("arc/config.json", sha256(CONTENT["config.json"]), "hub")
+        manifest.record_checkpoint("arc", "org/arc", ["config.json"])
+
+        self.write(self.root, "arc/config.json", b"{}")
+        self.assertIsNone(manifest.entry("arc/config.json"))
+        self.assertFalse(manifest.checkpoint_complete("arc"))
+        os.remove(path)
+        self.assertIsNone(manifest.entry("arc/config.json"))
+
+class TestFetchFile(ManifestTestCase):
+    """Tests für Download, Prüfung und Mirror"""
+
+    def test_download_is_verified_and_recorded(self):
+        manifest = Manifest(self.root)
+        expected = sha256(CONTENT["config.json"])
+        self.assertEqual(fetch_file(manifest, "arc", "org/arc", "config.json", expected, None), "hub")
+        self.assertEqual(self.calls, [("org/arc", "config.json")])
+        self.assertEqual(Manifest(self.root).entry("arc/config.json")["sha256"], expected)
+        # Ein zweiter Aufruf findet die geprüfte Datei vor
+        self.assertEqual(fetch_file(manifest, "arc", "org/arc", "config.json", expected, None), "cached")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_sha256_mismatch_removes_the_file(self):
+        manifest = Manifest(self.root)
+        with self.assertRaises(ValueError):
+            fetch_file(manifest, "arc", "org/arc", "config.json", "0" * 64, None)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "arc", "config.json")))
+        self.assertIsNone(Manifest(self.root).data["files"].get("arc/config.json"))
+
+    def test_mirror_is_hardlinked(self):
+        mirror = self.make_mirror()
+        manifest = Manifest(self.root)
+        self.assertEqual(fetch_file(manifest, "arc", "org/arc", "model.safetensors",
+                                    sha256(CONTENT["model.safetensors"]), mirror), "mirror")
+        self.assertTrue(os.path.samefile(os.path.join(self.root, "arc", "model.safetensors"),
+                                         os.path.join(self.mirror_root, "arc", "model.safetensors")))
+        self.assertEqual(manifest.entry("arc/model.safetensors")["source"], "mirror")
+        self.assertEqual(self.calls, [])
+
+    def test_mirror_is_copied_without_hardlinks(self):
+        """Auf einem anderen Dateisystem wird kopiert und dabei gehasht"""
+        mirror = self.make_mirror()
+        manifest = Manifest(self.root)
+        with mock.patch("download_hrm_models.os.link", side_effect=OSError("Invalid cross-device link")):
+            fetch_file(manifest, "arc", "org/arc", "model.safetensors", sha256(CONTENT["model.safetensors"]), mirror)
+        dest = os.path.join(self.root, "arc", "model.safetensors")
+        self.assertFalse(os.path.samefile(dest, os.path.join(self.mirror_root, "arc", "model.safetensors")))
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), CONTENT["model.safetensors"])
+        self.assertFalse(os.path.exists(dest + ".part"))
+
+    def test_corrupt_mirror_copy_is_rejected(self):
+        mirror = self.make_mirror()
+        self.write(self.mirror_root, "arc/config.json", b'{"hidden_size": 999}')
+        os.utime(os.path.join(self.mirror_root, "arc", "config.json"),
+                 ns=(0, mirror.data["files"]["arc/config.json"]["mtime_ns"]))
+        with mock.patch("download_hrm_models.os.link", side_effect=OSError), self.assertRaises(ValueError):
+            fetch_file(Manifest(self.root), "arc", "org/arc", "config.json", sha256(CONTENT["config.json"]), mirror)
+
+class TestDownloadCheckpoints(ManifestTestCase):
+    """Tests für den gesamten Lauf"""
+
+    def run_download(self, **kwargs) -> dict:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return download_hrm_checkpoints(self.root, checkpoints={"arc": "org/arc"}, max_workers=2, **kwargs)
+
+    def test_install_from_mirror_then_skip(self):
+        self.make_mirror()
+        self.assertEqual(self.run_download(mirror_root=self.mirror_root), {"arc": os.path.join(self.root, "arc")})
+        self.assertTrue(Manifest(self.root).checkpoint_complete("arc"))
+        with mock.patch("download_hrm_models.fetch_file") as fetch:
+            self.run_download(mirror_root=self.mirror_root)
+        fetch.assert_not_called()
+        self.assertEqual(self.calls, [])
+
+    def test_failed_file_fails_the_checkpoint(self):
+        remote = {filename: sha256(data) for filename, data in CONTENT.items()}
+        remote["config.json"] = "0" * 64
+        with mock.patch("download_hrm_models.list_remote_files", return_value=remote):
+            self.assertEqual(self.run_download(), {})
+        self.assertFalse(Manifest(self.root).checkpoint_complete("arc"))
+
+if __name__ == "__main__":
+    unittest.main()
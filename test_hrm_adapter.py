@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit-Tests für hrm_adapter.py: Ergebnisformat, kompakte Schritte und Streaming
+"""
+
+import itertools
+import json
+import unittest
+from collections.abc import Mapping, Sequence
+
+from hrm_adapter import HRMModelAdapter, ReasoningStep, ReasoningTrace, json_default
+
+CONFIG = {"max_reasoning_depth": 8, "halt_threshold": 0.95}
+
+class TestProcessReasoningTask(unittest.TestCase):
+    """Tests für das öffentliche Ergebnis von process_reasoning_task"""
+
+    def setUp(self):
+        self.adapter = HRMModelAdapter(CONFIG)
+
+    def test_default_result_is_json_serializable(self):
+        """Das Standard-Ergebnis lässt sich ohne default-Funktion serialisieren"""
+        result = self.adapter.process_reasoning_task("Löse komplexes Sudoku-Rätsel", {})
+        decoded = json.loads(json.dumps(result, ensure_ascii=False))
+        self.assertEqual(decoded["type"], "sudoku")
+        self.assertEqual(len(decoded["steps"]), 8)
+        self.assertEqual(decoded["steps"][0], {
+            "step": 1,
+            "type": "reasoning",
+            "description": "Analysiere sudoku - Schritt 1",
+            "confidence": 0.4,
+            "intermediate_result": "Analysiere Problemstruktur",
+        })
+
+    def test_compact_result_matches_default(self):
+        """compact=True liefert dieselben Schritte als ReasoningTrace"""
+        default = self.adapter.process_reasoning_task("Finde den Weg durchs Labyrinth", {})
+        compact = self.adapter.process_reasoning_task("Finde den Weg durchs Labyrinth", {}, compact=True)
+        self.assertIsInstance(compact["steps"], ReasoningTrace)
+        self.assertEqual(compact["steps"].to_list(), default["steps"])
+        self.assertEqual(compact["final_answer"], default["final_answer"])
+        self.assertEqual(json.loads(json.dumps(compact, default=json_default)), default)
+
+class TestReasoningTypes(unittest.TestCase):
+    """Tests für ReasoningStep und ReasoningTrace"""
+
+    def setUp(self):
+        self.trace = ReasoningTrace("arc", [0.4, 0.5, 0.6])
+
+    def test_step_is_mapping(self):
+        """Ein Schritt verhält sich wie das Dict der bisherigen Ausgabe"""
+        step = self.trace[0]
+        self.assertIsInstance(step, Mapping)
+        self.assertIn("confidence", step)
+        self.assertNotIn("missing", step)
+        self.assertEqual(step.get("missing", "-"), "-")
+        self.assertEqual(dict(step), step.to_dict())
+        self.assertEqual(step, step.to_dict())
+        self.assertEqual(list(step.keys()), list(ReasoningStep.FIELDS))
+        with self.assertRaises(KeyError):
+            step["missing"]
+
+    def test_trace_indexing_and_slicing(self):
+        """Indizes, negative Indizes und Slices wie bei einer Liste"""
+        self.assertIsInstance(self.trace, Sequence)
+        self.assertEqual(len(self.trace), 3)
+        self.assertEqual(self.trace[-1]["step"], 3)
+        self.assertEqual(self.trace[-1]["confidence"], 0.6)
+        self.assertEqual([step.step for step in self.trace[1:]], [2, 3])
+        self.assertEqual([step.step for step in self.trace[::-2]], [3, 1])
+        self.assertEqual(self.trace[5:], [])
+        with self.assertRaises(IndexError):
+            self.trace[3]
+        with self.assertRaises(IndexError):
+            self.trace[-4]
+        self.assertEqual([step.step for step in reversed(self.trace)], [3, 2, 1])
+
+    def test_json_default(self):
+        """json_default wandelt Trace und Schritte, andere Objekte nicht"""
+        self.assertEqual(json_default(self.trace), self.trace.to_list())
+        self.assertEqual(json_default(self.trace[1]), self.trace[1].to_dict())
+        with self.assertRaises(TypeError):
+            json_default(object())
+        with self.assertRaises(TypeError):
+            json.dumps({"steps": self.trace})
+
+class TestIterReasoningSteps(unittest.TestCase):
+    """Tests für das Streaming der Schritte"""
+
+    def test_stops_at_halt_threshold(self):
+        """Die Schritte enden beim ersten Schritt über der Abbruchschwelle"""
+        adapter = HRMModelAdapter({"max_reasoning_depth": 8, "halt_threshold": 0.55})
+        steps = list(adapter.iter_reasoning_steps("Abstrakte ARC-Aufgabe"))
+        self.assertEqual([step.step for step in steps], [1, 2, 3])
+        self.assertGreaterEqual(steps[-1].confidence, 0.55)
+        self.assertEqual(steps[-1].task_type, "arc")
+
+    def test_stops_at_max_depth(self):
+        """Ohne erreichte Schwelle enden die Schritte bei max_reasoning_depth"""
+        adapter = HRMModelAdapter({"max_reasoning_depth": 4, "halt_threshold": 0.95})
+        self.assertEqual(len(list(adapter.iter_reasoning_steps("Allgemeine Frage"))), 4)
+
+    def test_caller_can_stop_early(self):
+        """Der Aufrufer kann nach wenigen Schritten abbrechen"""
+        adapter = HRMModelAdapter(CONFIG)
+        steps = adapter.iter_reasoning_steps("Löse das Sudoku")
+        self.assertEqual([step.step for step in itertools.islice(steps, 2)], [1, 2])
+        steps.close()
+        self.assertEqual(list(steps), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit-Tests für hrm_augmentation.py: Diedertransformationen, Gültigkeit und Reproduzierbarkeit
+"""
+
+import unittest
+
+import numpy as np
+
+from hrm_augmentation import (
+    ARC, ARC_COLOR_OFFSET, ARC_EOS, ARC_PAD, MAZE, SUDOKU, SUDOKU_DIGIT_OFFSET,
+    AugmentationPipeline, augment_arc, dihedral, item_keys,
+)
+
+# Die Nummerierung der HRM-Datensätze als NumPy-Referenz
+REFERENCE = (
+    lambda grid: grid,
+    lambda grid: np.rot90(grid, 1),
+    lambda grid: np.rot90(grid, 2),
+    lambda grid: np.rot90(grid, 3),
+    np.fliplr,
+    np.flipud,
+    lambda grid: grid.T,
+    lambda grid: np.fliplr(np.rot90(grid, 1)),
+)
+
+SUDOKU_SOLUTION = np.array([[int(digit) for digit in row] for row in (
+    "534678912", "672195348", "198342567", "859761423", "426853791",
+    "713924856", "961537284", "287419635", "345286179",
+)])
+
+def arc_grid(content: np.ndarray, size: int) -> np.ndarray:
+    """Legt Farben 0-9 oben links in ein size×size-Gitter im HRM-Token-Format mit Ende-Markierungen."""
+    grid = np.full((size, size), ARC_PAD, dtype=np.uint8)
+    h, w = content.shape
+    grid[:h, :w] = content + ARC_COLOR_OFFSET
+    if h < size:
+        grid[h, :w] = ARC_EOS
+    if w < size:
+        grid[:h, w] = ARC_EOS
+    return grid
+
+def valid_sudoku(grid: np.ndarray) -> bool:
+    units = list(grid) + list(grid.T) + [grid[r:r + 3, c:c + 3].ravel() for r in (0, 3, 6) for c in (0, 3, 6)]
+    return all(sorted(unit) == list(range(1, 10)) for unit in units)
+
+class TestDihedral(unittest.TestCase):
+    """Tests für dihedral gegen np.rot90/np.flip"""
+
+    def test_full_grids_match_numpy(self):
+        grids = np.arange(5 * 25).reshape(5, 5, 5)
+        for transform, reference in enumerate(REFERENCE):
+            result, shapes = dihedral(grids, np.full(5, transform))
+            for grid, transformed in zip(grids, result):
+                np.testing.assert_array_equal(transformed, reference(grid))
+            np.testing.assert_array_equal(shapes, np.full((5, 2), 5))
+
+    def test_smaller_content_matches_numpy(self):
+        """Inhalt kleiner als das Gitter wird transformiert und wieder oben links abgelegt"""
+        size, content = 6, np.arange(1, 7).reshape(2, 3)
+        grids = np.zeros((8, size, size), dtype=np.int64)
+        grids[:, :2, :3] = content
+        result, shapes = dihedral(grids, np.arange(8), np.tile([2, 3], (8, 1)), pad_value=-1)
+        for transform, reference in enumerate(REFERENCE):
+            expected = reference(content)
+            h, w = expected.shape
+            np.testing.assert_array_equal(shapes[transform], [h, w])
+            np.testing.assert_array_equal(result[transform, :h, :w], expected)
+            outside = np.ones((size, size), dtype=bool)
+            outside[:h, :w] = False
+            self.assertTrue((result[transform][outside] == -1).all())
+
+class TestAugmenters(unittest.TestCase):
+    """Tests für die Augmentierung je Datenart"""
+
+    def test_sudoku_validity_is_preserved(self):
+        label = (SUDOKU_SOLUTION + SUDOKU_DIGIT_OFFSET).reshape(1, -1)
+        given = np.random.default_rng(0).random(81) < 0.3
+        puzzle = np.where(given, label, SUDOKU_DIGIT_OFFSET).astype(np.uint8)
+        pipeline = AugmentationPipeline(SUDOKU, puzzle, label.astype(np.uint8), num_augmentations=64)
+        inputs, labels = pipeline.augment(np.zeros(64, dtype=np.int64), np.arange(64))
+        self.assertGreater(len({labels[i].tobytes() for i in range(64)}), 60)
+        for augmented_input, augmented_label in zip(inputs, labels):
+            digits = augmented_label.reshape(9, 9).astype(int) - SUDOKU_DIGIT_OFFSET
+            self.assertTrue(valid_sudoku(digits))
+            filled = augmented_input != SUDOKU_DIGIT_OFFSET
+            self.assertEqual(filled.sum(), given.sum())
+            np.testing.assert_array_equal(augmented_input[filled], augmented_label[filled])
+
+    def test_arc_eos_border_is_restored(self):
+        size, content = 8, np.array([[0, 1, 2], [3, 0, 4]])
+        grid = arc_grid(content, size)[None]
+        keys = item_keys(0, np.zeros(16, dtype=np.int64), np.arange(16), 10)
+        for augmented, key in zip(augment_arc(np.repeat(grid, 16, axis=0), keys), keys):
+            h, w = (3, 2) if int(key[0] % 8) in (1, 3, 6, 7) else (2, 3)
+            colors = augmented[:h, :w].astype(int) - ARC_COLOR_OFFSET
+            # Schwarz bleibt an seinen (transformierten) Stellen, die übrigen Farben sind permutiert
+            expected_black = REFERENCE[int(key[0] % 8)](content) == 0
+            np.testing.assert_array_equal(colors == 0, expected_black)
+            self.assertEqual(len(set(colors[~expected_black])), 4)
+            # Ende-Markierungen direkt unter und rechts neben dem neuen Inhalt, sonst Padding
+            np.testing.assert_array_equal(augmented, arc_grid(colors, size))
+
+    def test_maze_matches_reference(self):
+        maze = np.random.default_rng(1).integers(1, 6, (4, 5 * 5), dtype=np.uint8)
+        pipeline = AugmentationPipeline(MAZE, maze, maze, num_augmentations=8)
+        inputs, _ = pipeline.augment(np.arange(4), np.full(4, 3))
+        keys = item_keys(0, np.arange(4), np.full(4, 3), 1)
+        for original, augmented, key in zip(maze, inputs, keys):
+            np.testing.assert_array_equal(augmented.reshape(5, 5), REFERENCE[int(key[0] % 8)](original.reshape(5, 5)))
+
+class TestAugmentationPipeline(unittest.TestCase):
+    """Tests für Index 0, Reproduzierbarkeit und Batches"""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.inputs = np.stack([arc_grid(rng.integers(0, 10, (3, 4)), 6).ravel() for _ in range(5)])
+        self.labels = np.stack([arc_grid(rng.integers(0, 10, (4, 3)), 6).ravel() for _ in range(5)])
+        self.pipeline = AugmentationPipeline(ARC, self.inputs, self.labels, num_augmentations=10, seed=7)
+
+    def test_augmentation_zero_is_the_original(self):
+        inputs, labels = self.pipeline.augment(np.arange(5), np.zeros(5, dtype=np.int64))
+        np.testing.assert_array_equal(inputs, self.inputs)
+        np.testing.assert_array_equal(labels, self.labels)
+
+    def test_items_do_not_depend_on_batch(self):
+        """Ein Eintrag ist derselbe, egal mit welchen anderen und in welcher Reihenfolge er erzeugt wird"""
+        example_ids, aug_ids = np.array([0, 3, 4, 1]), np.array([5, 9, 1, 2])
+        together = self.pipeline.augment(example_ids, aug_ids)
+        reversed_order = self.pipeline.augment(example_ids[::-1], aug_ids[::-1])
+        for i in range(4):
+            alone = self.pipeline.augment(example_ids[i:i + 1], aug_ids[i:i + 1])
+            np.testing.assert_array_equal(together[0][i], alone[0][0])
+            np.testing.assert_array_equal(together[1][i], alone[1][0])
+            np.testing.assert_array_equal(together[0][i], reversed_order[0][3 - i])
+
+    def test_iter_batches_is_reproducible(self):
+        def collect(batch_size, **kwargs):
+            batches = list(self.pipeline.iter_batches(batch_size, **kwargs))
+            return [np.concatenate([batch[part] for batch in batches]) for part in range(4)]
+
+        plain = collect(7)
+        for part, other in zip(plain, collect(16)):
+            np.testing.assert_array_equal(part, other)
+        self.assertEqual(len(plain[0]), len(self.pipeline))
+
+        shuffled = collect(8, shuffle=True, epoch=1)
+        for part, other in zip(shuffled, collect(13, shuffle=True, epoch=1)):
+            np.testing.assert_array_equal(part, other)
+        self.assertFalse(np.array_equal(shuffled[0], collect(8, shuffle=True, epoch=2)[0]))
+        # Derselbe Eintrag hat in jeder Reihenfolge denselben Inhalt
+        position = {(e, a): i for i, (e, a) in enumerate(zip(plain[2], plain[3]))}
+        for i, (e, a) in enumerate(zip(shuffled[2], shuffled[3])):
+            np.testing.assert_array_equal(shuffled[0][i], plain[0][position[(e, a)]])
+
+    def test_rejects_bad_input(self):
+        with self.assertRaises(ValueError):
+            AugmentationPipeline("chess", self.inputs, self.labels)
+        with self.assertRaises(ValueError):
+            AugmentationPipeline(ARC, self.inputs[:, :-1], self.labels[:, :-1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit-Tests für hrm_benchmark.py: Perzentile, Zusammenfassung, Baseline-Vergleich und Regressionsprüfung
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import hrm_benchmark
+from hrm_benchmark import compare, percentile, summarize
+
+def stats(p50_ms: float, p95_ms: float) -> dict:
+    return {"p50_ms": p50_ms, "p95_ms": p95_ms, "p99_ms": p95_ms, "throughput_per_s": 1.0}
+
+class TestPercentile(unittest.TestCase):
+    """Tests für das Perzentil nach der Nearest-Rank-Methode"""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 50), 5)
+        self.assertEqual(percentile(values, 95), 10)
+        self.assertEqual(percentile(values, 99), 10)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_single_value(self):
+        self.assertEqual(percentile([7], 50), 7)
+        self.assertEqual(percentile([7], 99), 7)
+
+class TestSummarize(unittest.TestCase):
+    """Tests für die Zusammenfassung der Laufzeiten"""
+
+    def test_milliseconds_and_throughput(self):
+        # 1 ms bis 4 ms in Nanosekunden, unsortiert
+        summary = summarize([3_000_000, 1_000_000, 4_000_000, 2_000_000])
+        self.assertEqual(summary["trials"], 4)
+        self.assertEqual((summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]), (2.0, 4.0, 4.0))
+        self.assertEqual((summary["min_ms"], summary["max_ms"]), (1.0, 4.0))
+        self.assertAlmostEqual(summary["mean_ms"], 2.5)
+        self.assertAlmostEqual(summary["throughput_per_s"], 400.0)
+
+    def test_zero_duration(self):
+        self.assertEqual(summarize([0, 0])["throughput_per_s"], 0.0)
+
+class TestCompare(unittest.TestCase):
+    """Tests für den Vergleich mit der Baseline"""
+
+    def test_regression_needs_percent_and_absolute_delta(self):
+        baseline = {"langsamer": stats(10.0, 20.0), "winzig": stats(0.01, 0.02), "gleich": stats(5.0, 6.0)}
+        results = {"langsamer": stats(10.5, 30.0), "winzig": stats(0.03, 0.06), "gleich": stats(5.0, 6.0)}
+        comparison = compare(results, baseline, threshold_pct=15.0, min_delta_ms=0.05)
+        self.assertTrue(comparison["langsamer"]["regression"])
+        self.assertEqual(comparison["langsamer"]["p95_ms"], {"baseline": 20.0, "current": 30.0, "change_pct": 50.0})
+        self.assertEqual(comparison["langsamer"]["p50_ms"]["change_pct"], 5.0)
+        # +200 %, aber nur 0,04 ms: unterhalb von min_delta_ms
+        self.assertFalse(comparison["winzig"]["regression"])
+        self.assertFalse(comparison["gleich"]["regression"])
+
+    def test_new_benchmarks_and_zero_baseline(self):
+        comparison = compare({"neu": stats(1.0, 2.0), "null": stats(1.0, 2.0)}, {"null": stats(0.0, 0.0)}, 15.0, 0.05)
+        self.assertNotIn("neu", comparison)
+        self.assertEqual(comparison["null"]["p50_ms"]["change_pct"], 0.0)
+        self.assertFalse(comparison["null"]["regression"])
+
+class TestBaselineCheck(unittest.TestCase):
+    """Tests für den Exit-Code von main() mit und ohne Regression"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.temp_dir.name, "results.json")
+        self.baseline = os.path.join(self.temp_dir.name, "baseline.json")
+        with open(self.baseline, "w", encoding="utf-8") as f:
+            json.dump({"results": {"suite/fall": stats(1.0, 2.0)}}, f)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_main(self, results: dict, *args) -> int:
+        argv = ["hrm_benchmark.py", "--suite", "adapter", "--output", self.output, "--baseline", self.baseline, *args]
+        with mock.patch.object(sys, "argv", argv), \
+                mock.patch("hrm_benchmark.run_benchmarks", return_value=results), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return hrm_benchmark.main()
+
+    def test_regression_fails(self):
+        self.assertEqual(self.run_main({"suite/fall": stats(2.0, 2.0)}), 1)
+        with open(self.output, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertTrue(report["comparison"]["suite/fall"]["regression"])
+
+    def test_no_regression_passes(self):
+        self.assertEqual(self.run_main({"suite/fall": stats(1.05, 2.0)}), 0)
+
+    def test_save_baseline_skips_the_check(self):
+        self.assertEqual(self.run_main({"suite/fall": stats(5.0, 5.0)}, "--save-baseline"), 0)
+        with open(self.baseline, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["results"], {"suite/fall": stats(5.0, 5.0)})
+
+class TestBenchProxy(unittest.TestCase):
+    """Die Proxy-Suite hinterlässt keine Änderungen an Umgebung und sys.path"""
+
+    def test_environment_and_path_are_restored(self):
+        environ, path = dict(os.environ), list(sys.path)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = hrm_benchmark.bench_proxy(warmup=1, trials=2)
+        except ImportError as e:
+            self.skipTest(f"Abhängigkeit fehlt: {e}")
+        self.assertEqual(results["proxy/chat_completions"]["trials"], 2)
+        self.assertEqual(dict(os.environ), environ)
+        self.assertEqual(sys.path, path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Unit-Tests für hrm_result_cache.py: Kanonisierung, inverse Transformationen und Cache-Stufen
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from hrm_result_cache import (
+    ARC, MAZE, SUDOKU, DEMO_SUDOKU, CachedHRMAdapter, DihedralTransform, SudokuTransform,
+    canonicalize, dihedral, wrap_adapter,
+)
+
+DEMO_SOLUTION = [[int(digit) for digit in row] for row in (
+    "534678912", "672195348", "198342567", "859761423", "426853791",
+    "713924856", "961537284", "287419635", "345286179",
+)]
+
+def random_sudoku_symmetry(rng: random.Random):
+    """Ein zufälliges Element der Sudoku-Symmetriegruppe als Funktion auf Gittern."""
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    relabel = {0: 0, **{d: digits[d - 1] for d in range(1, 10)}}
+
+    def line_order():
+        blocks = rng.sample(range(3), 3)
+        return [3 * block + line for block in blocks for line in rng.sample(range(3), 3)]
+    rows, cols, transposed = line_order(), line_order(), rng.random() < 0.5
+
+    def apply(grid):
+        if transposed:
+            grid = [list(column) for column in zip(*grid)]
+        return [[relabel[grid[r][c]] for c in cols] for r in rows]
+    return apply
+
+class FakeAdapter:
+    """Liefert für jedes Rätsel eine feste Lösung und zählt die Aufrufe."""
+
+    def __init__(self, solve):
+        self.config = {"max_reasoning_depth": 8}
+        self.solve = solve
+        self.calls = 0
+
+    def process_reasoning_task(self, task, context):
+        self.calls += 1
+        return {"task": task, "steps": [], "solution": self.solve(context["puzzle"]), "model": "fake"}
+
+class TestTransforms(unittest.TestCase):
+    """Tests für dihedral und die inversen Transformationen"""
+
+    def setUp(self):
+        self.grid = [[1, 2, 3], [4, 5, 6]]  # Nicht quadratisch: Höhe und Breite tauschen
+
+    def test_dihedral_group(self):
+        """Die 8 Transformationen sind verschieden, 1 ist eine Vierteldrehung"""
+        images = [dihedral(self.grid, transform) for transform in range(8)]
+        self.assertEqual(len({str(image) for image in images}), 8)
+        self.assertEqual(images[0], self.grid)
+        rotated = self.grid
+        for _ in range(4):
+            rotated = dihedral(rotated, 1)
+        self.assertEqual(rotated, self.grid)
+
+    def test_dihedral_inverse(self):
+        """inverse(forward(g)) == g für alle Transformationen, auch mit Farben"""
+        colors = {0: 0, 1: 3, 2: 1, 3: 2, 4: 4, 5: 5, 6: 6}
+        for transform in range(8):
+            for mapping in (None, colors):
+                t = DihedralTransform(transform, mapping)
+                self.assertEqual(t.inverse(t.forward(self.grid)), self.grid)
+
+    def test_sudoku_inverse(self):
+        """Die Sudoku-Transformation lässt sich umkehren, mit und ohne Transposition"""
+        rng = random.Random(1)
+        for transposed in (False, True):
+            digits = list(range(1, 10))
+            rng.shuffle(digits)
+            t = SudokuTransform(transposed, (2, 0, 1, 5, 4, 3, 6, 8, 7), (3, 4, 5, 0, 2, 1, 8, 7, 6),
+                                {0: 0, **{d: digits[d - 1] for d in range(1, 10)}})
+            self.assertEqual(t.inverse(t.forward(DEMO_SOLUTION)), DEMO_SOLUTION)
+
+class TestCanonicalize(unittest.TestCase):
+    """Tests für die Invarianz der kanonischen Form"""
+
+    def test_maze_invariant_under_dihedral(self):
+        maze = [[1, 0, 0, 1], [0, 0, 1, 1], [1, 0, 2, 0]]
+        form, _ = canonicalize({"type": MAZE, "grid": maze})
+        for transform in range(8):
+            self.assertEqual(canonicalize({"type": MAZE, "grid": dihedral(maze, transform)})[0], form)
+
+    def test_arc_invariant_under_dihedral_and_colors(self):
+        grids = [[[0, 3, 3], [5, 0, 0]], [[3, 3], [0, 5]]]
+        form, _ = canonicalize({"type": ARC, "grids": grids})
+        relabel = {0: 0, 3: 7, 5: 2}
+        for transform in range(8):
+            variant = [[[relabel[v] for v in row] for row in dihedral(grid, transform)] for grid in grids]
+            self.assertEqual(canonicalize({"type": ARC, "grids": variant})[0], form)
+        # Schwarz ist keine beliebige Farbe
+        swapped = [[[{0: 3, 3: 0, 5: 5}[v] for v in row] for row in grid] for grid in grids]
+        self.assertNotEqual(canonicalize({"type": ARC, "grids": swapped})[0], form)
+
+    def test_sudoku_invariant_under_symmetry_group(self):
+        form, transform = canonicalize({"type": SUDOKU, "grid": DEMO_SUDOKU})
+        self.assertEqual(transform.inverse(transform.forward(DEMO_SUDOKU)), DEMO_SUDOKU)
+        rng = random.Random(0)
+        for _ in range(5):
+            variant = random_sudoku_symmetry(rng)(DEMO_SUDOKU)
+            self.assertEqual(canonicalize({"type": SUDOKU, "grid": variant})[0], form)
+
+    def test_unsupported_puzzles(self):
+        """Sudokus unter 17 Vorgaben, ungültige Sudokus und fremde Formate werden nicht kanonisiert"""
+        sparse = [[DEMO_SUDOKU[r][c] if r < 3 else 0 for c in range(9)] for r in range(9)]
+        self.assertLess(sum(1 for row in sparse for v in row if v), 17)
+        self.assertIsNone(canonicalize({"type": SUDOKU, "grid": sparse}))
+        duplicate = [row[:] for row in DEMO_SUDOKU]
+        duplicate[0][2] = 5
+        self.assertIsNone(canonicalize({"type": SUDOKU, "grid": duplicate}))
+        self.assertIsNone(canonicalize({"type": ARC, "grids": [[[0, 10]]]}))
+        self.assertIsNone(canonicalize({"type": "chess", "grid": [[1]]}))
+        self.assertIsNone(canonicalize({"type": MAZE, "grid": [[1, 2], [3]]}))
+
+class TestCachedHRMAdapter(unittest.TestCase):
+    """Tests für den Cache vor dem Adapter"""
+
+    def test_sudoku_variant_hits_and_solution_is_mapped_back(self):
+        symmetry = random_sudoku_symmetry(random.Random(3))
+        solutions = {str(DEMO_SUDOKU): DEMO_SOLUTION, str(symmetry(DEMO_SUDOKU)): symmetry(DEMO_SOLUTION)}
+        adapter = FakeAdapter(lambda puzzle: solutions[str(puzzle["grid"])])
+        cache = CachedHRMAdapter(adapter)
+
+        first = cache.process_reasoning_task("Sudoku", {"puzzle": {"type": SUDOKU, "grid": DEMO_SUDOKU}})
+        second = cache.process_reasoning_task("Variante", {"puzzle": {"type": SUDOKU, "grid": symmetry(DEMO_SUDOKU)}})
+        self.assertEqual((first["cached"], second["cached"]), (False, True))
+        self.assertEqual(adapter.calls, 1)
+        self.assertEqual(second["solution"], symmetry(DEMO_SOLUTION))
+        self.assertEqual(second["task"], "Variante")
+
+    def test_arc_solution_with_unseen_color_is_not_cached(self):
+        """Eine Ausgabe mit einer Farbe, die in keiner Eingabe vorkommt, lässt sich nicht zurückbilden"""
+        adapter = FakeAdapter(lambda puzzle: [[8, 8]])
+        cache = CachedHRMAdapter(adapter)
+        context = {"puzzle": {"type": ARC, "grids": [[[0, 1]], [[1, 0]]]}}
+        for _ in range(2):
+            self.assertFalse(cache.process_reasoning_task("ARC", context)["cached"])
+        self.assertEqual(adapter.calls, 2)
+        self.assertEqual(cache.get_metrics()["entries"], 0)
+
+    def test_unstructured_tasks_bypass_the_cache(self):
+        adapter = FakeAdapter(lambda puzzle: None)
+        cache = CachedHRMAdapter(adapter)
+        sparse = [[DEMO_SUDOKU[r][c] if r < 3 else 0 for c in range(9)] for r in range(9)]
+        for _ in range(2):
+            cache.process_reasoning_task("Sudoku", {"puzzle": {"type": SUDOKU, "grid": sparse}})
+        self.assertEqual(adapter.calls, 2)
+        self.assertEqual(cache.get_metrics()["uncached"], 2)
+
+    def test_lru_eviction(self):
+        adapter = FakeAdapter(lambda puzzle: puzzle["grid"])
+        cache = CachedHRMAdapter(adapter, max_entries=1)
+        for grid in ([[1, 0]], [[1, 1]], [[1, 0]]):
+            cache.process_reasoning_task("Labyrinth", {"puzzle": {"type": MAZE, "grid": grid}})
+        self.assertEqual(adapter.calls, 3)
+        self.assertEqual(cache.get_metrics()["evictions"], 2)
+
+    def test_sqlite_tier_survives_restart(self):
+        maze = [[1, 0, 0], [1, 1, 0]]
+        adapter = FakeAdapter(lambda puzzle: [[2 if v == 0 else v for v in row] for row in puzzle["grid"]])
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "results.sqlite")
+            CachedHRMAdapter(adapter, db_path=db_path).process_reasoning_task(
+                "Labyrinth", {"puzzle": {"type": MAZE, "grid": maze}})
+
+            restarted = CachedHRMAdapter(adapter, db_path=db_path)
+            rotated = dihedral(maze, 1)
+            result = restarted.process_reasoning_task("Labyrinth", {"puzzle": {"type": MAZE, "grid": rotated}})
+            self.assertTrue(result["cached"])
+            self.assertEqual(result["solution"], [[2 if v == 0 else v for v in row] for row in rotated])
+            self.assertEqual(restarted.get_metrics()["store_hits"], 1)
+            self.assertEqual(adapter.calls, 1)
+
+            # Anderer Kontext (außer dem Rätsel) ergibt einen anderen Schlüssel
+            restarted.process_reasoning_task("Labyrinth", {"puzzle": {"type": MAZE, "grid": maze}, "mode": "x"})
+            self.assertEqual(adapter.calls, 2)
+
+    def test_wrap_adapter_is_opt_in(self):
+        adapter = FakeAdapter(lambda puzzle: None)
+        self.assertIs(wrap_adapter(adapter, {}), adapter)
+        self.assertIs(wrap_adapter(adapter, {"result_cache": {"enabled": False}}), adapter)
+        cache = wrap_adapter(adapter, {"result_cache": {"enabled": True, "max_entries": 8}})
+        self.assertIsInstance(cache, CachedHRMAdapter)
+        self.assertEqual(cache.max_entries, 8)
+
+if __name__ == "__main__":
+    unittest.main()